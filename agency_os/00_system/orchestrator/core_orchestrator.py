@@ -20,13 +20,14 @@ Version: 1.1 (Phase 3 - GAD-002 + GAD-003)
 """
 
 import json
-import yaml
 import logging
+import os
 import sys
 import re
+import time
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Iterable, Optional, List, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
@@ -35,6 +36,21 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "runtime"))
 
 from llm_client import LLMClient, BudgetExceededError
+from cost_ledger import cost_scope, get_cost_ledger
+from agent_index import get_agent_index
+from forecast import DEFAULT_SIMULATIONS, PlannedCall, RunForecast, RunForecaster
+from model_router import get_model_router
+from token_budget import resolve_token_budget
+from json_stream import IncrementalJSONParser, JSONEvent, JSONStreamError
+from composition_cache import get_composition_cache
+from prompt_bundle import ensure_bundle_loaded
+from prompt_blocks import PromptBlock
+from file_watcher import get_file_watcher
+
+try:
+    from .intelligence_request import write_intelligence_request
+except ImportError:
+    from intelligence_request import write_intelligence_request
 
 # Initialize logger BEFORE using it
 logger = logging.getLogger(__name__)
@@ -59,6 +75,18 @@ except ImportError:
     TOOLS_AVAILABLE = False
     logger.warning("ToolExecutor not available - tool execution disabled")
 
+# Agent output arrays reported element by element while the model is still
+# generating (autonomous mode, see json_stream.py) - CODE_GENERATOR's code files
+STREAMED_OUTPUT_PATHS = [("files",), ("generated_modules",)]
+
+# Model and output cap of autonomous agent calls without model routing
+# (VIBE_MODEL_ROUTING=0 - see model_router.py); also forecast()'s default
+AUTONOMOUS_MODEL = "claude-3-5-sonnet-20241022"
+AUTONOMOUS_MAX_TOKENS = 4096
+
+# Model tier of non-blocking AUDITOR checks (blocking ones use the AUDITOR's own tier)
+NON_BLOCKING_AUDIT_TIER = "fast"
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -156,8 +184,7 @@ class SchemaValidator:
             self.contracts = None
             return
 
-        with open(contracts_yaml_path, 'r') as f:
-            self.contracts = yaml.safe_load(f)
+        self.contracts = get_composition_cache().read_yaml(contracts_yaml_path.resolve())
 
         logger.info(f"Schema validator initialized with {len(self.contracts.get('schemas', []))} schemas")
 
@@ -248,6 +275,13 @@ class CoreOrchestrator:
         self.contracts_yaml_path = self.repo_root / contracts_yaml
         self.execution_mode = execution_mode
 
+        # Seed the composition cache from the compiled prompt bundle (if any)
+        ensure_bundle_loaded(self.repo_root.resolve(), get_composition_cache())
+
+        # Hot reload: invalidate cached prompt inputs when files change (long-running sessions)
+        if os.environ.get("VIBE_HOT_RELOAD", "0") in ("1", "true", "yes"):
+            get_file_watcher().start()
+
         # Load workflow design
         self.workflow = self._load_workflow()
 
@@ -285,8 +319,7 @@ class CoreOrchestrator:
         if not self.workflow_yaml_path.exists():
             raise FileNotFoundError(f"Workflow YAML not found: {self.workflow_yaml_path}")
 
-        with open(self.workflow_yaml_path, 'r') as f:
-            return yaml.safe_load(f)
+        return get_composition_cache().read_yaml(self.workflow_yaml_path.resolve())
 
     def get_phase_handler(self, phase: ProjectPhase):
         """
@@ -552,7 +585,9 @@ class CoreOrchestrator:
         agent_name: str,
         task_id: str,
         inputs: Dict[str, Any],
-        manifest: ProjectManifest
+        manifest: ProjectManifest,
+        on_output: Optional[Callable[[JSONEvent], None]] = None,
+        model_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute agent by composing prompt and delegating to appropriate executor.
@@ -565,6 +600,11 @@ class CoreOrchestrator:
             task_id: Task ID (e.g., "scope_negotiation")
             inputs: Input context for agent
             manifest: Project manifest (for budget tracking)
+            on_output: Called with each top-level field / streamed array
+                element of the output as soon as it is generated
+                (autonomous mode only)
+            model_tier: Model tier overriding the agent's routing config
+                (autonomous mode only - see model_router.py)
 
         Returns:
             Agent output (parsed JSON)
@@ -573,10 +613,16 @@ class CoreOrchestrator:
             # 1. Compose prompt (ALWAYS - this is the "Arm's" job)
             logger.info(f"🤖 Executing agent: {agent_name}.{task_id}")
 
+            if self.execution_mode not in ("delegated", "autonomous"):
+                raise ValueError(f"Invalid execution mode: {self.execution_mode}")
+
             # Use PromptRegistry if available (provides governance injection)
+            # Delegated: chunks are streamed to the handoff as they are produced
+            # Autonomous: blocks with cache breakpoints for provider prompt caching
+            composer = "compose_stream" if self.execution_mode == "delegated" else "compose_blocks"
             if self.use_registry:
-                # PromptRegistry.compose() with automatic governance
-                prompt = self.prompt_registry.compose(
+                # PromptRegistry with automatic governance
+                prompt, report = getattr(self.prompt_registry, composer)(
                     agent=agent_name,
                     task=task_id,
                     workspace=manifest.name,  # Use manifest name as workspace
@@ -587,17 +633,19 @@ class CoreOrchestrator:
                 )
             else:
                 # Fallback to PromptRuntime (no governance)
-                prompt = self.prompt_runtime.execute_task(agent_name, task_id, inputs)
+                prompt, report = getattr(self.prompt_runtime, composer)(agent_name, task_id, inputs)
+            logger.info(f"📏 Prompt budget: {report.summary()}")
 
             # 2. Route based on execution mode
             if self.execution_mode == "delegated":
                 # NEW: Request intelligence from external operator (Claude Code)
                 return self._request_intelligence(agent_name, task_id, prompt, manifest)
-            elif self.execution_mode == "autonomous":
-                # OLD: Direct LLM invocation (legacy mode for testing)
-                return self._execute_autonomous(agent_name, prompt, manifest)
             else:
-                raise ValueError(f"Invalid execution mode: {self.execution_mode}")
+                # OLD: Direct LLM invocation (legacy mode for testing)
+                with cost_scope(agent=agent_name, task=task_id):
+                    return self._execute_autonomous(
+                        agent_name, prompt, manifest, on_output, task_id=task_id, model_tier=model_tier
+                    )
 
         except BudgetExceededError as e:
             logger.error(f"❌ Budget limit reached: {e}")
@@ -610,7 +658,7 @@ class CoreOrchestrator:
         self,
         agent_name: str,
         task_id: str,
-        prompt: str,
+        prompt: Union[str, Iterable[str]],
         manifest: ProjectManifest
     ) -> Dict[str, Any]:
         """
@@ -630,30 +678,26 @@ class CoreOrchestrator:
         Args:
             agent_name: Agent name
             task_id: Task ID
-            prompt: Composed prompt (ready for LLM)
+            prompt: Composed prompt (ready for LLM) - a string or a stream of chunks
             manifest: Project manifest
 
         Returns:
             Agent result (parsed from response)
         """
-        # Build intelligence request
-        request = {
-            "type": "INTELLIGENCE_REQUEST",
-            "agent": agent_name,
-            "task_id": task_id,
-            "prompt": prompt,
-            "context": {
+        # Write request to STDOUT with markers (for parsing)
+        # The prompt is streamed into the JSON envelope chunk by chunk
+        print("---INTELLIGENCE_REQUEST_START---", file=sys.stderr)
+        write_intelligence_request(
+            sys.stdout,
+            agent=agent_name,
+            task_id=task_id,
+            prompt_chunks=prompt,
+            context={
                 "project_id": manifest.project_id,
                 "phase": manifest.current_phase.value,
                 "sub_state": manifest.current_sub_state.value if manifest.current_sub_state else None
-            },
-            "wait_for_response": True
-        }
-
-        # Write request to STDOUT with markers (for parsing)
-        print("---INTELLIGENCE_REQUEST_START---", file=sys.stderr)
-        print(json.dumps(request, indent=2))
-        sys.stdout.flush()
+            }
+        )
         print("---INTELLIGENCE_REQUEST_END---", file=sys.stderr)
 
         # GAD-003: Initialize tool executor if available
@@ -676,7 +720,7 @@ class CoreOrchestrator:
 
                 # Execute tool
                 try:
-                    result = tool_executor.execute(tool_call['name'], tool_call['parameters'])
+                    result = tool_executor.execute_tool(tool_call['name'], tool_call['parameters'])
                     logger.info(f"✅ Tool executed successfully: {tool_call['name']}")
                 except Exception as e:
                     logger.error(f"❌ Tool execution failed: {e}")
@@ -779,50 +823,105 @@ class CoreOrchestrator:
     def _execute_autonomous(
         self,
         agent_name: str,
-        prompt: str,
-        manifest: ProjectManifest
+        prompt: Union[str, List[PromptBlock]],
+        manifest: ProjectManifest,
+        on_output: Optional[Callable[[JSONEvent], None]] = None,
+        task_id: Optional[str] = None,
+        model_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute agent autonomously (legacy mode) via direct LLM invocation.
 
         This is the OLD behavior - kept for backward compatibility and testing.
 
+        The completion is streamed: completed output fields and elements of
+        STREAMED_OUTPUT_PATHS arrays are logged and passed to on_output
+        while the model is still generating.
+
+        The model and max_tokens come from the model router (the agent's
+        or task's tier, degrading along its fallback chain while models
+        are throttled or down).
+
         Args:
             agent_name: Agent name
-            prompt: Composed prompt
+            prompt: Composed prompt (string or PromptBlocks from compose_blocks)
             manifest: Project manifest
+            on_output: Called with each JSONEvent of the streamed output
+            task_id: Task the prompt was composed for (routing config)
+            model_tier: Model tier overriding the routing config
 
         Returns:
             Agent output (parsed JSON)
         """
-        # Initialize LLM client with project budget
+        # Initialize LLM client with project budget (billed to the project in the cost ledger)
         if not self.llm_client:
-            budget_limit = manifest.budget.get('max_cost_usd', 10.0)
-            self.llm_client = LLMClient(budget_limit=budget_limit)
-
-        # Invoke LLM
-        response = self.llm_client.invoke(
-            prompt=prompt,
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4096
-        )
+            # Calls reserve their worst-case cost; the alert fires on settled + reserved spend
+            self.llm_client = LLMClient(
+                budget_limit=manifest.budget.get('max_cost_usd', 10.0),
+                project=manifest.project_id,
+                alert_threshold=manifest.budget.get('alert_threshold', 0.80)
+            )
 
-        # Update budget in manifest
-        cost_summary = self.llm_client.get_cost_summary()
-        manifest.budget['current_cost_usd'] = cost_summary['total_cost_usd']
+        # Route to a model tier (or the fixed model without routing)
+        router = get_model_router()
+        if router is not None:
+            route = router.route(agent_name, task_id, tier=model_tier)
+            logger.info(
+                f"🧭 {agent_name}: {route.tier} tier ({route.model}, max_tokens {route.max_tokens}, from {route.source})"
+            )
+            events = router.invoke_stream(self.llm_client, prompt, route)
+        else:
+            events = self.llm_client.invoke_stream(
+                prompt=prompt,
+                model=AUTONOMOUS_MODEL,
+                max_tokens=AUTONOMOUS_MAX_TOKENS,
+                agent=agent_name
+            )
 
-        # Track cost breakdown by phase
+        # Invoke LLM (streamed)
         phase_key = manifest.current_phase.value.lower()
-        if phase_key not in manifest.budget.get('cost_breakdown', {}):
-            manifest.budget.setdefault('cost_breakdown', {})[phase_key] = 0.0
-        manifest.budget['cost_breakdown'][phase_key] = cost_summary['total_cost_usd']
-
-        # Check budget alert threshold
-        if cost_summary.get('budget_used_percent', 0) >= manifest.budget.get('alert_threshold', 0.80) * 100:
-            logger.warning(
-                f"⚠️  Budget alert: {cost_summary['budget_used_percent']:.1f}% used "
-                f"(${cost_summary['total_cost_usd']:.2f} / ${manifest.budget['max_cost_usd']:.2f})"
-            )
+        cost_before = self.llm_client.cost_tracker.total_cost
+        response = None
+        parser: Optional[IncrementalJSONParser] = IncrementalJSONParser(STREAMED_OUTPUT_PATHS)
+        start = time.perf_counter()
+        first_output = None
+        with cost_scope(phase=phase_key):
+            for event in events:
+                if event.response is not None:
+                    response = event.response
+                    continue
+                if first_output is None and event.text:
+                    first_output = time.perf_counter() - start
+                    logger.info(f"⏱️  {agent_name}: first output after {first_output:.1f}s")
+                try:
+                    outputs = parser.feed(event.text) if parser is not None else []
+                except JSONStreamError:
+                    # Not JSON - stop streaming events, handled when parsing the full response
+                    parser, outputs = None, []
+                for output in outputs:
+                    if output.kind == "item":
+                        item = output.value if isinstance(output.value, dict) else {}
+                        label = item.get("file_path") or item.get("path") or f"#{output.path[-1]}"
+                        logger.info(f"   ↳ {agent_name}: {output.path[0]} {label} ready")
+                    if on_output is not None:
+                        on_output(output)
+        logger.info(f"⏱️  {agent_name}: complete after {time.perf_counter() - start:.1f}s")
+        self._report_rate_limits()
+
+        # Update budget in manifest
+        breakdown = manifest.budget.setdefault('cost_breakdown', {})
+        ledger = self.llm_client.cost_tracker.ledger
+        if ledger is not None:
+            # Project spend across all runs and workers
+            manifest.budget['current_cost_usd'] = round(ledger.project_total(manifest.project_id), 4)
+            breakdown.update({
+                phase: round(cost, 4) for phase, cost in ledger.phase_costs(manifest.project_id).items() if phase
+            })
+        else:
+            # Track cost breakdown by phase (this invocation's cost only)
+            delta = self.llm_client.cost_tracker.total_cost - cost_before
+            manifest.budget['current_cost_usd'] = round(manifest.budget.get('current_cost_usd', 0.0) + delta, 4)
+            breakdown[phase_key] = round(breakdown.get(phase_key, 0.0) + delta, 4)
 
         # Parse JSON output
         try:
@@ -832,6 +931,26 @@ class CoreOrchestrator:
             logger.warning(f"Agent {agent_name} returned non-JSON response")
             return {"text": response.content}
 
+    def _report_rate_limits(self) -> None:
+        """
+        Log rate-limit queueing of this process and export the scheduler metrics
+        (queue depth, wait times, adaptive concurrency) to VIBE_LLM_RATE_METRICS.
+        """
+        scheduler = self.llm_client.rate_scheduler if self.llm_client else None
+        if scheduler is None:
+            return
+        for model, stats in scheduler.snapshot().items():
+            if stats["throttled"] or stats["peak_queue_depth"] > 1:
+                logger.info(
+                    f"⏳ Rate limits ({model}): queue depth {stats['queue_depth']} "
+                    f"(peak {stats['peak_queue_depth']}), wait p50 {stats['wait']['p50_ms']:.0f}ms / "
+                    f"max {stats['wait']['max_ms']:.0f}ms, {stats['throttled']} throttled, "
+                    f"concurrency limit {stats['concurrency_limit']}"
+                )
+        metrics_file = os.environ.get("VIBE_LLM_RATE_METRICS")
+        if metrics_file:
+            scheduler.export(metrics_file)
+
     # -------------------------------------------------------------------------
     # AUDITOR & QUALITY GATES (GAD-002 Decision 2 & 4)
     # -------------------------------------------------------------------------
@@ -869,7 +988,8 @@ class CoreOrchestrator:
                 agent_name="AUDITOR",
                 task_id="semantic_audit",  # Default task
                 inputs=audit_context,
-                manifest=manifest
+                manifest=manifest,
+                model_tier=None if blocking else NON_BLOCKING_AUDIT_TIER
             )
 
             # Parse audit result
@@ -1182,6 +1302,24 @@ class CoreOrchestrator:
         logger.info(f"   Current phase: {manifest.current_phase.value}")
         logger.info(f"   Budget: ${manifest.budget.get('max_cost_usd', 'N/A')}")
 
+        # Pre-flight: refuse a run whose p90 cost does not fit the remaining budget
+        if (
+            self.execution_mode == "autonomous"
+            and os.environ.get("VIBE_FORECAST_PREFLIGHT", "0") in ("1", "true", "yes")
+        ):
+            forecast = self.forecast(project_id)
+            logger.info(
+                f"🔮 Forecast: ${forecast.cost_usd.expected:.2f} expected, ${forecast.cost_usd.p90:.2f} p90, "
+                f"{forecast.parallel_seconds.expected / 60:.1f}-{forecast.sequential_seconds.expected / 60:.1f} min"
+            )
+            if not forecast.fits:
+                raise BudgetExceededError(
+                    f"Forecast p90 cost ${forecast.cost_usd.p90:.2f} exceeds the remaining budget "
+                    f"${forecast.budget_remaining_usd:.2f}\n"
+                    f"Fix: Raise budget.max_cost_usd, or inspect the plan with "
+                    f"vibe-cli forecast --project={project_id}"
+                )
+
         # Execute phases until PRODUCTION
         while manifest.current_phase != ProjectPhase.PRODUCTION:
             self.execute_phase(manifest)
@@ -1210,6 +1348,131 @@ class CoreOrchestrator:
                 logger.info(f"  {phase}: ${cost:.4f}")
 
 
+    # -------------------------------------------------------------------------
+    # FORECAST
+    # -------------------------------------------------------------------------
+
+    def forecast(
+        self,
+        project_id: str,
+        include_optional: bool = False,
+        simulations: int = DEFAULT_SIMULATIONS
+    ) -> RunForecast:
+        """
+        Forecast the cost and duration of the rest of a project's run (nothing is invoked).
+
+        Walks the workflow from the project's current phase (and planning
+        sub-state) to PRODUCTION, composes every task prompt of each
+        responsible agent, and simulates the calls against the agents'
+        history in the cost ledger (see forecast.py).
+
+        Args:
+            project_id: Project to forecast
+            include_optional: Include optional states (RESEARCH)
+            simulations: Monte Carlo runs
+
+        Returns:
+            RunForecast (expected/p90 cost, tokens, sequential and parallel
+            wall-clock time; fits = p90 cost within the remaining budget)
+        """
+        manifest = self.load_project_manifest(project_id)
+        calls = [
+            self._plan_call(stage, agent, task_id, manifest)
+            for stage, agents in self._remaining_stages(manifest, include_optional)
+            for agent in agents
+            for task_id in get_agent_index().task_ids(agent)
+        ]
+
+        ledger = get_cost_ledger()
+        remaining = None
+        if manifest.budget.get('max_cost_usd'):
+            spent = (
+                ledger.project_total(project_id) if ledger is not None
+                else manifest.budget.get('current_cost_usd', 0.0)
+            )
+            remaining = manifest.budget['max_cost_usd'] - spent
+
+        forecaster = RunForecaster(
+            ledger, model=AUTONOMOUS_MODEL, max_tokens=AUTONOMOUS_MAX_TOKENS, simulations=simulations
+        )
+        return forecaster.forecast(project_id, calls, remaining)
+
+    def _remaining_stages(self, manifest: ProjectManifest, include_optional: bool) -> List[tuple]:
+        """(stage name, responsible agents) from the current phase/sub-state to PRODUCTION"""
+        states = self.workflow.get('states', [])
+        names = [state['name'] for state in states]
+        start = names.index(manifest.current_phase.value) if manifest.current_phase.value in names else 0
+
+        def agents(state: Dict[str, Any]) -> List[str]:
+            return state.get('responsible_agents') or (
+                [state['responsible_agent']] if state.get('responsible_agent') else []
+            )
+
+        stages = []
+        for state in states[start:]:
+            if state['name'] == ProjectPhase.PRODUCTION.value:
+                break
+            sub_states = state.get('sub_states', [])
+            if state['name'] == manifest.current_phase.value and manifest.current_sub_state is not None:
+                sub_names = [sub['name'] for sub in sub_states]
+                if manifest.current_sub_state.value in sub_names:
+                    sub_states = sub_states[sub_names.index(manifest.current_sub_state.value):]
+            for sub in sub_states:
+                if sub.get('optional') and not include_optional:
+                    continue
+                if agents(sub):
+                    stages.append((f"{state['name']}.{sub['name']}", agents(sub)))
+            if agents(state):
+                stages.append((state['name'], agents(state)))
+        return stages
+
+    def _plan_call(self, stage: str, agent_name: str, task_id: str, manifest: ProjectManifest) -> PlannedCall:
+        """A task's planned call: composed prompt size (or its token budget) and task metadata"""
+        index = get_agent_index()
+        entry = index.tasks(agent_name).get(task_id)
+        meta: Dict[str, Any] = {}
+        if entry is not None and entry.meta_file:
+            try:
+                meta = get_composition_cache().read_yaml(index.base_path / entry.meta_file) or {}
+            except Exception as e:
+                logger.warning(f"Unreadable task metadata {entry.meta_file}: {e}")
+
+        try:
+            if self.use_registry:
+                _, report = self.prompt_registry.compose_with_report(
+                    agent=agent_name, task=task_id, workspace=manifest.name,
+                    inject_governance=True, context={}
+                )
+            else:
+                _, report = self.prompt_runtime.compose_with_report(agent_name, task_id, {})
+            input_tokens, composed = report.total_tokens, True
+        except Exception as e:
+            # Not composable yet (missing inputs, metadata): assume the full token budget
+            logger.info(f"Forecast: {agent_name}.{task_id} not composed ({type(e).__name__}), using its budget")
+            input_tokens = resolve_token_budget(
+                task_budget=meta.get('token_budget'), estimated_tokens=meta.get('estimated_tokens', 0)
+            )
+            composed = False
+
+        dependencies = meta.get('dependencies') if 'task_id' in meta else None
+        router = get_model_router()
+        route = router.route(agent_name, task_id) if router is not None else None
+        return PlannedCall(
+            stage=stage,
+            agent=agent_name,
+            task=task_id,
+            input_tokens=input_tokens,
+            composed=composed,
+            estimated_tokens=int(meta.get('estimated_tokens') or 0),
+            complexity=str(meta.get('estimated_complexity', 'unknown')),
+            depends_on=None if dependencies is None else [
+                dep.get('task_id', '') if isinstance(dep, dict) else str(dep) for dep in dependencies
+            ],
+            model=route.model if route is not None else None,
+            max_tokens=route.max_tokens if route is not None else None
+        )
+
+
 # =============================================================================
 # CLI INTERFACE (FOR TESTING)
 # =============================================================================
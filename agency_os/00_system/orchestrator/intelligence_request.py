@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Intelligence Request Writer - Streaming STDOUT handoff envelope
+===============================================================
+
+In delegated mode the orchestrator hands each composed prompt to the operator
+(Claude Code) as an INTELLIGENCE_REQUEST JSON envelope. Building that envelope
+with json.dumps() holds the prompt in memory several times (prompt string,
+request dict, escaped JSON string) and prints nothing until all of it exists.
+
+write_intelligence_request() instead writes the envelope incrementally: the
+JSON around the prompt is rendered once, and the prompt chunks yielded by
+PromptRegistry.compose_stream() / PromptRuntime.compose_stream() are escaped
+and written one by one. The output is byte-identical to
+json.dumps(request, indent=2).
+
+Usage:
+    chunks, report = PromptRegistry.compose_stream(agent, task, ...)
+    write_intelligence_request(sys.stdout, agent, task, chunks, context)
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, TextIO, Union
+
+# Placeholder replaced by the streamed value (cannot occur in real JSON output:
+# json.dumps escapes control characters)
+_STREAM_PLACEHOLDER = "\x00stream\x00"
+
+# Large chunks (e.g. a 133 KB knowledge section) are escaped in pieces of this size
+WRITE_PIECE_CHARS = 16 * 1024
+
+
+def write_json_streaming(
+    out: TextIO,
+    obj: Dict[str, Any],
+    stream_key: str,
+    chunks: Union[str, Iterable[str]],
+    indent: Optional[int] = 2
+) -> int:
+    """
+    Write `obj` as JSON with obj[stream_key] taken from a stream of string chunks.
+
+    Args:
+        out: Text stream to write to
+        obj: JSON object; obj[stream_key] is ignored (replaced by the chunks)
+        stream_key: Key whose string value is streamed
+        chunks: String or iterable of string chunks forming the value
+        indent: JSON indent (same meaning as json.dumps)
+
+    Returns:
+        Number of characters of the streamed value
+    """
+    template = json.dumps({**obj, stream_key: _STREAM_PLACEHOLDER}, indent=indent)
+    prefix, suffix = template.split(json.dumps(_STREAM_PLACEHOLDER), 1)
+
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+
+    out.write(prefix)
+    out.write('"')
+    length = 0
+    for chunk in chunks:
+        # JSON string escaping is per character, so escaping piece by piece
+        # gives the same bytes as escaping the joined string
+        for start in range(0, len(chunk), WRITE_PIECE_CHARS):
+            out.write(json.dumps(chunk[start:start + WRITE_PIECE_CHARS])[1:-1])
+        length += len(chunk)
+    out.write('"')
+    out.write(suffix)
+    return length
+
+
+def write_intelligence_request(
+    out: Union[TextIO, str, Path],
+    agent: str,
+    task_id: Optional[str],
+    prompt_chunks: Union[str, Iterable[str]],
+    context: Dict[str, Any],
+    wait_for_response: bool = True
+) -> int:
+    """
+    Stream an INTELLIGENCE_REQUEST envelope.
+
+    Args:
+        out: Text stream (e.g. sys.stdout) or file path
+        agent: Agent name
+        task_id: Task ID
+        prompt_chunks: Prompt string or chunk iterator
+        context: Project context (project_id, phase, sub_state)
+        wait_for_response: Whether the orchestrator blocks on STDIN
+
+    Returns:
+        Prompt length in characters
+    """
+    request = {
+        "type": "INTELLIGENCE_REQUEST",
+        "agent": agent,
+        "task_id": task_id,
+        "prompt": None,
+        "context": context,
+        "wait_for_response": wait_for_response
+    }
+
+    if isinstance(out, (str, Path)):
+        with open(out, "w", encoding="utf-8") as f:
+            length = write_json_streaming(f, request, "prompt", prompt_chunks)
+            f.write("\n")
+        return length
+
+    length = write_json_streaming(out, request, "prompt", prompt_chunks)
+    out.write("\n")
+    out.flush()
+    return length
@@ -16,12 +16,16 @@ Version: 2.0 (Phase 2 Implementation)
 """
 
 import json
-import yaml
+import sys
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field
 from enum import Enum
 
+# Shared YAML loading (CSafeLoader + on-disk parse cache)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "runtime"))
+from yaml_loader import load_yaml
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -143,8 +147,7 @@ class Orchestrator:
         if not self.workflow_yaml_path.exists():
             raise FileNotFoundError(f"Workflow YAML not found: {self.workflow_yaml_path}")
 
-        with open(self.workflow_yaml_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(self.workflow_yaml_path)
 
     def get_planning_substates(self) -> List[WorkflowState]:
         """Get PLANNING sub-states from workflow"""
@@ -402,8 +405,7 @@ class Orchestrator:
         if not research_yaml.exists():
             raise FileNotFoundError(f"Research workflow not found: {research_yaml}")
 
-        with open(research_yaml, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(research_yaml)
 
     def _ask_user_researcher(self) -> bool:
         """Ask if user wants USER_RESEARCHER (optional within RESEARCH)"""
@@ -1,8 +1,13 @@
 """Tool executor for dispatching tool calls from Claude Code."""
 
 import json
+import sys
+from pathlib import Path
 from typing import Dict, Any
 
+# Runtime siblings (artifact store of the context serializer)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "runtime"))
+
 # Support both relative and absolute imports
 try:
     from .google_search_client import GoogleSearchClient
@@ -11,6 +16,8 @@ except ImportError:
     from google_search_client import GoogleSearchClient
     from web_fetch_client import WebFetchClient
 
+from context_serializer import ArtifactNotFoundError, DEFAULT_FETCH_BYTES, get_artifact_store
+
 
 class ToolExecutor:
     """Executes tool calls from Claude Code"""
@@ -27,6 +34,7 @@ class ToolExecutor:
 
         # Always available
         self.tools['web_fetch'] = WebFetchClient()
+        self.tools['fetch_artifact'] = get_artifact_store()
 
         # Only if API keys are set
         import os
@@ -61,5 +69,17 @@ class ToolExecutor:
                 url = parameters.get('url')
                 return self.tools['web_fetch'].fetch(url)
 
+            elif tool_name == 'fetch_artifact':
+                # Parameters parsed from tool_use XML arrive as strings
+                return self.tools['fetch_artifact'].read(
+                    parameters.get('ref', ''),
+                    key_path=parameters.get('key_path') or None,
+                    offset=int(parameters.get('offset') or 0),
+                    max_bytes=int(parameters.get('max_bytes') or DEFAULT_FETCH_BYTES)
+                )
+
+        except ArtifactNotFoundError as e:
+            return {'error': str(e)}
+
         except Exception as e:
             return {'error': f"Tool execution failed: {e}"}
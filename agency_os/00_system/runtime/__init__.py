@@ -6,13 +6,39 @@ GAD-002 Phase 3 Implementation
 
 Contains runtime components for the orchestrator:
 - llm_client.py: LLM client with graceful failover
+- response_cache.py: Content-addressed on-disk LLM response cache (TTL, LRU, per-agent)
+- async_llm_client.py: asyncio LLM client (bounded concurrency, async retries, cancellation)
+- json_stream.py: Incremental JSON parsing of streamed agent output (invoke_stream)
 - prompt_runtime.py: Prompt composition runtime
+- composition_cache.py: Process-wide, file-invalidated composition cache
+- prompt_bundle.py: Precompiled composition inputs (vibe-cli compile)
+- knowledge_slicer.py: Relevance-sliced knowledge injection
+- token_budget.py: Token estimates, budgets and composition reports
+- prompt_blocks.py: Cache-friendly prompt blocks (provider prompt caching)
+- composition_metrics.py: Per-stage composition timing histograms (vibe-cli stats)
+- prompt_template.py: Precompiled ${variable} templates for composition fragments
+- context_serializer.py: Compact, size-capped runtime context JSON (artifact references)
+- tool_catalog.py: Precompiled tool definitions (one tools section per prompt)
+- file_watcher.py: Debounced hot reload (inotify/polling) of composition inputs
+- composition_server.py: Resident composition server on a Unix socket (vibe-cli serve)
+- composition_client.py: Stdlib-only client of the composition server
+- yaml_loader.py: Shared YAML loading (CSafeLoader, content-hash keyed on-disk parse cache)
+- agent_index.py: Scanned agent/task/SOP index (replaces the hard-coded agent list)
+- composition_session.py: Shared-prefix composition of several tasks of one agent
+- message_batches.py: Discounted message-batch execution (futures, polling with backoff)
+- rate_limiter.py: Process-wide RPM/TPM token buckets with AIMD concurrency and Retry-After
+- cost_ledger.py: Persistent, append-only SQLite cost ledger (per-project aggregates, vibe-cli costs)
+- budget_manager.py: Reservation-based budget enforcement (worst-case cost per call, live alerts)
+- forecast.py: Pre-flight cost/latency forecast of a run (ledger history, Monte Carlo, vibe-cli forecast)
+- model_router.py: Model tiers per agent/task, live model health and fallback chains (multi-provider)
 """
 
 from .llm_client import LLMClient, NoOpClient, CostTracker
+from .async_llm_client import AsyncLLMClient
 
 __all__ = [
     'LLMClient',
     'NoOpClient',
-    'CostTracker'
+    'CostTracker',
+    'AsyncLLMClient'
 ]
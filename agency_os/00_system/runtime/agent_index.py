@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Agent Index - Scanned agent, task and SOP index
+===============================================
+
+Agents are discovered instead of listed in Python: every directory below an
+`agents/` directory of agency_os/ or system_steward_framework/ that holds a
+_composition.yaml is an agent (its `agent_id:` field names it, the
+directory name otherwise). Adding an agent directory makes it available to
+PromptRuntime, PromptRegistry, vibe-cli and the composition server.
+
+The index answers, without touching the filesystem:
+    - agent_id -> agent directory
+    - agent_id -> tasks (task_*.md prompt, *.meta.yaml file, phase, description)
+    - SOP id -> SOP file (system_steward_framework/knowledge/sops)
+
+Persistence and refresh:
+    The index is saved to .cache/vibe/agent_index.json together with the
+    mtimes it was built from. A new process loads it and refresh()es it
+    incrementally: it stat()s the recorded directories and files and only
+    re-scans what changed (a changed directory mtime means entries were
+    added, removed or renamed). Lookups of an unknown agent refresh once
+    before failing, so agents created while a process runs are found.
+
+Usage:
+    index = get_agent_index()
+    agent_dir = index.agent_path("VIBE_ALIGNER")
+    task_ids = index.task_ids("VIBE_ALIGNER")
+    sop_file = index.sop_file("SOP_001")
+
+Environment:
+    VIBE_AGENT_INDEX=0      Do not persist the index (scan once per process)
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from .yaml_loader import YAMLParseError, load_yaml
+except ImportError:
+    from yaml_loader import YAMLParseError, load_yaml
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+INDEX_VERSION = 1
+
+# Relative to the index's base path
+INDEX_FILE = Path(".cache") / "vibe" / "agent_index.json"
+AGENT_ROOTS = ("agency_os", "system_steward_framework")
+SOPS_DIR = Path("system_steward_framework") / "knowledge" / "sops"
+
+IGNORED_DIRS = frozenset({"__pycache__", "node_modules"})
+
+_AGENT_ID_RE = re.compile(r"""^agent_id:\s*["']?([A-Za-z0-9_.\-]+)""", re.MULTILINE)
+_TASK_PREFIX_RE = re.compile(r"^(task_)?\d+_")
+
+PathLike = Union[str, Path]
+
+
+@dataclass
+class TaskEntry:
+    """One task of an agent (paths relative to the index base path)"""
+    task_id: str
+    prompt_file: Optional[str] = None
+    meta_file: Optional[str] = None
+    phase: Optional[str] = None
+    description: Optional[str] = None
+
+
+@dataclass
+class AgentEntry:
+    """One discovered agent and the mtimes its entry was built from"""
+    agent_id: str
+    path: str
+    composition_mtime_ns: int
+    tasks_mtime_ns: int = 0
+    tasks: Dict[str, TaskEntry] = field(default_factory=dict)
+    meta_mtimes: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AgentEntry":
+        tasks = {task_id: TaskEntry(**task) for task_id, task in data.get("tasks", {}).items()}
+        return cls(**dict(data, tasks=tasks))
+
+    @property
+    def task_ids(self) -> List[str]:
+        """Task IDs with a task_<id>.md prompt, sorted"""
+        return sorted(task_id for task_id, task in self.tasks.items() if task.prompt_file)
+
+
+def task_key(task: str) -> str:
+    """Task name without the task_/NN_ prefixes (handlers, index and metadata name tasks differently)"""
+    return _TASK_PREFIX_RE.sub("", task or "").lower()
+
+
+def _mtime_ns(path: PathLike) -> int:
+    """mtime of a path, 0 if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class AgentIndex:
+    """Agent/task/SOP index of one repository (thread-safe)"""
+
+    def __init__(self, base_path: PathLike = _REPO_ROOT, index_file: Optional[PathLike] = INDEX_FILE):
+        self.base_path = Path(base_path)
+        self.index_file = self.base_path / index_file if index_file is not None else None
+        self.agents: Dict[str, AgentEntry] = {}
+        self.dirs: Dict[str, int] = {}
+        self.sops: Dict[str, str] = {}
+        self.sops_mtime_ns = 0
+        self.full_scans = 0
+        self.agents_rebuilt = 0
+        self._sop_lookups: Dict[str, Optional[str]] = {}
+        self._lock = threading.RLock()
+
+    # -------------------------------------------------------------------------
+    # LOOKUPS
+    # -------------------------------------------------------------------------
+
+    def agent(self, agent_id: str) -> Optional[AgentEntry]:
+        return self.agents.get(agent_id)
+
+    def agent_path(self, agent_id: str) -> Optional[Path]:
+        """Absolute agent directory, None if the agent is unknown"""
+        entry = self.agents.get(agent_id)
+        return self.base_path / entry.path if entry is not None else None
+
+    def agent_ids(self) -> List[str]:
+        return sorted(self.agents)
+
+    def relative_paths(self) -> Dict[str, str]:
+        """agent_id -> agent directory relative to the base path"""
+        return {agent_id: entry.path for agent_id, entry in self.agents.items()}
+
+    def tasks(self, agent_id: str) -> Dict[str, TaskEntry]:
+        """Tasks of an agent by task ID (empty if the agent is unknown)"""
+        entry = self.agents.get(agent_id)
+        return dict(sorted(entry.tasks.items())) if entry is not None else {}
+
+    def task_ids(self, agent_id: str) -> List[str]:
+        """Task IDs with a task_<id>.md prompt, sorted (empty if the agent is unknown)"""
+        entry = self.agents.get(agent_id)
+        return entry.task_ids if entry is not None else []
+
+    def sop_file(self, sop_id: str) -> Optional[Path]:
+        """
+        SOP file for an ID: `SOP_001` matches SOP_001_<title>.md, a full
+        file stem matches exactly. None if there is no such SOP.
+        """
+        with self._lock:
+            if sop_id not in self._sop_lookups:
+                prefix = f"{sop_id}_"
+                matches = [stem for stem in sorted(self.sops) if stem.startswith(prefix)]
+                if not matches and sop_id in self.sops:
+                    matches = [sop_id]
+                self._sop_lookups[sop_id] = self.sops[matches[0]] if matches else None
+            rel = self._sop_lookups[sop_id]
+        return self.base_path / rel if rel is not None else None
+
+    def stats(self) -> Dict:
+        return {
+            "agents": len(self.agents),
+            "tasks": sum(len(entry.tasks) for entry in self.agents.values()),
+            "sops": len(self.sops),
+            "full_scans": self.full_scans,
+            "agents_rebuilt": self.agents_rebuilt,
+            "index_file": str(self.index_file) if self.index_file else None,
+        }
+
+    # -------------------------------------------------------------------------
+    # LOADING AND REFRESH
+    # -------------------------------------------------------------------------
+
+    def load(self) -> "AgentIndex":
+        """Load the persisted index (if any) and refresh it"""
+        with self._lock:
+            if self.index_file is not None and self.index_file.exists():
+                try:
+                    data = json.loads(self.index_file.read_text(encoding="utf-8"))
+                    if data.get("version") == INDEX_VERSION and data.get("base_path") == str(self.base_path):
+                        self.agents = {
+                            agent_id: AgentEntry.from_dict(entry) for agent_id, entry in data["agents"].items()
+                        }
+                        self.dirs = data["dirs"]
+                        self.sops = data["sops"]
+                        self.sops_mtime_ns = data["sops_mtime_ns"]
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Ignoring unreadable agent index {self.index_file}: {e}")
+                    self.agents, self.dirs = {}, {}
+            self.refresh()
+        return self
+
+    def refresh(self) -> bool:
+        """
+        Re-scan whatever changed since the index was built.
+
+        Returns:
+            True if the index changed
+        """
+        with self._lock:
+            changed = False
+            if not self.dirs or any(_mtime_ns(self.base_path / rel) != mtime for rel, mtime in self.dirs.items()):
+                changed = self._rediscover()
+            else:
+                for agent_id, entry in list(self.agents.items()):
+                    if not self._is_fresh(entry):
+                        self.agents[agent_id] = self._build_agent(self.base_path / entry.path)
+                        changed = True
+
+            sops_mtime = _mtime_ns(self.base_path / SOPS_DIR)
+            if sops_mtime != self.sops_mtime_ns:
+                self._scan_sops(sops_mtime)
+                changed = True
+
+            if changed:
+                self.save()
+            return changed
+
+    def save(self) -> None:
+        """Persist the index (atomically; failures only log)"""
+        if self.index_file is None or os.environ.get("VIBE_AGENT_INDEX", "1") in ("0", "false", "no"):
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "base_path": str(self.base_path),
+            "dirs": self.dirs,
+            "sops": self.sops,
+            "sops_mtime_ns": self.sops_mtime_ns,
+            "agents": {agent_id: asdict(entry) for agent_id, entry in sorted(self.agents.items())},
+        }
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.index_file.parent, prefix=".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            logger.warning(f"Could not save agent index to {self.index_file}: {e}")
+
+    # -------------------------------------------------------------------------
+    # SCANNING (caller holds lock)
+    # -------------------------------------------------------------------------
+
+    def _rediscover(self) -> bool:
+        """Walk the agent roots; rebuild only new or changed agents"""
+        self.full_scans += 1
+        dirs: Dict[str, int] = {}
+        agent_dirs: List[Path] = []
+        for root in AGENT_ROOTS:
+            if (self.base_path / root).is_dir():
+                self._walk(self.base_path / root, False, dirs, agent_dirs)
+
+        by_path = {entry.path: entry for entry in self.agents.values()}
+        agents: Dict[str, AgentEntry] = {}
+        for agent_dir in agent_dirs:
+            entry = by_path.get(agent_dir.relative_to(self.base_path).as_posix())
+            if entry is None or not self._is_fresh(entry):
+                entry = self._build_agent(agent_dir)
+            if entry.agent_id in agents:
+                logger.warning(
+                    f"Duplicate agent_id '{entry.agent_id}' in {entry.path} "
+                    f"(already defined in {agents[entry.agent_id].path}) - ignored"
+                )
+                continue
+            agents[entry.agent_id] = entry
+
+        changed = dirs != self.dirs or {k: asdict(v) for k, v in agents.items()} != {
+            k: asdict(v) for k, v in self.agents.items()
+        }
+        self.dirs, self.agents = dirs, agents
+        return changed
+
+    def _walk(self, path: Path, in_agents: bool, dirs: Dict[str, int], agent_dirs: List[Path]) -> None:
+        try:
+            dirs[path.relative_to(self.base_path).as_posix()] = path.stat().st_mtime_ns
+            children = sorted(
+                (entry for entry in os.scandir(path) if entry.is_dir(follow_symlinks=False)),
+                key=lambda entry: entry.name
+            )
+        except OSError:
+            return
+        for child in children:
+            if child.name in IGNORED_DIRS or child.name.startswith("."):
+                continue
+            child_path = Path(child.path)
+            if in_agents and (child_path / "_composition.yaml").is_file():
+                agent_dirs.append(child_path)
+            else:
+                # Non-agent directories below agents/ group agents (e.g. agents/research)
+                self._walk(child_path, in_agents or child.name == "agents", dirs, agent_dirs)
+
+    def _is_fresh(self, entry: AgentEntry) -> bool:
+        agent_dir = self.base_path / entry.path
+        if _mtime_ns(agent_dir / "_composition.yaml") != entry.composition_mtime_ns:
+            return False
+        if _mtime_ns(agent_dir / "tasks") != entry.tasks_mtime_ns:
+            return False
+        return all(_mtime_ns(self.base_path / rel) == mtime for rel, mtime in entry.meta_mtimes.items())
+
+    def _build_agent(self, agent_dir: Path) -> AgentEntry:
+        self.agents_rebuilt += 1
+        composition = agent_dir / "_composition.yaml"
+        try:
+            match = _AGENT_ID_RE.search(composition.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            match = None
+        entry = AgentEntry(
+            agent_id=match.group(1) if match else agent_dir.name,
+            path=agent_dir.relative_to(self.base_path).as_posix(),
+            composition_mtime_ns=_mtime_ns(composition),
+        )
+        entry.tasks_mtime_ns, entry.tasks, entry.meta_mtimes = self._scan_tasks(agent_dir / "tasks")
+        return entry
+
+    def _scan_tasks(self, tasks_dir: Path) -> Tuple[int, Dict[str, TaskEntry], Dict[str, int]]:
+        try:
+            tasks_mtime = tasks_dir.stat().st_mtime_ns
+            names = sorted(os.listdir(tasks_dir))
+        except OSError:
+            return 0, {}, {}
+
+        tasks: Dict[str, TaskEntry] = {}
+        meta_mtimes: Dict[str, int] = {}
+        for name in names:
+            rel = (tasks_dir / name).relative_to(self.base_path).as_posix()
+            if name.endswith(".meta.yaml"):
+                task_id = name[:-len(".meta.yaml")]
+                task_id = task_id[len("task_"):] if task_id.startswith("task_") else task_id
+                task = tasks.setdefault(task_id, TaskEntry(task_id))
+                # task_<id>.meta.yaml wins over <id>.meta.yaml (same order as PromptRuntime)
+                if task.meta_file is None or name.startswith("task_"):
+                    task.meta_file = rel
+                    task.phase, task.description = self._read_meta(tasks_dir / name)
+                meta_mtimes[rel] = _mtime_ns(tasks_dir / name)
+            elif name.startswith("task_") and name.endswith(".md"):
+                task_id = name[len("task_"):-len(".md")]
+                tasks.setdefault(task_id, TaskEntry(task_id)).prompt_file = rel
+        return tasks_mtime, tasks, meta_mtimes
+
+    @staticmethod
+    def _read_meta(meta_file: Path) -> Tuple[Optional[str], Optional[str]]:
+        """(phase, description) of a task meta file (None for unreadable files)"""
+        try:
+            data = load_yaml(meta_file)
+        except (OSError, YAMLParseError) as e:
+            logger.debug(f"Could not read {meta_file}: {e}")
+            return None, None
+        if not isinstance(data, dict):
+            return None, None
+        phase = data.get("phase")
+        description = data.get("description", data.get("notes"))
+        return (
+            str(phase) if phase is not None else None,
+            str(description) if description is not None else None,
+        )
+
+    def _scan_sops(self, sops_mtime: int) -> None:
+        sops_dir = self.base_path / SOPS_DIR
+        self.sops = {
+            sop.stem: sop.relative_to(self.base_path).as_posix()
+            for sop in sorted(sops_dir.glob("*.md"))
+        } if sops_mtime else {}
+        self.sops_mtime_ns = sops_mtime
+        self._sop_lookups.clear()
+
+
+# =============================================================================
+# AGENT REGISTRY (mapping view)
+# =============================================================================
+
+class AgentRegistry(MutableMapping):
+    """
+    agent_id -> agent directory (relative to the repository root).
+
+    Scanned agents come from the repository's AgentIndex; assigning an entry
+    registers an agent explicitly (e.g. one outside the scanned roots), and
+    explicit registrations take precedence. Only explicit registrations can
+    be deleted.
+    """
+
+    def __init__(self, base_path: PathLike = _REPO_ROOT):
+        self.base_path = Path(base_path)
+        self._registered: Dict[str, str] = {}
+
+    def registered(self, agent_id: str) -> Optional[str]:
+        """Explicitly registered path of an agent, if any"""
+        return self._registered.get(agent_id)
+
+    def registered_ids(self) -> List[str]:
+        return list(self._registered)
+
+    def __getitem__(self, agent_id: str) -> str:
+        if agent_id in self._registered:
+            return self._registered[agent_id]
+        entry = get_agent_index(self.base_path).agent(agent_id)
+        if entry is None:
+            raise KeyError(agent_id)
+        return entry.path
+
+    def __setitem__(self, agent_id: str, path: str) -> None:
+        self._registered[agent_id] = str(path)
+
+    def __delitem__(self, agent_id: str) -> None:
+        del self._registered[agent_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(set(get_agent_index(self.base_path).agents) | set(self._registered)))
+
+    def __len__(self) -> int:
+        return len(set(get_agent_index(self.base_path).agents) | set(self._registered))
+
+    def __contains__(self, agent_id: object) -> bool:
+        return agent_id in self._registered or get_agent_index(self.base_path).agent(agent_id) is not None
+
+
+_indexes: Dict[Path, AgentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_agent_index(base_path: Optional[PathLike] = None) -> AgentIndex:
+    """Get the (loaded and refreshed) index of a repository, one per base path per process"""
+    base_path = Path(base_path).resolve() if base_path is not None else _REPO_ROOT
+    index = _indexes.get(base_path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(base_path)
+            if index is None:
+                index = AgentIndex(base_path).load()
+                _indexes[base_path] = index
+    return index
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Async LLM Client - asyncio-native LLM invocation with bounded concurrency
+=========================================================================
+
+LLMClient.invoke() blocks for the whole completion (and sleeps through its
+retries), so independent calls - the research agents, non-blocking audits,
+per-module code generation - run one after another. AsyncLLMClient invokes
+the provider's async client instead:
+
+    - A semaphore bounds the calls in flight (max_concurrency)
+    - Retries back off with asyncio.sleep(), never blocking the event loop
+    - Calls are admitted by the same RateLimitScheduler as LLMClient's
+      (RPM/TPM buckets, adaptive concurrency, Retry-After)
+    - Every invocation is cancellable: cancelling the awaiting task (or
+      cancel() for all in-flight calls) aborts the request and its retries
+    - Costs go through the same CostTracker, budget reservations and
+      response cache as LLMClient; LLMClient.async_client() shares all three
+
+LLMClient stays the blocking facade: LLMClient.invoke_many() runs a batch
+through this client on a private event loop.
+
+Usage:
+    client = AsyncLLMClient(budget_limit=5.0, max_concurrency=4)
+    response = await client.invoke(prompt=blocks)
+    results = await client.invoke_many([prompt_a, prompt_b, prompt_c])
+
+    # From blocking code
+    results = LLMClient(budget_limit=5.0).invoke_many([prompt_a, prompt_b])
+
+Environment:
+    VIBE_LLM_CONCURRENCY=<n>    Default max_concurrency (default: 4)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+try:
+    from .llm_client import (
+        DEFAULT_RATE_SCHEDULER,
+        DEFAULT_RESPONSE_CACHE,
+        BaseLLMClient,
+        CostTracker,
+        LLMRequest,
+        LLMResponse,
+        LLMResult,
+        NoOpClient,
+        Prompt,
+        backoff_delay,
+        invocation_error,
+        is_retryable,
+        retry_delay,
+    )
+except ImportError:
+    from llm_client import (
+        DEFAULT_RATE_SCHEDULER,
+        DEFAULT_RESPONSE_CACHE,
+        BaseLLMClient,
+        CostTracker,
+        LLMRequest,
+        LLMResponse,
+        LLMResult,
+        NoOpClient,
+        Prompt,
+        backoff_delay,
+        invocation_error,
+        is_retryable,
+        retry_delay,
+    )
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def default_max_concurrency() -> int:
+    """Configured default concurrency (VIBE_LLM_CONCURRENCY)"""
+    value = os.environ.get("VIBE_LLM_CONCURRENCY")
+    return max(1, int(value)) if value else DEFAULT_MAX_CONCURRENCY
+
+
+class AsyncNoOpClient(NoOpClient):
+    """NoOpClient with an awaitable messages.create() (knowledge-only mode)"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = self
+
+    async def create(self, **kwargs) -> Any:
+        return self.messages_create(**kwargs)
+
+
+class AsyncLLMClient(BaseLLMClient):
+    """
+    LLM client for asyncio code: bounded concurrency, async retries, cancellation.
+
+    Same failover, retry policy, cost tracking and budget enforcement as
+    LLMClient. One instance can serve several event loops in turn (the
+    semaphore is rebuilt per loop), but not concurrently.
+    """
+
+    def __init__(
+        self,
+        budget_limit: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        cost_tracker: Optional[CostTracker] = None,
+        response_cache: Any = DEFAULT_RESPONSE_CACHE,
+        rate_scheduler: Any = DEFAULT_RATE_SCHEDULER,
+        budget_manager: Any = None
+    ):
+        """
+        Args:
+            budget_limit: Optional budget limit in USD (default: None = no limit)
+            max_concurrency: Calls in flight at once (default: VIBE_LLM_CONCURRENCY or 4)
+            cost_tracker: Tracker to record into (default: a new one)
+            response_cache: See LLMClient
+            rate_scheduler: See LLMClient
+            budget_manager: BudgetManager to reserve from (default: a new one
+                for budget_limit; LLMClient.async_client() passes its own)
+        """
+        super().__init__(budget_limit, cost_tracker, response_cache, rate_scheduler, budget_manager)
+        self.max_concurrency = max_concurrency or default_max_concurrency()
+        self.client, self.mode = self._create_provider_client("AsyncAnthropic", AsyncNoOpClient)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def invoke(
+        self,
+        prompt: Prompt,
+        model: str = "claude-3-5-sonnet-20241022",
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        max_retries: int = 3,
+        agent: Optional[str] = None
+    ) -> LLMResponse:
+        """
+        Invoke the LLM once a concurrency slot is free.
+
+        Same arguments, result and exceptions as LLMClient.invoke().
+
+        Raises:
+            BudgetExceededError: If budget limit reached
+            LLMInvocationError: If all retries fail
+            asyncio.CancelledError: If the invocation was cancelled
+        """
+        request = self._request_kwargs(prompt, model, max_tokens, temperature)
+        cache_key, cached = self._cache_lookup(request, agent)
+        if cached is not None:
+            return cached
+
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            async with self._slot():
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    response = await self._invoke(request, model, max_retries, agent)
+                    self._cache_store(cache_key, agent, response)
+                    return response
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self._tasks.discard(task)
+
+    async def _invoke(
+        self,
+        request: Dict[str, Any],
+        model: str,
+        max_retries: int,
+        agent: Optional[str] = None
+    ) -> LLMResponse:
+        # Reserved once a slot is free, so queued calls see the cost of earlier ones
+        reservation = await self._reserve_async(request)
+        try:
+            return await self._attempt(request, model, max_retries, agent)
+        finally:
+            self._settle(reservation)
+
+    async def _attempt(
+        self,
+        request: Dict[str, Any],
+        model: str,
+        max_retries: int,
+        agent: Optional[str] = None
+    ) -> LLMResponse:
+        """messages.create() with async retries and cost tracking"""
+        last_error = None
+        for attempt in range(max_retries):
+            ticket = None
+            try:
+                ticket = await self._acquire_slot_async(request)
+                start = time.perf_counter()
+                message = await self.client.messages.create(**request)
+                latency_ms = (time.perf_counter() - start) * 1000
+                self._release_slot(ticket, message)
+                ticket = None
+                return self._record_response(message, model, latency_ms=latency_ms, agent=agent)
+
+            except asyncio.CancelledError as e:
+                self._release_slot(ticket, error=e)
+                raise
+
+            except Exception as e:
+                self._release_slot(ticket, error=e)
+                last_error = e
+                error_name = type(e).__name__
+
+                if is_retryable(e) and attempt < max_retries - 1:
+                    wait_time = retry_delay(e, backoff_delay(attempt))
+                    logger.warning(
+                        f"LLM invocation failed ({error_name}), "
+                        f"retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})"
+                    )
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error(f"LLM invocation failed: {error_name} - {str(e)}")
+                    break
+
+        raise invocation_error(max_retries, last_error)
+
+    async def invoke_many(
+        self,
+        requests: Iterable[Union[LLMRequest, Dict[str, Any], str]],
+        fail_fast: bool = False
+    ) -> List[LLMResult]:
+        """
+        Invoke independent requests concurrently (at most max_concurrency at once).
+
+        A failing request does not stop the batch unless fail_fast is set:
+        then the first failure cancels the requests still queued or in
+        flight (their results carry asyncio.CancelledError). Cancelling the
+        caller cancels the whole batch.
+
+        Args:
+            requests: LLMRequests, dicts of invoke() keyword arguments, or prompts
+            fail_fast: Cancel the rest of the batch on the first failure
+
+        Returns:
+            One LLMResult per request, in request order
+        """
+        batch = [LLMRequest.coerce(request) for request in requests]
+        if not batch:
+            return []
+
+        tasks: List[asyncio.Task] = []
+
+        async def run(request: LLMRequest) -> LLMResult:
+            start = time.perf_counter()
+            try:
+                response = await self.invoke(
+                    request.prompt, request.model, request.max_tokens, request.temperature,
+                    request.max_retries, request.agent
+                )
+            except Exception as e:
+                if fail_fast:
+                    for other in tasks:
+                        if other is not asyncio.current_task():
+                            other.cancel()
+                return LLMResult(request, error=e, elapsed_ms=(time.perf_counter() - start) * 1000)
+            return LLMResult(request, response, elapsed_ms=(time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        tasks.extend(asyncio.ensure_future(run(request)) for request in batch)
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        results = [
+            outcome if isinstance(outcome, LLMResult) else LLMResult(request, error=outcome)
+            for request, outcome in zip(batch, outcomes)
+        ]
+
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(
+            f"Invoked {len(results) - failed}/{len(results)} LLM requests in "
+            f"{(time.perf_counter() - start) * 1000:.0f}ms "
+            f"(max concurrency {self.max_concurrency}, {failed} failed)"
+        )
+        return results
+
+    def cancel(self) -> int:
+        """Cancel every in-flight or queued invocation; returns the number cancelled"""
+        tasks = [task for task in self._tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def aclose(self) -> None:
+        """Cancel outstanding invocations and close the provider client"""
+        self.cancel()
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def _slot(self) -> asyncio.Semaphore:
+        """The concurrency semaphore of the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
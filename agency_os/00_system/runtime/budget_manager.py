@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Budget Manager - Reservation-based budget enforcement
+=====================================================
+
+Checking spend before each call (spent >= limit) only sees calls that have
+already returned. With concurrent calls (invoke_many, AsyncLLMClient,
+message batches, several workers) every caller passes the check at once
+and the budget is overrun by up to one worst-case call per caller.
+
+BudgetManager admits calls against committed spend instead:
+
+    - reserve(): before a call is sent, its worst-case cost is reserved -
+      the estimated prompt tokens (system blocks at the prompt-cache write
+      price) plus max_tokens of output, at the model's price. A call whose
+      worst case exceeds limit - settled spend is rejected
+      (BudgetExceededError); one that only fails to fit because of other
+      calls' reservations waits until they settle (or is rejected if wait
+      is off or the timeout passes).
+    - settle(): when the call returns (or fails), its reservation is
+      released; its actual cost is already in the CostTracker.
+    - Alerts: a warning is logged when settled + reserved spend crosses
+      alert_threshold of the limit (once per crossing), so concurrent calls
+      raise the alert before they overrun, not after.
+
+Settled spend is CostTracker.spent_usd() - the project's cost ledger total
+if the tracker has one, so all processes billing the project count.
+Reservations are per process (per manager): LLMClients of one process share
+a manager through async_client() and batch().
+
+Usage:
+    budget = BudgetManager(10.0, cost_tracker, alert_threshold=0.8)
+    reservation = budget.reserve(request)   # messages.create() kwargs
+    try:
+        response = client.messages.create(**request)
+    finally:
+        budget.settle(reservation)
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+try:
+    from .llm_client import BudgetExceededError, CostTracker
+    from .rate_limiter import estimate_request_tokens
+except ImportError:
+    from llm_client import BudgetExceededError, CostTracker
+    from rate_limiter import estimate_request_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_THRESHOLD = 0.80
+
+# Sleep between admission checks of async callers waiting for reservations to settle
+ASYNC_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class Reservation:
+    """Worst-case cost held for one call until it settles"""
+    id: int
+    model: str
+    amount_usd: float
+    created: float = field(default_factory=time.monotonic)
+
+
+class BudgetManager:
+    """
+    Reserves worst-case cost per call against a USD limit (thread-safe).
+
+    Args:
+        limit_usd: Budget limit in USD
+        cost_tracker: Tracker whose spent_usd() is the settled spend
+        alert_threshold: Fraction of the limit that triggers the alert
+        wait: Queue calls that only fit once in-flight reservations settle
+            (False rejects them immediately)
+        timeout: Seconds a call may wait for reservations (None = no limit)
+    """
+
+    def __init__(
+        self,
+        limit_usd: float,
+        cost_tracker: CostTracker,
+        alert_threshold: float = DEFAULT_ALERT_THRESHOLD,
+        wait: bool = True,
+        timeout: Optional[float] = None
+    ):
+        self.limit_usd = limit_usd
+        self.cost_tracker = cost_tracker
+        self.alert_threshold = alert_threshold
+        self.wait = wait
+        self.timeout = timeout
+        self._reservations: Dict[int, Reservation] = {}
+        self._reserved = 0.0
+        self._ids = itertools.count(1)
+        self._alerted = False
+        self._cond = threading.Condition()
+        self.counts = {"reserved": 0, "settled": 0, "waited": 0, "rejected": 0, "alerts": 0}
+
+    # -------------------------------------------------------------------------
+
+    def estimate(self, request: Dict[str, Any], batch: bool = False) -> float:
+        """Worst-case USD cost of a messages.create() request (batch: message batches pricing)"""
+        system = request.get("system") or []
+        cached = any(isinstance(block, dict) and "cache_control" in block for block in system)
+        system_tokens = estimate_request_tokens({"system": system})
+        message_tokens = estimate_request_tokens({"messages": request.get("messages")})
+        return self.cost_tracker.calculate_cost(
+            input_tokens=message_tokens + (0 if cached else system_tokens),
+            output_tokens=request["max_tokens"],
+            model=request["model"],
+            cache_write_tokens=system_tokens if cached else 0,
+            batch=batch
+        )
+
+    def reserve(
+        self,
+        request: Dict[str, Any],
+        batch: bool = False,
+        wait: Optional[bool] = None
+    ) -> Reservation:
+        """
+        Reserve the worst-case cost of a request, waiting for room if needed.
+
+        Args:
+            request: messages.create() keyword arguments
+            batch: The request goes through the message batches API
+            wait: Override the manager's wait policy for this call
+
+        Raises:
+            BudgetExceededError: If the call cannot fit the remaining budget
+        """
+        amount = self.estimate(request, batch)
+        wait = self.wait if wait is None else wait
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                reservation = self._try_reserve(request["model"], amount, final=not wait)
+                if reservation is not None:
+                    return reservation
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return self._try_reserve(request["model"], amount, final=True)
+                if not waited:
+                    waited = True
+                    self.counts["waited"] += 1
+                self._cond.wait(remaining)
+
+    async def reserve_async(
+        self,
+        request: Dict[str, Any],
+        batch: bool = False,
+        wait: Optional[bool] = None
+    ) -> Reservation:
+        """reserve() for asyncio code (waits without blocking the event loop)"""
+        amount = self.estimate(request, batch)
+        wait = self.wait if wait is None else wait
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        waited = False
+        while True:
+            expired = deadline is not None and time.monotonic() >= deadline
+            with self._cond:
+                reservation = self._try_reserve(request["model"], amount, final=not wait or expired)
+                if reservation is not None:
+                    return reservation
+                if not waited:
+                    waited = True
+                    self.counts["waited"] += 1
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+
+    def settle(self, reservation: Optional[Reservation]) -> None:
+        """Release a reservation once its call returned or failed (None is ignored)"""
+        if reservation is None:
+            return
+        with self._cond:
+            if self._reservations.pop(reservation.id, None) is None:
+                return
+            self._reserved = max(0.0, self._reserved - reservation.amount_usd)
+            self.counts["settled"] += 1
+            self._check_alert(self.cost_tracker.spent_usd())
+            self._cond.notify_all()
+
+    # -------------------------------------------------------------------------
+
+    @property
+    def reserved_usd(self) -> float:
+        with self._cond:
+            return self._reserved
+
+    def stats(self) -> Dict[str, Any]:
+        """Settled, reserved and available budget with reservation counters"""
+        settled = self.cost_tracker.spent_usd()
+        with self._cond:
+            reserved = self._reserved
+            in_flight = len(self._reservations)
+            counts = dict(self.counts)
+        return {
+            "limit_usd": self.limit_usd,
+            "settled_usd": round(settled, 4),
+            "reserved_usd": round(reserved, 4),
+            "available_usd": round(self.limit_usd - settled - reserved, 4),
+            "committed_percent": round((settled + reserved) / self.limit_usd * 100, 2) if self.limit_usd else 0,
+            "reservations_in_flight": in_flight,
+            **counts,
+        }
+
+    def _try_reserve(self, model: str, amount: float, final: bool) -> Optional[Reservation]:
+        """
+        Reserve amount if it fits (caller holds the lock).
+
+        Returns None if the call only fits once reservations settle and may
+        wait (final is False); raises BudgetExceededError otherwise.
+        """
+        settled = self.cost_tracker.spent_usd()
+        if settled + self._reserved + amount <= self.limit_usd:
+            reservation = Reservation(next(self._ids), model, amount)
+            self._reservations[reservation.id] = reservation
+            self._reserved += amount
+            self.counts["reserved"] += 1
+            self._check_alert(settled)
+            return reservation
+
+        if settled + amount <= self.limit_usd and self._reservations and not final:
+            return None
+
+        self.counts["rejected"] += 1
+        pending = f", ${self._reserved:.4f} reserved by calls in flight" if self._reservations else ""
+        raise BudgetExceededError(
+            f"Budget limit reached: ${self.limit_usd:.2f} "
+            f"(current: ${settled:.4f}{pending}; this call may cost up to ${amount:.4f})\n"
+            f"Fix: Raise the budget limit (budget.max_cost_usd) or lower max_tokens"
+        )
+
+    def _check_alert(self, settled: float) -> None:
+        """Warn once when settled + reserved spend crosses the alert threshold (caller holds the lock)"""
+        if not self.limit_usd:
+            return
+        committed = settled + self._reserved
+        if committed < self.alert_threshold * self.limit_usd:
+            self._alerted = False
+            return
+        if self._alerted:
+            return
+        self._alerted = True
+        self.counts["alerts"] += 1
+        logger.warning(
+            f"⚠️  Budget alert: {committed / self.limit_usd * 100:.1f}% committed "
+            f"(${settled:.2f} spent + ${self._reserved:.2f} reserved / ${self.limit_usd:.2f})"
+        )
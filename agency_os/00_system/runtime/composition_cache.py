@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Composition Cache - Process-wide cache for prompt composition inputs
+=====================================================================
+
+Every PromptRuntime / PromptRegistry call used to re-read and re-parse
+_composition.yaml, task_*.meta.yaml, _knowledge_deps.yaml, gate files and
+tool_definitions.yaml. This module keeps those inputs (and the static
+sections rendered from them) in one process-wide LRU cache.
+
+Invalidation:
+    Every entry records a fingerprint (mtime_ns, size, optional sha256) of the
+    files it was built from. On lookup the files are stat()ed; an entry whose
+    files changed size is dropped, an entry whose files only changed mtime is
+    kept if the content hash is unchanged (e.g. `touch` or a git checkout).
+
+    A FileWatcher (file_watcher.py) can additionally invalidate entries as
+    soon as a file changes (invalidate_path() drops exactly the entries built
+    from it). While an inotify watcher covers a directory (watch()), lookups
+    of entries built only from files below it skip the stat() validation.
+
+Memory:
+    Entries are sized on insert and evicted least-recently-used once the cache
+    exceeds `max_bytes` (default 64 MB, half of the 128 MB target_heap_size in
+    docs/requirements/NFR_PERFORMANCE.yaml).
+
+Usage:
+    cache = get_composition_cache()
+    text = cache.read_text(path)
+    data = cache.read_yaml(path)
+    spec = cache.get_or_load(("spec", agent_id), loader, [comp_file])
+
+Environment:
+    VIBE_COMPOSITION_CACHE=0        Disable caching (every lookup misses)
+    VIBE_COMPOSITION_CACHE_MB=<n>   Override the memory cap
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+try:
+    from .yaml_loader import YAMLParseError, parse_yaml
+except ImportError:
+    from yaml_loader import YAMLParseError, parse_yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Sentinel for "not in cache" (None is a legitimate cached value)
+MISSING = object()
+
+PathLike = Union[str, Path]
+
+# A backing source maps (kind, path) -> (value, fingerprint) or None.
+# Used by prompt_bundle to serve precompiled files on a cache miss.
+BackingSource = Callable[[str, str], Optional[Tuple[Any, "FileFingerprint"]]]
+
+
+# =============================================================================
+# FINGERPRINTS
+# =============================================================================
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Identity of a file at the time a cache entry was built"""
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: Optional[str] = None
+
+    @classmethod
+    def of(cls, path: PathLike, content: Optional[bytes] = None) -> "FileFingerprint":
+        """
+        Fingerprint a file.
+
+        Args:
+            path: File path
+            content: File content (if already read) - enables hash verification
+
+        Returns:
+            FileFingerprint (mtime_ns/size are -1 if the file does not exist)
+        """
+        path = str(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return cls(path=path, mtime_ns=-1, size=-1)
+
+        digest = hashlib.sha256(content).hexdigest() if content is not None else None
+        return cls(path=path, mtime_ns=st.st_mtime_ns, size=st.st_size, sha256=digest)
+
+    def check(self) -> Optional["FileFingerprint"]:
+        """
+        Check whether the file still matches this fingerprint.
+
+        Returns:
+            self (unchanged), a refreshed fingerprint (mtime changed but content
+            hash identical), or None (file changed / appeared / disappeared)
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return self if self.size == -1 else None
+
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.size:
+            return self
+
+        if st.st_size != self.size or self.sha256 is None:
+            return None
+
+        # Same size, new mtime: verify by content hash
+        try:
+            with open(self.path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+        if digest != self.sha256:
+            return None
+
+        return FileFingerprint(self.path, st.st_mtime_ns, st.st_size, digest)
+
+
+@dataclass
+class CacheEntry:
+    """Cached value plus the fingerprints it depends on"""
+    value: Any
+    fingerprints: Tuple[FileFingerprint, ...]
+    size_bytes: int
+    # Normalized dependency paths (reverse index for invalidate_path())
+    paths: Tuple[str, ...] = ()
+    # All dependencies are below watched roots and were unchanged when stored
+    watched: bool = False
+
+
+def _normalize_path(path: PathLike) -> str:
+    return os.path.realpath(str(path))
+
+
+def _deep_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    """Approximate recursive memory footprint of a parsed structure"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _deep_sizeof(k, _seen) + _deep_sizeof(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_sizeof(item, _seen)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), _seen)
+    return size
+
+
+# =============================================================================
+# COMPOSITION CACHE
+# =============================================================================
+
+class CompositionCache:
+    """
+    Thread-safe LRU cache with file-fingerprint invalidation.
+
+    Keys are arbitrary hashables, by convention tuples such as
+    ("spec", agent_id), ("meta", agent_id, task_id) or ("text", path).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._sources: List[BackingSource] = []
+        self._lock = threading.RLock()
+        # Keys whose loader is running (concurrent misses wait instead of reloading)
+        self._loading: Dict[Hashable, threading.Event] = {}
+        # Per-thread hit/miss/bytes counters (read by composition_metrics stages)
+        self._local = threading.local()
+        # Dependency path -> keys of the entries built from it
+        self._dependents: Dict[str, set] = {}
+        # Directory prefixes covered by a trusted file watcher (see watch())
+        self._watched: Tuple[str, ...] = ()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # -------------------------------------------------------------------------
+    # CORE API
+    # -------------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Look up a key, validating its file fingerprints.
+
+        Returns:
+            Cached value, or `default` if missing or stale
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self.enabled:
+                self.misses += 1
+                self._count(misses=1)
+                return default
+
+            if entry.watched and self._watched:
+                # A file watcher invalidates this entry when its files change
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(hits=1)
+                return entry.value
+
+            refreshed = []
+            for fp in entry.fingerprints:
+                current = fp.check()
+                if current is None:
+                    self._remove(key)
+                    self.invalidations += 1
+                    self.misses += 1
+                    self._count(misses=1)
+                    logger.debug(f"Composition cache invalidated: {key} ({fp.path} changed)")
+                    return default
+                refreshed.append(current)
+
+            entry.fingerprints = tuple(refreshed)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._count(hits=1)
+            return entry.value
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        dependencies: Iterable[Union[PathLike, FileFingerprint]] = (),
+        size_bytes: Optional[int] = None
+    ) -> Any:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache (treated as immutable by all readers)
+            dependencies: Files (or precomputed fingerprints) the value was built from
+            size_bytes: Memory estimate (computed if omitted)
+
+        Returns:
+            The value (for chaining)
+        """
+        if not self.enabled:
+            return value
+
+        fingerprints = tuple(
+            dep if isinstance(dep, FileFingerprint) else FileFingerprint.of(dep)
+            for dep in dependencies
+        )
+        if size_bytes is None:
+            size_bytes = _deep_sizeof(value)
+
+        if size_bytes > self.max_bytes:
+            logger.debug(f"Composition cache: {key} too large to cache ({size_bytes:,} bytes)")
+            return value
+
+        paths = tuple(_normalize_path(fp.path) for fp in fingerprints)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = CacheEntry(value, fingerprints, size_bytes, paths)
+            entry.watched = self._is_watched(entry)
+            self._entries[key] = entry
+            for path in paths:
+                self._dependents.setdefault(path, set()).add(key)
+            self.total_bytes += size_bytes
+            self._evict()
+
+        return value
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        dependencies: Iterable[PathLike] = ()
+    ) -> Any:
+        """
+        Return cached value for key, or call loader() and cache its result.
+
+        Concurrent misses on the same key run the loader once: other threads
+        wait for it and read the cached result (PromptRegistry.compose_many).
+        """
+        while True:
+            value = self.get(key)
+            if value is not MISSING:
+                return value
+            with self._lock:
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this key - wait, then look it up again
+            # (if that load failed or was not cacheable, this thread loads itself)
+            pending.wait()
+
+        try:
+            # Fingerprint BEFORE loading so a concurrent edit invalidates the entry
+            fingerprints = [FileFingerprint.of(dep) for dep in dependencies]
+            return self.put(key, loader(), fingerprints)
+        finally:
+            with self._lock:
+                del self._loading[key]
+            pending.set()
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single key. Returns True if it was present."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.invalidations += 1
+            return True
+
+    def invalidate_path(self, path: PathLike) -> int:
+        """
+        Drop every entry built from a file (or from any file below a directory).
+
+        Returns:
+            Number of entries dropped
+        """
+        path = _normalize_path(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            keys = set(self._dependents.get(path, ()))
+            for dep_path, dependents in self._dependents.items():
+                if dep_path.startswith(prefix):
+                    keys.update(dependents)
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+        if keys:
+            logger.debug(f"Composition cache invalidated {len(keys)} entries ({path} changed)")
+        return len(keys)
+
+    def watch(self, roots: Iterable[PathLike]) -> None:
+        """
+        Trust a file watcher for files below `roots`.
+
+        Entries built only from files below these directories skip the
+        stat() validation on lookup - the watcher invalidates them instead.
+        """
+        with self._lock:
+            prefixes = {_normalize_path(root).rstrip(os.sep) + os.sep for root in roots}
+            self._watched = tuple(sorted(set(self._watched) | prefixes))
+            for entry in self._entries.values():
+                entry.watched = self._is_watched(entry)
+
+    def unwatch(self) -> None:
+        """Stop trusting file watchers (lookups validate fingerprints again)"""
+        with self._lock:
+            self._watched = ()
+            for entry in self._entries.values():
+                entry.watched = False
+
+    def add_source(self, source: BackingSource) -> None:
+        """Register a backing source consulted by read_text/read_yaml on a miss"""
+        with self._lock:
+            self._sources.append(source)
+
+    def clear(self) -> None:
+        """Drop all entries (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+            self.total_bytes = 0
+
+    def thread_counters(self) -> Tuple[int, int, int]:
+        """(hits, misses, bytes_read) of the calling thread since it first used the cache"""
+        local = self._local
+        return getattr(local, "hits", 0), getattr(local, "misses", 0), getattr(local, "bytes_read", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "watched_roots": [root.rstrip(os.sep) for root in self._watched],
+            }
+
+    # -------------------------------------------------------------------------
+    # FILE HELPERS
+    # -------------------------------------------------------------------------
+
+    def read_text(self, path: PathLike) -> str:
+        """Read a text file through the cache (raises OSError like open())"""
+        path = str(path)
+        key = ("text", path)
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        value = self._from_sources("text", path)
+        if value is not MISSING:
+            return value
+
+        raw = self._read_bytes(path)
+        text = raw.decode("utf-8")
+        return self.put(key, text, [FileFingerprint.of(path, raw)], sys.getsizeof(text))
+
+    def read_yaml(self, path: PathLike) -> Any:
+        """
+        Parse a YAML file through the cache.
+
+        Raises:
+            OSError: If the file cannot be read
+            YAMLParseError: If the file is not valid YAML
+        """
+        path = str(path)
+        key = ("yaml", path)
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        value = self._from_sources("yaml", path)
+        if value is not MISSING:
+            return value
+
+        raw = self._read_bytes(path)
+        data = parse_yaml(raw, path)
+        return self.put(key, data, [FileFingerprint.of(path, raw)])
+
+    def _from_sources(self, kind: str, path: str) -> Any:
+        """Serve a miss from a backing source if its fingerprint is still fresh"""
+        for source in self._sources:
+            found = source(kind, path)
+            if found is None:
+                continue
+            value, fingerprint = found
+            current = fingerprint.check()
+            if current is None:
+                continue
+            # Bundle values are sized from the file size to avoid a deep walk
+            size = fingerprint.size if kind == "text" else fingerprint.size * 8
+            return self.put((kind, path), value, [current], size_bytes=size)
+        return MISSING
+
+    def _read_bytes(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            raw = f.read()
+        self._count(bytes_read=len(raw))
+        return raw
+
+    def _count(self, hits: int = 0, misses: int = 0, bytes_read: int = 0) -> None:
+        local = self._local
+        local.hits = getattr(local, "hits", 0) + hits
+        local.misses = getattr(local, "misses", 0) + misses
+        local.bytes_read = getattr(local, "bytes_read", 0) + bytes_read
+
+    # -------------------------------------------------------------------------
+    # INTERNALS (caller holds lock)
+    # -------------------------------------------------------------------------
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size_bytes
+        self._unindex(key, entry)
+
+    def _unindex(self, key: Hashable, entry: CacheEntry) -> None:
+        for path in entry.paths:
+            dependents = self._dependents.get(path)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[path]
+
+    def _is_watched(self, entry: CacheEntry) -> bool:
+        """Entry depends only on watched files, unchanged since it was built"""
+        if not self._watched or not entry.paths:
+            return False
+        if not all(path.startswith(self._watched) for path in entry.paths):
+            return False
+        # A file changed while the value was loading: keep validating by stat()
+        return all(fp.check() is fp for fp in entry.fingerprints)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size_bytes
+            self._unindex(key, entry)
+            self.evictions += 1
+            logger.debug(f"Composition cache evicted: {key} ({entry.size_bytes:,} bytes)")
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_default_cache: Optional[CompositionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_composition_cache() -> CompositionCache:
+    """Get the process-wide composition cache (created on first use)"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                enabled = os.environ.get("VIBE_COMPOSITION_CACHE", "1") not in ("0", "false", "no")
+                max_mb = os.environ.get("VIBE_COMPOSITION_CACHE_MB")
+                max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+                _default_cache = CompositionCache(max_bytes=max_bytes, enabled=enabled)
+    return _default_cache
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Composition Client - Talk to a resident composition server (vibe-cli serve)
+===========================================================================
+
+Short-lived callers (vibe_helper.compose_prompt, vibe-cli generate) pay for
+importing PyYAML and the runtime and for composing from a cold cache on
+every run. When `vibe-cli serve` is running, they send the request over a
+local Unix socket instead and get the prompt from warm caches.
+
+This module only uses the standard library (and workspace_utils), so
+importing it costs nothing; callers import the runtime only when no server
+is available.
+
+The server resolves workspace paths (_resolved_*) per request, so compose
+requests carry the caller's active workspace: context["workspace_name"]
+(and `workspace` for registry composition) default to the caller's
+get_active_workspace(), not the server's.
+
+Protocol (one JSON object per line, JSON-RPC 2.0):
+    -> {"jsonrpc": "2.0", "id": 1, "method": "compose", "params": {...}}
+    <- {"jsonrpc": "2.0", "id": 1, "result": {"prompt": "...", "report": {...}}}
+    <- {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "...", "data": {"type": "..."}}}
+
+Methods: ping, compose, compose_many, list_agents, list_tasks, stats, shutdown
+
+Usage:
+    client = get_composition_client()      # None if no server is listening
+    if client is not None:
+        prompt = client.compose("VIBE_ALIGNER", "02_feature_extraction", context)
+
+Environment:
+    VIBE_COMPOSE_SOCKET=<path>    Socket path (default: .cache/vibe/compose.sock)
+    VIBE_COMPOSE_SERVER=0         Never use a server (always compose in-process)
+"""
+
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_SOCKET_PATH = _REPO_ROOT / ".cache" / "vibe" / "compose.sock"
+
+# Seconds to wait for a reply (batch composition of every agent takes a while cold)
+DEFAULT_TIMEOUT_S = 120.0
+
+
+class CompositionServerError(Exception):
+    """The server ran the request and it failed (e.g. AgentNotFoundError)"""
+
+    def __init__(self, message: str, error_type: str = "", code: int = -32000):
+        super().__init__(message)
+        self.error_type = error_type
+        self.code = code
+
+
+def socket_path() -> Path:
+    """Configured server socket path"""
+    return Path(os.environ.get("VIBE_COMPOSE_SOCKET") or DEFAULT_SOCKET_PATH)
+
+
+def active_workspace() -> str:
+    """The caller's active workspace (see workspace_utils.get_active_workspace)"""
+    scripts = str(_REPO_ROOT / "scripts")
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    try:
+        from workspace_utils import get_active_workspace
+    except ImportError:
+        return os.environ.get("ACTIVE_WORKSPACE", "ROOT")
+    return get_active_workspace()
+
+
+def _in_caller_workspace(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of compose params that pins the workspace to the caller's"""
+    context = dict(params.get("context") or {})
+    workspace = params.get("workspace") or context.get("workspace_name") or active_workspace()
+    context.setdefault("workspace_name", workspace)
+    return {**params, "context": context, "workspace": workspace}
+
+
+class CompositionClient:
+    """
+    JSON-RPC client over a Unix socket (one connection, reused across calls).
+
+    Raises ConnectionError if the server is unreachable - callers fall back
+    to in-process composition. Thread-safe (calls are serialized).
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None, timeout: float = DEFAULT_TIMEOUT_S):
+        self.path = Path(path) if path is not None else socket_path()
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """
+        Call a server method.
+
+        Raises:
+            ConnectionError: Server unreachable or connection lost
+            CompositionServerError: The method failed on the server
+        """
+        request = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+        payload = (json.dumps(request, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                self._connect()
+                self._sock.sendall(payload)
+                line = self._reader.readline()
+            except OSError as e:
+                self.close()
+                raise ConnectionError(f"Composition server at {self.path} unavailable: {e}") from e
+            if not line:
+                self.close()
+                raise ConnectionError(f"Composition server at {self.path} closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            error = response["error"]
+            raise CompositionServerError(
+                error.get("message", "unknown error"),
+                (error.get("data") or {}).get("type", ""),
+                error.get("code", -32000)
+            )
+        return response.get("result")
+
+    def ping(self) -> bool:
+        """Whether a server answers on the socket"""
+        try:
+            return self.call("ping") == "pong"
+        except (ConnectionError, CompositionServerError):
+            return False
+
+    def compose(
+        self,
+        agent: str,
+        task: str,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        **options: Any
+    ) -> str:
+        """Compose one prompt (options: registry, inject_governance, inject_tools, inject_sops, workspace)"""
+        return self.compose_with_report(agent, task, context, token_budget, **options)["prompt"]
+
+    def compose_with_report(
+        self,
+        agent: str,
+        task: str,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        **options: Any
+    ) -> Dict[str, Any]:
+        """Compose one prompt; returns {prompt, report, elapsed_ms}"""
+        return self.call("compose", **_in_caller_workspace(
+            dict(agent=agent, task=task, context=context, token_budget=token_budget, **options)
+        ))
+
+    def compose_many(self, requests: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Compose a batch; returns one {ok, prompt, report, error, elapsed_ms} per request"""
+        requests = [
+            _in_caller_workspace(
+                request if isinstance(request, dict) else dict(zip(("agent", "task", "context"), request))
+            )
+            for request in requests
+        ]
+        return self.call("compose_many", requests=requests, max_workers=max_workers)
+
+    def list_agents(self) -> Dict[str, str]:
+        return self.call("list_agents")
+
+    def list_tasks(self, agent: str) -> List[str]:
+        return self.call("list_tasks", agent=agent)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call("stats")
+
+    def shutdown(self) -> None:
+        self.call("shutdown")
+        self.close()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _connect(self) -> None:
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def __enter__(self) -> "CompositionClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def get_composition_client(path: Optional[os.PathLike] = None) -> Optional[CompositionClient]:
+    """
+    Connect to a running composition server, if any.
+
+    Returns:
+        A connected client, or None (no socket, server not answering, or
+        VIBE_COMPOSE_SERVER=0) - compose in-process then
+    """
+    if os.environ.get("VIBE_COMPOSE_SERVER", "1") in ("0", "false", "no") or not hasattr(socket, "AF_UNIX"):
+        return None
+    client = CompositionClient(path)
+    if not client.path.exists():
+        return None
+    if not client.ping():
+        client.close()
+        return None
+    return client
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Composition Metrics - Per-stage timing histograms for prompt composition
+========================================================================
+
+docs/requirements/NFR_PERFORMANCE.yaml sets prompt_composition targets
+(p50 < 100 ms, p99 < 500 ms) and asks to "log composition time in
+prompt_runtime.py". This module times every composition stage and keeps
+in-process histograms, so regressions show up as shifted percentiles rather
+than anecdotes.
+
+Stages:
+    runtime.workspace    workspace path resolution
+    runtime.spec         _composition.yaml load
+    runtime.meta         task_*.meta.yaml load
+    runtime.knowledge    knowledge dependency resolution (incl. slicing)
+    runtime.compose      section rendering and token budgeting
+    runtime.total        whole PromptRuntime composition
+    registry.governance  Guardian Directives
+    registry.tools       tool definitions
+    registry.sops        SOPs
+    registry.context     context enrichment
+    registry.total       whole PromptRegistry composition (includes runtime.*)
+
+Each stage also records bytes read from disk and composition cache hits and
+misses of the composing thread (see CompositionCache.thread_counters()).
+
+Overhead is two perf_counter_ns() calls, one bisect and one short lock per
+stage. Set VIBE_COMPOSITION_METRICS=0 to disable.
+
+Usage:
+    metrics = get_composition_metrics()
+    with metrics.stage("runtime.spec", cache):
+        spec = load_spec()
+    metrics.snapshot()                 # {stage: {count, p50_ms, p99_ms, ...}}
+    metrics.export(".cache/vibe/composition_metrics.json")
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# docs/requirements/NFR_PERFORMANCE.yaml -> prompt_composition / alerts
+TARGET_P50_MS = 100.0
+TARGET_P99_MS = 500.0
+SLOW_COMPOSITION_MS = 1000.0
+
+# Stages checked against the NFR targets
+TOTAL_STAGES = ("runtime.total", "registry.total")
+
+# Histogram bucket upper bounds in milliseconds (last bucket: +inf)
+BUCKET_BOUNDS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000
+)
+
+
+@dataclass
+class StageHistogram:
+    """Latency histogram plus I/O counters of one composition stage"""
+    count: int = 0
+    total_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKET_BOUNDS_MS) + 1))
+    bytes_read: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def add(self, elapsed_ms: float, bytes_read: int = 0, cache_hits: int = 0, cache_misses: int = 0) -> None:
+        self.min_ms = elapsed_ms if self.count == 0 else min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.bytes_read += bytes_read
+        self.cache_hits += cache_hits
+        self.cache_misses += cache_misses
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the q-th percentile (0-100) from the buckets.
+
+        Interpolates linearly inside the bucket, clamped to the observed
+        min/max, so a stage whose samples share one bucket still reports
+        sensible values.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS_MS[index - 1] if index > 0 else 0.0
+                upper = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                estimate = lower + (upper - lower) * max(rank - seen, 0) / bucket_count
+                return min(max(estimate, self.min_ms), self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "bytes_read": self.bytes_read,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            "buckets": {
+                (f"le_{bound}" if i < len(BUCKET_BOUNDS_MS) else "inf"): n
+                for i, (bound, n) in enumerate(zip(BUCKET_BOUNDS_MS + (None,), self.buckets))
+                if n
+            },
+        }
+
+
+class CompositionMetrics:
+    """Thread-safe registry of per-stage histograms"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages: Dict[str, StageHistogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+
+    @contextmanager
+    def stage(self, name: str, cache: Any = None) -> Iterator[None]:
+        """
+        Time a block as one sample of `name`.
+
+        Args:
+            name: Stage name (see module docstring)
+            cache: CompositionCache whose per-thread counters are attributed
+                to the stage (optional)
+
+        Only blocks that complete without an exception are recorded.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        before = cache.thread_counters() if cache is not None else (0, 0, 0)
+        start = time.perf_counter_ns()
+        # Failed stages are not latency samples: an exception skips the record
+        yield
+        elapsed_ms = (time.perf_counter_ns() - start) / 1_000_000
+        after = cache.thread_counters() if cache is not None else (0, 0, 0)
+        self.record(
+            name,
+            elapsed_ms,
+            bytes_read=after[2] - before[2],
+            cache_hits=after[0] - before[0],
+            cache_misses=after[1] - before[1],
+        )
+
+    def record(
+        self,
+        name: str,
+        elapsed_ms: float,
+        bytes_read: int = 0,
+        cache_hits: int = 0,
+        cache_misses: int = 0
+    ) -> None:
+        """Record one stage sample"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = StageHistogram()
+            histogram.add(elapsed_ms, bytes_read, cache_hits, cache_misses)
+
+        if name in TOTAL_STAGES and elapsed_ms > SLOW_COMPOSITION_MS:
+            logger.warning(
+                f"Slow composition: {name} took {elapsed_ms:.0f}ms "
+                f"(> {SLOW_COMPOSITION_MS:.0f}ms) - check for large knowledge files"
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage statistics, keyed by stage name (sorted)"""
+        with self._lock:
+            return {name: self._stages[name].to_dict() for name in sorted(self._stages)}
+
+    def check_targets(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Compare the total-composition stages with the NFR latency targets.
+
+        Returns:
+            {stage: {p50_ms, p99_ms, p50_ok, p99_ok}} for stages with samples
+        """
+        result = {}
+        for name, stats in self.snapshot().items():
+            if name in TOTAL_STAGES:
+                result[name] = {
+                    "p50_ms": stats["p50_ms"],
+                    "p99_ms": stats["p99_ms"],
+                    "p50_ok": stats["p50_ms"] < TARGET_P50_MS,
+                    "p99_ok": stats["p99_ms"] < TARGET_P99_MS,
+                }
+        return result
+
+    def export(self, path: Union[str, Path]) -> Path:
+        """Write a JSON snapshot (for `vibe-cli stats --input` or dashboards)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "started_at": self.started_at,
+            "exported_at": datetime.utcnow().isoformat() + "Z",
+            "pid": os.getpid(),
+            "targets": {"p50_ms": TARGET_P50_MS, "p99_ms": TARGET_P99_MS},
+            "stages": self.snapshot(),
+        }
+        path.write_text(json.dumps(payload, indent=2))
+        return path
+
+    def reset(self) -> None:
+        """Drop all samples"""
+        with self._lock:
+            self._stages.clear()
+            self.started_at = datetime.utcnow().isoformat() + "Z"
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_default_metrics: Optional[CompositionMetrics] = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_composition_metrics() -> CompositionMetrics:
+    """Get the process-wide composition metrics (created on first use)"""
+    global _default_metrics
+    if _default_metrics is None:
+        with _default_metrics_lock:
+            if _default_metrics is None:
+                enabled = os.environ.get("VIBE_COMPOSITION_METRICS", "1") not in ("0", "false", "no")
+                _default_metrics = CompositionMetrics(enabled=enabled)
+    return _default_metrics
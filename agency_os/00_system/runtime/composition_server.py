@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Composition Server - Resident prompt composition over a Unix socket
+===================================================================
+
+`vibe-cli serve` runs this server. It keeps PyYAML, the runtime, the
+composition cache and the prompt bundle loaded, and a FileWatcher keeps the
+cache correct while fragments are edited (file_watcher.py). Repeated
+short-lived callers then compose in well under a millisecond instead of
+paying process startup and a cold cache each time.
+
+Protocol: newline-delimited JSON-RPC 2.0 (see composition_client.py).
+
+Methods:
+    ping                              -> "pong"
+    compose(agent, task, context, token_budget, registry=False,
+            inject_governance, inject_tools, inject_sops, workspace)
+                                      -> {prompt, report, elapsed_ms}
+    compose_many(requests, max_workers)
+                                      -> [{ok, prompt, report, error, elapsed_ms}]
+    list_agents                       -> {agent_id: agent path}
+    list_tasks(agent)                 -> [task_id, ...]
+    stats                             -> {server, cache, metrics, watcher, agent_index}
+    shutdown                          -> "ok" (server exits after replying;
+                                         only for clients running as the server's uid)
+
+The socket is created with mode 0600 (umask set around bind), so only its
+owner (and root) can connect. Where the platform reports the peer's uid
+(SO_PEERCRED), `shutdown` is further restricted to the server's own uid.
+
+`registry=False` composes with PromptRuntime (like vibe_helper and
+`vibe-cli generate`); `registry=True` uses PromptRegistry (governance,
+tools, SOPs, context enrichment).
+
+Usage:
+    server = CompositionServer()
+    server.serve_forever()        # Ctrl+C or a `shutdown` call stops it
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .composition_cache import get_composition_cache
+    from .composition_client import CompositionClient, socket_path
+    from .composition_metrics import get_composition_metrics
+    from .file_watcher import FileWatcher, get_file_watcher
+    from .prompt_registry import PromptRegistry
+    from .prompt_runtime import AGENT_REGISTRY, PromptRuntimeError
+except ImportError:
+    from composition_cache import get_composition_cache
+    from composition_client import CompositionClient, socket_path
+    from composition_metrics import get_composition_metrics
+    from file_watcher import FileWatcher, get_file_watcher
+    from prompt_registry import PromptRegistry
+    from prompt_runtime import AGENT_REGISTRY, PromptRuntimeError
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+COMPOSITION_ERROR = -32000
+PERMISSION_DENIED = -32001
+INTERNAL_ERROR = -32603
+
+# Methods that affect every client of the server
+PRIVILEGED_METHODS = frozenset({"shutdown"})
+
+
+class ServerAlreadyRunningError(RuntimeError):
+    """Another server already answers on the socket"""
+    pass
+
+
+def _peer_uid(connection: socket.socket) -> Optional[int]:
+    """uid of the process on the other end of a Unix socket (None if the platform can't tell)"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    ucred = struct.Struct("3i")  # pid, uid, gid
+    try:
+        _, uid, _ = ucred.unpack(connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, ucred.size))
+    except OSError:
+        return None
+    return uid
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One client connection: reads JSON lines, writes one reply per line"""
+
+    def handle(self) -> None:
+        peer_uid = _peer_uid(self.request)
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            reply = self.server.composition.handle_line(line, peer_uid)
+            try:
+                self.wfile.write(reply)
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CompositionServer:
+    """Resident composition server bound to a Unix socket"""
+
+    def __init__(
+        self,
+        path: Optional[os.PathLike] = None,
+        hot_reload: bool = True,
+        watcher: Optional[FileWatcher] = None
+    ):
+        self.path = Path(path) if path is not None else socket_path()
+        self.hot_reload = hot_reload
+        self.watcher = watcher
+        self.started_at: Optional[float] = None
+        self.requests: Dict[str, int] = {}
+        self._server: Optional[_UnixServer] = None
+        self._stats_lock = threading.Lock()
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "ping": lambda: "pong",
+            "compose": self.compose,
+            "compose_many": self.compose_many,
+            "list_agents": self.list_agents,
+            "list_tasks": self.list_tasks,
+            "stats": self.stats,
+            "shutdown": self.shutdown,
+        }
+
+    # -------------------------------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------------------------------
+
+    def bind(self) -> None:
+        """
+        Bind the socket (replacing a stale one).
+
+        Raises:
+            ServerAlreadyRunningError: If a live server owns the socket
+        """
+        if self.path.exists():
+            if CompositionClient(self.path, timeout=2.0).ping():
+                raise ServerAlreadyRunningError(
+                    f"A composition server is already running on {self.path}\n"
+                    f"Fix: Stop it with `./vibe-cli.py serve --stop` or use another --socket"
+                )
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Owner-only from the moment the socket file exists (a chmod after bind leaves a window)
+        umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(str(self.path), _RequestHandler)
+        finally:
+            os.umask(umask)
+        self._server.composition = self
+
+        # Shared runtime and process-wide caches, created once
+        PromptRegistry._get_runtime()
+        if self.hot_reload:
+            self.watcher = (self.watcher or get_file_watcher()).start()
+            # New or renamed agents/tasks/SOPs are picked up without a restart
+            self.watcher.add_hook(self._refresh_agent_index)
+        self.started_at = time.time()
+        logger.info(f"Composition server listening on {self.path}")
+
+    def serve_forever(self) -> None:
+        """Bind (if needed) and serve until shutdown()"""
+        if self._server is None:
+            self.bind()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self.close()
+
+    def shutdown(self) -> str:
+        """Stop serve_forever() (returns immediately; safe from a handler thread)"""
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+        return "ok"
+
+    @staticmethod
+    def _refresh_agent_index(paths) -> None:
+        PromptRegistry._get_runtime().agent_index.refresh()
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.remove_hook(self._refresh_agent_index)
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+        if self.watcher is not None and self.hot_reload:
+            self.watcher.stop()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info("Composition server stopped")
+
+    def warm(self) -> int:
+        """Compose every task of every agent once (fills all caches); returns prompts composed"""
+        requests = [
+            {"agent": agent, "task": task, "inject_governance": False}
+            for agent in sorted(AGENT_REGISTRY)
+            for task in self._task_ids(agent)
+        ]
+        results = PromptRegistry.compose_many(requests)
+        return sum(1 for result in results if result.ok)
+
+    # -------------------------------------------------------------------------
+    # DISPATCH
+    # -------------------------------------------------------------------------
+
+    def handle_line(self, line: bytes, peer_uid: Optional[int] = None) -> bytes:
+        """
+        Handle one JSON-RPC request line; returns the reply line.
+
+        Args:
+            line: Request line
+            peer_uid: uid of the calling process (None = unknown, e.g. no SO_PEERCRED)
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                return self._error(None, PARSE_ERROR, f"Parse error: {e}")
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                return self._error(None, INVALID_REQUEST, "Invalid request: expected {method, params}")
+
+            request_id = request.get("id")
+            method = self._methods.get(request["method"])
+            if method is None:
+                return self._error(request_id, METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+            if request["method"] in PRIVILEGED_METHODS and peer_uid not in (None, os.getuid()):
+                return self._error(
+                    request_id, PERMISSION_DENIED,
+                    f"Permission denied: {request['method']} is reserved for the server's owner (uid {os.getuid()})"
+                )
+
+            params = request.get("params") or {}
+            with self._stats_lock:
+                self.requests[request["method"]] = self.requests.get(request["method"], 0) + 1
+            try:
+                result = method(**params) if isinstance(params, dict) else method(*params)
+            except TypeError as e:
+                return self._error(request_id, INVALID_PARAMS, f"Invalid params for {request['method']}: {e}")
+            return self._reply({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+        except (PromptRuntimeError, FileNotFoundError, KeyError, ValueError) as e:
+            return self._error(request_id, COMPOSITION_ERROR, str(e), type(e).__name__)
+        except Exception as e:
+            logger.error(f"Composition server error: {e}", exc_info=True)
+            return self._error(request_id, INTERNAL_ERROR, str(e), type(e).__name__)
+
+    @staticmethod
+    def _reply(payload: Dict[str, Any]) -> bytes:
+        return (json.dumps(payload, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    @classmethod
+    def _error(cls, request_id: Any, code: int, message: str, error_type: str = "") -> bytes:
+        return cls._reply({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": code, "message": message, "data": {"type": error_type}},
+        })
+
+    # -------------------------------------------------------------------------
+    # METHODS
+    # -------------------------------------------------------------------------
+
+    def compose(
+        self,
+        agent: str,
+        task: str,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        registry: bool = False,
+        inject_governance: bool = True,
+        inject_tools: Optional[List[str]] = None,
+        inject_sops: Optional[List[str]] = None,
+        workspace: Optional[str] = None
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        if registry:
+            prompt, report = PromptRegistry.compose_with_report(
+                agent, task, workspace, inject_governance, inject_tools, inject_sops, context or {}, token_budget
+            )
+        else:
+            prompt, report = PromptRegistry._get_runtime().compose_with_report(
+                agent, task, context or {}, token_budget
+            )
+        return {"prompt": prompt, "report": report.to_dict(), "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+    def compose_many(self, requests: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                "ok": result.ok,
+                "prompt": result.prompt,
+                "report": result.report.to_dict() if result.report is not None else None,
+                "error": None if result.ok else f"{type(result.error).__name__}: {result.error}",
+                "elapsed_ms": result.elapsed_ms,
+            }
+            for result in PromptRegistry.compose_many(requests, max_workers)
+        ]
+
+    def list_agents(self) -> Dict[str, str]:
+        return dict(sorted(AGENT_REGISTRY.items()))
+
+    def list_tasks(self, agent: str) -> List[str]:
+        return self._task_ids(agent)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            requests = dict(self.requests)
+        return {
+            "server": {
+                "socket": str(self.path),
+                "pid": os.getpid(),
+                "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+                "requests": requests,
+            },
+            "cache": get_composition_cache().stats(),
+            "metrics": get_composition_metrics().check_targets(),
+            "watcher": self.watcher.stats() if self.watcher is not None else None,
+            "agent_index": PromptRegistry._get_runtime().agent_index.stats(),
+        }
+
+    @staticmethod
+    def _task_ids(agent: str) -> List[str]:
+        return PromptRegistry._get_runtime().list_tasks(agent)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Composition Session - Shared-prefix composition of one agent's tasks
+====================================================================
+
+Multi-task phases compose several tasks of the same agent in a row (the six
+VIBE_ALIGNER tasks, the five CODE_GENERATOR tasks, the three
+LEAN_CANVAS_VALIDATOR tasks). Every one of those prompts starts with the same
+sections: the agent's core personality and its tools section. A session
+loads the agent's composition spec once and renders that invariant prefix
+once; each task then only renders its own knowledge, task instructions,
+gates and runtime context.
+
+The prefix is the leading run of `base` and `tools` steps in
+composition_order. It is rendered with the agent's resolved ${variables}
+and re-rendered only when those values change (e.g. a variable that reads
+the runtime context).
+
+shared_prefix is exactly the text every prompt of the session starts with,
+and it is the first cache breakpoint block of compose_blocks() - the part
+provider prompt caching (prompt_blocks.py) reuses across the tasks.
+
+The spec and prefix are snapshots: fragments edited during a session are
+picked up by the next session.
+
+Usage:
+    session = runtime.session("VIBE_ALIGNER", context={"project_id": "demo"})
+    for task_id in runtime.list_tasks("VIBE_ALIGNER"):
+        prompt, report = session.compose_with_report(task_id)
+    print(session.shared_prefix_tokens, session.stats())
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .prompt_blocks import PromptBlock, build_prompt_blocks
+    from .token_budget import CompositionReport, estimate_tokens
+except ImportError:
+    from prompt_blocks import PromptBlock, build_prompt_blocks
+    from token_budget import CompositionReport, estimate_tokens
+
+# composition_order step types that are the same for every task of an agent
+PREFIX_STEP_TYPES = frozenset({"base", "tools"})
+
+
+class CompositionSession:
+    """
+    Composes tasks of one agent, rendering the shared prefix once.
+
+    Created by PromptRuntime.session(); prompts are identical to
+    PromptRuntime.compose_with_report() for the same arguments.
+    """
+
+    def __init__(
+        self,
+        runtime: Any,
+        agent_id: str,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ):
+        self.runtime = runtime
+        self.agent_id = agent_id
+        self.context = dict(context or {})
+        self.token_budget = token_budget
+        self.spec = runtime._load_composition_spec(agent_id)
+        self.tasks = 0
+        self.prefix_builds = 0
+        self.prefix_reuses = 0
+        self._prefix_key: Optional[Tuple] = None
+        self._prefix_sections: List[Tuple[str, str]] = []
+        self._prefix_steps = 0
+        for step in self.spec.composition_order:
+            if step["type"] not in PREFIX_STEP_TYPES:
+                break
+            self._prefix_steps += 1
+        self._lock = threading.Lock()
+
+    def compose(self, task_id: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Compose a task prompt (context is merged over the session context)"""
+        prompt, _ = self.compose_with_report(task_id, context)
+        return prompt
+
+    def compose_with_report(
+        self,
+        task_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, CompositionReport]:
+        """Compose a task prompt; returns (prompt, CompositionReport)"""
+        sections, report = self._compose(task_id, context)
+        return self.runtime._join_sections(sections), report
+
+    def compose_blocks(
+        self,
+        task_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[PromptBlock], CompositionReport]:
+        """Compose a task prompt as cache-friendly blocks (blocks[0] is the shared prefix)"""
+        sections, report = self._compose(task_id, context)
+        return build_prompt_blocks(self.runtime._iter_labeled(sections)), report
+
+    @property
+    def shared_prefix(self) -> str:
+        """Text every prompt of this session starts with (empty before the first compose)"""
+        with self._lock:
+            sections = list(self._prefix_sections)
+        if not sections:
+            return ""
+        return "".join(chunk for _, chunk in self.runtime._iter_labeled(sections))
+
+    @property
+    def shared_prefix_chars(self) -> int:
+        return len(self.shared_prefix)
+
+    @property
+    def shared_prefix_tokens(self) -> int:
+        return estimate_tokens(self.shared_prefix)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "tasks": self.tasks,
+            "prefix_steps": self._prefix_steps,
+            "prefix_builds": self.prefix_builds,
+            "prefix_reuses": self.prefix_reuses,
+            "shared_prefix_chars": self.shared_prefix_chars,
+        }
+
+    def _compose(self, task_id: str, context: Optional[Dict[str, Any]]):
+        # A fresh dict per call: composition writes the resolved workspace paths into it
+        merged = {**self.context, **(context or {})}
+        sections, report = self.runtime._compose_task(
+            self.agent_id, task_id, merged, self.token_budget, None, session=self
+        )
+        with self._lock:
+            self.tasks += 1
+        return sections, report
+
+    def _prefix(
+        self,
+        values: Dict[str, Any],
+        render: Callable[[Dict[str, Any]], Optional[Tuple[str, str]]]
+    ) -> Tuple[int, List[Tuple[str, str]]]:
+        """
+        The rendered prefix sections for these variable values.
+
+        Returns:
+            (number of composition_order steps covered, prefix sections)
+        """
+        key = tuple(sorted((name, repr(value)) for name, value in values.items()))
+        with self._lock:
+            if key == self._prefix_key:
+                self.prefix_reuses += 1
+                return self._prefix_steps, list(self._prefix_sections)
+
+        sections = []
+        for step in self.spec.composition_order[:self._prefix_steps]:
+            part = render(step)
+            if part is not None:
+                sections.append(part)
+
+        with self._lock:
+            self._prefix_key = key
+            self._prefix_sections = sections
+            self.prefix_builds += 1
+        return self._prefix_steps, list(sections)
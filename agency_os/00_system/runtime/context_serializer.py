@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Context Serializer - Compact, size-capped runtime context rendering
+===================================================================
+
+Handlers pass whole structures as runtime context (feature specs, generated
+code, validation results). Rendering them with str()/f-strings put Python
+reprs of unbounded size into the prompt, in dict insertion order - so two
+calls with the same data could produce different prompt bytes.
+
+serialize_context() renders the context as JSON instead:
+
+    - compact encoding (no whitespace), one top-level key per line
+    - deterministic key ordering at every level (sort_keys)
+    - a depth limit and an item limit per object/array
+    - a byte budget per top-level value and for the whole context
+    - values over budget are written to a content-addressed artifact store
+      and replaced by a reference the agent can fetch on demand:
+
+        "generated_code":{"$artifact":{"path":".cache/vibe/artifacts/3f2a...json",
+                          "sha256":"3f2a...","size":183204,"summary":"object with 14 keys: ..."}}
+
+Artifacts are fetched with the `fetch_artifact` tool (see
+orchestrator/tools/tool_definitions.yaml), which reads only from the store.
+Without a store, oversized values are pruned and clipped instead.
+
+Usage:
+    serialized = serialize_context(context, ContextLimits(max_value_bytes=2000), get_artifact_store())
+    section = serialized.text
+    serialized.artifacts        # [ArtifactRef, ...]
+
+    get_artifact_store().read("3f2a...", key_path="files.0")
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_ARTIFACT_DIR = _REPO_ROOT / ".cache" / "vibe" / "artifacts"
+
+# Marker key of an artifact reference
+ARTIFACT_KEY = "$artifact"
+
+# Length of reference summaries and of depth-limited placeholders
+SUMMARY_CHARS = 120
+
+# Default response size of ArtifactStore.read() (fetch_artifact tool)
+DEFAULT_FETCH_BYTES = 20_000
+
+
+class ArtifactNotFoundError(Exception):
+    """Referenced artifact is not in the artifact store"""
+    pass
+
+
+@dataclass(frozen=True)
+class ContextLimits:
+    """
+    Size limits for serialized runtime context (bytes are UTF-8 bytes).
+
+    The defaults only stop runaway values; the token budget tightens
+    max_value_bytes further (truncate_runtime_context, see token_budget.py).
+    """
+    max_value_bytes: int = 64_000
+    max_total_bytes: int = 256_000
+    max_depth: int = 4
+    max_items: int = 20
+
+    def capped(self, max_value_bytes: Optional[int]) -> "ContextLimits":
+        """Same limits with a tighter per-value budget (None: unchanged)"""
+        if max_value_bytes is None or max_value_bytes >= self.max_value_bytes:
+            return self
+        return replace(self, max_value_bytes=max_value_bytes)
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    """Reference to a value moved out of the prompt into the artifact store"""
+    path: str
+    sha256: str
+    size: int
+    summary: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {ARTIFACT_KEY: {"path": self.path, "sha256": self.sha256, "size": self.size, "summary": self.summary}}
+
+
+@dataclass
+class SerializedContext:
+    """Result of serialize_context()"""
+    text: str
+    artifacts: List[ArtifactRef] = field(default_factory=list)
+    clipped: List[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode("utf-8"))
+
+
+# =============================================================================
+# ENCODING HELPERS
+# =============================================================================
+
+def encode_compact(value: Any) -> str:
+    """Compact, deterministic JSON (sorted keys, no whitespace)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _byte_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _normalize(value: Any) -> Any:
+    """Convert a value into plain JSON types (string keys, lists for tuples/sets)"""
+    if isinstance(value, Mapping):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(v) for v in value), key=encode_compact)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "to_dict"):
+        return _normalize(value.to_dict())
+    if hasattr(value, "__dataclass_fields__"):
+        return _normalize(vars(value))
+    return str(value)
+
+
+def summarize(value: Any) -> str:
+    """One-line description of a (normalized) value"""
+    if isinstance(value, dict):
+        keys = sorted(value)
+        shown = ", ".join(keys[:5]) + (", ..." if len(keys) > 5 else "")
+        summary = f"object with {len(keys)} keys: {shown}" if keys else "empty object"
+    elif isinstance(value, list):
+        summary = f"array of {len(value)} items"
+    elif isinstance(value, str):
+        text = " ".join(value.split())
+        summary = f"text ({len(value):,} chars): {text}"
+    else:
+        summary = encode_compact(value)
+    return summary if len(summary) <= SUMMARY_CHARS else summary[:SUMMARY_CHARS - 3] + "..."
+
+
+def clip_text(text: str, max_chars: int) -> str:
+    """Clip a text, noting how much was cut"""
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars:,} chars truncated]"
+
+
+# =============================================================================
+# ARTIFACT STORE
+# =============================================================================
+
+class ArtifactStore:
+    """
+    Content-addressed store for context values too large for the prompt.
+
+    Each value is stored once as <sha256>.json (compact JSON). Writes are
+    atomic (temp file + rename), so concurrent writers of the same value
+    are harmless.
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_ARTIFACT_DIR, base_path: Union[str, Path] = _REPO_ROOT):
+        self.root = Path(root)
+        self.base_path = Path(base_path)
+
+    def put(self, value: Any) -> ArtifactRef:
+        """Store a (normalized) value and return its reference"""
+        payload = encode_compact(value).encode("utf-8")
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self.root / f"{digest}.json"
+
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+            logger.debug(f"Stored context artifact {digest[:12]} ({len(payload):,} bytes)")
+
+        return ArtifactRef(self._display_path(path), digest, len(payload), summarize(value))
+
+    def resolve(self, ref: str) -> Path:
+        """
+        Resolve a reference (sha256 or artifact path) to a file in the store.
+
+        Raises:
+            ArtifactNotFoundError: Unknown artifact or path outside the store
+        """
+        name = Path(str(ref).strip()).name
+        digest = name[:-len(".json")] if name.endswith(".json") else name
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ArtifactNotFoundError(
+                f"Invalid artifact reference: '{ref}'\n\n"
+                f"Fix: Pass the sha256 (or path) of a $artifact reference from the runtime context"
+            )
+
+        path = self.root / f"{digest}.json"
+        if not path.exists():
+            raise ArtifactNotFoundError(
+                f"Artifact not found: {digest}\n\n"
+                f"Fix: The artifact store ({self.root}) was cleared - recompose the prompt"
+            )
+        return path
+
+    def load(self, ref: str) -> Any:
+        """Load a stored value"""
+        return json.loads(self.resolve(ref).read_text(encoding="utf-8"))
+
+    def read(
+        self,
+        ref: str,
+        key_path: Optional[str] = None,
+        offset: int = 0,
+        max_bytes: int = DEFAULT_FETCH_BYTES
+    ) -> Dict[str, Any]:
+        """
+        Read (part of) an artifact - backs the fetch_artifact tool.
+
+        Args:
+            ref: sha256 or path from a $artifact reference
+            key_path: Dotted path into the value (e.g. "files.0.content")
+            offset: Byte offset into the selected value's JSON (paging)
+            max_bytes: Maximum bytes of content returned
+
+        Returns:
+            {sha256, key_path, size, content, truncated[, next_offset]} - content
+            is the value itself if it fits, otherwise a slice of its JSON text
+        """
+        path = self.resolve(ref)
+        value = json.loads(path.read_text(encoding="utf-8"))
+
+        for part in (key_path or "").split(".") if key_path else []:
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            elif isinstance(value, list) and part.lstrip("-").isdigit() and -len(value) <= int(part) < len(value):
+                value = value[int(part)]
+            else:
+                raise KeyError(f"'{part}' not found in artifact {path.stem[:12]} (key_path: {key_path})")
+
+        encoded = encode_compact(value)
+        result = {"sha256": path.stem, "key_path": key_path or "", "size": _byte_len(encoded)}
+
+        if offset <= 0 and result["size"] <= max_bytes:
+            result.update(content=value, truncated=False)
+            return result
+
+        data = encoded.encode("utf-8")
+        chunk = data[offset:offset + max_bytes].decode("utf-8", errors="ignore")
+        result.update(content=chunk, truncated=True)
+        if offset + max_bytes < len(data):
+            result["next_offset"] = offset + max_bytes
+        return result
+
+    def _display_path(self, path: Path) -> str:
+        try:
+            return str(path.relative_to(self.base_path))
+        except ValueError:
+            return str(path)
+
+
+_default_store: Optional[ArtifactStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Get the process-wide artifact store (VIBE_ARTIFACT_DIR overrides the location)"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ArtifactStore(os.environ.get("VIBE_ARTIFACT_DIR") or DEFAULT_ARTIFACT_DIR)
+    return _default_store
+
+
+# =============================================================================
+# SERIALIZER
+# =============================================================================
+
+class ContextSerializer:
+    """Render runtime context as compact JSON within ContextLimits"""
+
+    def __init__(self, limits: Optional[ContextLimits] = None, store: Optional[ArtifactStore] = None):
+        self.limits = limits or ContextLimits()
+        self.store = store
+
+    def serialize(self, context: Mapping[str, Any], skip_private: bool = False) -> SerializedContext:
+        """
+        Serialize a context mapping.
+
+        Args:
+            context: Runtime context
+            skip_private: Omit keys starting with "_" (internal keys)
+
+        Returns:
+            SerializedContext (text is a JSON object, one top-level key per line)
+        """
+        result = SerializedContext(text="{}")
+        values: Dict[str, Any] = {}
+        entries: Dict[str, str] = {}
+
+        for key in sorted(context, key=str):
+            name = str(key)
+            if skip_private and name.startswith("_"):
+                continue
+            values[name] = _normalize(context[key])
+            entries[name] = self._fit_value(name, values[name], result)
+
+        # Total budget: reduce the largest remaining values until the context fits
+        reduced = {ref_key for ref_key, encoded in entries.items() if encoded.startswith(f'{{"{ARTIFACT_KEY}"')}
+        while sum(_byte_len(e) + _byte_len(k) + 4 for k, e in entries.items()) > self.limits.max_total_bytes:
+            candidates = [k for k in entries if k not in reduced and _byte_len(entries[k]) > SUMMARY_CHARS]
+            if not candidates:
+                break
+            largest = max(candidates, key=lambda k: _byte_len(entries[k]))
+            entries[largest] = self._replace(largest, values[largest], SUMMARY_CHARS, result)
+            reduced.add(largest)
+
+        if entries:
+            result.text = "{\n" + ",\n".join(f"{json.dumps(k, ensure_ascii=False)}:{e}" for k, e in entries.items()) + "\n}"
+        return result
+
+    def _fit_value(self, key: str, value: Any, result: SerializedContext) -> str:
+        """Encode one top-level value within max_value_bytes"""
+        pruned, lossy = self._prune(value, 1)
+        encoded = encode_compact(pruned)
+        if not lossy and _byte_len(encoded) <= self.limits.max_value_bytes:
+            return encoded
+        return self._replace(key, value, self.limits.max_value_bytes, result, pruned)
+
+    def _replace(
+        self,
+        key: str,
+        value: Any,
+        max_bytes: int,
+        result: SerializedContext,
+        pruned: Any = None
+    ) -> str:
+        """Replace a value by an artifact reference, or by a pruned/clipped rendering"""
+        if self.store is not None:
+            ref = self.store.put(value)
+            result.artifacts.append(ref)
+            return encode_compact(ref.to_dict())
+
+        result.clipped.append(key)
+        if pruned is None:
+            pruned, _ = self._prune(value, 1)
+        encoded = encode_compact(pruned)
+        if _byte_len(encoded) <= max_bytes:
+            return encoded
+        text = pruned if isinstance(pruned, str) else encoded
+        return encode_compact(clip_text(text, max_bytes))
+
+    def _prune(self, value: Any, depth: int) -> Tuple[Any, bool]:
+        """Apply depth and item limits; returns (pruned value, whether anything was cut)"""
+        if isinstance(value, dict):
+            if depth > self.limits.max_depth:
+                return f"<{summarize(value)}>", True
+            keys = sorted(value)
+            pruned = {}
+            lossy = len(keys) > self.limits.max_items
+            for k in keys[:self.limits.max_items]:
+                pruned[k], cut = self._prune(value[k], depth + 1)
+                lossy = lossy or cut
+            if len(keys) > self.limits.max_items:
+                pruned["$omitted"] = f"{len(keys) - self.limits.max_items} more keys"
+            return pruned, lossy
+
+        if isinstance(value, list):
+            if depth > self.limits.max_depth:
+                return f"<{summarize(value)}>", True
+            pruned = []
+            lossy = len(value) > self.limits.max_items
+            for item in value[:self.limits.max_items]:
+                item, cut = self._prune(item, depth + 1)
+                pruned.append(item)
+                lossy = lossy or cut
+            if len(value) > self.limits.max_items:
+                pruned.append(f"<{len(value) - self.limits.max_items} more items>")
+            return pruned, lossy
+
+        return value, False
+
+
+def serialize_context(
+    context: Mapping[str, Any],
+    limits: Optional[ContextLimits] = None,
+    store: Optional[ArtifactStore] = None,
+    skip_private: bool = False
+) -> SerializedContext:
+    """Serialize runtime context (see ContextSerializer.serialize)"""
+    return ContextSerializer(limits, store).serialize(context, skip_private)
+
+
+def artifact_hint(serialized: SerializedContext) -> str:
+    """Instruction line for contexts that contain artifact references ("" if none)"""
+    if not serialized.artifacts:
+        return ""
+    return (
+        f'{len(serialized.artifacts)} large value(s) were moved to artifacts ("{ARTIFACT_KEY}" references). '
+        f'Fetch one on demand with the `fetch_artifact` tool: '
+        f'<tool_use name="fetch_artifact"><parameters><ref>SHA256</ref>'
+        f'<key_path>optional.dotted.path</key_path></parameters></tool_use>'
+    )
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Cost Ledger - Persistent, append-only record of every LLM invocation
+====================================================================
+
+CostTracker only knows the current process: its totals vanish on exit, a
+restarted orchestrator starts again at $0, and two workers of one project
+each see half of the spend. The ledger is a SQLite database shared by all
+processes of a checkout:
+
+    - ledger: one row per invocation (project, phase, agent, task, model,
+      input/output/cache tokens, latency, cost, response-cache hit, batch).
+      Append-only: UPDATE and DELETE are rejected by triggers.
+    - project_totals / phase_totals: per-project and per-phase aggregates,
+      maintained by an insert trigger in the same transaction as the row.
+      Budget checks read one primary-key row - O(1), however long the
+      history - and are correct across restarts and parallel workers.
+
+Rows are written in WAL mode with BEGIN IMMEDIATE, so concurrent writers
+serialize on the database lock instead of failing; readers never block.
+
+Invocations are attributed to the project of the CostTracker (LLMClient's
+project argument) and to the phase/agent/task of the innermost
+cost_scope() - a context variable, so concurrent asyncio tasks and
+threads each keep their own scope.
+
+Usage:
+    ledger = get_cost_ledger()
+    client = LLMClient(budget_limit=10.0, project="my-app")
+    with cost_scope(phase="planning", agent="VIBE_ALIGNER", task="02_feature_extraction"):
+        client.invoke(prompt)
+    ledger.project_total("my-app")           # USD, across all processes and runs
+    ledger.report(group_by=("phase", "agent"))
+
+    ./vibe-cli.py costs --project my-app --by phase,agent
+
+Environment:
+    VIBE_COST_LEDGER=<path>     Ledger database (default: .cache/vibe/cost_ledger.sqlite)
+    VIBE_COST_LEDGER=0          Disable the ledger (process-local CostTracker only)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_LEDGER_PATH = _REPO_ROOT / ".cache" / "vibe" / "cost_ledger.sqlite"
+
+# Dimensions a report can be grouped by
+GROUP_COLUMNS = ("project", "phase", "agent", "task", "model", "day")
+
+PathLike = Union[str, Path]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    project TEXT NOT NULL DEFAULT '',
+    phase TEXT NOT NULL DEFAULT '',
+    agent TEXT NOT NULL DEFAULT '',
+    task TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0,
+    batch INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ledger_project ON ledger (project, ts);
+CREATE INDEX IF NOT EXISTS ledger_agent ON ledger (agent, task);
+
+CREATE TABLE IF NOT EXISTS project_totals (
+    project TEXT PRIMARY KEY,
+    invocations INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phase_totals (
+    project TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    invocations INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    PRIMARY KEY (project, phase)
+);
+
+CREATE TRIGGER IF NOT EXISTS ledger_totals AFTER INSERT ON ledger BEGIN
+    INSERT INTO project_totals VALUES (NEW.project, 1, NEW.cost_usd, NEW.input_tokens, NEW.output_tokens)
+    ON CONFLICT (project) DO UPDATE SET
+        invocations = invocations + 1,
+        cost_usd = cost_usd + NEW.cost_usd,
+        input_tokens = input_tokens + NEW.input_tokens,
+        output_tokens = output_tokens + NEW.output_tokens;
+    INSERT INTO phase_totals VALUES (NEW.project, NEW.phase, 1, NEW.cost_usd)
+    ON CONFLICT (project, phase) DO UPDATE SET
+        invocations = invocations + 1,
+        cost_usd = cost_usd + NEW.cost_usd;
+END;
+CREATE TRIGGER IF NOT EXISTS ledger_no_update BEFORE UPDATE ON ledger BEGIN
+    SELECT RAISE(ABORT, 'cost ledger is append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS ledger_no_delete BEFORE DELETE ON ledger BEGIN
+    SELECT RAISE(ABORT, 'cost ledger is append-only');
+END;
+"""
+
+
+# =============================================================================
+# SCOPE
+# =============================================================================
+
+_scope: ContextVar[Dict[str, str]] = ContextVar("vibe_cost_scope", default={})
+
+
+@contextmanager
+def cost_scope(**fields: Optional[str]) -> Iterator[Dict[str, str]]:
+    """
+    Attribute invocations inside the block to phase/agent/task (and project).
+
+    Nested scopes inherit the fields they do not set.
+    """
+    scope = {**_scope.get(), **{k: str(v) for k, v in fields.items() if v is not None}}
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def current_scope() -> Dict[str, str]:
+    """Fields of the innermost cost_scope()"""
+    return _scope.get()
+
+
+# =============================================================================
+# LEDGER
+# =============================================================================
+
+@dataclass
+class LedgerRecord:
+    """One ledger row"""
+    model: str
+    project: str = ""
+    phase: str = ""
+    agent: str = ""
+    task: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_write_tokens: int = 0
+    cache_read_tokens: int = 0
+    latency_ms: float = 0.0
+    cost_usd: float = 0.0
+    cached: bool = False
+    batch: bool = False
+    ts: float = 0.0
+
+
+class CostLedger:
+    """
+    SQLite cost ledger with trigger-maintained project/phase aggregates.
+
+    One connection per instance, guarded by a lock (safe to share between
+    threads); any number of processes may open the same file.
+    """
+
+    def __init__(self, path: PathLike = DEFAULT_LEDGER_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def append(self, record: LedgerRecord) -> None:
+        """Append one invocation (and update the aggregates atomically)"""
+        row = asdict(record)
+        row["ts"] = row["ts"] or time.time()
+        row["cached"] = int(row["cached"])
+        row["batch"] = int(row["batch"])
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{name}" for name in row)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(f"INSERT INTO ledger ({columns}) VALUES ({placeholders})", row)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def project_total(self, project: str) -> float:
+        """Total spend of a project in USD (one indexed row read)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cost_usd FROM project_totals WHERE project = ?", (project,)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def project_totals(self, project: str) -> Dict[str, Any]:
+        """Invocations, cost and tokens of a project"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM project_totals WHERE project = ?", (project,)).fetchone()
+        if row is None:
+            return {"project": project, "invocations": 0, "cost_usd": 0.0, "input_tokens": 0, "output_tokens": 0}
+        return dict(row)
+
+    def phase_costs(self, project: str) -> Dict[str, float]:
+        """Spend of a project per phase in USD"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT phase, cost_usd FROM phase_totals WHERE project = ? ORDER BY phase", (project,)
+            ).fetchall()
+        return {row["phase"]: row["cost_usd"] for row in rows}
+
+    def records(
+        self,
+        project: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Ledger rows, newest first"""
+        where, params = self._filter(project, since)
+        sql = f"SELECT * FROM ledger{where} ORDER BY id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def samples(self, agent: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Latest billed, interactive invocations of an agent, newest first
+        (response cache hits and batch requests are skipped - their latency
+        is not a call's). Used as the agent's output-token and latency
+        distribution by forecast.py.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task, model, input_tokens, output_tokens, latency_ms FROM ledger "
+                "WHERE agent = ? AND cached = 0 AND batch = 0 ORDER BY id DESC LIMIT ?",
+                (agent, int(limit))
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def report(
+        self,
+        group_by: Sequence[str] = ("project", "phase"),
+        project: Optional[str] = None,
+        since: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate the ledger (one SQL GROUP BY pass; most expensive group first).
+
+        Args:
+            group_by: Columns of GROUP_COLUMNS ("day" = UTC date of the invocation)
+            project: Only this project
+            since: Only invocations at or after this Unix time
+
+        Returns:
+            One dict per group: the group columns, invocations, cost_usd,
+            token sums, response cache hits, batch invocations, mean and max latency
+        """
+        unknown = [column for column in group_by if column not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(
+                f"Unknown cost report column(s): {', '.join(unknown)}\n"
+                f"Fix: group by any of {', '.join(GROUP_COLUMNS)}"
+            )
+        keys = [
+            "date(ts, 'unixepoch') AS day" if column == "day" else column
+            for column in group_by
+        ]
+        where, params = self._filter(project, since)
+        select = ", ".join(keys + [
+            "COUNT(*) AS invocations",
+            "SUM(cost_usd) AS cost_usd",
+            "SUM(input_tokens) AS input_tokens",
+            "SUM(output_tokens) AS output_tokens",
+            "SUM(cache_write_tokens) AS cache_write_tokens",
+            "SUM(cache_read_tokens) AS cache_read_tokens",
+            "SUM(cached) AS response_cache_hits",
+            "SUM(batch) AS batch_invocations",
+            "AVG(CASE WHEN cached = 0 THEN latency_ms END) AS mean_latency_ms",
+            "MAX(latency_ms) AS max_latency_ms",
+        ])
+        group = f" GROUP BY {', '.join(group_by)}" if group_by else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {select} FROM ledger{where}{group} ORDER BY cost_usd DESC", params
+            ).fetchall()
+        return [dict(row) for row in rows if row["invocations"]]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _filter(project: Optional[str], since: Optional[float]):
+        clauses, params = [], []
+        if project is not None:
+            clauses.append("project = ?")
+            params.append(project)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_cost_ledger: Optional[CostLedger] = None
+_cost_ledger_lock = threading.Lock()
+
+
+def get_cost_ledger() -> Optional[CostLedger]:
+    """Get the shared cost ledger (None if disabled via VIBE_COST_LEDGER=0)"""
+    global _cost_ledger
+    setting = os.environ.get("VIBE_COST_LEDGER", "")
+    if setting in ("0", "false", "no"):
+        return None
+    if _cost_ledger is None:
+        with _cost_ledger_lock:
+            if _cost_ledger is None:
+                try:
+                    _cost_ledger = CostLedger(setting or DEFAULT_LEDGER_PATH)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Cost ledger unavailable ({e}) - costs are tracked in memory only")
+                    return None
+    return _cost_ledger
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+File Watcher - Hot reload of prompt fragments, knowledge and directives
+=======================================================================
+
+Long-running processes (orchestrator sessions, `vibe-cli serve`) keep
+composition inputs in the process-wide CompositionCache. This watcher
+observes agency_os/ and system_steward_framework/ and, when files change:
+
+    1. invalidates exactly the cache entries built from them
+       (CompositionCache.invalidate_path())
+    2. fires reload hooks with the changed paths
+
+Backends:
+    inotify   Linux, via ctypes (no extra dependency). Events arrive
+              immediately, so the cache trusts the watcher and skips the
+              per-lookup stat() of watched files (CompositionCache.watch()).
+    polling   Everywhere else: rescans mtimes/sizes every `poll_interval`
+              seconds. The cache keeps validating fingerprints on lookup;
+              polling only adds proactive invalidation and the hooks.
+              Also taken over from inotify if a directory created later
+              cannot be watched (e.g. max_user_watches reached).
+
+Changes are debounced: a burst of events (editor save, git checkout) is
+flushed once, `debounce` seconds after the last event.
+
+Usage:
+    watcher = get_file_watcher()
+    watcher.add_hook(lambda paths: print(f"reloaded {len(paths)} files"))
+    watcher.start()
+    ...
+    watcher.stop()
+
+Environment:
+    VIBE_HOT_RELOAD=1              Start the watcher in CoreOrchestrator
+    VIBE_WATCH_BACKEND=polling     Force a backend (inotify | polling)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from .composition_cache import CompositionCache, get_composition_cache
+except ImportError:
+    from composition_cache import CompositionCache, get_composition_cache
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+WATCH_ROOTS = (_REPO_ROOT / "agency_os", _REPO_ROOT / "system_steward_framework")
+
+DEFAULT_DEBOUNCE_S = 0.2
+DEFAULT_POLL_INTERVAL_S = 1.0
+
+# Directories never watched, and editor/temp files never reported
+IGNORED_DIRS = {"__pycache__", ".git", ".pytest_cache", ".mypy_cache", ".cache", "node_modules"}
+IGNORED_SUFFIXES = (".pyc", ".swp", ".swx", ".tmp", "~")
+
+ReloadHook = Callable[[List[Path]], None]
+
+
+def _ignored(name: str) -> bool:
+    return name.startswith(".#") or name.endswith(IGNORED_SUFFIXES)
+
+
+def _walk_dirs(root: Path) -> Iterable[str]:
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        yield dirpath
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class PollingBackend:
+    """Detects changes by rescanning (mtime_ns, size) of every file"""
+
+    name = "polling"
+
+    def __init__(self, roots: Iterable[Path], poll_interval: float = DEFAULT_POLL_INTERVAL_S):
+        self.roots = [Path(r) for r in roots]
+        self.poll_interval = poll_interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + poll_interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath in _walk_dirs(root):
+                try:
+                    entries = list(os.scandir(dirpath))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and not _ignored(entry.name):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout: float, stop: threading.Event) -> Set[str]:
+        """Block up to `timeout` seconds; return paths changed since the last scan"""
+        delay = max(0.0, min(timeout, self._next_scan - time.monotonic()))
+        if stop.wait(delay) or time.monotonic() < self._next_scan:
+            return set()
+        self._next_scan = time.monotonic() + self.poll_interval
+
+        snapshot = self._scan()
+        old = self._snapshot
+        self._snapshot = snapshot
+        changed = {path for path, sig in snapshot.items() if old.get(path) != sig}
+        changed.update(path for path in old if path not in snapshot)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyBackend:
+    """Linux inotify via ctypes - one watch per directory"""
+
+    name = "inotify"
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, roots: Iterable[Path]):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify_init1 not available")
+
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}
+        self.roots = [Path(r) for r in roots]
+        # Set when a new directory could not be watched: its files go unnoticed
+        self.degraded: Optional[OSError] = None
+        try:
+            for root in self.roots:
+                for dirpath in _walk_dirs(root):
+                    self._add_watch(dirpath)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, dirpath: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return  # Removed before we got to it
+            raise OSError(err, f"inotify_add_watch({dirpath}): {os.strerror(err)} "
+                               f"(Fix: raise fs.inotify.max_user_watches or set VIBE_WATCH_BACKEND=polling)")
+        self._dirs[wd] = dirpath
+
+    def wait(self, timeout: float, stop: threading.Event) -> Set[str]:
+        """Block up to `timeout` seconds for events; return changed paths"""
+        try:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+        except (OSError, ValueError):
+            return set()
+        if not readable:
+            return set()
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            raw_name = data[offset + self._EVENT.size:offset + self._EVENT.size + length]
+            offset += self._EVENT.size + length
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were lost - report the roots (invalidates everything below)
+                logger.warning("File watcher queue overflow - invalidating all watched files")
+                changed.update(str(root) for root in self.roots)
+                continue
+            if mask & self.IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            dirpath = self._dirs.get(wd)
+            if dirpath is None:
+                continue
+            if not name:
+                changed.add(dirpath)  # The watched directory itself
+                continue
+
+            path = os.path.join(dirpath, name)
+            if mask & self.IN_ISDIR:
+                if name in IGNORED_DIRS:
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # New directory: watch it and everything created in it meanwhile
+                    try:
+                        for sub in _walk_dirs(Path(path)):
+                            self._add_watch(sub)
+                    except OSError as e:
+                        self.degraded = e
+                changed.add(path)
+            elif not _ignored(name):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if getattr(self, "_fd", -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+# =============================================================================
+# WATCHER
+# =============================================================================
+
+class FileWatcher:
+    """
+    Debounced file watcher that invalidates composition cache entries.
+
+    Hooks run on the watcher thread after invalidation; exceptions in a hook
+    are logged and do not stop the watcher.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[Union[str, Path]] = WATCH_ROOTS,
+        cache: Optional[CompositionCache] = None,
+        debounce: float = DEFAULT_DEBOUNCE_S,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_S,
+        backend: Optional[str] = None
+    ):
+        self.roots = [Path(r).resolve() for r in roots if Path(r).exists()]
+        self.cache = cache if cache is not None else get_composition_cache()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.requested_backend = backend or os.environ.get("VIBE_WATCH_BACKEND", "auto")
+        self.backend: Optional[Union[InotifyBackend, PollingBackend]] = None
+        self._hooks: List[ReloadHook] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.files_changed = 0
+        self.entries_invalidated = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def backend_name(self) -> Optional[str]:
+        return self.backend.name if self.backend is not None else None
+
+    def add_hook(self, hook: ReloadHook) -> None:
+        """Register a reload hook, called with the changed paths after each flush"""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: ReloadHook) -> None:
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def start(self) -> "FileWatcher":
+        """Start watching (idempotent)"""
+        with self._lock:
+            if self.running:
+                return self
+            self.backend = self._create_backend()
+            if self.backend.name == "inotify":
+                self.cache.watch(self.roots)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vibe-file-watcher", daemon=True)
+            self._thread.start()
+        logger.info(f"File watcher started ({self.backend.name}): {', '.join(str(r) for r in self.roots)}")
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop watching and restore per-lookup cache validation"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        if self.backend is not None:
+            if self.backend.name == "inotify":
+                self.cache.unwatch()
+            self.backend.close()
+        logger.info("File watcher stopped")
+
+    def __enter__(self) -> "FileWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def flush(self, paths: Iterable[Union[str, Path]]) -> int:
+        """
+        Invalidate the cache entries of changed paths and run the hooks.
+
+        Returns:
+            Number of cache entries invalidated
+        """
+        changed = sorted({Path(p) for p in paths})
+        if not changed:
+            return 0
+        invalidated = sum(self.cache.invalidate_path(path) for path in changed)
+
+        self.reloads += 1
+        self.files_changed += len(changed)
+        self.entries_invalidated += invalidated
+        logger.info(f"Hot reload: {len(changed)} file(s) changed, {invalidated} cache entries invalidated")
+
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(changed)
+            except Exception as e:
+                logger.error(f"Reload hook {getattr(hook, '__name__', hook)} failed: {e}", exc_info=True)
+        return invalidated
+
+    def stats(self) -> Dict[str, Any]:
+        """Watcher statistics"""
+        return {
+            "running": self.running,
+            "backend": self.backend_name,
+            "roots": [str(r) for r in self.roots],
+            "reloads": self.reloads,
+            "files_changed": self.files_changed,
+            "entries_invalidated": self.entries_invalidated,
+        }
+
+    def _create_backend(self) -> Union[InotifyBackend, PollingBackend]:
+        if self.requested_backend in ("auto", "inotify"):
+            try:
+                return InotifyBackend(self.roots)
+            except OSError as e:
+                if self.requested_backend == "inotify":
+                    raise
+                logger.info(f"inotify unavailable ({e}) - falling back to polling")
+        return PollingBackend(self.roots, self.poll_interval)
+
+    def _fall_back_to_polling(self, backend: InotifyBackend) -> PollingBackend:
+        """Replace an inotify backend that missed a directory; the cache validates by stat() again"""
+        logger.warning(f"File watcher: {backend.degraded} - switching to polling")
+        self.cache.unwatch()
+        self.backend = PollingBackend(self.roots, self.poll_interval)
+        backend.close()
+        return self.backend
+
+    def _run(self) -> None:
+        pending: Set[str] = set()
+        deadline = 0.0
+        backend = self.backend
+        while not self._stop.is_set():
+            timeout = self.poll_interval
+            if pending:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                changed = backend.wait(timeout, self._stop)
+            except Exception as e:
+                logger.error(f"File watcher error: {e}", exc_info=True)
+                changed = set()
+                self._stop.wait(self.poll_interval)
+
+            if getattr(backend, "degraded", None) is not None:
+                backend = self._fall_back_to_polling(backend)
+
+            if changed:
+                pending |= changed
+                deadline = time.monotonic() + self.debounce  # trailing debounce
+            if pending and time.monotonic() >= deadline:
+                batch, pending = pending, set()
+                self.flush(batch)
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_default_watcher: Optional[FileWatcher] = None
+_default_watcher_lock = threading.Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """Get the process-wide watcher over WATCH_ROOTS (created on first use, not started)"""
+    global _default_watcher
+    if _default_watcher is None:
+        with _default_watcher_lock:
+            if _default_watcher is None:
+                _default_watcher = FileWatcher()
+    return _default_watcher
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Forecast - Pre-flight cost and latency forecast of an SDLC run
+==============================================================
+
+A run's cost and duration were only known afterwards. Before anything is
+spent, CoreOrchestrator.forecast() lists the calls the run will make (the
+workflow's stages from the project's current phase, each responsible
+agent's tasks and their composed prompt sizes) and RunForecaster turns
+them into distributions:
+
+    - Input tokens: the composed prompt, or the task's token budget (see
+      token_budget.py) if it cannot be composed before its inputs exist
+    - Output tokens and latency: drawn from the agent's calls in the cost
+      ledger - the task's own calls if there are MIN_HISTORY of them, else
+      all of the agent's. Without history, output tokens follow a
+      triangular prior around the task's estimated_tokens (its upper end
+      set by estimated_complexity, capped at max_tokens) and latency is
+      FIRST_TOKEN_SECONDS + tokens / OUTPUT_TOKENS_PER_SECOND. Calls routed
+      to another model (see model_router.py) are priced at that model and
+      capped at their route's max_tokens.
+    - A Monte Carlo simulation of the run gives expected and p90 totals
+      (percentiles of the totals, not sums of per-call percentiles) of
+      cost, tokens and wall-clock time, sequential (one call at a time)
+      and parallel (stages in order, the agents of a stage concurrently,
+      an agent's tasks once their meta dependencies are done).
+
+A forecast whose p90 cost exceeds the remaining budget does not fit: re-plan
+(lower max_tokens, skip optional stages) or raise the budget before running.
+
+Usage:
+    forecast = orchestrator.forecast("my-app")
+    print(forecast.summary())
+    if not forecast.fits:
+        ...
+
+    ./vibe-cli.py forecast --project my-app
+"""
+
+import logging
+import random
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .agent_index import task_key
+    from .cost_ledger import CostLedger
+    from .llm_client import CostTracker
+except ImportError:
+    from agent_index import task_key
+    from cost_ledger import CostLedger
+    from llm_client import CostTracker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATIONS = 2000
+
+# Ledger calls of a task needed before its own distribution is used
+MIN_HISTORY = 3
+
+# Latest ledger calls per agent the distributions are drawn from
+HISTORY_LIMIT = 500
+
+# Latency model without history
+FIRST_TOKEN_SECONDS = 1.0
+OUTPUT_TOKENS_PER_SECOND = 50.0
+
+# Output tokens without history or estimated_tokens, and the prior's upper
+# end as a multiple of the estimate
+DEFAULT_OUTPUT_TOKENS = 2000
+COMPLEXITY_SPREAD = {"low": 1.5, "medium": 2.0, "high": 3.0}
+DEFAULT_SPREAD = 2.0
+
+
+# =============================================================================
+# DATA STRUCTURES
+# =============================================================================
+
+@dataclass
+class PlannedCall:
+    """One agent task the run will invoke"""
+    stage: str
+    agent: str
+    task: str
+    input_tokens: int
+    composed: bool = True              # False: input_tokens is the task's token budget
+    estimated_tokens: int = 0          # task meta estimated_tokens (0 = unknown)
+    complexity: str = "unknown"        # task meta estimated_complexity
+    depends_on: Optional[List[str]] = None  # Tasks of the agent to wait for (None: the previous one)
+    model: Optional[str] = None        # Routed model (None: the forecaster's, see model_router.py)
+    max_tokens: Optional[int] = None   # Routed output cap (None: the forecaster's)
+    # Filled in by RunForecaster
+    history: int = 0                   # Ledger calls the distribution was drawn from
+    expected_output_tokens: float = 0.0
+    expected_seconds: float = 0.0
+    expected_cost_usd: float = 0.0
+
+
+@dataclass
+class Estimate:
+    """Expected value and 90th percentile of a forecast quantity"""
+    expected: float
+    p90: float
+
+    @classmethod
+    def of(cls, values: Sequence[float]) -> "Estimate":
+        ordered = sorted(values)
+        rank = max(0, int(round(0.9 * len(ordered))) - 1)
+        return cls(sum(ordered) / len(ordered), ordered[rank])
+
+    def rounded(self, digits: int) -> Dict[str, float]:
+        return {"expected": round(self.expected, digits), "p90": round(self.p90, digits)}
+
+
+@dataclass
+class RunForecast:
+    """Forecast of the rest of a project's run"""
+    project_id: str
+    model: str
+    max_tokens: int
+    simulations: int
+    calls: List[PlannedCall]
+    input_tokens: int
+    output_tokens: Estimate
+    cost_usd: Estimate
+    sequential_seconds: Estimate
+    parallel_seconds: Estimate
+    budget_remaining_usd: Optional[float] = None
+    stages: List[str] = field(default_factory=list)
+
+    @property
+    def fits(self) -> bool:
+        """Whether the p90 cost fits the remaining budget (True without a budget)"""
+        return self.budget_remaining_usd is None or self.cost_usd.p90 <= self.budget_remaining_usd
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "simulations": self.simulations,
+            "stages": self.stages,
+            "calls": [asdict(call) for call in self.calls],
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens.rounded(0),
+            "cost_usd": self.cost_usd.rounded(4),
+            "sequential_seconds": self.sequential_seconds.rounded(1),
+            "parallel_seconds": self.parallel_seconds.rounded(1),
+            "budget_remaining_usd": (
+                round(self.budget_remaining_usd, 4) if self.budget_remaining_usd is not None else None
+            ),
+            "fits": self.fits,
+        }
+
+    def summary(self) -> str:
+        """Human-readable per-call table and totals"""
+        lines = [
+            f"Forecast for {self.project_id}: {len(self.calls)} calls in {len(self.stages)} stages "
+            f"({self.model}, max_tokens {self.max_tokens} unless routed, {self.simulations} simulations)",
+            "",
+            f"{'STAGE':<30} {'AGENT.TASK':<50} {'IN':>7} {'OUT':>7} {'SEC':>7} {'USD':>8} HISTORY",
+        ]
+        for call in self.calls:
+            source = f"{call.history} calls" if call.history else "prior"
+            if call.model and call.model != self.model:
+                source += f", {call.model}"
+            estimated = "" if call.composed else "~"
+            lines.append(
+                f"{call.stage:<30} {(call.agent + '.' + call.task)[:50]:<50} "
+                f"{estimated + str(call.input_tokens):>7} {call.expected_output_tokens:>7.0f} "
+                f"{call.expected_seconds:>7.1f} {call.expected_cost_usd:>8.4f} {source}"
+            )
+        lines += [
+            "",
+            f"{'':<49} {'EXPECTED':>12} {'P90':>12}",
+            f"{'Cost (USD)':<49} {self.cost_usd.expected:>12.4f} {self.cost_usd.p90:>12.4f}",
+            f"{'Input tokens':<49} {self.input_tokens:>12,} {self.input_tokens:>12,}",
+            f"{'Output tokens':<49} {self.output_tokens.expected:>12,.0f} {self.output_tokens.p90:>12,.0f}",
+            f"{'Wall clock, sequential (s)':<49} "
+            f"{self.sequential_seconds.expected:>12.1f} {self.sequential_seconds.p90:>12.1f}",
+            f"{'Wall clock, parallel (s)':<49} "
+            f"{self.parallel_seconds.expected:>12.1f} {self.parallel_seconds.p90:>12.1f}",
+        ]
+        if self.budget_remaining_usd is not None:
+            verdict = "fits" if self.fits else "DOES NOT FIT"
+            lines += ["", f"Remaining budget: ${self.budget_remaining_usd:.4f} - p90 cost {verdict}"]
+        return "\n".join(lines)
+
+
+# =============================================================================
+# FORECASTER
+# =============================================================================
+
+class RunForecaster:
+    """
+    Simulates planned calls against the cost ledger's history.
+
+    Args:
+        ledger: Cost ledger with the history (None: priors only)
+        cost_tracker: Pricing (default: a ledger-less CostTracker)
+        model: Model of calls without a routed model
+        max_tokens: Output cap of calls without a routed one
+        simulations: Monte Carlo runs
+        seed: Random seed (forecasts are reproducible)
+    """
+
+    def __init__(
+        self,
+        ledger: Optional[CostLedger] = None,
+        cost_tracker: Optional[CostTracker] = None,
+        model: str = "claude-3-5-sonnet-20241022",
+        max_tokens: int = 4096,
+        simulations: int = DEFAULT_SIMULATIONS,
+        seed: int = 0
+    ):
+        self.ledger = ledger
+        self.cost_tracker = cost_tracker if cost_tracker is not None else CostTracker(ledger=None)
+        self.model = model
+        self.max_tokens = max_tokens
+        self.simulations = max(1, simulations)
+        self.seed = seed
+
+    def forecast(
+        self,
+        project_id: str,
+        calls: List[PlannedCall],
+        budget_remaining_usd: Optional[float] = None
+    ) -> RunForecast:
+        """Simulate the run of calls (in stage order) and summarize it"""
+        rng = random.Random(self.seed)
+        histories: Dict[str, Dict[str, List[Tuple[int, float]]]] = {}
+        samplers = []
+        for call in calls:
+            if call.agent not in histories:
+                histories[call.agent] = self._history(call.agent)
+            samplers.append(self._sampler(call, histories[call.agent]))
+
+        input_cost = [
+            self.cost_tracker.calculate_cost(call.input_tokens, 0, call.model or self.model) for call in calls
+        ]
+        output_price = [
+            self.cost_tracker.calculate_cost(0, 1_000_000, call.model or self.model) / 1_000_000 for call in calls
+        ]
+        stages = list(dict.fromkeys(call.stage for call in calls))
+        waits = self._dependencies(calls)
+
+        totals: Dict[str, List[float]] = defaultdict(list)
+        per_call = [[0.0, 0.0, 0.0] for _ in calls]  # Sums of output tokens, seconds, cost
+        for _ in range(self.simulations):
+            outputs, seconds = zip(*(sampler(rng) for sampler in samplers)) if calls else ((), ())
+            costs = [input_cost[i] + outputs[i] * output_price[i] for i in range(len(calls))]
+            for i in range(len(calls)):
+                per_call[i][0] += outputs[i]
+                per_call[i][1] += seconds[i]
+                per_call[i][2] += costs[i]
+            totals["output"].append(sum(outputs))
+            totals["cost"].append(sum(costs))
+            totals["sequential"].append(sum(seconds))
+            totals["parallel"].append(self._parallel_seconds(calls, stages, waits, seconds))
+
+        for call, (output, seconds, cost) in zip(calls, per_call):
+            call.expected_output_tokens = round(output / self.simulations, 1)
+            call.expected_seconds = round(seconds / self.simulations, 2)
+            call.expected_cost_usd = round(cost / self.simulations, 6)
+
+        return RunForecast(
+            project_id=project_id,
+            model=self.model,
+            max_tokens=self.max_tokens,
+            simulations=self.simulations,
+            calls=calls,
+            input_tokens=sum(call.input_tokens for call in calls),
+            output_tokens=Estimate.of(totals["output"] or [0.0]),
+            cost_usd=Estimate.of(totals["cost"] or [0.0]),
+            sequential_seconds=Estimate.of(totals["sequential"] or [0.0]),
+            parallel_seconds=Estimate.of(totals["parallel"] or [0.0]),
+            budget_remaining_usd=budget_remaining_usd,
+            stages=stages
+        )
+
+    # -------------------------------------------------------------------------
+
+    def _history(self, agent: str) -> Dict[str, List[Tuple[int, float]]]:
+        """(output tokens, seconds) of an agent's ledger calls, per task key and overall ("")"""
+        history: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        if self.ledger is None:
+            return history
+        try:
+            rows = self.ledger.samples(agent, HISTORY_LIMIT)
+        except Exception as e:
+            logger.warning(f"Could not read cost ledger history of {agent}: {e}")
+            return history
+        for row in rows:
+            output = int(row["output_tokens"])
+            # Calls recorded without latency get the token-rate estimate
+            seconds = row["latency_ms"] / 1000 if row["latency_ms"] else self._seconds(output)
+            history[task_key(row["task"])].append((output, seconds))
+            history[""].append((output, seconds))
+        return history
+
+    def _sampler(self, call: PlannedCall, history: Dict[str, List[Tuple[int, float]]]):
+        """Draws (output tokens, seconds) of one call"""
+        own = history.get(task_key(call.task), [])
+        samples = own if len(own) >= MIN_HISTORY else history.get("", [])
+        call.history = len(samples)
+        max_tokens = call.max_tokens or self.max_tokens
+        if samples:
+            # Outputs above the call's cap would have been cut off at it
+            capped = [
+                (max_tokens, seconds * max_tokens / output) if output > max_tokens else (output, seconds)
+                for output, seconds in samples
+            ]
+            return lambda rng: rng.choice(capped)
+
+        mode = min(call.estimated_tokens or DEFAULT_OUTPUT_TOKENS, max_tokens)
+        high = min(mode * COMPLEXITY_SPREAD.get(call.complexity, DEFAULT_SPREAD), max_tokens)
+        low = mode / 2
+
+        def prior(rng: random.Random) -> Tuple[float, float]:
+            output = rng.triangular(low, high, mode) if high > low else mode
+            return output, self._seconds(output)
+        return prior
+
+    @staticmethod
+    def _seconds(output_tokens: float) -> float:
+        return FIRST_TOKEN_SECONDS + output_tokens / OUTPUT_TOKENS_PER_SECOND
+
+    @staticmethod
+    def _dependencies(calls: List[PlannedCall]) -> List[List[int]]:
+        """Indexes of the calls each call waits for (same stage and agent)"""
+        waits: List[List[int]] = []
+        previous: Dict[Tuple[str, str], int] = {}
+        by_key: Dict[Tuple[str, str, str], int] = {}
+        for i, call in enumerate(calls):
+            group = (call.stage, call.agent)
+            if call.depends_on is None:
+                waits.append([previous[group]] if group in previous else [])
+            else:
+                keys = {task_key(task) for task in call.depends_on}
+                waits.append([
+                    index for (stage, agent, key), index in by_key.items()
+                    if (stage, agent) == group and key in keys
+                ])
+            previous[group] = i
+            by_key[(call.stage, call.agent, task_key(call.task))] = i
+        return waits
+
+    @staticmethod
+    def _parallel_seconds(
+        calls: List[PlannedCall],
+        stages: List[str],
+        waits: List[List[int]],
+        seconds: Sequence[float]
+    ) -> float:
+        """Critical path: stages one after another, calls once their dependencies finished"""
+        finish = [0.0] * len(calls)
+        total = 0.0
+        for stage in stages:
+            stage_end = 0.0
+            for i, call in enumerate(calls):
+                if call.stage != stage:
+                    continue
+                finish[i] = max((finish[j] for j in waits[i]), default=0.0) + seconds[i]
+                stage_end = max(stage_end, finish[i])
+            total += stage_end
+        return total
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+JSON Stream - Incremental parsing of streamed JSON agent output
+===============================================================
+
+Agents answer with one JSON document (e.g. CODE_GENERATOR's
+{"files": [...], ...}). With LLMClient.invoke_stream() the text arrives in
+small deltas; IncrementalJSONParser turns them into events as soon as a
+value is complete, long before the document is:
+
+    field   a top-level member of the root object closed
+            path=(key,), value=the member value
+    item    an element of a streamed array closed
+            path=(key, ..., index), value=the element
+
+Arrays are streamed element by element if their key path is in
+stream_paths (e.g. ("files",) for generated_code['files']); the elements
+of a root-level array are always streamed. Every value is decoded with
+json.loads exactly when it closes, so events carry the same values the
+final document does.
+
+Text before the first "{" or "[" (e.g. a ```json fence) and after the
+root value is ignored.
+
+Usage:
+    parser = IncrementalJSONParser(stream_paths=[("files",)])
+    for event in client.invoke_stream(prompt):
+        for item in parser.feed(event.text):
+            if item.kind == "item":
+                write_file(item.value)
+    document = parser.close()
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+WHITESPACE = " \t\r\n"
+
+Path = Tuple[Union[str, int], ...]
+
+
+class JSONStreamError(ValueError):
+    """The streamed text is not a (complete) JSON document"""
+    pass
+
+
+@dataclass
+class JSONEvent:
+    """A value of the streamed document that just closed"""
+    kind: str          # "field" or "item"
+    path: Path
+    value: Any
+
+
+class _Frame:
+    """An open object or array"""
+
+    __slots__ = ("kind", "path", "key", "key_start", "start", "index", "expect", "streamed")
+
+    def __init__(self, kind: str, path: Path, streamed: bool):
+        self.kind = kind            # "{" or "["
+        self.path = path
+        self.key: Optional[str] = None
+        self.key_start = -1
+        self.start = -1             # Offset of the current member/element value
+        self.index = 0
+        self.expect = "key" if kind == "{" else "value"
+        self.streamed = streamed
+
+
+class IncrementalJSONParser:
+    """
+    Feed text deltas, get JSONEvents for values that completed.
+
+    Deltas are kept as received and each is scanned once; only offsets
+    are tracked, and the text of a value is joined from the deltas it spans
+    when it is decoded (once per top-level field and streamed element).
+    Not thread-safe.
+    """
+
+    def __init__(self, stream_paths: Iterable[Sequence[Union[str, int]]] = ()):
+        """
+        Args:
+            stream_paths: Key paths of arrays to stream element by element
+                (e.g. [("files",)]; nested: [("result", "modules")])
+        """
+        self.stream_paths = {tuple(path) for path in stream_paths}
+        self.events: List[JSONEvent] = []
+        self._chunks: List[str] = []
+        self._starts: List[int] = []  # Offset of each chunk
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._root_start = -1
+        self._root_end = -1
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._slice(0, self._length)
+
+    @property
+    def complete(self) -> bool:
+        """Whether the root value has closed"""
+        return self._root_end >= 0
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """
+        Scan a text delta.
+
+        Returns:
+            Events for the values that closed within this delta (in order)
+
+        Raises:
+            JSONStreamError: If a completed value is not valid JSON
+        """
+        events: List[JSONEvent] = []
+        if not chunk:
+            return events
+        base = self._length
+        self._chunks.append(chunk)
+        self._starts.append(base)
+        self._length += len(chunk)
+
+        # i: index in chunk; base + i: offset in the text
+        i = 0
+        n = len(chunk)
+        while i < n and self._root_end < 0:
+            c = chunk[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        frame = self._stack[-1]
+                        frame.key = self._decode(self._slice(frame.key_start, base + i + 1))
+                        frame.expect = "colon"
+                i += 1
+                continue
+
+            if not self._stack:
+                # Skip anything before the root value
+                if c in "{[":
+                    self._root_start = base + i
+                    self._stack.append(_Frame(c, (), c == "["))
+                i += 1
+                continue
+
+            frame = self._stack[-1]
+            if c in WHITESPACE:
+                i += 1
+                continue
+
+            if frame.expect == "key":
+                if c == '"':
+                    frame.key_start = base + i
+                    self._in_string = True
+                    self._string_is_key = True
+                elif c == "}":
+                    self._close(base + i)
+                i += 1
+                continue
+
+            if frame.expect == "colon":
+                if c == ":":
+                    frame.expect = "value"
+                i += 1
+                continue
+
+            if frame.expect == "value":
+                if c == "]" and frame.kind == "[":
+                    self._close(base + i)
+                    i += 1
+                    continue
+                frame.start = base + i
+                frame.expect = "end"
+                if c == '"':
+                    self._in_string = True
+                    self._string_is_key = False
+                elif c in "{[":
+                    path = frame.path + ((frame.key,) if frame.kind == "{" else (frame.index,))
+                    self._stack.append(_Frame(c, path, c == "[" and path in self.stream_paths))
+                i += 1
+                continue
+
+            # frame.expect == "end": inside a scalar, or after the member value
+            if c == '"':
+                self._in_string = True
+                self._string_is_key = False
+            elif c in "{[":
+                # Only reachable for malformed input such as `1 {`
+                path = frame.path + ((frame.key,) if frame.kind == "{" else (frame.index,))
+                self._stack.append(_Frame(c, path, False))
+            elif c == ",":
+                self._end_member(frame, base + i, events)
+                frame.expect = "key" if frame.kind == "{" else "value"
+            elif c in "}]":
+                self._end_member(frame, base + i, events)
+                self._close(base + i)
+            i += 1
+
+        self.events.extend(events)
+        return events
+
+    def close(self) -> Any:
+        """
+        The complete document.
+
+        Raises:
+            JSONStreamError: If no complete JSON value was streamed
+        """
+        if self._root_end < 0:
+            raise JSONStreamError(
+                f"Streamed output is not a complete JSON document ({self._length} chars received)"
+            )
+        return self._decode(self._slice(self._root_start, self._root_end))
+
+    def _end_member(self, frame: _Frame, end: int, events: List[JSONEvent]) -> None:
+        """The value of the current member/element ended at offset end"""
+        if frame.start < 0:
+            return
+        if frame is self._stack[0] and frame.kind == "{":
+            events.append(JSONEvent("field", (frame.key,), self._decode(self._slice(frame.start, end))))
+        elif frame.streamed:
+            events.append(JSONEvent("item", frame.path + (frame.index,), self._decode(self._slice(frame.start, end))))
+        frame.start = -1
+        frame.index += 1
+
+    def _close(self, end: int) -> None:
+        """frame's closing bracket is at offset end"""
+        self._stack.pop()
+        if not self._stack:
+            self._root_end = end + 1
+        # The parent's member value now continues until its "," or closing bracket
+
+    def _slice(self, start: int, end: int) -> str:
+        """text[start:end], joining only the chunks it spans (merged, so they are joined once)"""
+        if start >= end:
+            return ""
+        first = bisect_right(self._starts, start) - 1
+        last = bisect_left(self._starts, end)
+        if last - first > 1:
+            self._chunks[first:last] = ["".join(self._chunks[first:last])]
+            del self._starts[first + 1:last]
+        offset = self._starts[first]
+        return self._chunks[first][start - offset:end - offset]
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise JSONStreamError(f"Invalid JSON in streamed output: {e}") from e
+
+
+def iter_json_events(
+    chunks: Iterable[str],
+    stream_paths: Iterable[Sequence[Union[str, int]]] = ()
+) -> Iterator[JSONEvent]:
+    """Yield JSONEvents while consuming text chunks"""
+    parser = IncrementalJSONParser(stream_paths)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Knowledge Slicer - Relevance-sliced knowledge injection
+========================================================
+
+Knowledge bases such as FDG_dependencies.yaml (133 KB), APCE_rules.yaml
+(52 KB) and FAE_constraints.yaml (29 KB) used to be injected whole, even for a
+project with five features. This module parses a knowledge file once into
+indexed records and injects only the records relevant to the runtime context.
+
+Records:
+    Every list-of-mappings section of a knowledge document (e.g. `features`,
+    `feature_complexity`, `incompatibilities`) contributes one record per
+    item. A record is indexed by the values of its index keys (default: id,
+    name, feature_type, component, feature).
+
+Selection:
+    1. Direct matches: records whose index value appears in the runtime
+       context (feature names, ids, free text - normalized, so
+       "user_authentication_basic" matches "User Authentication Basic")
+    2. Transitive references: records whose index value is referenced by an
+       already-selected record (e.g. a feature's required component), up to
+       `max_depth` hops
+    3. Always kept: scalar/mapping sections (version, info), records without
+       any index key (general rules) and sections listed in `always_include`
+
+If the context matches nothing, the full file is injected (fallback: full).
+
+Configuration (per _knowledge_deps.yaml entry):
+    - path: agency_os/01_planning_framework/knowledge/FDG_dependencies.yaml
+      slice:
+        mode: relevant            # full (default) | relevant
+        max_depth: 2              # transitive reference hops
+        keys: [id, name]          # override index keys
+        always_include: [dependency_chains]
+        fallback: full            # full | none - when nothing matches
+
+    `slice: relevant` is accepted as shorthand.
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+try:
+    from .composition_cache import CompositionCache
+    from .yaml_loader import parse_yaml
+except ImportError:
+    from composition_cache import CompositionCache
+    from yaml_loader import parse_yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_KEYS = ("id", "name", "feature_type", "component", "feature")
+DEFAULT_MAX_DEPTH = 2
+
+# Strings longer than this (in words) are prose, not identifiers
+MAX_IDENTIFIER_WORDS = 6
+MIN_TERM_CHARS = 3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(value: str) -> str:
+    """Normalize an identifier or phrase: 'User_Auth-Basic' -> 'user auth basic'"""
+    return _NON_ALNUM.sub(" ", value.lower()).strip()
+
+
+def _iter_strings(value: Any) -> Iterator[str]:
+    """Yield every string nested in a parsed YAML/JSON structure"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def _is_identifier(phrase: str) -> bool:
+    return len(phrase) >= MIN_TERM_CHARS and phrase.count(" ") < MAX_IDENTIFIER_WORDS
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+@dataclass(frozen=True)
+class SliceConfig:
+    """Slicing options of one _knowledge_deps.yaml entry"""
+    keys: Tuple[str, ...] = DEFAULT_INDEX_KEYS
+    max_depth: int = DEFAULT_MAX_DEPTH
+    always_include: Tuple[str, ...] = ()
+    fallback: str = "full"
+
+    @classmethod
+    def from_spec(cls, spec: Any) -> Optional["SliceConfig"]:
+        """
+        Parse the `slice` field of a knowledge entry.
+
+        Returns:
+            SliceConfig, or None if the entry is injected in full
+
+        Raises:
+            ValueError: If the slice spec is malformed
+        """
+        if spec is None or spec is False or spec == "full":
+            return None
+        if spec == "relevant" or spec is True:
+            return cls()
+        if not isinstance(spec, dict):
+            raise ValueError(
+                f"Invalid knowledge slice spec: {spec!r}\n"
+                f"Fix: Use 'slice: relevant' or a mapping with mode/max_depth/keys/always_include"
+            )
+
+        mode = spec.get("mode", "relevant")
+        if mode == "full":
+            return None
+        if mode != "relevant":
+            raise ValueError(
+                f"Unknown knowledge slice mode: {mode!r}\n"
+                f"Fix: Use mode 'relevant' or 'full'"
+            )
+
+        fallback = spec.get("fallback", "full")
+        if fallback not in ("full", "none"):
+            raise ValueError(
+                f"Unknown knowledge slice fallback: {fallback!r}\n"
+                f"Fix: Use fallback 'full' or 'none'"
+            )
+
+        return cls(
+            keys=tuple(spec.get("keys", DEFAULT_INDEX_KEYS)),
+            max_depth=int(spec.get("max_depth", DEFAULT_MAX_DEPTH)),
+            always_include=tuple(spec.get("always_include", ())),
+            fallback=fallback,
+        )
+
+
+# =============================================================================
+# CONTEXT TERMS
+# =============================================================================
+
+@dataclass(frozen=True)
+class ContextTerms:
+    """Normalized terms extracted from a runtime context"""
+    phrases: FrozenSet[str]
+    text: str  # all context strings, normalized and space-padded
+
+    @classmethod
+    def from_context(cls, context: Dict[str, Any]) -> "ContextTerms":
+        """
+        Extract terms from a runtime context.
+
+        Keys starting with "_" (resolved workspace paths etc.) are ignored.
+        """
+        strings: List[str] = []
+        for key, value in (context or {}).items():
+            if isinstance(key, str) and key.startswith("_"):
+                continue
+            strings.extend(_iter_strings(value))
+
+        normalized = [_normalize(s) for s in strings]
+        phrases = frozenset(p for p in normalized if _is_identifier(p))
+        return cls(phrases=phrases, text=" " + " ".join(normalized) + " ")
+
+    def matches(self, identifier: str) -> bool:
+        """True if a normalized identifier is mentioned by the context"""
+        if f" {identifier} " in self.text:
+            return True
+        padded = f" {identifier} "
+        return any(f" {phrase} " in padded for phrase in self.phrases)
+
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# KNOWLEDGE INDEX
+# =============================================================================
+
+@dataclass
+class KnowledgeRecord:
+    """One indexed item of a knowledge section"""
+    doc_index: int
+    section: str
+    position: int
+    keys: FrozenSet[str]
+    refs: FrozenSet[str]
+
+
+@dataclass
+class KnowledgeIndex:
+    """Parsed knowledge file with records indexed by identifier"""
+    path: str
+    documents: List[Any]
+    records: List[KnowledgeRecord] = field(default_factory=list)
+    by_key: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, path: str, text: str, index_keys: Tuple[str, ...]) -> "KnowledgeIndex":
+        """
+        Parse a (possibly multi-document) YAML knowledge file into records.
+
+        Raises:
+            YAMLParseError: If the file is not valid YAML
+        """
+        documents = [doc for doc in parse_yaml(text, path, multi=True) if doc is not None]
+
+        index = cls(path=path, documents=documents)
+        for doc_index, doc in enumerate(documents):
+            if not isinstance(doc, dict):
+                continue
+            for section, items in doc.items():
+                if not isinstance(items, list):
+                    continue
+                for position, item in enumerate(items):
+                    if not isinstance(item, dict):
+                        continue
+                    keys = frozenset(
+                        _normalize(str(item[k])) for k in index_keys
+                        if isinstance(item.get(k), (str, int)) and _normalize(str(item[k]))
+                    )
+                    refs = frozenset(
+                        p for p in (_normalize(s) for s in _iter_strings(item)) if _is_identifier(p)
+                    ) - keys
+                    index._add_keys(len(index.records), keys)
+                    index.records.append(KnowledgeRecord(doc_index, section, position, keys, refs))
+        return index
+
+    def _add_keys(self, record_id: int, keys: FrozenSet[str]) -> None:
+        for key in keys:
+            self.by_key.setdefault(key, []).append(record_id)
+
+    def select(self, terms: ContextTerms, config: SliceConfig) -> Tuple[Set[int], int]:
+        """
+        Select relevant records.
+
+        Returns:
+            (selected record ids, number of direct context matches)
+        """
+        selected: Set[int] = set()
+        for record_id, record in enumerate(self.records):
+            if any(terms.matches(key) for key in record.keys):
+                selected.add(record_id)
+        direct = len(selected)
+
+        # Follow references from selected records (components, related features)
+        frontier = set(selected)
+        for _ in range(config.max_depth):
+            referenced: Set[str] = set()
+            for record_id in frontier:
+                record = self.records[record_id]
+                referenced |= record.keys | record.refs
+            frontier = {
+                record_id
+                for ref in referenced
+                for record_id in self.by_key.get(ref, ())
+                if record_id not in selected
+            }
+            if not frontier:
+                break
+            selected |= frontier
+
+        # General rules carry no identifier - they apply to every project
+        for record_id, record in enumerate(self.records):
+            if not record.keys or record.section in config.always_include:
+                selected.add(record_id)
+
+        return selected, direct
+
+    def render(self, selected: Set[int]) -> str:
+        """Render the documents keeping only the selected records"""
+        import yaml
+
+        keep: Dict[Tuple[int, str], Set[int]] = {}
+        for record_id in selected:
+            record = self.records[record_id]
+            keep.setdefault((record.doc_index, record.section), set()).add(record.position)
+
+        rendered = []
+        for doc_index, doc in enumerate(self.documents):
+            if not isinstance(doc, dict):
+                rendered.append(yaml.safe_dump(doc, sort_keys=False, allow_unicode=True))
+                continue
+            sliced = {}
+            for section, items in doc.items():
+                if isinstance(items, list) and any(isinstance(i, dict) for i in items):
+                    positions = keep.get((doc_index, section))
+                    if positions:
+                        sliced[section] = [i for p, i in enumerate(items) if p in positions]
+                else:
+                    sliced[section] = items
+            if sliced:
+                rendered.append(
+                    yaml.safe_dump(sliced, sort_keys=False, allow_unicode=True, width=120)
+                )
+        return "---\n".join(rendered)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def slice_knowledge(
+    path: Path,
+    context: Dict[str, Any],
+    config: SliceConfig,
+    cache: CompositionCache
+) -> str:
+    """
+    Render the parts of a knowledge file relevant to a runtime context.
+
+    Args:
+        path: Knowledge YAML file
+        context: Runtime context (features, artifacts, user input)
+        config: Slicing options from _knowledge_deps.yaml
+        cache: Composition cache (index and slices are cached per file version)
+
+    Returns:
+        Sliced YAML text (or the full file if nothing in the context matches)
+    """
+    path = Path(path)
+    terms = ContextTerms.from_context(context)
+
+    index = cache.get_or_load(
+        ("knowledge_index", str(path), config.keys),
+        lambda: KnowledgeIndex.build(str(path), cache.read_text(path), config.keys),
+        [path]
+    )
+
+    def render() -> str:
+        selected, direct = index.select(terms, config)
+        if direct == 0 and config.fallback == "full":
+            logger.debug(f"No context match in {path.name} - injecting full file")
+            return cache.read_text(path)
+        logger.debug(
+            f"Sliced {path.name}: {len(selected)}/{len(index.records)} records "
+            f"({direct} direct matches)"
+        )
+        return (
+            f"# Relevance-sliced: {len(selected)} of {len(index.records)} entries "
+            f"relevant to the current context ({path.name})\n"
+            + index.render(selected)
+        )
+
+    return cache.get_or_load(
+        ("knowledge_slice", str(path), config, terms.digest()),
+        render,
+        [path]
+    )
@@ -7,23 +7,59 @@ Implements GAD-002 Decision 6: Agent Invocation Architecture
 
 Features:
 - Graceful failover (no crash if API key missing)
-- Retry logic with exponential backoff
-- Cost tracking (input/output tokens)
-- Rate limiting support
+- Retry logic with exponential backoff (jittered, honors Retry-After)
+- Rate limiting (process-wide RPM/TPM scheduler - see rate_limiter.py)
+- Cost tracking (input/output tokens, prompt-cache writes/reads)
+- Persistent cost ledger per project (shared across processes - see cost_ledger.py)
+- Budget enforcement by worst-case cost reservation (see budget_manager.py)
+- Prompt caching (PromptBlock lists -> cached system content blocks)
+- Response caching (identical requests answered from disk at $0 - see response_cache.py)
+- Concurrent invocation (invoke_many - see async_llm_client.py)
+- Streaming (invoke_stream - text deltas as they are generated)
+- Message batches (batch()/invoke_batch - discounted, see message_batches.py)
+- Model routing per agent/task with fallback chains (see model_router.py)
 - Error handling
 
 Version: 1.0 (Phase 3 - GAD-002)
 """
 
 import os
+import random
+import threading
 import time
 import logging
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 
+try:
+    from .cost_ledger import CostLedger, LedgerRecord, current_scope, get_cost_ledger
+    from .prompt_blocks import PromptBlock
+    from .rate_limiter import RateLimitScheduler, Ticket, estimate_request_tokens, get_rate_scheduler, \
+        is_throttled, retry_after
+    from .response_cache import ResponseCache, get_response_cache, response_cache_key
+except ImportError:
+    from cost_ledger import CostLedger, LedgerRecord, current_scope, get_cost_ledger
+    from prompt_blocks import PromptBlock
+    from rate_limiter import RateLimitScheduler, Ticket, estimate_request_tokens, get_rate_scheduler, \
+        is_throttled, retry_after
+    from response_cache import ResponseCache, get_response_cache, response_cache_key
+
 logger = logging.getLogger(__name__)
 
+# A prompt is either a plain string or cache-friendly blocks (see prompt_blocks.py)
+Prompt = Union[str, Sequence[PromptBlock]]
+
+# Sentinel for "use the shared response cache" (None disables caching)
+DEFAULT_RESPONSE_CACHE = object()
+
+# Sentinel for "use the shared rate scheduler" (None disables admission control)
+DEFAULT_RATE_SCHEDULER = object()
+
+# Sentinel for "use the shared cost ledger" (None keeps costs in memory only)
+DEFAULT_COST_LEDGER = object()
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -37,6 +73,11 @@ class LLMUsage:
     model: str
     cost_usd: float
     timestamp: str
+    cache_write_tokens: int = 0  # Input tokens written to the provider prompt cache
+    cache_read_tokens: int = 0   # Input tokens served from the provider prompt cache
+    cached: bool = False         # Answered from the response cache (cost_usd is 0)
+    batch: bool = False          # Processed by the message batches API (discounted)
+    latency_ms: float = 0.0      # Wall-clock time of the provider call
 
 
 @dataclass
@@ -48,6 +89,49 @@ class LLMResponse:
     finish_reason: str
 
 
+@dataclass
+class StreamEvent:
+    """
+    One event of LLMClient.invoke_stream(): a text delta, or (last) the
+    complete response with its usage.
+    """
+    text: str = ""
+    response: Optional[LLMResponse] = None
+
+
+@dataclass
+class LLMRequest:
+    """One invocation of a batch (LLMClient.invoke_many / AsyncLLMClient.invoke_many)"""
+    prompt: Prompt
+    model: str = "claude-3-5-sonnet-20241022"
+    max_tokens: int = 4096
+    temperature: float = 1.0
+    max_retries: int = 3
+    agent: Optional[str] = None
+
+    @classmethod
+    def coerce(cls, request: Union["LLMRequest", Dict[str, Any], str]) -> "LLMRequest":
+        """Accept an LLMRequest, a dict of invoke() keyword arguments, or a prompt"""
+        if isinstance(request, LLMRequest):
+            return request
+        if isinstance(request, dict):
+            return cls(**request)
+        return cls(prompt=request)
+
+
+@dataclass
+class LLMResult:
+    """Outcome of one batch request: a response or the exception it raised"""
+    request: LLMRequest
+    response: Optional[LLMResponse] = None
+    error: Optional[BaseException] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 # =============================================================================
 # COST TRACKER
 # =============================================================================
@@ -57,29 +141,92 @@ class CostTracker:
     Tracks API costs across invocations.
 
     Pricing (as of 2025-11-14):
-    - Claude 3.5 Sonnet: $3/MTok input, $15/MTok output
+    - Claude 3.5 / 3.7 Sonnet: $3/MTok input, $15/MTok output
+    - Claude 3.5 Haiku: $0.80/MTok input, $4/MTok output
+    - Claude 3 Haiku: $0.25/MTok input, $1.25/MTok output
+    - Prompt cache: writes $3.75/MTok (1.25x input), reads $0.30/MTok (0.1x input)
+    - Message batches: all token prices x BATCH_DISCOUNT (50% off)
+
+    With a project, every invocation is also appended to the cost ledger
+    (see cost_ledger.py) and spent_usd() is the project's spend across all
+    processes and runs. Only the RECENT_INVOCATIONS latest usages are kept
+    in memory.
     """
 
+    # In-memory history (the ledger keeps the complete one)
+    RECENT_INVOCATIONS = 1000
+
+    # Price factor of requests processed through the message batches API
+    BATCH_DISCOUNT = 0.5
+
     # Pricing table (USD per million tokens)
     PRICING = {
         "claude-3-5-sonnet-20241022": {
             "input": 3.0,
-            "output": 15.0
+            "output": 15.0,
+            "cache_write": 3.75,
+            "cache_read": 0.30
         },
         "claude-3-5-sonnet-20250129": {
             "input": 3.0,
-            "output": 15.0
+            "output": 15.0,
+            "cache_write": 3.75,
+            "cache_read": 0.30
+        },
+        "claude-3-7-sonnet-20250219": {
+            "input": 3.0,
+            "output": 15.0,
+            "cache_write": 3.75,
+            "cache_read": 0.30
+        },
+        "claude-3-5-haiku-20241022": {
+            "input": 0.80,
+            "output": 4.0,
+            "cache_write": 1.0,
+            "cache_read": 0.08
+        },
+        "claude-3-haiku-20240307": {
+            "input": 0.25,
+            "output": 1.25,
+            "cache_write": 0.30,
+            "cache_read": 0.03
         }
     }
 
-    def __init__(self):
+    def __init__(self, project: Optional[str] = None, ledger: Any = DEFAULT_COST_LEDGER):
+        """
+        Args:
+            project: Project the invocations are billed to (enables the ledger)
+            ledger: CostLedger to append to (default: the shared one if a
+                project is set; None keeps costs in memory only)
+        """
+        self.project = project
+        self.ledger: Optional[CostLedger] = (
+            (get_cost_ledger() if project else None) if ledger is DEFAULT_COST_LEDGER else ledger
+        )
         self.total_cost = 0.0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        self.invocations = []
-
-    def calculate_cost(self, input_tokens: int, output_tokens: int, model: str) -> float:
-        """Calculate cost for a single invocation"""
+        self.total_cache_write_tokens = 0
+        self.total_cache_read_tokens = 0
+        self.response_cache_hits = 0
+        self.response_cache_saved_usd = 0.0
+        self.batch_invocations = 0
+        self.total_invocations = 0
+        self.invocations = deque(maxlen=self.RECENT_INVOCATIONS)
+        # Concurrent invocations (invoke_many, threads) record into one tracker
+        self._lock = threading.Lock()
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        model: str,
+        cache_write_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        batch: bool = False
+    ) -> float:
+        """Calculate cost for a single invocation (batch: message batches pricing)"""
         if model not in self.PRICING:
             logger.warning(f"Unknown model pricing: {model}, using Sonnet defaults")
             pricing = self.PRICING["claude-3-5-sonnet-20241022"]
@@ -88,36 +235,127 @@ class CostTracker:
 
         input_cost = (input_tokens / 1_000_000) * pricing["input"]
         output_cost = (output_tokens / 1_000_000) * pricing["output"]
+        cache_write_cost = (cache_write_tokens / 1_000_000) * pricing.get("cache_write", pricing["input"] * 1.25)
+        cache_read_cost = (cache_read_tokens / 1_000_000) * pricing.get("cache_read", pricing["input"] * 0.1)
 
-        return input_cost + output_cost
+        cost = input_cost + output_cost + cache_write_cost + cache_read_cost
+        return cost * self.BATCH_DISCOUNT if batch else cost
 
-    def record(self, input_tokens: int, output_tokens: int, model: str) -> LLMUsage:
-        """Record token usage and calculate cost"""
-        cost = self.calculate_cost(input_tokens, output_tokens, model)
+    def record(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        model: str,
+        cache_write_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        batch: bool = False,
+        latency_ms: float = 0.0,
+        agent: Optional[str] = None
+    ) -> LLMUsage:
+        """Record token usage and calculate cost (agent: fallback if no cost_scope() sets one)"""
+        cost = self.calculate_cost(input_tokens, output_tokens, model, cache_write_tokens, cache_read_tokens, batch)
 
         usage = LLMUsage(
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             model=model,
             cost_usd=cost,
-            timestamp=datetime.utcnow().isoformat() + "Z"
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            cache_write_tokens=cache_write_tokens,
+            cache_read_tokens=cache_read_tokens,
+            batch=batch,
+            latency_ms=latency_ms
         )
 
-        self.total_cost += cost
-        self.total_input_tokens += input_tokens
-        self.total_output_tokens += output_tokens
-        self.invocations.append(usage)
-
+        with self._lock:
+            self.batch_invocations += batch
+            self.total_invocations += 1
+            self.total_cost += cost
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self.total_cache_write_tokens += cache_write_tokens
+            self.total_cache_read_tokens += cache_read_tokens
+            self.invocations.append(usage)
+
+        self._append_ledger(usage, agent)
         return usage
 
+    def record_cached(self, usage: LLMUsage, agent: Optional[str] = None) -> LLMUsage:
+        """
+        Record a response cache hit: no tokens billed, $0.
+
+        Args:
+            usage: Usage of the original (cached) invocation
+            agent: See record()
+        """
+        cached = LLMUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            model=usage.model,
+            cost_usd=0.0,
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            cache_write_tokens=usage.cache_write_tokens,
+            cache_read_tokens=usage.cache_read_tokens,
+            cached=True
+        )
+        with self._lock:
+            self.response_cache_hits += 1
+            self.response_cache_saved_usd += usage.cost_usd
+            self.total_invocations += 1
+            self.invocations.append(cached)
+        self._append_ledger(cached, agent)
+        return cached
+
+    def spent_usd(self) -> float:
+        """Spend the budget is checked against: the project's ledger total, else this process's"""
+        if self.ledger is not None and self.project:
+            return self.ledger.project_total(self.project)
+        return self.total_cost
+
+    def _append_ledger(self, usage: LLMUsage, agent: Optional[str]) -> None:
+        if self.ledger is None:
+            return
+        scope = current_scope()
+        project = self.project or scope.get("project")
+        if not project:
+            return
+        try:
+            self.ledger.append(LedgerRecord(
+                model=usage.model,
+                project=project,
+                phase=scope.get("phase", ""),
+                agent=scope.get("agent") or agent or "",
+                task=scope.get("task", ""),
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_write_tokens=usage.cache_write_tokens,
+                cache_read_tokens=usage.cache_read_tokens,
+                latency_ms=usage.latency_ms,
+                cost_usd=usage.cost_usd,
+                cached=usage.cached,
+                batch=usage.batch
+            ))
+        except Exception as e:
+            # The in-memory totals stay correct; only the persistent record is lost
+            logger.error(f"Could not append to cost ledger {self.ledger.path}: {e}")
+
     def get_summary(self) -> Dict[str, Any]:
         """Get cost summary"""
+        prompt_tokens = self.total_input_tokens + self.total_cache_write_tokens + self.total_cache_read_tokens
         return {
             "total_cost_usd": round(self.total_cost, 4),
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
-            "total_invocations": len(self.invocations),
-            "average_cost_per_invocation": round(self.total_cost / len(self.invocations), 4) if self.invocations else 0
+            "total_cache_write_tokens": self.total_cache_write_tokens,
+            "total_cache_read_tokens": self.total_cache_read_tokens,
+            "cache_hit_rate": round(self.total_cache_read_tokens / prompt_tokens, 4) if prompt_tokens else 0,
+            "total_invocations": self.total_invocations,
+            "average_cost_per_invocation": (
+                round(self.total_cost / self.total_invocations, 4) if self.total_invocations else 0
+            ),
+            "response_cache_hits": self.response_cache_hits,
+            "response_cache_saved_usd": round(self.response_cache_saved_usd, 4),
+            "batch_invocations": self.batch_invocations
         }
 
 
@@ -140,6 +378,42 @@ class BudgetExceededError(LLMClientError):
     pass
 
 
+# Provider exceptions worth retrying (matched by class name - the provider SDK is optional)
+RETRYABLE_ERRORS = ("RateLimitError", "APIConnectionError", "APITimeoutError")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed invocation should be retried (incl. 429 rate limits and 529 overloads)"""
+    error_name = type(error).__name__
+    return is_throttled(error) or any(err in error_name for err in RETRYABLE_ERRORS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Seconds to wait before retry number attempt + 1.
+
+    Exponential (1s, 2s, 4s) with jitter: a random 50-100% of the step, so
+    concurrent callers failing together do not retry together.
+    """
+    return 2 ** attempt * random.uniform(0.5, 1.0)
+
+
+def retry_delay(error: BaseException, backoff: float) -> float:
+    """Seconds to wait before retrying after error: the server's Retry-After, else backoff"""
+    wait = retry_after(error)
+    return wait if wait is not None else backoff
+
+
+def invocation_error(max_retries: int, last_error: Optional[BaseException]) -> LLMInvocationError:
+    """The error raised once all attempts of an invocation failed (last_error: the provider's error)"""
+    error = LLMInvocationError(
+        f"LLM invocation failed after {max_retries} attempts. "
+        f"Last error: {type(last_error).__name__} - {str(last_error)}"
+    )
+    error.last_error = last_error
+    return error
+
+
 # =============================================================================
 # NO-OP CLIENT (GRACEFUL FAILOVER)
 # =============================================================================
@@ -185,7 +459,279 @@ class NoOpClient:
 # LLM CLIENT
 # =============================================================================
 
-class LLMClient:
+class BaseLLMClient:
+    """
+    Provider setup, request building and cost accounting shared by
+    LLMClient (blocking) and AsyncLLMClient (asyncio).
+    """
+
+    def __init__(
+        self,
+        budget_limit: Optional[float] = None,
+        cost_tracker: Optional[CostTracker] = None,
+        response_cache: Any = DEFAULT_RESPONSE_CACHE,
+        rate_scheduler: Any = DEFAULT_RATE_SCHEDULER,
+        budget_manager: Any = None,
+        alert_threshold: Optional[float] = None
+    ):
+        try:
+            from .budget_manager import DEFAULT_ALERT_THRESHOLD, BudgetManager
+        except ImportError:
+            from budget_manager import DEFAULT_ALERT_THRESHOLD, BudgetManager
+
+        self.cost_tracker = cost_tracker if cost_tracker is not None else CostTracker()
+        self.budget_limit = budget_limit
+        # Reservations of concurrent calls (shared by async_client() and batch())
+        if budget_manager is None and budget_limit:
+            budget_manager = BudgetManager(
+                budget_limit, self.cost_tracker,
+                alert_threshold if alert_threshold is not None else DEFAULT_ALERT_THRESHOLD
+            )
+        self.budget: Optional["BudgetManager"] = budget_manager
+        # None unless enabled (VIBE_LLM_CACHE=1) or passed explicitly
+        self.response_cache: Optional[ResponseCache] = (
+            get_response_cache() if response_cache is DEFAULT_RESPONSE_CACHE else response_cache
+        )
+        # Shared per process unless disabled (VIBE_LLM_RATE_LIMIT=0) or passed explicitly
+        self.rate_scheduler: Optional[RateLimitScheduler] = (
+            get_rate_scheduler() if rate_scheduler is DEFAULT_RATE_SCHEDULER else rate_scheduler
+        )
+        self.api_key = os.environ.get("ANTHROPIC_API_KEY")
+
+    def _create_provider_client(self, provider_class: str, fallback: type) -> Tuple[Any, str]:
+        """
+        Initialize the Anthropic client with graceful failover.
+
+        Returns:
+            (client, mode) - mode is "anthropic", or "noop" with the fallback client
+        """
+        if not self.api_key:
+            logger.warning(
+                "ANTHROPIC_API_KEY not found - using NoOpClient (knowledge-only mode). "
+                "Set ANTHROPIC_API_KEY environment variable to enable LLM invocations."
+            )
+            return fallback(), "noop"
+        try:
+            import anthropic
+            client = getattr(anthropic, provider_class)(api_key=self.api_key)
+            logger.info(f"LLM Client initialized with Anthropic API ({provider_class})")
+            return client, "anthropic"
+        except ImportError:
+            logger.error(
+                "anthropic package not installed. "
+                "Install with: pip install anthropic>=0.18.0"
+            )
+            return fallback(), "noop"
+
+    def _reserve(self, request: Dict[str, Any], batch: bool = False) -> Optional["Reservation"]:
+        """
+        Reserve the request's worst-case cost (None without a budget).
+
+        Raises:
+            BudgetExceededError: If the call cannot fit the remaining budget
+        """
+        if self.budget is None:
+            return None
+        return self.budget.reserve(request, batch)
+
+    async def _reserve_async(self, request: Dict[str, Any]) -> Optional["Reservation"]:
+        """_reserve() for asyncio code"""
+        if self.budget is None:
+            return None
+        return await self.budget.reserve_async(request)
+
+    def _settle(self, reservation: Optional["Reservation"]) -> None:
+        """Release a reservation once its call returned or failed"""
+        if reservation is not None:
+            self.budget.settle(reservation)
+
+    @classmethod
+    def _request_kwargs(cls, prompt: Prompt, model: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        """Keyword arguments for messages.create()"""
+        system, messages = cls._build_request(prompt)
+        request_kwargs = {"system": system} if system else {}
+        return dict(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=messages,
+            **request_kwargs
+        )
+
+    def _acquire_slot(self, request: Dict[str, Any]) -> Optional[Ticket]:
+        """Wait until the rate scheduler admits the request (None without a scheduler)"""
+        if self.rate_scheduler is None:
+            return None
+        return self.rate_scheduler.acquire(
+            request["model"], estimate_request_tokens(request), request["max_tokens"]
+        )
+
+    async def _acquire_slot_async(self, request: Dict[str, Any]) -> Optional[Ticket]:
+        """_acquire_slot() for asyncio code"""
+        if self.rate_scheduler is None:
+            return None
+        return await self.rate_scheduler.acquire_async(
+            request["model"], estimate_request_tokens(request), request["max_tokens"]
+        )
+
+    def _release_slot(
+        self,
+        ticket: Optional[Ticket],
+        message: Any = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Report an admitted call's outcome (actual usage or error) to the rate scheduler"""
+        if ticket is None:
+            return
+        usage = getattr(message, "usage", None)
+        input_tokens = output_tokens = None
+        if usage is not None:
+            # Prompt-cache writes count against input limits, cache reads do not
+            input_tokens = usage.input_tokens + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+            output_tokens = usage.output_tokens
+        self.rate_scheduler.release(ticket, input_tokens, output_tokens, error)
+
+    def _cache_lookup(
+        self,
+        request: Dict[str, Any],
+        agent: Optional[str]
+    ) -> Tuple[Optional[str], Optional[LLMResponse]]:
+        """
+        Look a request up in the response cache.
+
+        Returns:
+            (cache key, cached response) - key is None if the request bypasses
+            the cache, response is None on a miss
+        """
+        if self.response_cache is None or not self.response_cache.enabled_for(agent):
+            return None, None
+        key = response_cache_key(
+            request["model"], request.get("system"), request["messages"],
+            request["max_tokens"], request["temperature"]
+        )
+        entry = self.response_cache.get(key)
+        if entry is None:
+            return key, None
+
+        usage = self.cost_tracker.record_cached(LLMUsage(
+            input_tokens=entry["input_tokens"],
+            output_tokens=entry["output_tokens"],
+            model=request["model"],
+            cost_usd=entry["cost_usd"],
+            timestamp=entry.get("timestamp", ""),
+            cache_write_tokens=entry.get("cache_write_tokens", 0),
+            cache_read_tokens=entry.get("cache_read_tokens", 0)
+        ), agent)
+        logger.info(
+            f"LLM response cache hit: {request['model']}"
+            f"{f' ({agent})' if agent else ''} - saved ${entry['cost_usd']:.4f}"
+        )
+        return key, LLMResponse(
+            content=entry["content"],
+            usage=usage,
+            model=entry["model"],
+            finish_reason=entry["finish_reason"]
+        )
+
+    def _cache_store(self, key: Optional[str], agent: Optional[str], response: LLMResponse) -> None:
+        """Store a fresh response (knowledge-only NoOp responses are not cached)"""
+        if key is None or response.finish_reason == "no_api_key":
+            return
+        usage = response.usage
+        self.response_cache.put(key, {
+            "content": response.content,
+            "model": response.model,
+            "finish_reason": response.finish_reason,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_write_tokens": usage.cache_write_tokens,
+            "cache_read_tokens": usage.cache_read_tokens,
+            "cost_usd": usage.cost_usd,
+            "timestamp": usage.timestamp,
+        }, agent)
+
+    def _record_response(
+        self,
+        response: Any,
+        model: str,
+        batch: bool = False,
+        latency_ms: float = 0.0,
+        agent: Optional[str] = None
+    ) -> LLMResponse:
+        """Track the cost of a provider response and standardize it"""
+        # Track cost (cache token fields are absent/None without prompt caching)
+        usage = self.cost_tracker.record(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            model=model,
+            cache_write_tokens=getattr(response.usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_tokens=getattr(response.usage, "cache_read_input_tokens", 0) or 0,
+            batch=batch,
+            latency_ms=latency_ms,
+            agent=agent
+        )
+
+        # Log invocation
+        logger.info(
+            f"LLM {'batch request' if batch else 'invocation'} successful: {model} "
+            f"(in: {usage.input_tokens}, out: {usage.output_tokens}, "
+            f"cache write: {usage.cache_write_tokens}, cache read: {usage.cache_read_tokens}, "
+            f"cost: ${usage.cost_usd:.4f})"
+        )
+
+        # Return standardized response
+        return LLMResponse(
+            content=response.content[0].text,
+            usage=usage,
+            model=response.model,
+            finish_reason=response.stop_reason
+        )
+
+    @staticmethod
+    def _build_request(prompt: Prompt) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Build (system, messages) for messages.create().
+
+        A plain string becomes a single user message (no system content).
+        PromptBlocks up to the last cache breakpoint become system text
+        blocks (breakpoints carry cache_control); the rest is the user message.
+        """
+        if isinstance(prompt, str):
+            return [], [{"role": "user", "content": prompt}]
+
+        blocks = [b for b in prompt if b.text]
+        split = max((i + 1 for i, b in enumerate(blocks) if b.cache_breakpoint), default=0)
+        if split == len(blocks):
+            # Everything is cacheable - the user turn still needs content
+            split -= 1
+
+        def content(block: PromptBlock) -> Dict[str, Any]:
+            item = {"type": "text", "text": block.text}
+            if block.cache_breakpoint:
+                item["cache_control"] = {"type": "ephemeral"}
+            return item
+
+        system = [content(b) for b in blocks[:split]]
+        user = [content(b) for b in blocks[split:]]
+        return system, [{"role": "user", "content": user}]
+
+    def get_cost_summary(self) -> Dict[str, Any]:
+        """Get cost tracking summary"""
+        summary = self.cost_tracker.get_summary()
+        spent = self.cost_tracker.spent_usd()
+        if self.cost_tracker.ledger is not None and self.cost_tracker.project:
+            summary['project'] = self.cost_tracker.project
+            summary['project_cost_usd'] = round(spent, 4)
+        if self.budget_limit:
+            summary['budget_limit_usd'] = self.budget_limit
+            summary['budget_remaining_usd'] = round(self.budget_limit - spent, 4)
+            summary['budget_used_percent'] = round((spent / self.budget_limit) * 100, 2)
+        if self.budget is not None:
+            summary['budget_reserved_usd'] = round(self.budget.reserved_usd, 4)
+        return summary
+
+
+class LLMClient(BaseLLMClient):
     """
     Thin wrapper around Anthropic API with retry, cost tracking, error handling.
 
@@ -195,8 +741,11 @@ class LLMClient:
     - Graceful failover (NoOpClient if no API key)
     - Retry with exponential backoff (up to 3 attempts)
     - Cost tracking via CostTracker
-    - Budget enforcement (optional)
-    - Rate limiting support (optional)
+    - Budget enforcement (optional, worst-case reservations - see budget_manager.py)
+    - Rate limiting via the shared RateLimitScheduler (RPM/TPM, adaptive concurrency)
+    - Concurrent batches (invoke_many) on top of AsyncLLMClient
+    - Streaming (invoke_stream)
+    - Discounted message batches (batch, invoke_batch)
 
     Usage:
         client = LLMClient()
@@ -209,57 +758,59 @@ class LLMClient:
         print(f"Cost: ${response.usage.cost_usd:.4f}")
     """
 
-    def __init__(self, budget_limit: Optional[float] = None):
+    def __init__(
+        self,
+        budget_limit: Optional[float] = None,
+        response_cache: Any = DEFAULT_RESPONSE_CACHE,
+        rate_scheduler: Any = DEFAULT_RATE_SCHEDULER,
+        project: Optional[str] = None,
+        cost_tracker: Optional[CostTracker] = None,
+        alert_threshold: Optional[float] = None
+    ):
         """
         Initialize LLM client.
 
         Args:
             budget_limit: Optional budget limit in USD (default: None = no limit)
+            response_cache: ResponseCache to answer repeated requests from
+                (default: the shared one if VIBE_LLM_CACHE=1; None disables it)
+            rate_scheduler: RateLimitScheduler admitting every call (default:
+                the process-wide one; None disables admission control)
+            project: Project to bill: invocations go to the cost ledger and
+                budget_limit applies to the project's total spend
+            cost_tracker: Tracker to record into (default: a new one for project)
+            alert_threshold: Fraction of budget_limit (settled + reserved)
+                that logs a budget alert (default: 0.8)
         """
-        self.cost_tracker = CostTracker()
-        self.budget_limit = budget_limit
-
-        # Initialize Anthropic client with graceful failover
-        self.api_key = os.environ.get("ANTHROPIC_API_KEY")
-
-        if not self.api_key:
-            logger.warning(
-                "ANTHROPIC_API_KEY not found - using NoOpClient (knowledge-only mode). "
-                "Set ANTHROPIC_API_KEY environment variable to enable LLM invocations."
-            )
-            self.client = NoOpClient()
-            self.mode = "noop"
-        else:
-            try:
-                from anthropic import Anthropic
-                self.client = Anthropic(api_key=self.api_key)
-                self.mode = "anthropic"
-                logger.info("LLM Client initialized with Anthropic API")
-            except ImportError:
-                logger.error(
-                    "anthropic package not installed. "
-                    "Install with: pip install anthropic>=0.18.0"
-                )
-                self.client = NoOpClient()
-                self.mode = "noop"
+        if cost_tracker is None and project:
+            cost_tracker = CostTracker(project=project)
+        super().__init__(
+            budget_limit, cost_tracker, response_cache=response_cache, rate_scheduler=rate_scheduler,
+            alert_threshold=alert_threshold
+        )
+        self.client, self.mode = self._create_provider_client("Anthropic", NoOpClient)
 
     def invoke(
         self,
-        prompt: str,
+        prompt: Prompt,
         model: str = "claude-3-5-sonnet-20241022",
         max_tokens: int = 4096,
         temperature: float = 1.0,
-        max_retries: int = 3
+        max_retries: int = 3,
+        agent: Optional[str] = None
     ) -> LLMResponse:
         """
         Invoke LLM with retry logic and cost tracking.
 
         Args:
-            prompt: Input prompt
+            prompt: Input prompt - a string, or PromptBlocks whose cache
+                breakpoints are sent as cached system content blocks
             model: Model to use
             max_tokens: Maximum output tokens
             temperature: Sampling temperature
             max_retries: Maximum retry attempts (default: 3)
+            agent: Agent the request is made for (response cache scope and
+                per-agent enable/disable)
 
         Returns:
             LLMResponse with content and usage info
@@ -268,61 +819,51 @@ class LLMClient:
             BudgetExceededError: If budget limit reached
             LLMInvocationError: If all retries fail
         """
-        # Check budget before invocation
-        if self.budget_limit and self.cost_tracker.total_cost >= self.budget_limit:
-            raise BudgetExceededError(
-                f"Budget limit reached: ${self.budget_limit:.2f} "
-                f"(current: ${self.cost_tracker.total_cost:.4f})"
-            )
+        request = self._request_kwargs(prompt, model, max_tokens, temperature)
+        cache_key, cached = self._cache_lookup(request, agent)
+        if cached is not None:
+            return cached
+
+        reservation = self._reserve(request)
+        try:
+            response = self._create(request, model, max_retries, agent)
+        finally:
+            self._settle(reservation)
+        self._cache_store(cache_key, agent, response)
+        return response
 
+    def _create(
+        self,
+        request: Dict[str, Any],
+        model: str,
+        max_retries: int,
+        agent: Optional[str] = None
+    ) -> LLMResponse:
+        """messages.create() with retries and cost tracking"""
         # Retry loop with exponential backoff
         last_error = None
         for attempt in range(max_retries):
+            ticket = None
             try:
-                # Call Anthropic API
-                response = self.client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-
-                # Track cost
-                usage = self.cost_tracker.record(
-                    input_tokens=response.usage.input_tokens,
-                    output_tokens=response.usage.output_tokens,
-                    model=model
-                )
-
-                # Log invocation
-                logger.info(
-                    f"LLM invocation successful: {model} "
-                    f"(in: {usage.input_tokens}, out: {usage.output_tokens}, "
-                    f"cost: ${usage.cost_usd:.4f})"
-                )
-
-                # Return standardized response
-                return LLMResponse(
-                    content=response.content[0].text,
-                    usage=usage,
-                    model=response.model,
-                    finish_reason=response.stop_reason
-                )
+                # Call Anthropic API once the rate scheduler admits it
+                ticket = self._acquire_slot(request)
+                start = time.perf_counter()
+                message = self._messages_create()(**request)
+                latency_ms = (time.perf_counter() - start) * 1000
+                self._release_slot(ticket, message)
+                ticket = None
+                return self._record_response(message, model, latency_ms=latency_ms, agent=agent)
 
             except Exception as e:
+                self._release_slot(ticket, error=e)
                 last_error = e
                 error_name = type(e).__name__
 
-                # Check if retryable error
-                retryable_errors = ["RateLimitError", "APIConnectionError", "APITimeoutError"]
-                is_retryable = any(err in error_name for err in retryable_errors)
-
-                if is_retryable and attempt < max_retries - 1:
-                    # Exponential backoff: 2s, 4s, 8s
-                    wait_time = 2 ** attempt
+                if is_retryable(e) and attempt < max_retries - 1:
+                    wait_time = retry_delay(e, backoff_delay(attempt))
                     logger.warning(
                         f"LLM invocation failed ({error_name}), "
-                        f"retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})"
+                        f"retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})"
                     )
                     time.sleep(wait_time)
                 else:
@@ -331,19 +872,230 @@ class LLMClient:
                     break
 
         # All retries failed
-        raise LLMInvocationError(
-            f"LLM invocation failed after {max_retries} attempts. "
-            f"Last error: {type(last_error).__name__} - {str(last_error)}"
+        raise invocation_error(max_retries, last_error)
+
+    def invoke_stream(
+        self,
+        prompt: Prompt,
+        model: str = "claude-3-5-sonnet-20241022",
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        max_retries: int = 3,
+        agent: Optional[str] = None
+    ) -> Iterator[StreamEvent]:
+        """
+        Invoke LLM and yield the completion as it is generated.
+
+        Yields StreamEvent(text=delta) for every text delta, then one
+        StreamEvent(response=LLMResponse) with the full content and usage
+        (cost is tracked like invoke()). Failures before the first delta are
+        retried like invoke(); once text has been yielded they raise
+        LLMInvocationError. Closing the generator early aborts the request.
+
+        Providers without a streaming API (NoOpClient in knowledge-only
+        mode) and response cache hits yield the whole content as a single
+        delta.
+
+        Args:
+            Same as invoke()
+
+        Raises:
+            BudgetExceededError: If budget limit reached
+            LLMInvocationError: If the request fails
+        """
+        request = self._request_kwargs(prompt, model, max_tokens, temperature)
+        cache_key, cached = self._cache_lookup(request, agent)
+        if cached is not None:
+            yield StreamEvent(text=cached.content)
+            yield StreamEvent(response=cached)
+            return
+
+        reservation = self._reserve(request)
+        try:
+            stream = getattr(getattr(self.client, "messages", None), "stream", None)
+            if stream is None:
+                response = self._create(request, model, max_retries, agent)
+                self._cache_store(cache_key, agent, response)
+                yield StreamEvent(text=response.content)
+                yield StreamEvent(response=response)
+                return
+
+            last_error = None
+            for attempt in range(max_retries):
+                started = False
+                ticket = None
+                try:
+                    ticket = self._acquire_slot(request)
+                    start = time.perf_counter()
+                    with stream(**request) as events:
+                        for text in events.text_stream:
+                            started = True
+                            yield StreamEvent(text=text)
+                        message = events.get_final_message()
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    self._release_slot(ticket, message)
+                    ticket = None
+                    response = self._record_response(message, model, latency_ms=latency_ms, agent=agent)
+                    self._cache_store(cache_key, agent, response)
+                    yield StreamEvent(response=response)
+                    return
+
+                except Exception as e:
+                    self._release_slot(ticket, error=e)
+                    ticket = None
+                    last_error = e
+                    error_name = type(e).__name__
+
+                    if not started and is_retryable(e) and attempt < max_retries - 1:
+                        wait_time = retry_delay(e, backoff_delay(attempt))
+                        logger.warning(
+                            f"LLM stream failed ({error_name}), "
+                            f"retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})"
+                        )
+                        time.sleep(wait_time)
+                    else:
+                        logger.error(f"LLM stream failed: {error_name} - {str(e)}")
+                        break
+
+                finally:
+                    # Generator closed mid-stream: free the slot (usage unknown)
+                    self._release_slot(ticket)
+
+            raise invocation_error(max_retries, last_error)
+        finally:
+            # Also when the caller closes the generator early
+            self._settle(reservation)
+
+    def invoke_many(
+        self,
+        requests: Iterable[Union[LLMRequest, Dict[str, Any], str]],
+        max_concurrency: Optional[int] = None
+    ) -> List[LLMResult]:
+        """
+        Invoke many independent requests concurrently (blocking until all finish).
+
+        Runs AsyncLLMClient.invoke_many() on a private event loop; costs are
+        recorded in this client's CostTracker and count against its budget.
+
+        Args:
+            requests: LLMRequests, dicts of invoke() keyword arguments, or prompts
+            max_concurrency: Calls in flight at once (default: see async_llm_client.py)
+
+        Returns:
+            One LLMResult per request, in request order
+
+        Raises:
+            LLMClientError: If called from a running event loop
+        """
+        import asyncio
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise LLMClientError(
+                "LLMClient.invoke_many() cannot block inside a running event loop\n"
+                "Fix: await client.async_client().invoke_many(requests) instead"
+            )
+        return asyncio.run(self.async_client(max_concurrency).invoke_many(requests))
+
+    def async_client(self, max_concurrency: Optional[int] = None):
+        """
+        An AsyncLLMClient sharing this client's CostTracker, budget reservations, response cache and rate scheduler.
+
+        Args:
+            max_concurrency: Calls in flight at once (default: see async_llm_client.py)
+        """
+        try:
+            from .async_llm_client import AsyncLLMClient
+        except ImportError:
+            from async_llm_client import AsyncLLMClient
+        return AsyncLLMClient(
+            budget_limit=self.budget_limit,
+            max_concurrency=max_concurrency,
+            cost_tracker=self.cost_tracker,
+            response_cache=self.response_cache,
+            rate_scheduler=self.rate_scheduler,
+            budget_manager=self.budget
         )
 
-    def get_cost_summary(self) -> Dict[str, Any]:
-        """Get cost tracking summary"""
-        summary = self.cost_tracker.get_summary()
-        if self.budget_limit:
-            summary['budget_limit_usd'] = self.budget_limit
-            summary['budget_remaining_usd'] = round(self.budget_limit - self.cost_tracker.total_cost, 4)
-            summary['budget_used_percent'] = round((self.cost_tracker.total_cost / self.budget_limit) * 100, 2)
-        return summary
+    def batch(self, **options):
+        """
+        A MessageBatcher submitting through this client (see message_batches.py).
+
+        Args:
+            **options: MessageBatcher options (backend, max_batch_size,
+                poll_interval, max_poll_interval)
+        """
+        try:
+            from .message_batches import MessageBatcher
+        except ImportError:
+            from message_batches import MessageBatcher
+        return MessageBatcher(self, **options)
+
+    def invoke_batch(
+        self,
+        requests: Iterable[Union[LLMRequest, Dict[str, Any], str]],
+        timeout: Optional[float] = None,
+        **options
+    ) -> List[LLMResult]:
+        """
+        Run independent requests through the message batches API (blocking).
+
+        Half the price of invoke(), but a batch may take minutes to hours;
+        use it for calls nobody waits on. Requests are not retried
+        (max_retries is ignored).
+
+        Args:
+            requests: LLMRequests, dicts of invoke() keyword arguments, or prompts
+            timeout: Seconds to wait for the batches; unfinished requests are
+                cancelled and carry an error (default: wait until they end)
+            **options: MessageBatcher options
+
+        Returns:
+            One LLMResult per request, in request order
+        """
+        batch = [LLMRequest.coerce(request) for request in requests]
+        futures = []
+        with self.batch(**options) as batcher:
+            for request in batch:
+                try:
+                    futures.append(batcher.submit(
+                        request.prompt, request.model, request.max_tokens, request.temperature, request.agent
+                    ))
+                except LLMClientError as e:
+                    futures.append(e)
+            if not batcher.wait(timeout):
+                batcher.cancel()
+                batcher.wait()
+
+        results = []
+        for request, future in zip(batch, futures):
+            if isinstance(future, Exception):
+                results.append(LLMResult(request, error=future))
+                continue
+            try:
+                results.append(LLMResult(request, future.result()))
+            except Exception as e:
+                results.append(LLMResult(request, error=e))
+        return results
+
+    def _batch_backend(self):
+        """The provider's batches endpoint, or a local stand-in running messages.create()"""
+        try:
+            from .message_batches import AnthropicBatchBackend, LocalBatchBackend
+        except ImportError:
+            from message_batches import AnthropicBatchBackend, LocalBatchBackend
+        messages = getattr(self.client, "messages", None)
+        if getattr(messages, "batches", None) is not None:
+            return AnthropicBatchBackend(self.client)
+        return LocalBatchBackend(self._messages_create())
+
+    def _messages_create(self) -> Callable[..., Any]:
+        """The provider's messages.create() (NoOpClient: messages_create())"""
+        create = getattr(getattr(self.client, "messages", None), "create", None)
+        return create or self.client.messages_create
 
 
 # =============================================================================
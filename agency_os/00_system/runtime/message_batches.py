@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Message Batches - Discounted bulk execution of latency-tolerant LLM calls
+=========================================================================
+
+Non-blocking horizontal audits (quality_best_practices,
+code_complexity_check), overnight planning over several projects and other
+calls nobody waits on do not need an interactive answer. The provider's
+message batches API processes them asynchronously (usually within minutes,
+at most 24h) at half the token price. MessageBatcher queues such requests
+and submits them as batches:
+
+    - submit() returns a concurrent.futures.Future that resolves to the
+      LLMResponse (or raises LLMInvocationError) once its batch has ended
+    - The queue is submitted when it reaches max_batch_size, on flush(),
+      or when the batcher is closed (context manager exit / wait())
+    - One poller thread per batch checks its status with exponential
+      backoff (poll_interval, x1.5 per poll, up to max_poll_interval)
+    - Costs are recorded in the client's CostTracker at batch pricing
+      (CostTracker.BATCH_DISCOUNT); response cache hits never reach a batch
+
+Backends: AnthropicBatchBackend (client.messages.batches) and
+LocalBatchBackend, an in-process stand-in that runs the requests through
+any messages.create() callable - used in knowledge-only mode and tests.
+
+Usage:
+    with client.batch() as batcher:
+        futures = [batcher.submit(prompt, agent="AUDITOR") for prompt in prompts]
+    responses = [future.result() for future in futures]
+
+    # Blocking, one LLMResult per request
+    results = client.invoke_batch([prompt_a, prompt_b], timeout=3600)
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .llm_client import LLMClientError, LLMInvocationError, LLMResponse, Prompt, is_retryable
+except ImportError:
+    from llm_client import LLMClientError, LLMInvocationError, LLMResponse, Prompt, is_retryable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 1000
+
+DEFAULT_MAX_POLL_INTERVAL = 60.0
+
+POLL_BACKOFF = 1.5
+
+# (custom_id, result type, message or error) - result type is one of
+# "succeeded", "errored", "canceled", "expired"
+BatchResult = Tuple[str, str, Any]
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class AnthropicBatchBackend:
+    """The provider's message batches endpoint (client.messages.batches)"""
+
+    poll_interval = 5.0
+
+    def __init__(self, client: Any):
+        self.batches = client.messages.batches
+
+    def create(self, requests: List[Dict[str, Any]]) -> str:
+        return self.batches.create(requests=requests).id
+
+    def status(self, batch_id: str) -> str:
+        return self.batches.retrieve(batch_id).processing_status
+
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        for entry in self.batches.results(batch_id):
+            result = entry.result
+            payload = getattr(result, "message", None) or getattr(result, "error", None)
+            yield entry.custom_id, result.type, payload
+
+    def cancel(self, batch_id: str) -> None:
+        self.batches.cancel(batch_id)
+
+
+class _LocalBatch:
+    def __init__(self, requests: List[Dict[str, Any]]):
+        self.requests = requests
+        self.results: List[BatchResult] = []
+        self.canceled = threading.Event()
+        self.done = threading.Event()
+
+
+class LocalBatchBackend:
+    """
+    In-process stand-in for the message batches endpoint.
+
+    Each batch is processed sequentially on a background thread by calling
+    create(**params) per request; same statuses and result types as the
+    provider. processing_delay simulates queueing time before processing.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, create: Callable[..., Any], processing_delay: float = 0.0):
+        self.create_message = create
+        self.processing_delay = processing_delay
+        self._batches: Dict[str, _LocalBatch] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, requests: List[Dict[str, Any]]) -> str:
+        with self._lock:
+            batch_id = f"local_batch_{next(self._ids)}"
+            batch = self._batches[batch_id] = _LocalBatch(list(requests))
+        threading.Thread(target=self._process, args=(batch,), name=batch_id, daemon=True).start()
+        return batch_id
+
+    def _process(self, batch: _LocalBatch) -> None:
+        if self.processing_delay:
+            batch.canceled.wait(self.processing_delay)
+        for item in batch.requests:
+            if batch.canceled.is_set():
+                batch.results.append((item["custom_id"], "canceled", None))
+                continue
+            try:
+                message = self.create_message(**item["params"])
+            except Exception as e:
+                batch.results.append((item["custom_id"], "errored", e))
+            else:
+                batch.results.append((item["custom_id"], "succeeded", message))
+        batch.done.set()
+
+    def status(self, batch_id: str) -> str:
+        batch = self._batches[batch_id]
+        if batch.done.is_set():
+            return "ended"
+        return "canceling" if batch.canceled.is_set() else "in_progress"
+
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        batch = self._batches[batch_id]
+        if not batch.done.is_set():
+            raise LLMClientError(f"Batch {batch_id} has not ended")
+        return list(batch.results)
+
+    def cancel(self, batch_id: str) -> None:
+        self._batches[batch_id].canceled.set()
+
+
+# =============================================================================
+# BATCHER
+# =============================================================================
+
+@dataclass
+class _Pending:
+    """A queued or submitted request"""
+    params: Dict[str, Any]
+    model: str
+    agent: Optional[str]
+    cache_key: Optional[str]
+    future: Future
+    submitted: float = field(default_factory=time.perf_counter)
+    # Caller's context at submit(): results are billed to its cost_scope()
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+@dataclass
+class _Batch:
+    """A submitted batch and its unresolved requests"""
+    id: str
+    pending: Dict[str, _Pending]
+    created: float = field(default_factory=time.perf_counter)
+    polls: int = 0
+
+
+class MessageBatcher:
+    """
+    Queue LLM requests and run them through the message batches API.
+
+    Thread-safe: several threads may submit() to one batcher. Futures of
+    requests that are cancelled before their batch is submitted are
+    dropped from it.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        backend: Any = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        poll_interval: Optional[float] = None,
+        max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL
+    ):
+        """
+        Args:
+            client: LLMClient whose budget, CostTracker and response cache are used
+            backend: Batch endpoint (default: see LLMClient.batch())
+            max_batch_size: Queued requests that trigger a submission
+            poll_interval: First status poll delay in seconds (default: the backend's)
+            max_poll_interval: Cap of the poll delay backoff
+        """
+        self.client = client
+        self.backend = backend if backend is not None else client._batch_backend()
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval if poll_interval is not None else self.backend.poll_interval
+        self.max_poll_interval = max(max_poll_interval, self.poll_interval)
+        self._queue: List[_Pending] = []
+        self._batches: Dict[str, _Batch] = {}
+        self._pollers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self.counts = {
+            "submitted": 0, "batches": 0, "cache_hits": 0,
+            "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0,
+        }
+
+    def submit(
+        self,
+        prompt: Prompt,
+        model: str = "claude-3-5-sonnet-20241022",
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        agent: Optional[str] = None
+    ) -> "Future[LLMResponse]":
+        """
+        Queue a request for the next batch.
+
+        Response cache hits resolve immediately and are not sent.
+
+        Args:
+            Same as LLMClient.invoke() (batches are not retried)
+
+        Returns:
+            Future resolving to the LLMResponse
+
+        Raises:
+            BudgetExceededError: If budget limit reached
+        """
+        params = self.client._request_kwargs(prompt, model, max_tokens, temperature)
+        future: Future = Future()
+        cache_key, cached = self.client._cache_lookup(params, agent)
+        if cached is not None:
+            self._count("cache_hits")
+            future.set_result(cached)
+            return future
+
+        # Held until the result is recorded (or the request fails or is cancelled)
+        reservation = self.client._reserve(params, batch=True)
+        future.add_done_callback(lambda _: self.client._settle(reservation))
+        with self._lock:
+            self._queue.append(_Pending(params, model, agent, cache_key, future))
+            self.counts["submitted"] += 1
+            full = len(self._queue) >= self.max_batch_size
+        if full:
+            self.flush()
+        return future
+
+    def flush(self) -> Optional[str]:
+        """Submit the queued requests as one batch; returns its id (None if nothing was queued)"""
+        with self._lock:
+            queue, self._queue = self._queue, []
+        pending = {}
+        for item in queue:
+            if item.future.set_running_or_notify_cancel():
+                pending[f"req_{next(self._ids)}"] = item
+        if not pending:
+            return None
+
+        requests = [{"custom_id": custom_id, "params": item.params} for custom_id, item in pending.items()]
+        try:
+            batch_id = self.backend.create(requests)
+        except Exception as e:
+            logger.error(f"LLM batch submission failed: {type(e).__name__} - {e}")
+            error = LLMInvocationError(f"Batch submission failed: {type(e).__name__} - {e}")
+            for item in pending.values():
+                item.future.set_exception(error)
+            self._count("errored", len(pending))
+            return None
+
+        batch = _Batch(batch_id, pending)
+        poller = threading.Thread(target=self._poll, args=(batch,), name=f"poll-{batch_id}", daemon=True)
+        with self._lock:
+            self._batches[batch_id] = batch
+            self._pollers.append(poller)
+            self.counts["batches"] += 1
+        logger.info(f"Submitted LLM batch {batch_id} ({len(pending)} requests)")
+        poller.start()
+        return batch_id
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush the queue and wait for every submitted batch to end.
+
+        Returns:
+            True if all batches ended within timeout
+        """
+        self.flush()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            pollers = list(self._pollers)
+        for poller in pollers:
+            poller.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(poller.is_alive() for poller in pollers)
+
+    def cancel(self) -> int:
+        """
+        Cancel queued requests and every batch still processing.
+
+        Requests the provider already answered still resolve with their
+        response; the others raise LLMInvocationError. Returns the number of
+        requests that were queued or in unfinished batches.
+        """
+        with self._lock:
+            queue, self._queue = self._queue, []
+            batches = list(self._batches.values())
+        for item in queue:
+            item.future.cancel()
+        cancelled = len(queue)
+        for batch in batches:
+            try:
+                self.backend.cancel(batch.id)
+            except Exception as e:
+                logger.warning(f"Could not cancel LLM batch {batch.id}: {type(e).__name__} - {e}")
+            cancelled += len(batch.pending)
+        return cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counts,
+                "queued": len(self._queue),
+                "batches_in_progress": len(self._batches),
+                "requests_in_progress": sum(len(batch.pending) for batch in self._batches.values()),
+                "max_batch_size": self.max_batch_size,
+            }
+
+    def __enter__(self) -> "MessageBatcher":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is not None:
+            self.cancel()
+        else:
+            self.wait()
+
+    # -------------------------------------------------------------------------
+
+    def _poll(self, batch: _Batch) -> None:
+        """Poll a batch with backoff until it ends, then resolve its futures"""
+        interval = self.poll_interval
+        try:
+            while True:
+                time.sleep(interval)
+                batch.polls += 1
+                try:
+                    status = self.backend.status(batch.id)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    logger.warning(f"Polling LLM batch {batch.id} failed ({type(e).__name__}), retrying")
+                    status = None
+                if status == "ended":
+                    break
+                interval = min(interval * POLL_BACKOFF, self.max_poll_interval)
+
+            for custom_id, kind, payload in self.backend.results(batch.id):
+                item = batch.pending.pop(custom_id, None)
+                if item is not None:
+                    self._resolve(batch.id, custom_id, item, kind, payload)
+
+        except Exception as e:
+            logger.error(f"LLM batch {batch.id} failed: {type(e).__name__} - {e}")
+            error = LLMInvocationError(f"Batch {batch.id} failed: {type(e).__name__} - {e}")
+        else:
+            error = LLMInvocationError(f"Batch {batch.id} ended without a result for this request")
+        finally:
+            with self._lock:
+                self._batches.pop(batch.id, None)
+
+        for item in batch.pending.values():
+            item.future.set_exception(error)
+        self._count("errored", len(batch.pending))
+        batch.pending.clear()
+        logger.info(
+            f"LLM batch {batch.id} ended after {time.perf_counter() - batch.created:.1f}s "
+            f"({batch.polls} polls)"
+        )
+
+    def _resolve(self, batch_id: str, custom_id: str, item: _Pending, kind: str, payload: Any) -> None:
+        if kind != "succeeded":
+            self._count(kind if kind in self.counts else "errored")
+            item.future.set_exception(LLMInvocationError(
+                f"Batch request {custom_id} of {batch_id} {kind}"
+                f"{f': {payload}' if payload is not None else ''}"
+            ))
+            return
+        try:
+            latency_ms = (time.perf_counter() - item.submitted) * 1000
+            response = item.context.run(
+                self.client._record_response,
+                payload, item.model, batch=True, latency_ms=latency_ms, agent=item.agent
+            )
+            self.client._cache_store(item.cache_key, item.agent, response)
+        except Exception as e:
+            self._count("errored")
+            item.future.set_exception(LLMInvocationError(
+                f"Unreadable result of batch request {custom_id}: {type(e).__name__} - {e}"
+            ))
+            return
+        self._count("succeeded")
+        item.future.set_result(response)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[name] += n
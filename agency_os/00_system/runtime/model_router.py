@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Model Router - Model tiers per agent/task with live health and fallback
+=======================================================================
+
+Every autonomous agent call used the same model and max_tokens: a
+LEAN_CANVAS handoff paid the latency and price of GENESIS_BLUEPRINT's
+architecture generation. ModelRouter picks the model per call:
+
+    - Tiers: fast (cheap, quick), default and deep (larger output cap),
+      each a fallback chain of models (DEFAULT_TIERS; a chain can be
+      replaced with VIBE_MODEL_TIER_<TIER>=model,model,...).
+    - Routing config, most specific first: the task's meta (model_tier,
+      models, max_tokens), the agent's _composition.yaml model_routing
+      block (its tasks: entries over its own tier/models/max_tokens), then
+      the task's estimated_complexity (low -> fast), else the default tier.
+      An explicit tier passed to route() overrides the config.
+    - Live statistics per model from every routed call: latency and error
+      rate (EWMAs, the error rate decaying over time), consecutive
+      failures. A model is unavailable while it is throttled (Retry-After,
+      THROTTLE_COOLDOWN without one, or the rate scheduler's pause) or down
+      (FAILURE_THRESHOLD failures in a row: DOWN_COOLDOWN seconds, then the
+      next call probes it). Unavailable, failing (error rate above
+      MAX_ERROR_RATE) and slow (latency above the tier's max_latency_ms)
+      models move to the end of the chain.
+    - Selection among the healthy models, per tier: "ordered" keeps the
+      chain order (chains list the cheaper model last, as the fallback),
+      "latency" tries the fastest model first and "cost" the cheapest by
+      CostTracker.PRICING (unpriced models rank at the Sonnet price they
+      are billed at).
+    - Fallback: invoke() / invoke_stream() work down the ranked chain. A
+      model that is throttled or fails with a server/connection error gets
+      one attempt, then the call degrades to the next model (the last one
+      gets all retries). Other errors (bad request, budget) propagate, and
+      a stream only fails over before its first text delta.
+    - Providers: a model named "<provider>:<model>" is sent through the
+      client registered for that provider (register_provider() - another
+      Anthropic-compatible endpoint, or a local stand-in); plain model
+      names go through the caller's client.
+
+Usage:
+    router = get_model_router()
+    route = router.route("LEAN_CANVAS_VALIDATOR", "03_handoff")  # fast tier
+    for event in router.invoke_stream(client, prompt, route):
+        ...
+
+    # _composition.yaml
+    model_routing:
+      tier: deep
+      tasks:
+        05_handoff: {tier: fast}
+
+    # task meta
+    model_tier: fast
+
+Environment:
+    VIBE_MODEL_ROUTING=0        Disable routing (one model for every call)
+    VIBE_MODEL_TIER_<TIER>      Comma-separated fallback chain of a tier
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .agent_index import get_agent_index, task_key
+    from .composition_cache import get_composition_cache
+    from .llm_client import (
+        BaseLLMClient, CostTracker, LLMInvocationError, LLMResponse, Prompt, StreamEvent, is_retryable
+    )
+    from .rate_limiter import is_throttled, retry_after
+except ImportError:
+    from agent_index import get_agent_index, task_key
+    from composition_cache import get_composition_cache
+    from llm_client import (
+        BaseLLMClient, CostTracker, LLMInvocationError, LLMResponse, Prompt, StreamEvent, is_retryable
+    )
+    from rate_limiter import is_throttled, retry_after
+
+logger = logging.getLogger(__name__)
+
+# Seconds a throttled model is skipped when the provider sent no Retry-After
+THROTTLE_COOLDOWN = 10.0
+
+# Consecutive failures after which a model counts as down, and for how long
+FAILURE_THRESHOLD = 3
+DOWN_COOLDOWN = 30.0
+
+# Error rate (EWMA) above which a model moves behind healthier ones; it
+# halves every ERROR_RATE_HALF_LIFE seconds, so demoted models are tried again
+MAX_ERROR_RATE = 0.5
+ERROR_RATE_HALF_LIFE = 60.0
+
+# Weight of the latest call in the latency and error rate EWMAs
+STATS_EWMA_WEIGHT = 0.3
+
+# HTTP statuses worth trying another model for (besides throttling and connection errors)
+FAILOVER_STATUS_CODES = (404, 408, 500, 502, 503, 504)
+
+DEFAULT_TIER = "default"
+
+# Complexity (task meta estimated_complexity) routed without explicit config
+COMPLEXITY_TIERS = {"low": "fast"}
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """Whether another model may succeed where this one failed (throttled, down, unreachable)"""
+    error = getattr(error, "last_error", None) or error
+    status = getattr(error, "status_code", None)
+    return is_retryable(error) or status in FAILOVER_STATUS_CODES or type(error).__name__ in (
+        "InternalServerError", "ServiceUnavailableError", "NotFoundError"
+    )
+
+
+def model_price(model: str) -> float:
+    """USD per million input plus output tokens (CostTracker.PRICING, Sonnet's for unknown models)"""
+    pricing = CostTracker.PRICING.get(model) or CostTracker.PRICING["claude-3-5-sonnet-20241022"]
+    return pricing["input"] + pricing["output"]
+
+
+# =============================================================================
+# DATA STRUCTURES
+# =============================================================================
+
+@dataclass
+class ModelTier:
+    """A class of calls and the fallback chain of models serving it"""
+    name: str
+    models: List[str]
+    max_tokens: int = 4096
+    select: str = "ordered"               # "ordered": chain order, "latency": fastest first, "cost": cheapest first
+    max_latency_ms: Optional[float] = None  # Slower models move behind faster ones
+
+
+DEFAULT_TIERS = {
+    "fast": ModelTier(
+        "fast", ["claude-3-5-haiku-20241022", "claude-3-haiku-20240307"], max_tokens=2048, select="latency"
+    ),
+    "default": ModelTier(
+        "default", ["claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022"], max_tokens=4096
+    ),
+    "deep": ModelTier(
+        "deep", ["claude-3-7-sonnet-20250219", "claude-3-5-sonnet-20241022"], max_tokens=8192
+    ),
+}
+
+
+def load_tiers(tiers: Optional[Dict[str, ModelTier]] = None) -> Dict[str, ModelTier]:
+    """Tiers with the chains of VIBE_MODEL_TIER_<TIER> applied"""
+    result = {}
+    for name, tier in (tiers or DEFAULT_TIERS).items():
+        chain = os.environ.get(f"VIBE_MODEL_TIER_{name.upper()}", "")
+        models = [model.strip() for model in chain.split(",") if model.strip()]
+        result[name] = replace(tier, models=models or list(tier.models))
+    return result
+
+
+@dataclass
+class Route:
+    """The models (fallback chain) and output cap a call is routed to"""
+    agent: Optional[str]
+    task: Optional[str]
+    tier: str
+    models: List[str]
+    max_tokens: int
+    select: str = "ordered"
+    max_latency_ms: Optional[float] = None
+    source: str = "default"  # Where the tier came from: argument, task, composition, complexity, default
+
+    @property
+    def model(self) -> str:
+        """The preferred model (before health ranking)"""
+        return self.models[0]
+
+
+@dataclass
+class ModelStats:
+    """Live statistics of one model (provider:model)"""
+    calls: int = 0
+    errors: int = 0
+    throttled: int = 0
+    failovers: int = 0                 # Calls that degraded from this model to the next
+    consecutive_failures: int = 0
+    latency_ms: Optional[float] = None  # EWMA of successful calls
+    error_rate: float = 0.0            # EWMA (1 per failed call, 0 per success) at error_rate_at
+    error_rate_at: float = 0.0
+    unavailable_until: float = 0.0
+
+    def error_rate_now(self, now: float) -> float:
+        """The error rate decayed to now"""
+        return self.error_rate * 0.5 ** (max(0.0, now - self.error_rate_at) / ERROR_RATE_HALF_LIFE)
+
+
+# =============================================================================
+# ROUTER
+# =============================================================================
+
+class ModelRouter:
+    """
+    Routes agent calls to model tiers and fails over along their chains (thread-safe).
+
+    Args:
+        tiers: Tiers by name (default: DEFAULT_TIERS with env overrides)
+        providers: Clients by provider name, for "<provider>:<model>" models
+        base_path: Repository whose agents' routing config is read
+        clock: Time source (seconds)
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, ModelTier]] = None,
+        providers: Optional[Dict[str, BaseLLMClient]] = None,
+        base_path: Optional[Any] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.tiers = load_tiers(tiers)
+        if DEFAULT_TIER not in self.tiers:
+            raise ValueError(f"Model tiers need a '{DEFAULT_TIER}' tier\nFix: Add it to the tiers passed in")
+        self.providers: Dict[str, BaseLLMClient] = dict(providers or {})
+        self.base_path = base_path
+        self.clock = clock
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def register_provider(self, name: str, client: BaseLLMClient) -> None:
+        """Send "<name>:<model>" models through client"""
+        self.providers[name] = client
+
+    # -------------------------------------------------------------------------
+    # ROUTING
+    # -------------------------------------------------------------------------
+
+    def route(self, agent: Optional[str] = None, task: Optional[str] = None, tier: Optional[str] = None) -> Route:
+        """
+        Route a call of an agent's task.
+
+        Args:
+            agent: Agent ID (its _composition.yaml model_routing and task meta apply)
+            task: Task ID
+            tier: Tier overriding the agent's config
+
+        Raises:
+            ValueError: If the tier is unknown
+        """
+        settings, source = self._config(agent, task)
+        if tier is not None:
+            settings["tier"], source = tier, "argument"
+        name = settings.get("tier") or DEFAULT_TIER
+        if name not in self.tiers:
+            raise ValueError(
+                f"Unknown model tier '{name}' for {agent}.{task}\n"
+                f"Fix: Use one of: {', '.join(self.tiers)} (model_tier / model_routing.tier)"
+            )
+        selected = self.tiers[name]
+        return Route(
+            agent=agent,
+            task=task,
+            tier=name,
+            models=list(settings.get("models") or selected.models),
+            max_tokens=int(settings.get("max_tokens") or selected.max_tokens),
+            select=selected.select,
+            max_latency_ms=selected.max_latency_ms,
+            source=source
+        )
+
+    def candidates(self, route: Route, client: Optional[BaseLLMClient] = None) -> List[str]:
+        """The route's models, best first by live health (client: target of plain model names)"""
+        now = self.clock()
+
+        def rank(item: Tuple[int, str]) -> Tuple:
+            position, spec = item
+            with self._lock:
+                stats = self._stats.get(spec)
+            target, model = self._target(spec, client)
+            unavailable = self._blocked_for(stats, target, model, now) > 0
+            failing = stats is not None and stats.error_rate_now(now) > MAX_ERROR_RATE
+            latency = stats.latency_ms if stats is not None and stats.latency_ms is not None else 0.0
+            slow = route.max_latency_ms is not None and latency > route.max_latency_ms
+            return (
+                unavailable, failing, slow,
+                latency if route.select == "latency" else 0.0,
+                model_price(model) if route.select == "cost" else 0.0,
+                position
+            )
+
+        return [spec for _, spec in sorted(enumerate(route.models), key=rank)]
+
+    def _config(self, agent: Optional[str], task: Optional[str]) -> Tuple[Dict[str, Any], str]:
+        """Merged routing settings (tier, models, max_tokens) of an agent's task and their source"""
+        if not agent:
+            return {}, "default"
+        index = get_agent_index(self.base_path)
+        cache = get_composition_cache()
+        settings: Dict[str, Any] = {}
+        source = "default"
+
+        def apply(values: Any, origin: str) -> None:
+            nonlocal source
+            if not isinstance(values, dict):
+                return
+            for key in ("tier", "models", "max_tokens"):
+                if values.get(key):
+                    settings[key] = values[key]
+                    if key == "tier":
+                        source = origin
+
+        agent_path = index.agent_path(agent)
+        if agent_path is not None and (agent_path / "_composition.yaml").exists():
+            try:
+                routing = (cache.read_yaml(agent_path / "_composition.yaml") or {}).get("model_routing") or {}
+            except Exception as e:
+                logger.warning(f"Unreadable _composition.yaml of {agent}: {e}")
+                routing = {}
+            apply(routing, "composition")
+            for name, values in (routing.get("tasks") or {}).items() if task else ():
+                if task_key(str(name)) == task_key(task):
+                    apply(values, "composition")
+
+        meta: Dict[str, Any] = {}
+        entry = next(
+            (entry for task_id, entry in index.tasks(agent).items() if task and task_key(task_id) == task_key(task)),
+            None
+        )
+        if entry is not None and entry.meta_file:
+            try:
+                meta = cache.read_yaml(index.base_path / entry.meta_file) or {}
+            except Exception as e:
+                logger.warning(f"Unreadable task metadata {entry.meta_file}: {e}")
+        if isinstance(meta, dict):
+            apply({"tier": meta.get("model_tier"), "models": meta.get("models"),
+                   "max_tokens": meta.get("max_tokens")}, "task")
+            complexity = COMPLEXITY_TIERS.get(str(meta.get("estimated_complexity")))
+            if "tier" not in settings and "models" not in settings and complexity:
+                settings["tier"], source = complexity, "complexity"
+        return settings, source
+
+    # -------------------------------------------------------------------------
+    # INVOCATION
+    # -------------------------------------------------------------------------
+
+    def invoke(
+        self,
+        client: BaseLLMClient,
+        prompt: Prompt,
+        route: Route,
+        temperature: float = 1.0,
+        max_retries: int = 3
+    ) -> LLMResponse:
+        """
+        client.invoke() on the best available model of the route, degrading
+        along the chain while models are throttled or down.
+
+        Raises:
+            BudgetExceededError: If budget limit reached
+            LLMInvocationError: If the last model fails too (or the error is not a failover error)
+        """
+        candidates = self.candidates(route, client)
+        for position, spec in enumerate(candidates):
+            target, model = self._target(spec, client)
+            fallback = candidates[position + 1] if position + 1 < len(candidates) else None
+            try:
+                response = target.invoke(
+                    prompt, model=model, max_tokens=route.max_tokens, temperature=temperature,
+                    max_retries=max_retries if fallback is None else 1, agent=route.agent
+                )
+            except LLMInvocationError as e:
+                if not self._failed(spec, e, fallback):
+                    raise
+                continue
+            self._succeeded(spec, response)
+            return response
+        raise LLMInvocationError(f"Route {route.tier} of {route.agent}.{route.task} has no models")
+
+    def invoke_stream(
+        self,
+        client: BaseLLMClient,
+        prompt: Prompt,
+        route: Route,
+        temperature: float = 1.0,
+        max_retries: int = 3
+    ) -> Iterator[StreamEvent]:
+        """client.invoke_stream() with invoke()'s routing; fails over only before the first delta"""
+        candidates = self.candidates(route, client)
+        for position, spec in enumerate(candidates):
+            target, model = self._target(spec, client)
+            fallback = candidates[position + 1] if position + 1 < len(candidates) else None
+            started = False
+            try:
+                for event in target.invoke_stream(
+                    prompt, model=model, max_tokens=route.max_tokens, temperature=temperature,
+                    max_retries=max_retries if fallback is None else 1, agent=route.agent
+                ):
+                    if event.response is not None:
+                        self._succeeded(spec, event.response)
+                    elif event.text:
+                        started = True
+                    yield event
+                return
+            except LLMInvocationError as e:
+                if not self._failed(spec, e, None if started else fallback):
+                    raise
+        raise LLMInvocationError(f"Route {route.tier} of {route.agent}.{route.task} has no models")
+
+    # -------------------------------------------------------------------------
+    # STATISTICS
+    # -------------------------------------------------------------------------
+
+    def record(self, spec: str, latency_ms: Optional[float] = None, error: Optional[BaseException] = None) -> None:
+        """Record a call of a model: success (with its latency) or a failover error"""
+        with self._lock:
+            now = self.clock()
+            stats = self._stats.setdefault(spec, ModelStats())
+            stats.calls += 1
+            stats.error_rate, stats.error_rate_at = stats.error_rate_now(now), now
+            if error is None:
+                stats.consecutive_failures = 0
+                stats.error_rate *= 1 - STATS_EWMA_WEIGHT
+                stats.unavailable_until = 0.0
+                if latency_ms:
+                    stats.latency_ms = latency_ms if stats.latency_ms is None else (
+                        STATS_EWMA_WEIGHT * latency_ms + (1 - STATS_EWMA_WEIGHT) * stats.latency_ms
+                    )
+                return
+
+            stats.errors += 1
+            stats.consecutive_failures += 1
+            stats.error_rate = STATS_EWMA_WEIGHT + (1 - STATS_EWMA_WEIGHT) * stats.error_rate
+            if is_throttled(error):
+                stats.throttled += 1
+                wait = retry_after(error)
+                stats.unavailable_until = max(
+                    stats.unavailable_until, now + (wait if wait is not None else THROTTLE_COOLDOWN)
+                )
+            elif stats.consecutive_failures >= FAILURE_THRESHOLD:
+                stats.unavailable_until = max(stats.unavailable_until, now + DOWN_COOLDOWN)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model statistics (sorted by model), with seconds until each is available again"""
+        now = self.clock()
+        with self._lock:
+            return {
+                spec: {
+                    **{
+                        key: value for key, value in asdict(stats).items()
+                        if key not in ("error_rate_at", "unavailable_until")
+                    },
+                    "latency_ms": None if stats.latency_ms is None else round(stats.latency_ms, 1),
+                    "error_rate": round(stats.error_rate_now(now), 3),
+                    "unavailable_for_s": round(max(0.0, stats.unavailable_until - now), 3),
+                }
+                for spec, stats in sorted(self._stats.items())
+            }
+
+    def _succeeded(self, spec: str, response: LLMResponse) -> None:
+        # Response cache hits say nothing about the model's latency
+        self.record(spec, latency_ms=None if response.usage.cached else response.usage.latency_ms)
+
+    def _failed(self, spec: str, error: LLMInvocationError, fallback: Optional[str]) -> bool:
+        """Record a failed call; whether to fail over to fallback"""
+        cause = getattr(error, "last_error", None) or error
+        if not is_failover_error(cause):
+            return False
+        self.record(spec, error=cause)
+        if fallback is None:
+            return False
+        with self._lock:
+            self._stats[spec].failovers += 1
+        logger.warning(f"⚠️  Model {spec} unavailable ({type(cause).__name__}), degrading to {fallback}")
+        return True
+
+    def _blocked_for(self, stats: Optional[ModelStats], target: BaseLLMClient, model: str, now: float) -> float:
+        """Seconds until a model may be called (own cooldowns and the client's rate scheduler)"""
+        blocked = max(0.0, stats.unavailable_until - now) if stats is not None else 0.0
+        scheduler = getattr(target, "rate_scheduler", None)
+        if scheduler is not None:
+            blocked = max(blocked, scheduler.blocked_for(model))
+        return blocked
+
+    def _target(self, spec: str, client: Optional[BaseLLMClient]) -> Tuple[Optional[BaseLLMClient], str]:
+        """(client, model name) a "[provider:]model" is sent through"""
+        provider, sep, model = spec.partition(":")
+        if not sep:
+            return client, spec
+        if provider not in self.providers:
+            raise ValueError(
+                f"Unknown model provider '{provider}' in '{spec}'\n"
+                f"Fix: Register its client with router.register_provider('{provider}', client)"
+            )
+        return self.providers[provider], model
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_model_router: Optional[ModelRouter] = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> Optional[ModelRouter]:
+    """Get the process-wide router (None if disabled via VIBE_MODEL_ROUTING=0)"""
+    global _model_router
+    if os.environ.get("VIBE_MODEL_ROUTING", "1") in ("0", "false", "no"):
+        return None
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                _model_router = ModelRouter()
+    return _model_router
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Prompt Blocks - Cache-friendly structured prompts
+=================================================
+
+Provider-side prompt caching (Anthropic `cache_control`) only hits when the
+request starts with exactly the same content as an earlier request. Composed
+prompts are therefore ordered from most to least stable, and split into
+blocks with a cache breakpoint after each stable group:
+
+    rank 0  governance, tools, sops, core   (same for every task of an agent)
+    rank 1  knowledge                       (same for a task + feature set)
+    rank 2  task, gates                     (same for a task)
+    rank 3  runtime_context, context        (changes every call - never cached)
+
+Sequential tasks of one agent (the six VIBE_ALIGNER tasks, the five
+CODE_GENERATOR tasks) then read the rank-0 prefix from cache.
+
+LLMClient sends cached blocks as `system` text blocks with
+cache_control={"type": "ephemeral"} and the rest as the user message.
+
+Usage:
+    blocks, report = PromptRegistry.compose_blocks(agent, task, ...)
+    response = llm_client.invoke(prompt=blocks)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+# Layer -> stability rank (lower = more stable, goes first)
+LAYER_STABILITY: Dict[str, int] = {
+    "governance": 0,
+    "tools": 0,
+    "sops": 0,
+    "core": 0,
+    "knowledge": 1,
+    "task": 2,
+    "gates": 2,
+    "runtime_context": 3,
+    "context": 3,
+}
+VOLATILE_RANK = 3
+
+# Anthropic accepts at most 4 cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+
+@dataclass
+class PromptBlock:
+    """A contiguous part of a prompt; cache_breakpoint marks a cacheable prefix end"""
+    text: str
+    layers: Tuple[str, ...]
+    cache_breakpoint: bool = False
+
+
+def build_prompt_blocks(labeled_chunks: Iterable[Tuple[str, str]]) -> List[PromptBlock]:
+    """
+    Group (layer, chunk) pairs into blocks of equal stability rank.
+
+    A block gets a cache breakpoint if neither it nor anything before it is
+    volatile. "".join(block.text) equals the joined chunks.
+    """
+    groups: List[Tuple[int, List[str], List[str]]] = []
+    for layer, chunk in labeled_chunks:
+        rank = LAYER_STABILITY.get(layer, VOLATILE_RANK)
+        if groups and groups[-1][0] == rank:
+            groups[-1][1].append(chunk)
+            if groups[-1][2][-1] != layer:
+                groups[-1][2].append(layer)
+        else:
+            groups.append((rank, [chunk], [layer]))
+
+    blocks = []
+    prefix_stable = True
+    breakpoints = 0
+    for rank, chunks, layers in groups:
+        prefix_stable = prefix_stable and rank < VOLATILE_RANK
+        cacheable = prefix_stable and breakpoints < MAX_CACHE_BREAKPOINTS
+        breakpoints += cacheable
+        blocks.append(PromptBlock("".join(chunks), tuple(layers), cacheable))
+    return blocks
+
+
+def blocks_to_text(blocks: Iterable[PromptBlock]) -> str:
+    """Flatten blocks back into a plain prompt string"""
+    return "".join(block.text for block in blocks)
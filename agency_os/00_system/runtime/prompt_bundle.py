@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Prompt Bundle - Precompiled composition inputs for fast cold starts
+====================================================================
+
+`vibe-cli compile` walks every agent in AGENT_REGISTRY and writes a single
+JSON bundle containing everything prompt composition reads from disk:
+
+- _composition.yaml and _knowledge_deps.yaml (parsed)
+- task_*.meta.yaml (parsed) and task_*.md (text)
+- gates/*.md and core prompt fragments (text)
+- knowledge files referenced by _knowledge_deps.yaml (text)
+- tool_definitions.yaml and guardian_directives.yaml (parsed)
+- SOPs, workflow and data-contract YAML used by the orchestrator
+
+On startup PromptRuntime loads the bundle with one read and registers it as a
+backing source of the process-wide composition cache. Every bundled file
+carries the fingerprint (mtime_ns, size, sha256) recorded at compile time, so
+a file edited after compilation is read from the source tree instead - a stale
+bundle entry is never served.
+
+Bundle location: .cache/vibe/prompt_bundle.json (override: VIBE_PROMPT_BUNDLE)
+
+Usage:
+    info = compile_bundle(repo_root, AGENT_REGISTRY)
+    load_bundle(repo_root, get_composition_cache())
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from .composition_cache import CompositionCache, FileFingerprint
+    from .yaml_loader import YAMLParseError, load_yaml, parse_yaml
+except ImportError:
+    from composition_cache import CompositionCache, FileFingerprint
+    from yaml_loader import YAMLParseError, load_yaml, parse_yaml
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+DEFAULT_BUNDLE_RELPATH = Path(".cache") / "vibe" / "prompt_bundle.json"
+
+# Files outside agent directories that composition (or the orchestrator) reads
+SHARED_YAML_FILES = [
+    "agency_os/00_system/orchestrator/tools/tool_definitions.yaml",
+    "system_steward_framework/knowledge/guardian_directives.yaml",
+    "agency_os/00_system/state_machine/ORCHESTRATION_workflow_design.yaml",
+    "agency_os/00_system/contracts/ORCHESTRATION_data_contracts.yaml",
+]
+SOP_DIR = "system_steward_framework/knowledge/sops"
+
+
+@dataclass
+class BundleInfo:
+    """Summary of a compiled or loaded bundle"""
+    path: Path
+    version: str
+    agents: int
+    text_files: int
+    yaml_files: int
+    size_bytes: int
+
+
+def default_bundle_path(base_path: Path) -> Path:
+    """Resolve the bundle location for a repo root"""
+    override = os.environ.get("VIBE_PROMPT_BUNDLE")
+    return Path(override) if override else Path(base_path) / DEFAULT_BUNDLE_RELPATH
+
+
+# =============================================================================
+# COMPILATION
+# =============================================================================
+
+def _collect_agent_files(base_path: Path, agent_dir: Path) -> Tuple[Set[Path], Set[Path]]:
+    """Collect (text_files, yaml_files) composed for one agent"""
+    text_files: Set[Path] = set()
+    yaml_files: Set[Path] = set()
+
+    for name in ("_composition.yaml", "_knowledge_deps.yaml"):
+        if (agent_dir / name).exists():
+            yaml_files.add(agent_dir / name)
+
+    for md in agent_dir.glob("*.md"):
+        text_files.add(md)
+    for sub in ("tasks", "gates"):
+        for md in (agent_dir / sub).glob("*.md"):
+            text_files.add(md)
+    for meta in (agent_dir / "tasks").glob("*.meta.yaml"):
+        yaml_files.add(meta)
+
+    deps_file = agent_dir / "_knowledge_deps.yaml"
+    if deps_file.exists():
+        deps = load_yaml(deps_file) or {}
+        for entry in deps.get("required_knowledge", []) + deps.get("optional_knowledge", []):
+            knowledge_path = base_path / entry["path"]
+            if knowledge_path.exists():
+                text_files.add(knowledge_path)
+
+    return text_files, yaml_files
+
+
+def compile_bundle(
+    base_path: Path,
+    agent_registry: Dict[str, str],
+    output_path: Optional[Path] = None
+) -> BundleInfo:
+    """
+    Compile all composition inputs into one bundle file.
+
+    Args:
+        base_path: Repo root
+        agent_registry: agent_id -> agent directory (relative to base_path)
+        output_path: Bundle file (default: .cache/vibe/prompt_bundle.json)
+
+    Returns:
+        BundleInfo describing the written bundle
+    """
+    base_path = Path(base_path).resolve()
+    output_path = Path(output_path) if output_path else default_bundle_path(base_path)
+
+    text_files: Set[Path] = set()
+    yaml_files: Set[Path] = set()
+    agents = {}
+
+    for agent_id, rel_dir in sorted(agent_registry.items()):
+        agent_dir = base_path / rel_dir
+        if not agent_dir.exists():
+            logger.warning(f"Skipping {agent_id}: directory not found ({agent_dir})")
+            continue
+        agent_text, agent_yaml = _collect_agent_files(base_path, agent_dir)
+        text_files |= agent_text
+        yaml_files |= agent_yaml
+        agents[agent_id] = rel_dir
+
+    for rel in SHARED_YAML_FILES:
+        if (base_path / rel).exists():
+            yaml_files.add(base_path / rel)
+    text_files |= set((base_path / SOP_DIR).glob("*.md"))
+
+    files: Dict[str, Dict[str, Any]] = {}
+    parsed: Dict[str, Any] = {}
+
+    for path in sorted(text_files | yaml_files):
+        raw = path.read_bytes()
+        st = path.stat()
+        rel = path.relative_to(base_path).as_posix()
+        files[rel] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "text": raw.decode("utf-8") if path in text_files else None,
+        }
+        if path in yaml_files:
+            try:
+                parsed[rel] = parse_yaml(raw, rel)
+            except YAMLParseError as e:
+                # Leave it to the runtime to report the error with context
+                logger.warning(f"Not bundling unparsable YAML {rel}: {e}")
+
+    version = hashlib.sha256(
+        "\n".join(f"{rel}:{meta['sha256']}" for rel, meta in sorted(files.items())).encode()
+    ).hexdigest()[:16]
+
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "agents": agents,
+        "files": files,
+        "yaml": parsed,
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps(bundle, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Compiled prompt bundle {version}: {len(files)} files -> {output_path}")
+
+    return BundleInfo(
+        path=output_path,
+        version=version,
+        agents=len(agents),
+        text_files=len(text_files),
+        yaml_files=len(parsed),
+        size_bytes=len(payload),
+    )
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+_loaded: Set[Tuple[int, str]] = set()
+_load_lock = threading.Lock()
+
+
+def load_bundle(
+    base_path: Path,
+    cache: CompositionCache,
+    bundle_path: Optional[Path] = None
+) -> Optional[BundleInfo]:
+    """
+    Attach a compiled bundle to a composition cache (single read).
+
+    Args:
+        base_path: Repo root the bundle's relative paths are resolved against
+        cache: Cache to attach the bundle to
+        bundle_path: Bundle file (default: .cache/vibe/prompt_bundle.json)
+
+    Returns:
+        BundleInfo, or None if no usable bundle exists
+    """
+    base_path = Path(base_path)
+    bundle_path = Path(bundle_path) if bundle_path else default_bundle_path(base_path)
+
+    try:
+        with open(bundle_path, "rb") as f:
+            payload = f.read()
+    except OSError:
+        return None
+
+    try:
+        bundle = json.loads(payload)
+    except ValueError as e:
+        logger.warning(f"Ignoring corrupt prompt bundle {bundle_path}: {e}")
+        return None
+
+    if bundle.get("format") != BUNDLE_FORMAT:
+        logger.warning(f"Ignoring prompt bundle {bundle_path}: unsupported format {bundle.get('format')}")
+        return None
+
+    files = bundle.get("files", {})
+    parsed = bundle.get("yaml", {})
+    base_prefix = str(base_path) + os.sep
+
+    def source(kind: str, path: str):
+        if not path.startswith(base_prefix):
+            return None
+        rel = path[len(base_prefix):].replace(os.sep, "/")
+        meta = files.get(rel)
+        if meta is None:
+            return None
+        if kind == "text":
+            value = meta.get("text")
+            if value is None:
+                return None
+        elif kind == "yaml" and rel in parsed:
+            value = parsed[rel]
+        else:
+            return None
+        return value, FileFingerprint(path, meta["mtime_ns"], meta["size"], meta["sha256"])
+
+    # Entries are served lazily on cache misses - no up-front copying or sizing
+    cache.add_source(source)
+
+    logger.debug(f"Loaded prompt bundle {bundle.get('version')} from {bundle_path}")
+
+    return BundleInfo(
+        path=bundle_path,
+        version=bundle.get("version", "unknown"),
+        agents=len(bundle.get("agents", {})),
+        text_files=sum(1 for meta in files.values() if meta.get("text") is not None),
+        yaml_files=len(parsed),
+        size_bytes=len(payload),
+    )
+
+
+def ensure_bundle_loaded(base_path: Path, cache: CompositionCache) -> Optional[BundleInfo]:
+    """Load the default bundle into `cache` once per process"""
+    key = (id(cache), str(base_path))
+    if key in _loaded:
+        return None
+    with _load_lock:
+        if key in _loaded:
+            return None
+        _loaded.add(key)
+        if not cache.enabled:
+            return None
+        return load_bundle(base_path, cache)
+
+
+def bundle_status(base_path: Path, bundle_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Report how many bundled files are still fresh.
+
+    Returns:
+        Dict with exists/version/fresh/stale/stale_files
+    """
+    base_path = Path(base_path)
+    bundle_path = Path(bundle_path) if bundle_path else default_bundle_path(base_path)
+    if not bundle_path.exists():
+        return {"exists": False, "path": str(bundle_path)}
+
+    with open(bundle_path, "rb") as f:
+        bundle = json.loads(f.read())
+
+    stale: List[str] = []
+    for rel, meta in bundle.get("files", {}).items():
+        fp = FileFingerprint(str(base_path / rel), meta["mtime_ns"], meta["size"], meta["sha256"])
+        if fp.check() is None:
+            stale.append(rel)
+
+    total = len(bundle.get("files", {}))
+    return {
+        "exists": True,
+        "path": str(bundle_path),
+        "version": bundle.get("version"),
+        "created_at": bundle.get("created_at"),
+        "fresh": total - len(stale),
+        "stale": len(stale),
+        "stale_files": stale,
+    }
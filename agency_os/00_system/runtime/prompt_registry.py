@@ -18,32 +18,55 @@ Usage:
         inject_sops=["SOP_001"]
     )
 
+    # Compose a batch concurrently (results in request order)
+    results = PromptRegistry.compose_many([
+        ("VIBE_ALIGNER", "01_education_calibration"),
+        CompositionRequest("VIBE_ALIGNER", "02_feature_extraction", inject_governance=False),
+    ])
+
 Architecture:
     Wraps PromptRuntime (low-level composition) and adds:
     - Guardian Directives injection (from SSF)
     - Context enrichment (manifest, workspace paths)
     - Tool definitions injection
     - SOP injection
-    - Composition order: Governance → Context → Tools → SOPs → Agent
+    - Composition order: Governance → Tools → SOPs → Agent → Context
+      (stable prefix first so provider prompt caching can hit, see prompt_blocks.py)
 
 Created: 2025-11-15
 Version: 1.0 (MVP)
 """
 
-import yaml
 import json
 import sys
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 
 # Import PromptRuntime (same directory)
 # Use try/except to handle both direct execution and module import
 try:
     from .prompt_runtime import PromptRuntime, PromptRuntimeError
+    from .composition_cache import get_composition_cache, YAMLParseError
+    from .token_budget import CompositionReport, estimate_tokens, resolve_token_budget
+    from .prompt_blocks import PromptBlock, build_prompt_blocks
+    from .composition_metrics import get_composition_metrics
+    from .context_serializer import artifact_hint, get_artifact_store, serialize_context
+    from .tool_catalog import get_tool_catalog
+    from .agent_index import SOPS_DIR, get_agent_index
 except ImportError:
     # Direct execution - import without relative path
     from prompt_runtime import PromptRuntime, PromptRuntimeError
+    from composition_cache import get_composition_cache, YAMLParseError
+    from token_budget import CompositionReport, estimate_tokens, resolve_token_budget
+    from prompt_blocks import PromptBlock, build_prompt_blocks
+    from composition_metrics import get_composition_metrics
+    from context_serializer import artifact_hint, get_artifact_store, serialize_context
+    from tool_catalog import get_tool_catalog
+    from agent_index import SOPS_DIR, get_agent_index
 
 # Import workspace utilities
 _REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
@@ -79,6 +102,61 @@ class ContextEnrichmentError(PromptRegistryError):
     pass
 
 
+# Upper bound for compose_many() worker threads
+COMPOSE_MANY_MAX_WORKERS = 8
+
+
+@dataclass
+class CompositionRequest:
+    """Arguments of one compose() call in a compose_many() batch"""
+    agent: str
+    task: Optional[str] = None
+    workspace: Optional[str] = None
+    inject_governance: bool = True
+    inject_tools: Optional[List[str]] = None
+    inject_sops: Optional[List[str]] = None
+    context: Optional[Dict[str, Any]] = None
+    token_budget: Optional[int] = None
+
+    @classmethod
+    def coerce(cls, value: Any) -> "CompositionRequest":
+        """
+        Build a request from a CompositionRequest, a dict of compose() keyword
+        arguments, or an (agent, task[, context]) tuple.
+
+        Raises:
+            TypeError: If the value has none of these shapes
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(**value)
+        if isinstance(value, (tuple, list)) and 1 <= len(value) <= 3:
+            return cls(*value[:2], context=value[2] if len(value) == 3 else None)
+        raise TypeError(
+            f"Invalid composition request: {value!r}\n"
+            f"Fix: Pass a CompositionRequest, a dict of compose() arguments or an (agent, task) tuple"
+        )
+
+    @property
+    def label(self) -> str:
+        return f"{self.agent}.{self.task}" if self.task else self.agent
+
+
+@dataclass
+class CompositionResult:
+    """Outcome of one compose_many() request"""
+    request: CompositionRequest
+    prompt: Optional[str] = None
+    report: Optional[CompositionReport] = None
+    error: Optional[Exception] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class PromptRegistry:
     """
     High-level interface for prompt composition with automatic injections.
@@ -87,8 +165,15 @@ class PromptRegistry:
     context enrichment capabilities.
     """
 
-    # Class-level cache for Guardian Directives (loaded once)
-    _guardian_directives_cache: Optional[str] = None
+    # Shared PromptRuntime (all instances share the process-wide composition cache)
+    _runtime: Optional[PromptRuntime] = None
+
+    @classmethod
+    def _get_runtime(cls) -> PromptRuntime:
+        """Get the shared PromptRuntime (created on first use)"""
+        if cls._runtime is None:
+            cls._runtime = PromptRuntime()
+        return cls._runtime
 
     @classmethod
     def compose(
@@ -99,7 +184,8 @@ class PromptRegistry:
         inject_governance: bool = True,
         inject_tools: Optional[List[str]] = None,
         inject_sops: Optional[List[str]] = None,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
     ) -> str:
         """
         Compose a governed prompt with all injections.
@@ -112,6 +198,7 @@ class PromptRegistry:
             inject_tools: List of tool names to inject (e.g., ["google_search"])
             inject_sops: List of SOP IDs to inject (e.g., ["SOP_001"])
             context: Additional runtime context
+            token_budget: Input-token budget (default: see token_budget.py)
 
         Returns:
             Fully composed prompt string ready for LLM execution
@@ -121,7 +208,197 @@ class PromptRegistry:
             GovernanceLoadError: If Guardian Directives can't be loaded
             ContextEnrichmentError: If workspace context enrichment fails
         """
+        prompt, _ = cls.compose_with_report(
+            agent, task, workspace, inject_governance, inject_tools, inject_sops, context, token_budget
+        )
+        return prompt
+
+    @classmethod
+    def compose_many(
+        cls,
+        requests: Iterable[Union[CompositionRequest, Dict[str, Any], Tuple]],
+        max_workers: Optional[int] = None
+    ) -> List[CompositionResult]:
+        """
+        Compose many prompts concurrently in a thread pool.
+
+        All requests share one PromptRuntime and the process-wide composition
+        cache, so every fragment (spec, task metadata, knowledge file, gates,
+        governance) is loaded once per batch no matter how many requests use
+        it. A failing request does not stop the batch: its exception is
+        returned in its result. Each request composes on a copy of its
+        context, so one context dict can be shared by many requests.
+
+        Args:
+            requests: CompositionRequests, dicts of compose() keyword
+                arguments, or (agent, task[, context]) tuples
+            max_workers: Thread pool size (default: up to COMPOSE_MANY_MAX_WORKERS)
+
+        Returns:
+            One CompositionResult per request, in request order
+        """
+        batch = [CompositionRequest.coerce(request) for request in requests]
+        if not batch:
+            return []
+
+        # Create the shared runtime before the workers race for it
+        cls._get_runtime()
+
+        workers = max_workers or min(len(batch), COMPOSE_MANY_MAX_WORKERS)
+        start = time.perf_counter()
+        if workers <= 1:
+            results = [cls._compose_one(request) for request in batch]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compose") as pool:
+                results = list(pool.map(cls._compose_one, batch))
+
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(
+            f"Composed {len(results) - failed}/{len(results)} prompts in "
+            f"{(time.perf_counter() - start) * 1000:.0f}ms ({workers} workers, {failed} failed)"
+        )
+        return results
+
+    @classmethod
+    def _compose_one(cls, request: CompositionRequest) -> CompositionResult:
+        """Compose a single batch request, capturing its timing and error"""
+        start = time.perf_counter()
+        try:
+            prompt, report = cls.compose_with_report(
+                request.agent,
+                request.task,
+                request.workspace,
+                request.inject_governance,
+                request.inject_tools,
+                request.inject_sops,
+                dict(request.context or {}),
+                request.token_budget
+            )
+        except Exception as e:
+            logger.error(f"Composition failed: {request.label}: {e}")
+            return CompositionResult(request, error=e, elapsed_ms=(time.perf_counter() - start) * 1000)
+        return CompositionResult(request, prompt, report, elapsed_ms=(time.perf_counter() - start) * 1000)
+
+    @classmethod
+    def compose_with_report(
+        cls,
+        agent: str,
+        task: Optional[str] = None,
+        workspace: Optional[str] = None,
+        inject_governance: bool = True,
+        inject_tools: Optional[List[str]] = None,
+        inject_sops: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ) -> Tuple[str, CompositionReport]:
+        """
+        Compose a governed prompt and report its token usage per layer.
+
+        Same arguments and exceptions as compose().
+
+        Returns:
+            (composed prompt, CompositionReport)
+        """
+        chunks, report = cls.compose_stream(
+            agent, task, workspace, inject_governance, inject_tools, inject_sops, context, token_budget
+        )
+        return "".join(chunks), report
+
+    @classmethod
+    def compose_stream(
+        cls,
+        agent: str,
+        task: Optional[str] = None,
+        workspace: Optional[str] = None,
+        inject_governance: bool = True,
+        inject_tools: Optional[List[str]] = None,
+        inject_sops: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ) -> Tuple[Iterator[str], CompositionReport]:
+        """
+        Compose a governed prompt as a stream of chunks.
+
+        Same arguments and exceptions as compose(). "".join(chunks) equals
+        the prompt returned by compose().
+
+        Returns:
+            (chunk iterator, CompositionReport)
+        """
+        layers, report = cls.compose_layers(
+            agent, task, workspace, inject_governance, inject_tools, inject_sops, context, token_budget
+        )
+        return (chunk for _, chunk in layers), report
+
+    @classmethod
+    def compose_blocks(
+        cls,
+        agent: str,
+        task: Optional[str] = None,
+        workspace: Optional[str] = None,
+        inject_governance: bool = True,
+        inject_tools: Optional[List[str]] = None,
+        inject_sops: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ) -> Tuple[List[PromptBlock], CompositionReport]:
+        """
+        Compose a governed prompt as cache-friendly blocks for LLMClient.invoke().
+
+        Same arguments and exceptions as compose().
+
+        Returns:
+            (prompt blocks with cache breakpoints, CompositionReport)
+        """
+        layers, report = cls.compose_layers(
+            agent, task, workspace, inject_governance, inject_tools, inject_sops, context, token_budget
+        )
+        return build_prompt_blocks(layers), report
+
+    @classmethod
+    def compose_layers(
+        cls,
+        agent: str,
+        task: Optional[str] = None,
+        workspace: Optional[str] = None,
+        inject_governance: bool = True,
+        inject_tools: Optional[List[str]] = None,
+        inject_sops: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ) -> Tuple[Iterator[Tuple[str, str]], CompositionReport]:
+        """
+        Compose a governed prompt as (layer, chunk) pairs.
+
+        Order (most stable first, for provider prompt caching):
+        Governance → Tools → SOPs → Agent (core, knowledge, task, gates,
+        runtime context) → Context
+
+        Returns:
+            ((layer, chunk) iterator, CompositionReport)
+        """
+        # Composition is eager - the returned iterator only walks finished sections
+        with get_composition_metrics().stage("registry.total", get_composition_cache()):
+            return cls._compose_layers(
+                agent, task, workspace, inject_governance, inject_tools, inject_sops, context, token_budget
+            )
+
+    @classmethod
+    def _compose_layers(
+        cls,
+        agent: str,
+        task: Optional[str],
+        workspace: Optional[str],
+        inject_governance: bool,
+        inject_tools: Optional[List[str]],
+        inject_sops: Optional[List[str]],
+        context: Optional[Dict[str, Any]],
+        token_budget: Optional[int]
+    ) -> Tuple[Iterator[Tuple[str, str]], CompositionReport]:
+        """compose_layers() without the registry.total timer"""
         logger.info(f"Composing prompt: agent={agent}, task={task}, workspace={workspace}")
+        metrics = get_composition_metrics()
+        cache = get_composition_cache()
 
         # Initialize context if not provided
         if context is None:
@@ -135,72 +412,105 @@ class PromptRegistry:
 
         context["_registry_workspace"] = workspace
 
-        # 1. Get base prompt from PromptRuntime
-        runtime = PromptRuntime()
-
-        # If task is None, create a minimal context-only prompt
-        if task is None:
-            logger.warning(f"No task specified for agent {agent} - creating meta-agent prompt")
-            base_prompt = cls._create_meta_agent_prompt(agent)
-        else:
-            base_prompt = runtime.execute_task(agent, task, context)
-
-        # 2. Build injection layers (in order)
-        layers = []
-
-        # Layer 1: Governance (if requested)
+        # 1. Static injection layers (count against the runtime's token budget)
+        governance_section = None
         if inject_governance:
             try:
-                governance_section = cls._load_guardian_directives()
-                layers.append(governance_section)
+                with metrics.stage("registry.governance", cache):
+                    governance_section = cls._load_guardian_directives()
                 logger.debug("Guardian Directives injected")
             except Exception as e:
                 logger.error(f"Failed to load Guardian Directives: {e}")
                 raise GovernanceLoadError(f"Failed to inject governance: {e}") from e
 
-        # Layer 2: Context (automatic)
+        # Tools: a single section per prompt - merged into the agent's own
+        # tools step if it has one, otherwise injected here
+        runtime = cls._get_runtime()
+        tools_section = None
+        merged_tools = None
+        if inject_tools:
+            if task is not None and runtime.has_tools_step(agent):
+                merged_tools = inject_tools
+            else:
+                with metrics.stage("registry.tools", cache):
+                    tools_section = cls._inject_tools(inject_tools)
+        sops_section = None
+        if inject_sops:
+            with metrics.stage("registry.sops", cache):
+                sops_section = cls._inject_sops(inject_sops)
+
+        static_layers = {
+            name: estimate_tokens(text)
+            for name, text in (("governance", governance_section), ("tools", tools_section), ("sops", sops_section))
+            if text is not None
+        }
+
+        # 2. Get base prompt from PromptRuntime
+        # If task is None, create a minimal context-only prompt
+        if task is None:
+            logger.warning(f"No task specified for agent {agent} - creating meta-agent prompt")
+            base_prompt = cls._create_meta_agent_prompt(agent)
+            base_chunks = iter([("core", base_prompt)])
+            report = CompositionReport(
+                agent_id=agent,
+                task_id=None,
+                budget_tokens=resolve_token_budget(token_budget),
+                runtime_layers={"core": estimate_tokens(base_prompt)}
+            )
+        else:
+            base_chunks, report = runtime.compose_layers(
+                agent, task, context, token_budget, registry_layers=static_layers, extra_tools=merged_tools
+            )
+
+        # Layer 2: Context (automatic - reflects the context as resolved by the runtime)
         try:
-            context_section = cls._enrich_context(workspace, context)
-            layers.append(context_section)
+            with metrics.stage("registry.context", cache):
+                context_section = cls._enrich_context(workspace, context)
             logger.debug("Context enrichment completed")
         except Exception as e:
             logger.error(f"Failed to enrich context: {e}")
             raise ContextEnrichmentError(f"Failed to enrich context: {e}") from e
 
-        # Layer 3: Tools (if requested)
-        if inject_tools:
-            tools_section = cls._inject_tools(inject_tools)
-            layers.append(tools_section)
+        if tools_section:
             logger.debug(f"Tools injected: {inject_tools}")
-
-        # Layer 4: SOPs (if requested)
-        if inject_sops:
-            sops_section = cls._inject_sops(inject_sops)
-            layers.append(sops_section)
+        if sops_section:
             logger.debug(f"SOPs injected: {inject_sops}")
 
         # 3. Combine layers + base prompt
-        # Order: Governance → Context → Tools → SOPs → Agent
-        final_prompt = "\n\n".join(layers + [base_prompt])
-
-        prompt_size = len(final_prompt)
-        logger.info(f"Prompt composed successfully: {prompt_size:,} chars")
-
-        return final_prompt
+        # Order: Governance → Tools → SOPs → Agent → Context
+        # (static prefix first, per-call context last - keeps provider prompt caches hot)
+        prefix = [
+            ("governance", governance_section),
+            ("tools", tools_section),
+            ("sops", sops_section),
+        ]
+        prefix = [(name, text) for name, text in prefix if text is not None]
+        report.registry_layers = {name: estimate_tokens(text) for name, text in prefix}
+        report.registry_layers["context"] = estimate_tokens(context_section)
+
+        def chunks() -> Iterator[Tuple[str, str]]:
+            for name, text in prefix:
+                yield name, text
+                yield name, "\n\n"
+            yield from base_chunks
+            yield "context", "\n\n"
+            yield "context", context_section
+
+        logger.info(f"Prompt composed successfully: ~{report.total_tokens:,} tokens ({report.summary()})")
+
+        return chunks(), report
 
     @classmethod
     def _load_guardian_directives(cls) -> str:
         """
         Load Guardian Directives from SSF knowledge base (with caching).
 
+        The rendered section lives in the shared composition cache and is
+        invalidated when guardian_directives.yaml changes on disk.
+
         Returns:
             Formatted markdown section with Guardian Directives
         """
-        # Return cached version if available
-        if cls._guardian_directives_cache is not None:
-            return cls._guardian_directives_cache
-
-        # Load from file
         directives_path = (
             _REPO_ROOT /
             "system_steward_framework" /
@@ -208,6 +518,15 @@ class PromptRegistry:
             "guardian_directives.yaml"
         )
 
+        return get_composition_cache().get_or_load(
+            ("section", "governance", str(directives_path)),
+            lambda: cls._render_guardian_directives(directives_path),
+            [directives_path]
+        )
+
+    @classmethod
+    def _render_guardian_directives(cls, directives_path: Path) -> str:
+        """Load Guardian Directives injection template (uncached)"""
         if not directives_path.exists():
             raise GovernanceLoadError(
                 f"Guardian Directives not found: {directives_path}\n"
@@ -216,9 +535,8 @@ class PromptRegistry:
             )
 
         try:
-            with open(directives_path) as f:
-                data = yaml.safe_load(f)
-        except yaml.YAMLError as e:
+            data = get_composition_cache().read_yaml(directives_path)
+        except YAMLParseError as e:
             raise GovernanceLoadError(
                 f"Invalid YAML in Guardian Directives: {e}"
             ) from e
@@ -230,10 +548,7 @@ class PromptRegistry:
                 "Guardian Directives YAML missing 'injection_template' field"
             )
 
-        # Cache for future calls
-        cls._guardian_directives_cache = template.strip()
-
-        return cls._guardian_directives_cache
+        return template.strip()
 
     @classmethod
     def _enrich_context(cls, workspace: str, context: Dict[str, Any]) -> str:
@@ -286,17 +601,15 @@ class PromptRegistry:
             if budget_used:
                 lines.append(f"- Budget Used: {budget_used:,} tokens")
 
-        # Add additional context (from caller)
+        # Add additional context (from caller) - compact, size-capped JSON
         if context and len(context) > 1:  # More than just _registry_workspace
-            lines.append("\n**Additional Context:**")
-            for key, value in context.items():
-                if not key.startswith("_"):  # Skip internal keys
-                    if isinstance(value, dict):
-                        lines.append(f"- **{key}:**")
-                        for k, v in list(value.items())[:3]:  # Limit nested items
-                            lines.append(f"  - {k}: `{v}`")
-                    else:
-                        lines.append(f"- **{key}:** `{value}`")
+            serialized = serialize_context(context, store=get_artifact_store(), skip_private=True)
+            if serialized.text != "{}":
+                lines.append("\n**Additional Context:**")
+                lines.append(f"```json\n{serialized.text}\n```")
+                hint = artifact_hint(serialized)
+                if hint:
+                    lines.append(hint)
 
         return "\n".join(lines)
 
@@ -309,58 +622,21 @@ class PromptRegistry:
             tool_names: List of tool names to inject
 
         Returns:
-            Formatted markdown section with tool definitions
+            Pre-rendered tools section from the ToolCatalog (see tool_catalog.py)
         """
-        # Load tool definitions
-        tool_defs_path = (
-            _REPO_ROOT /
-            "agency_os" /
-            "00_system" /
-            "orchestrator" /
-            "tools" /
-            "tool_definitions.yaml"
-        )
-
-        if not tool_defs_path.exists():
-            logger.warning(f"Tool definitions not found: {tool_defs_path}")
-            return "# === TOOLS ===\n\n*(Tool definitions file not found)*"
-
         try:
-            with open(tool_defs_path) as f:
-                all_tools = yaml.safe_load(f)
-        except yaml.YAMLError as e:
+            catalog = get_tool_catalog()
+        except FileNotFoundError as e:
+            logger.warning(f"Tool definitions not found: {e}")
+            return "# === AVAILABLE TOOLS ===\n\n*(Tool definitions file not found)*"
+        except YAMLParseError as e:
             logger.error(f"Invalid YAML in tool definitions: {e}")
-            return "# === TOOLS ===\n\n*(Invalid tool definitions YAML)*"
+            return "# === AVAILABLE TOOLS ===\n\n*(Invalid tool definitions YAML)*"
 
-        # Filter to requested tools
-        tools_dict = all_tools.get("tools", {})
-        filtered_tools = {name: tool for name, tool in tools_dict.items() if name in tool_names}
-
-        if not filtered_tools:
-            return "# === TOOLS ===\n\n*(No matching tools found)*"
-
-        # Format as markdown (reuse PromptRuntime's formatting logic)
-        lines = ["# === TOOLS ===\n"]
-        lines.append("You have access to the following tools:\n")
-
-        for tool_name, tool_def in filtered_tools.items():
-            lines.append(f"## Tool: `{tool_name}`\n")
-            lines.append(f"**Description:** {tool_def.get('description', 'No description')}\n")
-
-            # Parameters
-            params = tool_def.get('parameters', {})
-            if params:
-                lines.append("\n**Parameters:**")
-                for param_name, param_spec in params.items():
-                    required = " (required)" if param_spec.get('required', False) else " (optional)"
-                    param_type = param_spec.get('type', 'any')
-                    param_desc = param_spec.get('description', '')
-                    default = f", default: `{param_spec['default']}`" if 'default' in param_spec else ""
-                    lines.append(f"- `{param_name}` ({param_type}){required}: {param_desc}{default}")
-
-            lines.append("\n---\n")
-
-        return "\n".join(lines)
+        missing = catalog.missing(tool_names)
+        if missing:
+            logger.warning(f"Unknown tools (not in tool_definitions.yaml): {', '.join(missing)}")
+        return catalog.section(tool_names)
 
     @classmethod
     def _inject_sops(cls, sop_ids: List[str]) -> str:
@@ -373,29 +649,22 @@ class PromptRegistry:
         Returns:
             Formatted markdown section with SOP content
         """
-        sops_dir = _REPO_ROOT / "system_steward_framework" / "knowledge" / "sops"
+        index = get_agent_index()
+        sops_dir = index.base_path / SOPS_DIR
 
-        if not sops_dir.exists():
+        if not index.sops_mtime_ns:
             logger.warning(f"SOPs directory not found: {sops_dir}")
             return "# === STANDARD OPERATING PROCEDURES ===\n\n*(SOPs directory not found)*"
 
         lines = ["# === STANDARD OPERATING PROCEDURES ===\n"]
 
         for sop_id in sop_ids:
-            # Try to find SOP file with pattern SOP_XXX_*.md
-            sop_files = list(sops_dir.glob(f"{sop_id}_*.md"))
-
-            if not sop_files:
-                # Fall back to exact match
-                sop_file = sops_dir / f"{sop_id}.md"
-                if sop_file.exists():
-                    sop_files = [sop_file]
+            # SOP_XXX_*.md, falling back to an exact match (indexed, no glob)
+            sop_file = index.sop_file(sop_id)
 
-            if sop_files:
-                sop_file = sop_files[0]  # Use first match
+            if sop_file is not None:
                 try:
-                    with open(sop_file) as f:
-                        sop_content = f.read()
+                    sop_content = get_composition_cache().read_text(sop_file)
                     lines.append(f"\n## {sop_id}\n")
                     lines.append(sop_content)
                     lines.append("\n---\n")
@@ -20,13 +20,12 @@ Error Handling:
     - CompositionError: Failed to compose prompt
 """
 
-import yaml
 import json
 import logging
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
 
 # Configure logging early (before any logger usage)
 logging.basicConfig(
@@ -47,6 +46,40 @@ except ImportError as e:
     logger.warning(f"workspace_utils not available: {e}")
     WORKSPACE_UTILS_AVAILABLE = False
 
+# Runtime siblings (this module is also loaded via importlib by vibe-cli/vibe_helper)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    from .composition_cache import CompositionCache, get_composition_cache, YAMLParseError
+    from .prompt_bundle import ensure_bundle_loaded
+    from .knowledge_slicer import SliceConfig, slice_knowledge
+    from .prompt_blocks import PromptBlock, build_prompt_blocks
+    from .composition_metrics import CompositionMetrics, get_composition_metrics
+    from .prompt_template import CompiledTemplate, compile_template, render_expression, resolve_variables
+    from .context_serializer import ArtifactStore, ContextLimits, artifact_hint, get_artifact_store, serialize_context
+    from .tool_catalog import get_tool_catalog
+    from .agent_index import AgentIndex, AgentRegistry, get_agent_index
+    from .composition_session import CompositionSession
+    from .token_budget import (
+        CompositionReport, Reduction, CONTEXT_VALUE_CAPS, REDUCTION_STRATEGIES,
+        estimate_tokens, resolve_token_budget
+    )
+except ImportError:
+    from composition_cache import CompositionCache, get_composition_cache, YAMLParseError
+    from prompt_bundle import ensure_bundle_loaded
+    from knowledge_slicer import SliceConfig, slice_knowledge
+    from prompt_blocks import PromptBlock, build_prompt_blocks
+    from composition_metrics import CompositionMetrics, get_composition_metrics
+    from prompt_template import CompiledTemplate, compile_template, render_expression, resolve_variables
+    from context_serializer import ArtifactStore, ContextLimits, artifact_hint, get_artifact_store, serialize_context
+    from tool_catalog import get_tool_catalog
+    from agent_index import AgentIndex, AgentRegistry, get_agent_index
+    from composition_session import CompositionSession
+    from token_budget import (
+        CompositionReport, Reduction, CONTEXT_VALUE_CAPS, REDUCTION_STRATEGIES,
+        estimate_tokens, resolve_token_budget
+    )
+
 
 # Custom Exceptions
 class PromptRuntimeError(Exception):
@@ -74,6 +107,18 @@ class CompositionError(PromptRuntimeError):
     pass
 
 
+# Agent registry (agent_id -> path relative to repo root). Agents are discovered
+# by scanning for agents/*/_composition.yaml (agent_index.py); assigning an entry
+# registers an agent explicitly.
+AGENT_REGISTRY = AgentRegistry(_REPO_ROOT)
+
+# composition_order defaults when a step declares no path_pattern / resolve_from
+DEFAULT_TASK_PATTERN = "tasks/${task_id}.md"
+DEFAULT_GATE_PATTERN = "gates/${gate_id}.md"
+DEFAULT_GATES_SOURCE = "tasks/${task_id}.meta.yaml#validation_gates"
+DEFAULT_KNOWLEDGE_SOURCE = "_knowledge_deps.yaml"
+
+
 @dataclass
 class CompositionSpec:
     """Parsed _composition.yaml structure"""
@@ -85,6 +130,7 @@ class CompositionSpec:
     conflict_resolution: Dict
     metadata: Dict
     tools: List[str] = None  # GAD-003: List of available tool names
+    token_budget: Optional[int] = None  # Input-token budget for all tasks of this agent
 
 
 @dataclass
@@ -99,6 +145,7 @@ class TaskMetadata:
     validation_gates: List[str]
     estimated_complexity: str
     estimated_tokens: int
+    token_budget: Optional[int] = None  # Overrides the agent-level budget
 
 
 class PromptRuntime:
@@ -109,16 +156,39 @@ class PromptRuntime:
     Production version would integrate with actual LLM API.
     """
 
-    def __init__(self, base_path: Optional[str] = None):
+    def __init__(
+        self,
+        base_path: Optional[str] = None,
+        cache: Optional[CompositionCache] = None,
+        metrics: Optional[CompositionMetrics] = None,
+        artifact_store: Optional[ArtifactStore] = None
+    ):
         if base_path is None:
             # Auto-detect repo root (4 levels up from prompt_runtime.py)
             # agency_os/00_system/runtime/prompt_runtime.py -> vibe-agency/
             self.base_path = Path(__file__).resolve().parent.parent.parent.parent
         else:
             self.base_path = Path(base_path)
-        self.knowledge_cache = {}  # Cache loaded YAML files
-
-    def execute_task(self, agent_id: str, task_id: str, context: Dict[str, Any]) -> str:
+        # Process-wide cache shared by every PromptRuntime/PromptRegistry instance
+        self.cache = cache if cache is not None else get_composition_cache()
+        # Per-stage timing histograms (process-wide unless a private instance is passed)
+        self.metrics = metrics if metrics is not None else get_composition_metrics()
+        # Oversized runtime context values are moved here (fetch_artifact tool)
+        self.artifact_store = artifact_store if artifact_store is not None else get_artifact_store()
+        # Agent/task/SOP index, resolved on first lookup
+        self._agent_index: Optional[AgentIndex] = None
+        # Token report of the most recent composition
+        self.last_report: Optional[CompositionReport] = None
+        # Seed the cache from the compiled bundle (vibe-cli compile), if present
+        ensure_bundle_loaded(self.base_path, self.cache)
+
+    def execute_task(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int] = None
+    ) -> str:
         """
         Compose and execute an atomized task.
 
@@ -126,9 +196,11 @@ class PromptRuntime:
             agent_id: Agent identifier (e.g., "GENESIS_BLUEPRINT")
             task_id: Task identifier (e.g., "select_core_modules")
             context: Runtime context (project_id, artifacts, etc.)
+            token_budget: Input-token budget (default: see token_budget.py)
 
         Returns:
             Composed prompt string ready for LLM execution
+            (the composition report is available as self.last_report)
 
         Raises:
             AgentNotFoundError: If agent_id not found
@@ -136,77 +208,206 @@ class PromptRuntime:
             MalformedYAMLError: If YAML parsing fails
             CompositionError: If prompt composition fails
         """
-        try:
-            print(f"\n{'='*60}")
-            print(f"Executing: {agent_id}.{task_id}")
-            print(f"{'='*60}\n")
-            logger.info(f"Starting composition: {agent_id}.{task_id}")
-
-            # CRITICAL FIX #1: Resolve workspace paths BEFORE composition
-            if WORKSPACE_UTILS_AVAILABLE:
-                workspace_name = context.get('workspace_name', get_active_workspace())
-                artifact_base = resolve_artifact_base_path(workspace_name)
-
-                # Inject resolved paths into context
-                context['_resolved_workspace'] = workspace_name
-                context['_resolved_artifact_base_path'] = str(artifact_base)
-                context['_resolved_planning_path'] = str(artifact_base / 'planning')
-                context['_resolved_coding_path'] = str(artifact_base / 'coding')
-                context['_resolved_qa_path'] = str(artifact_base / 'qa')
-                context['_resolved_deployment_path'] = str(artifact_base / 'deployment')
-
-                print(f"✓ Workspace context resolved: {workspace_name}")
-                print(f"  Artifact base: {artifact_base}")
-                logger.info(f"Workspace: {workspace_name}, Artifacts: {artifact_base}")
-            else:
-                logger.warning("Workspace utilities not available - paths NOT resolved")
-
-            # 1. Load composition spec
-            comp_spec = self._load_composition_spec(agent_id)
-            print(f"✓ Loaded composition spec (v{comp_spec.composition_version})")
-            logger.debug(f"Composition spec loaded: version {comp_spec.composition_version}")
-
-            # 2. Load task metadata
-            task_meta = self._load_task_metadata(agent_id, task_id)
-            print(f"✓ Loaded task metadata (phase {task_meta.phase})")
-            logger.debug(f"Task metadata loaded: phase {task_meta.phase}")
-
-            # 3. Resolve knowledge dependencies
-            knowledge_files = self._resolve_knowledge_deps(agent_id, task_meta)
-            print(f"✓ Resolved {len(knowledge_files)} knowledge dependencies")
-            logger.debug(f"Knowledge dependencies resolved: {len(knowledge_files)} files")
-
-            # 4. Compose final prompt
-            final_prompt = self._compose_prompt(
-                agent_id=agent_id,
-                composition_spec=comp_spec,
-                task_id=task_id,
-                task_meta=task_meta,
-                knowledge_files=knowledge_files,
-                runtime_context=context
-            )
+        prompt, _ = self.compose_with_report(agent_id, task_id, context, token_budget)
+        return prompt
 
-            # Validate prompt size
-            prompt_size = len(final_prompt)
-            print(f"✓ Composed final prompt ({prompt_size:,} chars)")
+    def compose_with_report(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int] = None,
+        registry_layers: Optional[Dict[str, int]] = None
+    ) -> Tuple[str, CompositionReport]:
+        """
+        Compose a task prompt within a token budget.
+
+        Args:
+            agent_id: Agent identifier
+            task_id: Task identifier
+            context: Runtime context
+            token_budget: Input-token budget (default: see token_budget.py)
+            registry_layers: Token estimates of layers PromptRegistry wraps
+                around this prompt (count against the budget)
+
+        Returns:
+            (composed prompt, CompositionReport)
+
+        Raises:
+            Same as execute_task()
+        """
+        chunks, report = self.compose_stream(agent_id, task_id, context, token_budget, registry_layers)
+        return "".join(chunks), report
 
-            if prompt_size > 200000:
-                logger.warning(
-                    f"Prompt size ({prompt_size:,} chars) exceeds recommended limit (200,000 chars). "
-                    "This may cause LLM context window issues."
+    def compose_stream(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int] = None,
+        registry_layers: Optional[Dict[str, int]] = None
+    ) -> Tuple[Iterator[str], CompositionReport]:
+        """
+        Compose a task prompt as a stream of chunks.
+
+        Sections are selected (and reduced to the token budget) up front; the
+        returned generator then yields separators and section texts in order
+        without concatenating them. "".join(chunks) equals the prompt returned
+        by compose_with_report().
+
+        Args:
+            Same as compose_with_report()
+
+        Returns:
+            (chunk iterator, CompositionReport)
+
+        Raises:
+            Same as execute_task()
+        """
+        sections, report = self._compose_task(agent_id, task_id, context, token_budget, registry_layers)
+        return self._iter_sections(sections), report
+
+    def compose_layers(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int] = None,
+        registry_layers: Optional[Dict[str, int]] = None,
+        extra_tools: Optional[List[str]] = None
+    ) -> Tuple[Iterator[Tuple[str, str]], CompositionReport]:
+        """
+        Like compose_stream(), but yields (layer, chunk) pairs.
+
+        Args:
+            extra_tools: Tools merged into the agent's tools section
+                (PromptRegistry inject_tools - see has_tools_step())
+
+        Returns:
+            ((layer, chunk) iterator, CompositionReport)
+        """
+        sections, report = self._compose_task(
+            agent_id, task_id, context, token_budget, registry_layers, extra_tools
+        )
+        return self._iter_labeled(sections), report
+
+    def compose_blocks(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int] = None
+    ) -> Tuple[List[PromptBlock], CompositionReport]:
+        """
+        Compose a task prompt as cache-friendly blocks for LLMClient.invoke().
+
+        Returns:
+            (prompt blocks with cache breakpoints, CompositionReport)
+        """
+        layers, report = self.compose_layers(agent_id, task_id, context, token_budget)
+        return build_prompt_blocks(layers), report
+
+    def session(
+        self,
+        agent_id: str,
+        context: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None
+    ) -> CompositionSession:
+        """
+        Start a composition session for several tasks of one agent.
+
+        The agent's composition spec and its task-invariant prefix (core
+        personality, tools) are loaded and rendered once per session; see
+        composition_session.py.
+
+        Args:
+            agent_id: Agent identifier
+            context: Runtime context shared by the session's tasks
+            token_budget: Input-token budget for every task
+
+        Raises:
+            AgentNotFoundError: If agent_id not found
+            MalformedYAMLError: If the composition spec is invalid
+        """
+        return CompositionSession(self, agent_id, context, token_budget)
+
+    def _compose_task(
+        self,
+        agent_id: str,
+        task_id: str,
+        context: Dict[str, Any],
+        token_budget: Optional[int],
+        registry_layers: Optional[Dict[str, int]],
+        extra_tools: Optional[List[str]] = None,
+        session: Optional[CompositionSession] = None
+    ) -> Tuple[List[Tuple[str, str]], CompositionReport]:
+        """Load, resolve and budget all sections of a task prompt"""
+        try:
+            with self.metrics.stage("runtime.total", self.cache):
+                # Progress goes to the logger: compose_many() and the composition
+                # server compose concurrently, and stdout would interleave
+                logger.info(f"Starting composition: {agent_id}.{task_id}")
+
+                # CRITICAL FIX #1: Resolve workspace paths BEFORE composition
+                with self.metrics.stage("runtime.workspace", self.cache):
+                    self._resolve_workspace_context(context)
+
+                # 1. Load composition spec
+                with self.metrics.stage("runtime.spec", self.cache):
+                    comp_spec = session.spec if session is not None else self._load_composition_spec(agent_id)
+                    if extra_tools:
+                        merged = list(comp_spec.tools or [])
+                        merged += [tool for tool in extra_tools if tool not in merged]
+                        comp_spec = replace(comp_spec, tools=merged)
+                logger.debug(f"Composition spec loaded: version {comp_spec.composition_version}")
+
+                # 2. Load task metadata
+                with self.metrics.stage("runtime.meta", self.cache):
+                    task_meta = self._load_task_metadata(agent_id, task_id)
+                logger.debug(f"Task metadata loaded: phase {task_meta.phase}")
+
+                # 3. Resolve knowledge dependencies
+                with self.metrics.stage("runtime.knowledge", self.cache):
+                    knowledge_files = self._resolve_knowledge_deps(agent_id, task_meta, context)
+                logger.debug(f"Knowledge dependencies resolved: {len(knowledge_files)} files")
+
+                # 4. Compose final prompt within the token budget
+                report = CompositionReport(
+                    agent_id=agent_id,
+                    task_id=task_id,
+                    budget_tokens=resolve_token_budget(
+                        token_budget,
+                        task_meta.token_budget,
+                        comp_spec.token_budget,
+                        task_meta.estimated_tokens
+                    ),
+                    registry_layers=dict(registry_layers or {})
                 )
+                with self.metrics.stage("runtime.compose", self.cache):
+                    sections = self._compose_within_budget(
+                        agent_id, comp_spec, task_id, task_meta, knowledge_files, context, report, session
+                    )
 
-            # 5. Validation gates (dry-run)
-            if task_meta.validation_gates:
-                print(f"✓ Validation gates loaded: {', '.join(task_meta.validation_gates)}")
-                logger.debug(f"Validation gates: {task_meta.validation_gates}")
+                # Validate prompt size
+                prompt_size = sum(len(chunk) for chunk in self._iter_sections(sections))
 
-            print(f"\n{'='*60}")
-            print(f"COMPOSITION COMPLETE")
-            print(f"{'='*60}\n")
+                if report.over_warning_threshold:
+                    logger.warning(
+                        f"Prompt size (~{report.total_tokens:,} tokens) exceeds the NFR warning threshold. "
+                        "This may cause LLM context window issues."
+                    )
+                elif not report.within_budget:
+                    logger.warning(f"Prompt for {agent_id}.{task_id} is over its token budget: {report.summary()}")
+
+                # 5. Validation gates (dry-run)
+                if task_meta.validation_gates:
+                    logger.debug(f"Validation gates: {task_meta.validation_gates}")
 
-            logger.info(f"Composition successful: {agent_id}.{task_id} ({prompt_size:,} chars)")
-            return final_prompt
+                logger.info(
+                    f"Composition successful: {agent_id}.{task_id} ({prompt_size:,} chars, {report.summary()})"
+                )
+                self.last_report = report
+                return sections, report
 
         except (AgentNotFoundError, TaskNotFoundError, MalformedYAMLError) as e:
             logger.error(f"Composition failed: {e}")
@@ -217,6 +418,24 @@ class PromptRuntime:
                 f"Failed to compose prompt for {agent_id}.{task_id}: {e}"
             ) from e
 
+    def _resolve_workspace_context(self, context: Dict[str, Any]) -> None:
+        """Inject the resolved workspace paths (_resolved_*) into the context"""
+        if WORKSPACE_UTILS_AVAILABLE:
+            workspace_name = context.get('workspace_name', get_active_workspace())
+            artifact_base = resolve_artifact_base_path(workspace_name)
+
+            # Inject resolved paths into context
+            context['_resolved_workspace'] = workspace_name
+            context['_resolved_artifact_base_path'] = str(artifact_base)
+            context['_resolved_planning_path'] = str(artifact_base / 'planning')
+            context['_resolved_coding_path'] = str(artifact_base / 'coding')
+            context['_resolved_qa_path'] = str(artifact_base / 'qa')
+            context['_resolved_deployment_path'] = str(artifact_base / 'deployment')
+
+            logger.info(f"Workspace: {workspace_name}, Artifacts: {artifact_base}")
+        else:
+            logger.warning("Workspace utilities not available - paths NOT resolved")
+
     def _load_composition_spec(self, agent_id: str) -> CompositionSpec:
         """
         Load and parse _composition.yaml
@@ -235,6 +454,19 @@ class PromptRuntime:
         agent_path = self._get_agent_path(agent_id)
         comp_file = agent_path / "_composition.yaml"
 
+        return self.cache.get_or_load(
+            ("spec", str(comp_file)),
+            lambda: self._parse_composition_spec(comp_file, agent_path, agent_id),
+            [comp_file]
+        )
+
+    def has_tools_step(self, agent_id: str) -> bool:
+        """Whether the agent's composition_order has a tools step (GAD-003)"""
+        spec = self._load_composition_spec(agent_id)
+        return any(step.get("type") == "tools" for step in spec.composition_order)
+
+    def _parse_composition_spec(self, comp_file: Path, agent_path: Path, agent_id: str) -> CompositionSpec:
+        """Parse and validate _composition.yaml (uncached)"""
         if not comp_file.exists():
             raise FileNotFoundError(
                 f"Composition file not found: {comp_file}\n"
@@ -243,9 +475,8 @@ class PromptRuntime:
             )
 
         try:
-            with open(comp_file) as f:
-                data = yaml.safe_load(f)
-        except yaml.YAMLError as e:
+            data = self.cache.read_yaml(comp_file)
+        except YAMLParseError as e:
             raise MalformedYAMLError(
                 f"Invalid YAML syntax in {comp_file}\n"
                 f"Error: {e}\n"
@@ -272,7 +503,8 @@ class PromptRuntime:
             variables=data.get("variables", {}),
             conflict_resolution=data.get("conflict_resolution", {}),
             metadata=data.get("metadata", {}),
-            tools=tools_list if tools_list else None
+            tools=tools_list if tools_list else None,
+            token_budget=data.get("token_budget")
         )
 
     def _load_task_metadata(self, agent_id: str, task_id: str) -> TaskMetadata:
@@ -292,6 +524,20 @@ class PromptRuntime:
         """
         agent_path = self._get_agent_path(agent_id)
 
+        # Both candidate paths are dependencies: creating the prefixed file
+        # must invalidate an entry that was resolved to the bare one
+        candidates = [
+            agent_path / "tasks" / f"task_{task_id}.meta.yaml",
+            agent_path / "tasks" / f"{task_id}.meta.yaml",
+        ]
+        return self.cache.get_or_load(
+            ("meta", str(agent_path), task_id),
+            lambda: self._parse_task_metadata(agent_path, agent_id, task_id),
+            candidates
+        )
+
+    def _parse_task_metadata(self, agent_path: Path, agent_id: str, task_id: str) -> TaskMetadata:
+        """Locate, parse and validate task_*.meta.yaml (uncached)"""
         # Try with task_ prefix first, fall back to bare task_id
         meta_file = agent_path / "tasks" / f"task_{task_id}.meta.yaml"
         if not meta_file.exists():
@@ -318,9 +564,8 @@ class PromptRuntime:
             )
 
         try:
-            with open(meta_file) as f:
-                data = yaml.safe_load(f)
-        except yaml.YAMLError as e:
+            data = self.cache.read_yaml(meta_file)
+        except YAMLParseError as e:
             raise MalformedYAMLError(
                 f"Invalid YAML syntax in {meta_file}\n"
                 f"Error: {e}\n"
@@ -344,53 +589,177 @@ class PromptRuntime:
             outputs=data.get("outputs", []),
             validation_gates=data.get("validation_gates", []),
             estimated_complexity=data.get("estimated_complexity", "unknown"),
-            estimated_tokens=data.get("estimated_tokens", 0)
+            estimated_tokens=data.get("estimated_tokens", 0),
+            token_budget=data.get("token_budget")
         )
 
-    def _resolve_knowledge_deps(self, agent_id: str, task_meta: TaskMetadata) -> List[str]:
+    def _resolve_knowledge_deps(
+        self,
+        agent_id: str,
+        task_meta: TaskMetadata,
+        context: Optional[Dict[str, Any]] = None,
+        force_slice: bool = False,
+        include_optional: bool = True
+    ) -> List[str]:
         """
         Resolve which knowledge YAML files to load for this task.
 
+        Entries with a `slice` spec in _knowledge_deps.yaml are reduced to the
+        records relevant to `context` (see knowledge_slicer.py). The budget
+        reductions can force slicing of every entry and skip optional ones.
+
         Returns list of file contents (as YAML strings).
         """
         agent_path = self._get_agent_path(agent_id)
-        deps_file = agent_path / "_knowledge_deps.yaml"
+        deps_file = agent_path / self._knowledge_source(self._load_composition_spec(agent_id))
+        deps = self.cache.read_yaml(deps_file)
 
-        with open(deps_file) as f:
-            deps = yaml.safe_load(f)
+        entries = [(entry, True) for entry in deps.get("required_knowledge", [])]
+        if include_optional:
+            entries += [(entry, bool(entry.get("critical"))) for entry in deps.get("optional_knowledge", [])]
 
         knowledge_files = []
 
-        # Load required knowledge
-        for req in deps.get("required_knowledge", []):
+        # Required knowledge first, then optional knowledge (if conditions met)
+        for entry, required in entries:
             # Check if this task uses this knowledge file
             # Note: YAMLs use 'used_in_tasks', not 'used_by_tasks'
-            used_tasks = req.get("used_in_tasks", req.get("used_by_tasks", []))
+            used_tasks = entry.get("used_in_tasks", entry.get("used_by_tasks", []))
             if task_meta.task_id in used_tasks:
-                content = self._load_knowledge_file(req["path"])
-                knowledge_files.append(f"# {req['purpose']}\n{content}")
-
-        # Load optional knowledge (if conditions met)
-        for opt in deps.get("optional_knowledge", []):
-            used_tasks = opt.get("used_in_tasks", opt.get("used_by_tasks", []))
-            if task_meta.task_id in used_tasks:
-                content = self._load_knowledge_file(opt["path"])
-                knowledge_files.append(f"# {opt['purpose']}\n{content}")
+                content = self._load_knowledge_file(
+                    entry["path"], entry.get("slice"), context, force_slice, required
+                )
+                knowledge_files.append(f"# {entry['purpose']}\n{content}")
 
         return knowledge_files
 
-    def _load_knowledge_file(self, relative_path: str) -> str:
-        """Load a knowledge YAML file (with caching)"""
-        if relative_path in self.knowledge_cache:
-            return self.knowledge_cache[relative_path]
+    def _load_knowledge_file(
+        self,
+        relative_path: str,
+        slice_spec: Any = None,
+        context: Optional[Dict[str, Any]] = None,
+        force_slice: bool = False,
+        required: bool = False
+    ) -> str:
+        """
+        Load a knowledge YAML file (via the shared composition cache), sliced if configured.
 
-        full_path = self.base_path / relative_path
+        Required (or critical) knowledge is never sliced down to nothing: if
+        the context matches none of its entries, the full file is injected.
+        Over budget (force_slice), optional knowledge the context matches
+        nothing in is left out instead.
+        """
+        path = self.base_path / relative_path
+        config = SliceConfig.from_spec(slice_spec)
+        if force_slice and config is None:
+            config = SliceConfig()
+        if config is not None:
+            config = replace(config, fallback="full" if required else "none" if force_slice else config.fallback)
+        if config is None or not (context or force_slice):
+            return self.cache.read_text(path)
 
-        with open(full_path) as f:
-            content = f.read()
+        try:
+            return slice_knowledge(path, context or {}, config, self.cache)
+        except YAMLParseError:
+            if slice_spec is not None:
+                raise
+            # Forced slicing of a file that is not structured YAML: keep it whole
+            return self.cache.read_text(path)
+
+    def _compose_within_budget(
+        self,
+        agent_id: str,
+        composition_spec: CompositionSpec,
+        task_id: str,
+        task_meta: TaskMetadata,
+        knowledge_files: List[str],
+        runtime_context: Dict[str, Any],
+        report: CompositionReport,
+        session: Optional[CompositionSession] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Compose prompt sections, applying reduction strategies until the
+        prompt fits report.budget_tokens (see token_budget.py).
 
-        self.knowledge_cache[relative_path] = content
-        return content
+        Fills in report.runtime_layers, report.initial_tokens, report.reductions
+        and report.exhausted.
+        """
+        context_cap = None
+        force_slice = False
+        include_optional = True
+
+        def compose() -> List[Tuple[str, str]]:
+            sections = self._compose_sections(
+                agent_id, composition_spec, task_id, task_meta,
+                knowledge_files, runtime_context, context_cap, session
+            )
+            report.runtime_layers = self._layer_tokens(sections)
+            return sections
+
+        sections = compose()
+        report.initial_tokens = report.total_tokens
+
+        for strategy in REDUCTION_STRATEGIES:
+            if report.within_budget:
+                break
+            before = report.total_tokens
+
+            if strategy == "truncate_runtime_context":
+                for cap in CONTEXT_VALUE_CAPS:
+                    context_cap = cap
+                    sections = compose()
+                    if report.within_budget:
+                        break
+                detail = f"values capped at {context_cap} chars"
+            else:
+                if strategy == "slice_knowledge":
+                    force_slice = True
+                    detail = "all knowledge files relevance-sliced"
+                else:  # drop_optional_knowledge
+                    include_optional = False
+                    detail = "optional knowledge omitted"
+                knowledge_files = self._resolve_knowledge_deps(
+                    agent_id, task_meta, runtime_context, force_slice, include_optional
+                )
+                sections = compose()
+
+            saved = before - report.total_tokens
+            if saved > 0:
+                report.reductions.append(Reduction(strategy, saved, detail))
+                logger.info(f"Token budget: {strategy} saved ~{saved:,} tokens ({detail})")
+
+        # Every strategy ran (some may have saved nothing) and the prompt is still too large
+        report.exhausted = not report.within_budget
+        return sections
+
+    @staticmethod
+    def _layer_tokens(sections: List[Tuple[str, str]]) -> Dict[str, int]:
+        """Token estimate per composition layer"""
+        layers: Dict[str, int] = {}
+        for layer, text in sections:
+            layers[layer] = layers.get(layer, 0) + estimate_tokens(text)
+        return layers
+
+    @staticmethod
+    def _iter_labeled(sections: List[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        """Yield (layer, chunk) pairs: sections with their leading separators"""
+        first_layer = sections[0][0] if sections else "core"
+        yield first_layer, "\n\n" + "="*60
+        for i, (layer, text) in enumerate(sections):
+            if i:
+                yield layer, "\n\n"
+            yield layer, text
+
+    @classmethod
+    def _iter_sections(cls, sections: List[Tuple[str, str]]) -> Iterator[str]:
+        """Yield the prompt chunk by chunk: sections with their separators"""
+        for _, chunk in cls._iter_labeled(sections):
+            yield chunk
+
+    @classmethod
+    def _join_sections(cls, sections: List[Tuple[str, str]]) -> str:
+        """Combine all parts with separators"""
+        return "".join(cls._iter_sections(sections))
 
     def _compose_prompt(
         self,
@@ -404,17 +773,47 @@ class PromptRuntime:
         """
         Compose the final prompt by combining fragments according to composition_order.
         """
+        return self._join_sections(self._compose_sections(
+            agent_id, composition_spec, task_id, task_meta, knowledge_files, runtime_context
+        ))
+
+    def _compose_sections(
+        self,
+        agent_id: str,
+        composition_spec: CompositionSpec,
+        task_id: str,
+        task_meta: TaskMetadata,
+        knowledge_files: List[str],
+        runtime_context: Dict[str, Any],
+        max_context_value_chars: Optional[int] = None,
+        session: Optional[CompositionSession] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Render the sections of composition_order as (layer, text) pairs.
+
+        Layers: core, tools, knowledge, task, gates, runtime_context
+
+        Core, task and gate fragments are precompiled templates: the
+        variables declared in _composition.yaml are substituted with one join
+        per section (see prompt_template.py).
+        """
         agent_path = self._get_agent_path(agent_id)
-        composed_parts = []
 
-        for step in composition_spec.composition_order:
+        names = frozenset(composition_spec.variables or ())
+        scope = {"runtime_context": runtime_context, "agent_id": agent_id, "task_id": task_id}
+        values = resolve_variables(composition_spec.variables, scope) if names else {}
+
+        def render(step: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+            """Render one composition_order step (None if it contributes nothing)"""
             source = step["source"]
             step_type = step["type"]
 
             # === BASE PROMPT (Core Personality) ===
             if source.endswith(".md") and step_type == "base":
-                core_prompt = self._load_file(agent_path / source)
-                composed_parts.append(f"# === CORE PERSONALITY ===\n\n{core_prompt}")
+                return (
+                    "core",
+                    self._file_section("# === CORE PERSONALITY ===", agent_path / source, names).render(values)
+                )
 
             # === TOOLS (GAD-003 Phase 2) ===
             elif step_type == "tools":
@@ -424,56 +823,129 @@ class PromptRuntime:
                         available_tools=composition_spec.tools,
                         agent_path=agent_path
                     )
-                    composed_parts.append(f"# === AVAILABLE TOOLS ===\n\n{tools_section}")
+                    return ("tools", tools_section)
 
             # === KNOWLEDGE FILES ===
             elif source == "${knowledge_files}" and step_type == "knowledge":
                 if knowledge_files:
                     knowledge_section = "\n\n---\n\n".join(knowledge_files)
-                    composed_parts.append(f"# === KNOWLEDGE BASE ===\n\n{knowledge_section}")
+                    return ("knowledge", f"# === KNOWLEDGE BASE ===\n\n{knowledge_section}")
 
             # === TASK PROMPT ===
             elif source == "${task_prompt}" and step_type == "task":
-                # Try with task_ prefix first, fall back to bare task_id
-                task_file = agent_path / "tasks" / f"task_{task_id}.md"
-                if not task_file.exists():
-                    task_file = agent_path / "tasks" / f"{task_id}.md"
-                task_prompt = self._load_file(task_file)
-                composed_parts.append(f"# === TASK INSTRUCTIONS ===\n\n{task_prompt}")
+                task_file = self._resolve_task_path(
+                    agent_path, render_expression(step.get("path_pattern", DEFAULT_TASK_PATTERN), scope)
+                )
+                return (
+                    "task",
+                    self._file_section("# === TASK INSTRUCTIONS ===", task_file, names).render(values)
+                )
 
             # === VALIDATION GATES ===
             elif source == "${gate_prompts}" and step_type == "validation":
-                if task_meta.validation_gates:
-                    gate_sections = []
-                    for gate_id in task_meta.validation_gates:
-                        gate_file = gate_id if gate_id.endswith(".md") else f"{gate_id}.md"
-                        gate_prompt = self._load_file(agent_path / "gates" / gate_file)
-                        gate_sections.append(gate_prompt)
-
-                    gates_combined = "\n\n---\n\n".join(gate_sections)
-                    composed_parts.append(f"# === VALIDATION GATES ===\n\n{gates_combined}")
+                gate_ids = self._resolve_gate_ids(
+                    agent_path, step.get("resolve_from", DEFAULT_GATES_SOURCE), scope, task_meta
+                )
+                if gate_ids:
+                    pattern = step.get("path_pattern", DEFAULT_GATE_PATTERN)
+                    gate_files = [
+                        agent_path / render_expression(
+                            pattern, {**scope, "gate_id": gate_id[:-3] if gate_id.endswith(".md") else gate_id}
+                        )
+                        for gate_id in gate_ids
+                    ]
+                    template = self.cache.get_or_load(
+                        ("section", "gates", names) + tuple(str(g) for g in gate_files),
+                        lambda: compile_template(
+                            "# === VALIDATION GATES ===\n\n" + "\n\n---\n\n".join(
+                                self._load_file(g) for g in gate_files
+                            ),
+                            names
+                        ),
+                        gate_files
+                    )
+                    return ("gates", template.render(values))
 
             # === RUNTIME CONTEXT ===
             elif source == "${runtime_context}" and step_type == "context":
-                context_str = self._format_runtime_context(runtime_context)
-                composed_parts.append(f"# === RUNTIME CONTEXT ===\n\n{context_str}")
-
-        # Combine all parts with separators
-        final_prompt = "\n\n" + "="*60 + "\n\n".join(composed_parts)
-
-        return final_prompt
-
-    def _format_runtime_context(self, context: Dict[str, Any]) -> str:
-        """Format runtime context as markdown"""
-        lines = ["**Runtime Context:**\n"]
-        for key, value in context.items():
-            if isinstance(value, dict):
-                lines.append(f"- **{key}:**")
-                for k, v in value.items():
-                    lines.append(f"  - {k}: `{v}`")
-            else:
-                lines.append(f"- **{key}:** `{value}`")
+                context_str = self._format_runtime_context(runtime_context, max_context_value_chars)
+                return ("runtime_context", f"# === RUNTIME CONTEXT ===\n\n{context_str}")
+
+            return None
+
+        # A session supplies the agent's task-invariant leading sections pre-rendered
+        composed_parts: List[Tuple[str, str]] = []
+        start = 0
+        if session is not None:
+            start, prefix_sections = session._prefix(values, render)
+            composed_parts.extend(prefix_sections)
+
+        for step in composition_spec.composition_order[start:]:
+            part = render(step)
+            if part is not None:
+                composed_parts.append(part)
+
+        return composed_parts
+
+    def _file_section(self, header: str, path: Path, names: FrozenSet[str] = frozenset()) -> CompiledTemplate:
+        """Compile (and cache) a section template: header followed by file content"""
+        return self.cache.get_or_load(
+            ("section", header, str(path), names),
+            lambda: compile_template(f"{header}\n\n{self._load_file(path)}", names),
+            [path]
+        )
 
+    @staticmethod
+    def _resolve_task_path(agent_path: Path, relative_path: str) -> Path:
+        """
+        Resolve a rendered task path pattern.
+
+        Task files are named task_<id>.md, so the task_-prefixed name is tried
+        first and the bare name is the fallback.
+        """
+        path = agent_path / relative_path
+        if not path.name.startswith("task_"):
+            prefixed = path.with_name(f"task_{path.name}")
+            if prefixed.exists():
+                return prefixed
+        return path
+
+    def _resolve_gate_ids(
+        self,
+        agent_path: Path,
+        resolve_from: str,
+        scope: Dict[str, Any],
+        task_meta: TaskMetadata
+    ) -> List[str]:
+        """Resolve the gate IDs of a validation step (resolve_from: <yaml path>#<key>)"""
+        relative_path, _, key = render_expression(resolve_from, scope).partition("#")
+        meta_file = self._resolve_task_path(agent_path, relative_path)
+        if not key or meta_file.name == f"task_{task_meta.task_id}.meta.yaml" or not meta_file.exists():
+            # The task's own metadata is already parsed
+            return list(task_meta.validation_gates or [])
+        data = self.cache.read_yaml(meta_file) or {}
+        return list(data.get(key) or [])
+
+    @staticmethod
+    def _knowledge_source(composition_spec: CompositionSpec) -> str:
+        """Knowledge dependency file named by the knowledge step's resolve_from"""
+        for step in composition_spec.composition_order:
+            if step.get("type") == "knowledge" and step.get("resolve_from"):
+                return step["resolve_from"]
+        return DEFAULT_KNOWLEDGE_SOURCE
+
+    def _format_runtime_context(self, context: Dict[str, Any], max_value_chars: Optional[int] = None) -> str:
+        """
+        Format runtime context as compact JSON (see context_serializer.py).
+
+        Values over the per-value budget (optionally capped at max_value_chars)
+        are replaced by artifact references.
+        """
+        serialized = serialize_context(context, ContextLimits().capped(max_value_chars), self.artifact_store)
+        lines = ["**Runtime Context:**\n", "```json", serialized.text, "```"]
+        hint = artifact_hint(serialized)
+        if hint:
+            lines.append(f"\n{hint}")
         return "\n".join(lines)
 
     def _get_agent_path(self, agent_id: str) -> Path:
@@ -489,59 +961,57 @@ class PromptRuntime:
         Raises:
             AgentNotFoundError: If agent_id not in registry
         """
-        # Dynamic agent registry - supports all agents
-        AGENT_REGISTRY = {
-            # Planning Framework
-            "LEAN_CANVAS_VALIDATOR": "agency_os/01_planning_framework/agents/LEAN_CANVAS_VALIDATOR",
-            "VIBE_ALIGNER": "agency_os/01_planning_framework/agents/VIBE_ALIGNER",
-            "GENESIS_BLUEPRINT": "agency_os/01_planning_framework/agents/GENESIS_BLUEPRINT",
-            "GENESIS_UPDATE": "agency_os/01_planning_framework/agents/GENESIS_UPDATE",
-
-            # Research Agents (GAD-003)
-            "MARKET_RESEARCHER": "agency_os/01_planning_framework/agents/research/MARKET_RESEARCHER",
-            "TECH_RESEARCHER": "agency_os/01_planning_framework/agents/research/TECH_RESEARCHER",
-            "FACT_VALIDATOR": "agency_os/01_planning_framework/agents/research/FACT_VALIDATOR",
-
-            # Other Frameworks
-            "CODE_GENERATOR": "agency_os/02_code_gen_framework/agents/CODE_GENERATOR",
-            "QA_VALIDATOR": "agency_os/03_qa_framework/agents/QA_VALIDATOR",
-            "DEPLOY_MANAGER": "agency_os/04_deploy_framework/agents/DEPLOY_MANAGER",
-            "BUG_TRIAGE": "agency_os/05_maintenance_framework/agents/BUG_TRIAGE",
-
-            # System Steward Framework
-            "SSF_ROUTER": "system_steward_framework/agents/SSF_ROUTER",
-            "AUDITOR": "system_steward_framework/agents/AUDITOR",
-            "LEAD_ARCHITECT": "system_steward_framework/agents/LEAD_ARCHITECT",
-
-            # System Agents
-            "AGENCY_OS_ORCHESTRATOR": "agency_os/00_system/agents/AGENCY_OS_ORCHESTRATOR",
-        }
-
-        if agent_id not in AGENT_REGISTRY:
-            available = '\n  - '.join(sorted(AGENT_REGISTRY.keys()))
+        registered = AGENT_REGISTRY.registered(agent_id)
+        if registered is not None:
+            agent_path = self.base_path / registered
+
+            # Verify agent directory exists
+            if not agent_path.exists():
+                raise AgentNotFoundError(
+                    f"Agent directory not found: {agent_path}\n"
+                    f"Agent ID: {agent_id}\n"
+                    f"Expected path: {agent_path}\n"
+                    f"Fix: Ensure agent directory exists or update AGENT_REGISTRY"
+                )
+            return agent_path
+
+        # Scanned agents need no exists() check; an unknown agent may be new
+        index = self.agent_index
+        entry = index.agent(agent_id)
+        if entry is None and index.refresh():
+            entry = index.agent(agent_id)
+        if entry is None:
+            available = '\n  - '.join(sorted(set(index.agent_ids()) | set(AGENT_REGISTRY.registered_ids())))
             raise AgentNotFoundError(
                 f"Agent not found: '{agent_id}'\n\n"
                 f"Available agents:\n  - {available}\n\n"
-                f"Fix: Check agent_id spelling or add to AGENT_REGISTRY in prompt_runtime.py"
+                f"Fix: Check agent_id spelling, or create agents/<AGENT>/_composition.yaml "
+                f"with 'agent_id: {agent_id}'"
             )
+        return self.base_path / entry.path
 
-        agent_path = self.base_path / AGENT_REGISTRY[agent_id]
+    @property
+    def agent_index(self) -> AgentIndex:
+        """Agent/task/SOP index of this runtime's base path"""
+        if self._agent_index is None:
+            self._agent_index = get_agent_index(self.base_path)
+        return self._agent_index
 
-        # Verify agent directory exists
-        if not agent_path.exists():
-            raise AgentNotFoundError(
-                f"Agent directory not found: {agent_path}\n"
-                f"Agent ID: {agent_id}\n"
-                f"Expected path: {agent_path}\n"
-                f"Fix: Ensure agent directory exists or update AGENT_REGISTRY"
-            )
+    def list_tasks(self, agent_id: str) -> List[str]:
+        """
+        Task IDs of an agent (task_<id>.md files), sorted.
 
-        return agent_path
+        Raises:
+            AgentNotFoundError: If agent_id not found
+        """
+        agent_path = self._get_agent_path(agent_id)
+        if AGENT_REGISTRY.registered(agent_id) is None:
+            return self.agent_index.task_ids(agent_id)
+        return [f.stem.replace("task_", "", 1) for f in sorted((agent_path / "tasks").glob("task_*.md"))]
 
     def _load_file(self, path: Path) -> str:
-        """Load a file's contents"""
-        with open(path) as f:
-            return f.read()
+        """Load a file's contents (via the shared composition cache)"""
+        return self.cache.read_text(path)
 
     def _compose_tools_section(self, source: str, available_tools: List[str], agent_path: Path) -> str:
         """
@@ -553,7 +1023,7 @@ class PromptRuntime:
             agent_path: Path to agent directory (for resolving relative paths)
 
         Returns:
-            Formatted markdown string with tool definitions
+            Pre-rendered tools section from the ToolCatalog (see tool_catalog.py)
         """
         # Resolve the tool definitions file path
         # source is like "../../../00_system/orchestrator/tools/tool_definitions.yaml"
@@ -563,63 +1033,19 @@ class PromptRuntime:
         else:
             tool_defs_path = (agent_path / source).resolve()
 
-        # Load tool definitions
         try:
-            with open(tool_defs_path) as f:
-                all_tools = yaml.safe_load(f)
+            catalog = get_tool_catalog(tool_defs_path, self.cache)
         except FileNotFoundError:
             logger.warning(f"Tool definitions file not found: {tool_defs_path}")
-            return "*(No tools available - tool_definitions.yaml not found)*"
-        except yaml.YAMLError as e:
+            return "# === AVAILABLE TOOLS ===\n\n*(No tools available - tool_definitions.yaml not found)*"
+        except YAMLParseError as e:
             logger.error(f"Invalid YAML in tool definitions: {e}")
-            return "*(Tool definitions file has invalid YAML)*"
-
-        # Filter to only requested tools
-        tools_dict = all_tools.get("tools", {})
-        filtered_tools = {name: tool for name, tool in tools_dict.items() if name in available_tools}
-
-        if not filtered_tools:
-            return "*(No tools available for this agent)*"
-
-        # Format tools as markdown
-        lines = []
-        lines.append("You have access to the following research tools:\n")
-
-        for tool_name, tool_def in filtered_tools.items():
-            lines.append(f"## Tool: `{tool_name}`\n")
-            lines.append(f"**Description:** {tool_def.get('description', 'No description')}\n")
-
-            # Parameters
-            params = tool_def.get('parameters', {})
-            if params:
-                lines.append("\n**Parameters:**")
-                for param_name, param_spec in params.items():
-                    required = " (required)" if param_spec.get('required', False) else " (optional)"
-                    param_type = param_spec.get('type', 'any')
-                    param_desc = param_spec.get('description', '')
-                    default = f", default: `{param_spec['default']}`" if 'default' in param_spec else ""
-                    lines.append(f"- `{param_name}` ({param_type}){required}: {param_desc}{default}")
-
-            # Returns
-            returns = tool_def.get('returns', {})
-            if returns:
-                lines.append(f"\n**Returns:** {returns.get('description', 'No description')}")
-
-            lines.append("\n---\n")
-
-        # Add usage instructions
-        lines.append("\n### How to use tools:\n")
-        lines.append("To call a tool, use the following XML format in your response:\n")
-        lines.append("```xml")
-        lines.append('<tool_use name="tool_name">')
-        lines.append('  <parameters>')
-        lines.append('    <param_name>value</param_name>')
-        lines.append('  </parameters>')
-        lines.append('</tool_use>')
-        lines.append("```\n")
-        lines.append("You will receive the tool result, then you can continue your analysis.\n")
+            return "# === AVAILABLE TOOLS ===\n\n*(Tool definitions file has invalid YAML)*"
 
-        return "\n".join(lines)
+        missing = catalog.missing(available_tools)
+        if missing:
+            logger.warning(f"Unknown tools (not in {tool_defs_path.name}): {', '.join(missing)}")
+        return catalog.section(available_tools)
 
 
 # =================================================================
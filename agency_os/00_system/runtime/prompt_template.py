@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Prompt Template - Precompiled ${variable} substitution
+======================================================
+
+_composition.yaml declares `variables` (e.g. project_id:
+${runtime_context.project_id}) and path templates (path_pattern:
+tasks/${task_id}.md, resolve_from: tasks/${task_id}.meta.yaml#validation_gates).
+
+A fragment is compiled once into literal segments and variable slots:
+
+    "Project ${project_id} - see ${gate_id}"
+        -> segments ("Project ", " - see ", "")  slots ("project_id", "gate_id")
+
+Rendering is a single "".join() over the segments and resolved values - the
+large static text is never rescanned or copied with str.replace(). A template
+without slots renders to its (cached) text object itself.
+
+Only names passed to compile_template() become slots. Fragments also contain
+${...} text meant for the LLM (e.g. "Your budget: ${user_budget}" in
+gate_budget_feasibility.md), so undeclared names stay literal, and so does a
+declared variable whose value cannot be resolved.
+
+Usage:
+    template = compile_template(text, frozenset(spec.variables))
+    prompt_part = template.render(resolve_variables(spec.variables, scope))
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+_PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_.]*)\}")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Literal segments interleaved with variable slots (len(segments) == len(slots) + 1)"""
+    segments: Tuple[str, ...]
+    slots: Tuple[str, ...]
+
+    @property
+    def is_static(self) -> bool:
+        return not self.slots
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """
+        Substitute slot values (single join).
+
+        Slots without a value are rendered back as the original ${name}.
+        """
+        if not self.slots:
+            return self.segments[0]
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values.get(slot)
+            parts.append(f"${{{slot}}}" if value is None else value)
+            parts.append(segment)
+        return "".join(parts)
+
+
+def compile_template(text: str, names: Optional[FrozenSet[str]] = None) -> CompiledTemplate:
+    """
+    Compile a text into a template.
+
+    Args:
+        text: Template text
+        names: Placeholder names that become slots (None: every ${name})
+
+    Returns:
+        CompiledTemplate
+    """
+    segments = []
+    slots = []
+    literal_start = 0
+    for match in _PLACEHOLDER.finditer(text):
+        name = match.group(1)
+        if names is not None and name not in names:
+            continue
+        segments.append(text[literal_start:match.start()])
+        slots.append(name)
+        literal_start = match.end()
+
+    if not slots:
+        return CompiledTemplate((text,), ())
+    segments.append(text[literal_start:])
+    return CompiledTemplate(tuple(segments), tuple(slots))
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text: str) -> CompiledTemplate:
+    """Compile a short template (variable value, path pattern) - memoized"""
+    return compile_template(text)
+
+
+def lookup(scope: Mapping[str, Any], dotted_name: str) -> Any:
+    """
+    Resolve a dotted name ("runtime_context.project_id") in nested mappings.
+
+    Returns:
+        The value, or None if any part is missing
+    """
+    value: Any = scope
+    for part in dotted_name.split("."):
+        if isinstance(value, Mapping):
+            value = value.get(part)
+        else:
+            value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def resolve_variables(variables: Mapping[str, Any], scope: Mapping[str, Any]) -> Dict[str, str]:
+    """
+    Resolve a `variables` mapping of _composition.yaml against a scope.
+
+    Args:
+        variables: name -> template (e.g. "${runtime_context.project_id}") or literal
+        scope: Values referenced by the templates (runtime_context, task_id, agent_id)
+
+    Returns:
+        name -> rendered value, for every variable whose references all resolved
+    """
+    resolved: Dict[str, str] = {}
+    for name, spec in (variables or {}).items():
+        if not isinstance(spec, str):
+            if spec is not None:
+                resolved[name] = _to_text(spec)
+            continue
+        template = compile_expression(spec)
+        values = {}
+        for slot in template.slots:
+            value = lookup(scope, slot)
+            if value is None:
+                break
+            values[slot] = _to_text(value)
+        else:
+            resolved[name] = template.render(values)
+    return resolved
+
+
+def render_expression(text: str, values: Mapping[str, Any]) -> str:
+    """Render a path pattern or resolve_from expression (e.g. tasks/${task_id}.md)"""
+    template = compile_expression(text)
+    rendered = {}
+    for slot in template.slots:
+        value = lookup(values, slot)
+        if value is not None:
+            rendered[slot] = _to_text(value)
+    return template.render(rendered)
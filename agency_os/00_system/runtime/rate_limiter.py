@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Process-wide RPM/TPM scheduling with adaptive concurrency
+========================================================================
+
+The provider limits every organization per model: requests per minute
+(RPM), input tokens per minute (ITPM) and output tokens per minute (OTPM).
+Retrying each 429 on its own (sleep 1s, 2s, 4s) works for one caller; with
+concurrent calls (invoke_many, AsyncLLMClient, batch planning in several
+threads) every caller retries at once and the burst collapses into a
+thundering herd. RateLimitScheduler admits calls before they are sent:
+
+    - Token buckets per model for RPM, ITPM and OTPM (each refilled
+      continuously, capacity one minute). A call is admitted once its
+      estimated tokens fit: input estimated from the request text, output
+      from the observed average (capped at max_tokens). After the call the
+      buckets are corrected by the actual usage.
+    - AIMD concurrency per model: every success raises the in-flight limit
+      by 1/limit (about +1 per round trip); a 429/529 halves it (at most
+      once per DECREASE_COOLDOWN seconds, so one burst halves it once).
+    - Retry-After: a throttled response blocks admission of the model until
+      the server's Retry-After (plus jitter) has passed, for all callers.
+    - Metrics per model: queue depth (current and peak), in-flight calls,
+      the concurrency limit, throttled responses and an admission wait-time
+      histogram (snapshot() / export()).
+
+Limits default to unlimited (only the adaptive concurrency applies); set
+them for the org's tier via the environment or RateLimits per model.
+
+Usage:
+    scheduler = get_rate_scheduler()
+    ticket = scheduler.acquire(model, input_tokens=2000, max_tokens=4096)
+    try:
+        response = client.messages.create(**request)
+    except Exception as e:
+        scheduler.release(ticket, error=e)
+        raise
+    scheduler.release(ticket, response.usage.input_tokens, response.usage.output_tokens)
+
+Environment:
+    VIBE_LLM_RATE_LIMIT=0              Disable the shared scheduler
+    VIBE_LLM_RPM=<n>                   Requests per minute per model
+    VIBE_LLM_INPUT_TPM=<n>             Input tokens per minute per model
+    VIBE_LLM_OUTPUT_TPM=<n>            Output tokens per minute per model
+    VIBE_LLM_MAX_IN_FLIGHT=<n>         Upper bound of the adaptive concurrency (default: 16)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+try:
+    from .composition_metrics import StageHistogram
+    from .token_budget import estimate_tokens
+except ImportError:
+    from composition_metrics import StageHistogram
+    from token_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Seconds between two multiplicative decreases of one model's concurrency
+DECREASE_COOLDOWN = 2.0
+
+# Retry-After blocks are stretched by up to this fraction (spreads the restart)
+RETRY_AFTER_JITTER = 0.1
+
+# Sleep between admission checks of async callers waiting for a free slot
+ASYNC_POLL_INTERVAL = 0.05
+
+# Weight of the latest call in the output-token average
+OUTPUT_EWMA_WEIGHT = 0.2
+
+THROTTLED_STATUS_CODES = (429, 529)
+THROTTLED_ERRORS = ("RateLimitError", "OverloadedError")
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Whether an error is a rate-limit (429) or overload (529) response"""
+    return (
+        getattr(error, "status_code", None) in THROTTLED_STATUS_CODES
+        or type(error).__name__ in THROTTLED_ERRORS
+    )
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait according to the error's Retry-After header (None if absent)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """Estimated input tokens of a messages.create() request"""
+    def text(value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, dict):
+            return text(value.get("text") or value.get("content") or "")
+        if isinstance(value, (list, tuple)):
+            return "".join(text(item) for item in value)
+        return ""
+
+    return estimate_tokens(text(request.get("system")) + text(request.get("messages")))
+
+
+@dataclass
+class RateLimits:
+    """Per-minute limits of one model (None = unlimited)"""
+    rpm: Optional[float] = None
+    input_tpm: Optional[float] = None
+    output_tpm: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "RateLimits":
+        def limit(name: str) -> Optional[float]:
+            value = os.environ.get(name)
+            return float(value) if value else None
+
+        return cls(limit("VIBE_LLM_RPM"), limit("VIBE_LLM_INPUT_TPM"), limit("VIBE_LLM_OUTPUT_TPM"))
+
+
+class TokenBucket:
+    """
+    A per-minute budget, refilled continuously.
+
+    The level may go negative when actual usage exceeds the estimate that
+    was taken; the debt delays later admissions.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (0 = now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """Consume amount (a negative amount gives tokens back)"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def refund(self, amount: float, now: float) -> None:
+        self.take(-amount, now)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+@dataclass
+class Ticket:
+    """An admitted call; hand it back to release()"""
+    model: str
+    input_tokens: int
+    output_tokens: int
+    waited_ms: float
+
+
+class _ModelState:
+    """Buckets, adaptive concurrency and metrics of one model"""
+
+    def __init__(self, limits: RateLimits, max_in_flight: int, now: float):
+        self.limits = limits
+        self.buckets = {
+            name: TokenBucket(per_minute, now)
+            for name, per_minute in (
+                ("requests", limits.rpm),
+                ("input_tokens", limits.input_tpm),
+                ("output_tokens", limits.output_tpm),
+            )
+            if per_minute
+        }
+        self.concurrency = float(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.blocked_until = 0.0
+        self.last_decrease = float("-inf")
+        self.output_average: Optional[float] = None
+        self.admitted = 0
+        self.throttled = 0
+        self.wait = StageHistogram()
+
+    def output_estimate(self, max_tokens: int) -> int:
+        if self.output_average is None:
+            return max_tokens
+        return min(max_tokens, int(self.output_average * 1.25) + 1)
+
+
+class RateLimitScheduler:
+    """
+    Admission control for LLM calls, shared by all clients of a process.
+
+    Thread-safe. acquire() blocks a thread, acquire_async() suspends a
+    task; every admitted Ticket must be released exactly once.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimits]] = None,
+        default: Optional[RateLimits] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        min_in_flight: int = 1,
+        clock=time.monotonic
+    ):
+        """
+        Args:
+            limits: RateLimits per model name
+            default: Limits of models not in limits (default: unlimited)
+            max_in_flight: Upper bound (and start value) of each model's concurrency
+            min_in_flight: Lower bound of the concurrency after throttling
+            clock: Monotonic time source (seconds)
+        """
+        self.limits = dict(limits or {})
+        self.default = default or RateLimits()
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.clock = clock
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+        self._models: Dict[str, _ModelState] = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, model: str, input_tokens: int = 0, max_tokens: int = 0) -> Ticket:
+        """
+        Block until a call to model may be sent.
+
+        Args:
+            model: Model name
+            input_tokens: Estimated input tokens (see estimate_request_tokens)
+            max_tokens: The request's max_tokens (upper bound of the output estimate)
+        """
+        start = self.clock()
+        with self._cond:
+            state = self._state(model)
+            self._enqueue(state)
+            try:
+                while True:
+                    ticket = self._admit(model, state, input_tokens, max_tokens, start)
+                    if isinstance(ticket, Ticket):
+                        return ticket
+                    self._cond.wait(ticket)
+            finally:
+                state.waiting -= 1
+
+    async def acquire_async(self, model: str, input_tokens: int = 0, max_tokens: int = 0) -> Ticket:
+        """acquire() for asyncio code (never blocks the event loop)"""
+        start = self.clock()
+        with self._cond:
+            state = self._state(model)
+            self._enqueue(state)
+        try:
+            while True:
+                with self._cond:
+                    ticket = self._admit(model, state, input_tokens, max_tokens, start)
+                if isinstance(ticket, Ticket):
+                    return ticket
+                await asyncio.sleep(ticket if ticket is not None else ASYNC_POLL_INTERVAL)
+        finally:
+            with self._cond:
+                state.waiting -= 1
+
+    def release(
+        self,
+        ticket: Ticket,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Hand back an admitted call.
+
+        Args:
+            ticket: From acquire()/acquire_async()
+            input_tokens: Actual input tokens (corrects the estimate)
+            output_tokens: Actual output tokens (corrects the estimate)
+            error: The call's exception, if it failed (429/529 throttle the model)
+        """
+        with self._cond:
+            state = self._models[ticket.model]
+            state.in_flight -= 1
+            now = self.clock()
+            inputs = state.buckets.get("input_tokens")
+            outputs = state.buckets.get("output_tokens")
+
+            if error is None:
+                state.concurrency = min(float(self.max_in_flight), state.concurrency + 1.0 / state.concurrency)
+                if inputs is not None and input_tokens is not None:
+                    inputs.take(input_tokens - ticket.input_tokens, now)
+                if output_tokens is not None:
+                    if outputs is not None:
+                        outputs.take(output_tokens - ticket.output_tokens, now)
+                    state.output_average = output_tokens if state.output_average is None else (
+                        OUTPUT_EWMA_WEIGHT * output_tokens + (1 - OUTPUT_EWMA_WEIGHT) * state.output_average
+                    )
+            else:
+                # Failed calls produce no output; rejected ones consume no input
+                if outputs is not None:
+                    outputs.refund(ticket.output_tokens, now)
+                if inputs is not None and is_throttled(error):
+                    inputs.refund(ticket.input_tokens, now)
+                if is_throttled(error):
+                    self._throttle(ticket.model, state, error, now)
+
+            self._cond.notify_all()
+
+    def blocked_for(self, model: str) -> float:
+        """Seconds until the model's Retry-After pause ends (0 if it is not paused)"""
+        with self._cond:
+            state = self._models.get(model)
+            return max(0.0, state.blocked_until - self.clock()) if state is not None else 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model queue, concurrency and wait-time statistics (sorted by model)"""
+        with self._cond:
+            now = self.clock()
+            return {
+                model: {
+                    "queue_depth": state.waiting,
+                    "peak_queue_depth": state.peak_waiting,
+                    "in_flight": state.in_flight,
+                    "concurrency_limit": round(state.concurrency, 2),
+                    "admitted": state.admitted,
+                    "throttled": state.throttled,
+                    "blocked_for_s": round(max(0.0, state.blocked_until - now), 3),
+                    "limits": {
+                        "rpm": state.limits.rpm,
+                        "input_tpm": state.limits.input_tpm,
+                        "output_tpm": state.limits.output_tpm,
+                    },
+                    "wait": state.wait.to_dict(),
+                }
+                for model, state in sorted(self._models.items())
+            }
+
+    def export(self, path: Union[str, Path]) -> Path:
+        """Write a JSON snapshot (dashboards, post-run analysis)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "started_at": self.started_at,
+            "exported_at": datetime.utcnow().isoformat() + "Z",
+            "pid": os.getpid(),
+            "models": self.snapshot(),
+        }
+        path.write_text(json.dumps(payload, indent=2))
+        return path
+
+    # -------------------------------------------------------------------------
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            limits = self.limits.get(model, self.default)
+            state = self._models[model] = _ModelState(limits, self.max_in_flight, self.clock())
+        return state
+
+    @staticmethod
+    def _enqueue(state: _ModelState) -> None:
+        state.waiting += 1
+        state.peak_waiting = max(state.peak_waiting, state.waiting)
+
+    def _admit(
+        self,
+        model: str,
+        state: _ModelState,
+        input_tokens: int,
+        max_tokens: int,
+        start: float
+    ) -> Union[Ticket, Optional[float]]:
+        """
+        Admit the call if its slot and tokens are available (lock held).
+
+        Returns:
+            A Ticket, or the seconds to wait before checking again
+            (None: until a call is released)
+        """
+        now = self.clock()
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.in_flight >= max(self.min_in_flight, int(state.concurrency)):
+            return None
+
+        output_tokens = state.output_estimate(max_tokens)
+        amounts = {"requests": 1, "input_tokens": input_tokens, "output_tokens": output_tokens}
+        delay = max((bucket.delay(amounts[name], now) for name, bucket in state.buckets.items()), default=0.0)
+        if delay > 0:
+            return delay
+
+        for name, bucket in state.buckets.items():
+            bucket.take(amounts[name], now)
+        state.in_flight += 1
+        state.admitted += 1
+        waited_ms = (now - start) * 1000
+        state.wait.add(waited_ms)
+        return Ticket(model, input_tokens, output_tokens, waited_ms)
+
+    def _throttle(self, model: str, state: _ModelState, error: BaseException, now: float) -> None:
+        state.throttled += 1
+        if now - state.last_decrease >= DECREASE_COOLDOWN:
+            state.concurrency = max(float(self.min_in_flight), state.concurrency / 2)
+            state.last_decrease = now
+        wait = retry_after(error)
+        if wait:
+            state.blocked_until = max(state.blocked_until, now + wait * (1 + random.uniform(0, RETRY_AFTER_JITTER)))
+        logger.warning(
+            f"LLM calls to {model} throttled ({type(error).__name__}): "
+            f"concurrency limit {state.concurrency:.1f}"
+            f"{f', paused {wait:.1f}s (Retry-After)' if wait else ''}"
+        )
+
+
+# =============================================================================
+# PROCESS-WIDE INSTANCE
+# =============================================================================
+
+_rate_scheduler: Optional[RateLimitScheduler] = None
+_rate_scheduler_lock = threading.Lock()
+
+
+def get_rate_scheduler() -> Optional[RateLimitScheduler]:
+    """Get the process-wide scheduler (None if disabled via VIBE_LLM_RATE_LIMIT=0)"""
+    global _rate_scheduler
+    if os.environ.get("VIBE_LLM_RATE_LIMIT", "1") in ("0", "false", "no"):
+        return None
+    if _rate_scheduler is None:
+        with _rate_scheduler_lock:
+            if _rate_scheduler is None:
+                max_in_flight = os.environ.get("VIBE_LLM_MAX_IN_FLIGHT")
+                _rate_scheduler = RateLimitScheduler(
+                    default=RateLimits.from_env(),
+                    max_in_flight=max(1, int(max_in_flight)) if max_in_flight else DEFAULT_MAX_IN_FLIGHT
+                )
+    return _rate_scheduler
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Response Cache - Content-addressed on-disk cache of LLM responses
+=================================================================
+
+Re-running a phase after a crash, or a regression run against the same
+workspace, sends byte-identical requests again. With the response cache
+enabled, LLMClient/AsyncLLMClient answer those from disk: no API call, no
+latency, and the hit is recorded in CostTracker at $0 (with the cost it
+saved).
+
+    - Key: sha256 of (model, normalized request, max_tokens, temperature).
+      Normalization drops cache_control markers and trailing whitespace and
+      unifies line endings, so a prompt sent as plain text or as PromptBlocks
+      with the same system/user split hits the same entry.
+    - One small JSON file per entry (.cache/vibe/llm/<key>.json). The entry
+      carries its creation time (TTL) and the agent that made the request;
+      the file mtime is its recency (refreshed on hit) for LRU eviction once
+      the cache exceeds its size cap.
+    - A compact append-only index (index.log, one "<key> <bytes>" line per
+      write, shared by all processes) tracks the cache size, so a write only
+      reads the index lines appended since the last one. The directory is
+      scanned only when the index says the cap is exceeded; eviction then
+      trims the cache to 90% of its cap and rewrites the index.
+    - Safe for concurrent processes: entries are written to a temp file and
+      renamed into place; a corrupt or half-evicted entry is a miss.
+    - Per agent: disabled_agents (VIBE_LLM_CACHE_DISABLE) never read or write
+      the cache, e.g. agents whose output must be fresh every run.
+
+The cache is opt-in (VIBE_LLM_CACHE=1): sampled responses (temperature > 0)
+are replayed verbatim, which is what development and regression runs want,
+but not necessarily production runs. Knowledge-only (NoOp) responses are
+never cached.
+
+Usage:
+    VIBE_LLM_CACHE=1 python core_orchestrator.py <repo> my-project --mode=autonomous
+    # (a second run answers every identical request from the cache)
+
+    client = LLMClient(response_cache=ResponseCache(ttl_seconds=3600))
+    response = client.invoke(prompt, agent="VIBE_ALIGNER")
+
+Environment:
+    VIBE_LLM_CACHE=1                  Enable the shared response cache
+    VIBE_LLM_CACHE_DIR=<path>         Cache directory (default: .cache/vibe/llm)
+    VIBE_LLM_CACHE_MB=<n>             Cache size cap (default: 256)
+    VIBE_LLM_CACHE_TTL=<seconds>      Entry lifetime (default: 7 days; 0 = no expiry)
+    VIBE_LLM_CACHE_DISABLE=<a,b>      Agents that bypass the cache
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_CACHE_DIR = _REPO_ROOT / ".cache" / "vibe" / "llm"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Bump when the key derivation or entry format changes
+CACHE_FORMAT_VERSION = 1
+
+INDEX_FILE = "index.log"
+
+# Eviction trims the cache to this fraction of its cap, so a full cache is
+# not rescanned on every write
+EVICT_LOW_WATER = 0.9
+
+PathLike = Union[str, Path]
+
+
+def _normalize(value: Any) -> Any:
+    """Request payload without cache markers, with canonical whitespace"""
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").rstrip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def response_cache_key(
+    model: str,
+    system: Any,
+    messages: Any,
+    max_tokens: int,
+    temperature: float
+) -> str:
+    """Cache key of a messages.create() request"""
+    payload = json.dumps(
+        {
+            "v": CACHE_FORMAT_VERSION,
+            "model": model,
+            "system": _normalize(system or []),
+            "messages": _normalize(messages),
+            "max_tokens": max_tokens,
+            "temperature": float(temperature),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM responses keyed by request hash, one JSON file per entry.
+
+    get()/put() exchange plain dicts (see LLMClient for the fields); the
+    cache itself knows nothing about the provider.
+    """
+
+    def __init__(
+        self,
+        root: PathLike = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        disabled_agents: Iterable[str] = ()
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds or None
+        self.disabled_agents = frozenset(disabled_agents)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        # Index state: bytes per key, and how far (in which file) it has been read
+        self._index_sizes: Dict[str, int] = {}
+        self._index_bytes = 0
+        self._index_offset = 0
+        self._index_inode: Optional[int] = None
+
+    def enabled_for(self, agent: Optional[str]) -> bool:
+        """Whether requests made on behalf of agent use the cache"""
+        return agent not in self.disabled_agents
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached response, or None (missing, expired or unreadable)"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            response = entry["response"]
+        except FileNotFoundError:
+            self._count(misses=1)
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable LLM cache entry {path.name}: {e}")
+            self._discard(path)
+            self._count(misses=1)
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._discard(path)
+            self._count(misses=1, expired=1)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Recency is best-effort (read-only cache directory)
+        self._count(hits=1)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any], agent: Optional[str] = None) -> None:
+        """Store a response (atomically; write failures are logged, not raised)"""
+        entry = {"version": CACHE_FORMAT_VERSION, "created": time.time(), "agent": agent, "response": response}
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                self._discard(Path(tmp))
+                raise
+            self._count(writes=1)
+            estimated = self._record(key, len(payload))
+            if estimated is None or estimated > self.max_bytes:
+                self.evict()
+        except OSError as e:
+            logger.warning(f"Could not write LLM cache entry to {self.root}: {e}")
+
+    def evict(self) -> int:
+        """
+        Scan the cache and, if it exceeds its cap, remove least recently used
+        entries down to EVICT_LOW_WATER of the cap. Rewrites the index from
+        the scan. Returns the number of entries removed.
+        """
+        if not self.root.is_dir():
+            return 0
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        kept = {path.stem: size for _, size, path in entries}
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes * EVICT_LOW_WATER:
+                    break
+                self._discard(path)
+                del kept[path.stem]
+                total -= size
+                removed += 1
+        self._write_index(kept)
+        return removed
+
+    def clear(self) -> None:
+        for path in self.root.glob("*.json"):
+            self._discard(path)
+        self._discard(self.root / INDEX_FILE)
+
+    def _record(self, key: str, size: int) -> Optional[int]:
+        """
+        Append a write to the index; returns the estimated cache size, or
+        None if there is no index yet (the caller rebuilds it by evicting).
+
+        The estimate counts the latest size of every key written since the
+        index was last rebuilt, by any process. Entries dropped by get()
+        (expired, unreadable) are still counted, so it errs high; eviction
+        corrects it.
+        """
+        index = self.root / INDEX_FILE
+        with self._lock:
+            if not index.exists():
+                return None
+            with open(index, "ab") as f:
+                f.write(f"{key} {size}\n".encode("ascii"))
+            with open(index, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._index_inode or stat.st_size < self._index_offset:
+                    # Rebuilt by another process (or this one): read it from the start
+                    self._index_sizes, self._index_bytes, self._index_offset = {}, 0, 0
+                    self._index_inode = stat.st_ino
+                f.seek(self._index_offset)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1  # A line being appended is read next time
+            for line in data[:complete].splitlines():
+                try:
+                    entry_key, entry_size = line.decode("ascii").split()
+                    entry_size = int(entry_size)
+                except ValueError:
+                    continue
+                self._index_bytes += entry_size - self._index_sizes.get(entry_key, 0)
+                self._index_sizes[entry_key] = entry_size
+            self._index_offset += complete
+            return self._index_bytes
+
+    def _write_index(self, sizes: Dict[str, int]) -> None:
+        """Replace the index with one line per entry (atomically)"""
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write("".join(f"{key} {size}\n" for key, size in sizes.items()).encode("ascii"))
+            os.replace(tmp, self.root / INDEX_FILE)
+        except BaseException:
+            self._discard(Path(tmp))
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = [p.stat().st_size for p in self.root.glob("*.json")] if self.root.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            "root": str(self.root),
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "disabled_agents": sorted(self.disabled_agents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+    def _count(self, hits: int = 0, misses: int = 0, expired: int = 0, writes: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.expired += expired
+            self.writes += writes
+
+    @staticmethod
+    def _discard(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Could not remove {path}: {e}")
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache (None unless enabled via VIBE_LLM_CACHE=1)"""
+    global _response_cache
+    if os.environ.get("VIBE_LLM_CACHE", "0") not in ("1", "true", "yes"):
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                max_mb = os.environ.get("VIBE_LLM_CACHE_MB")
+                ttl = os.environ.get("VIBE_LLM_CACHE_TTL")
+                disabled = os.environ.get("VIBE_LLM_CACHE_DISABLE", "")
+                _response_cache = ResponseCache(
+                    root=os.environ.get("VIBE_LLM_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                    max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+                    ttl_seconds=float(ttl) if ttl else DEFAULT_TTL_SECONDS,
+                    disabled_agents=[agent.strip() for agent in disabled.split(",") if agent.strip()]
+                )
+    return _response_cache
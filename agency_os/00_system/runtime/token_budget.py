@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Token Budget - Per-layer token estimates and composition reports
+================================================================
+
+docs/requirements/NFR_PERFORMANCE.yaml sets llm_processing targets
+(target_input_tokens: 10000, warning_threshold: 50000). PromptRuntime used to
+count characters after the fact; this module gives the composer a token
+estimate per composition layer and records which reduction strategies were
+applied to fit a budget.
+
+Layers:
+    governance, context, tools, sops   (added by PromptRegistry)
+    core, knowledge, task, gates, runtime_context   (added by PromptRuntime)
+
+Reduction strategies (applied in priority order until the prompt fits):
+    1. truncate_runtime_context  - cap the length of each runtime context value
+    2. slice_knowledge           - relevance-slice every knowledge file
+                                   (required/critical files the context matches
+                                   nothing in stay whole; optional ones are left out)
+    3. drop_optional_knowledge   - omit optional_knowledge entries
+
+Required knowledge is never reduced to nothing: a prompt still over budget
+after all strategies keeps it and is marked exhausted in its
+CompositionReport.
+
+Budget resolution (first match wins):
+    explicit token_budget argument
+    -> task_*.meta.yaml `token_budget`
+    -> _composition.yaml `token_budget`
+    -> max(NFR warning_threshold, task_*.meta.yaml `estimated_tokens`)
+
+The NFR target_input_tokens (10k) is opt-in (token_budget: 10000); by
+default only prompts past the warning threshold are reduced.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# docs/requirements/NFR_PERFORMANCE.yaml -> llm_processing
+TARGET_INPUT_TOKENS = 10000
+WARNING_THRESHOLD_TOKENS = 50000
+MAX_INPUT_TOKENS = 100000
+
+# Heuristic for English prose / YAML with Claude's tokenizer (no network call)
+CHARS_PER_TOKEN = 4
+
+REDUCTION_STRATEGIES = (
+    "truncate_runtime_context",
+    "slice_knowledge",
+    "drop_optional_knowledge",
+)
+
+# Per-value caps (chars) tried by truncate_runtime_context, loosest first
+CONTEXT_VALUE_CAPS = (2000, 500, 120)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def resolve_token_budget(
+    explicit: Optional[int] = None,
+    task_budget: Optional[int] = None,
+    agent_budget: Optional[int] = None,
+    estimated_tokens: int = 0
+) -> int:
+    """Resolve the input-token budget for one composition (see module docstring)"""
+    for budget in (explicit, task_budget, agent_budget):
+        if budget:
+            return int(budget)
+    return max(WARNING_THRESHOLD_TOKENS, int(estimated_tokens or 0))
+
+
+@dataclass
+class Reduction:
+    """One applied reduction strategy"""
+    strategy: str
+    tokens_saved: int
+    detail: str = ""
+
+
+@dataclass
+class CompositionReport:
+    """Token accounting for one composed prompt"""
+    agent_id: str
+    task_id: Optional[str]
+    budget_tokens: int
+    runtime_layers: Dict[str, int] = field(default_factory=dict)
+    registry_layers: Dict[str, int] = field(default_factory=dict)  # Added by PromptRegistry
+    initial_tokens: int = 0
+    reductions: List[Reduction] = field(default_factory=list)
+    exhausted: bool = False  # All reduction strategies ran and the prompt is still over budget
+
+    @property
+    def layers(self) -> Dict[str, int]:
+        """Per-layer token estimates (registry layers first, in prompt order)"""
+        merged = dict(self.registry_layers)
+        for name, tokens in self.runtime_layers.items():
+            merged[name] = merged.get(name, 0) + tokens
+        return merged
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.registry_layers.values()) + sum(self.runtime_layers.values())
+
+    @property
+    def within_budget(self) -> bool:
+        return self.total_tokens <= self.budget_tokens
+
+    @property
+    def over_warning_threshold(self) -> bool:
+        return self.total_tokens > WARNING_THRESHOLD_TOKENS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "task_id": self.task_id,
+            "budget_tokens": self.budget_tokens,
+            "total_tokens": self.total_tokens,
+            "initial_tokens": self.initial_tokens,
+            "within_budget": self.within_budget,
+            "exhausted": self.exhausted,
+            "layers": self.layers,
+            "reductions": [
+                {"strategy": r.strategy, "tokens_saved": r.tokens_saved, "detail": r.detail}
+                for r in self.reductions
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompositionReport":
+        """Rebuild a report from to_dict() output (layers come back as runtime layers)"""
+        return cls(
+            agent_id=data["agent_id"],
+            task_id=data.get("task_id"),
+            budget_tokens=data["budget_tokens"],
+            runtime_layers=dict(data.get("layers") or {}),
+            initial_tokens=data.get("initial_tokens", 0),
+            reductions=[Reduction(**r) for r in data.get("reductions") or []],
+            exhausted=data.get("exhausted", False),
+        )
+
+    def summary(self) -> str:
+        """One-line human-readable summary"""
+        status = "within budget" if self.within_budget else "OVER BUDGET"
+        if self.exhausted:
+            status += " after all reductions"
+        text = f"~{self.total_tokens:,} tokens / budget {self.budget_tokens:,} ({status})"
+        if self.reductions:
+            text += "; reductions: " + ", ".join(
+                f"{r.strategy} (-{r.tokens_saved:,})" for r in self.reductions
+            )
+        return text
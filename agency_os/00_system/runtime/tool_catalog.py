@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tool Catalog - Precompiled tool definitions (GAD-003)
+=====================================================
+
+tool_definitions.yaml is parsed once per process into a ToolCatalog that
+holds each tool's pre-rendered markdown block and the shared usage footer.
+The catalog lives in the composition cache, so it is rebuilt only when the
+YAML file changes on disk.
+
+Both composition paths render tools through it:
+    - PromptRuntime: the `tools` step of an agent's _composition.yaml
+    - PromptRegistry: inject_tools=[...]
+
+A prompt carries a single tools section: when the agent declares a tools
+step, PromptRegistry merges inject_tools into that section instead of
+adding a second one.
+
+Usage:
+    catalog = get_tool_catalog()
+    section = catalog.section(["google_search", "web_fetch"])
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Union
+
+try:
+    from .composition_cache import CompositionCache, get_composition_cache
+except ImportError:
+    from composition_cache import CompositionCache, get_composition_cache
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_TOOL_DEFINITIONS = _REPO_ROOT / "agency_os" / "00_system" / "orchestrator" / "tools" / "tool_definitions.yaml"
+
+SECTION_HEADER = "# === AVAILABLE TOOLS ==="
+
+USAGE_FOOTER = "\n".join([
+    "\n### How to use tools:\n",
+    "To call a tool, use the following XML format in your response:\n",
+    "```xml",
+    '<tool_use name="tool_name">',
+    '  <parameters>',
+    '    <param_name>value</param_name>',
+    '  </parameters>',
+    '</tool_use>',
+    "```\n",
+    "You will receive the tool result, then you can continue your analysis.\n",
+])
+
+
+def render_tool(tool_name: str, tool_def: Dict) -> str:
+    """Render one tool definition as markdown"""
+    lines = [f"## Tool: `{tool_name}`\n"]
+    lines.append(f"**Description:** {tool_def.get('description', 'No description')}\n")
+
+    params = tool_def.get('parameters', {})
+    if params:
+        lines.append("\n**Parameters:**")
+        for param_name, param_spec in params.items():
+            required = " (required)" if param_spec.get('required', False) else " (optional)"
+            param_type = param_spec.get('type', 'any')
+            param_desc = param_spec.get('description', '')
+            default = f", default: `{param_spec['default']}`" if 'default' in param_spec else ""
+            lines.append(f"- `{param_name}` ({param_type}){required}: {param_desc}{default}")
+
+    returns = tool_def.get('returns', {})
+    if returns:
+        lines.append(f"\n**Returns:** {returns.get('description', 'No description')}")
+
+    lines.append("\n---\n")
+    return "\n".join(lines)
+
+
+@dataclass
+class ToolCatalog:
+    """Pre-rendered tool blocks of one tool_definitions.yaml (definition order)"""
+    path: Path
+    blocks: Dict[str, str]
+    _sections: Dict[FrozenSet[str], str] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.blocks)
+
+    def missing(self, tool_names: Iterable[str]) -> List[str]:
+        """Requested tools without a definition"""
+        return [name for name in tool_names if name not in self.blocks]
+
+    def section(self, tool_names: Iterable[str]) -> str:
+        """
+        Render the tools section for a set of tools (memoized per set).
+
+        Tools appear in definition order, each once; unknown names are
+        skipped. Returns a placeholder section if none is defined.
+        """
+        key = frozenset(name for name in tool_names if name in self.blocks)
+        with self._lock:
+            text = self._sections.get(key)
+        if text is None:
+            blocks = [block for name, block in self.blocks.items() if name in key]
+            if blocks:
+                text = "\n".join(
+                    [f"{SECTION_HEADER}\n", "You have access to the following tools:\n"] + blocks + [USAGE_FOOTER]
+                )
+            else:
+                text = f"{SECTION_HEADER}\n\n*(No tools available for this agent)*"
+            with self._lock:
+                self._sections[key] = text
+        return text
+
+
+def load_tool_catalog(path: Union[str, Path], cache: CompositionCache) -> ToolCatalog:
+    """
+    Parse tool_definitions.yaml and render every tool (uncached).
+
+    Raises:
+        FileNotFoundError: If the file is missing
+        YAMLParseError: If the YAML is invalid
+    """
+    path = Path(path)
+    data = cache.read_yaml(path) or {}
+    tools = data.get("tools") or {}
+    return ToolCatalog(path, {name: render_tool(name, tool_def or {}) for name, tool_def in tools.items()})
+
+
+def get_tool_catalog(
+    path: Optional[Union[str, Path]] = None,
+    cache: Optional[CompositionCache] = None
+) -> ToolCatalog:
+    """
+    Get the catalog of a tool definitions file (loaded once, mtime-invalidated).
+
+    Raises:
+        FileNotFoundError: If the file is missing
+        YAMLParseError: If the YAML is invalid
+    """
+    path = Path(path).resolve() if path is not None else DEFAULT_TOOL_DEFINITIONS
+    cache = cache if cache is not None else get_composition_cache()
+    return cache.get_or_load(("tool_catalog", str(path)), lambda: load_tool_catalog(path, cache), [path])
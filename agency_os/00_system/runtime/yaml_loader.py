@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+YAML Loader - Shared YAML parsing with an on-disk parse cache
+=============================================================
+
+Every tool that reads the knowledge base (PromptRuntime, the orchestrators,
+scripts/semantic_audit.py, validate_knowledge_index.py) parses YAML through
+this module:
+
+    - libyaml's CSafeLoader is used when PyYAML was built with it (~10x
+      faster than the pure-Python SafeLoader on FDG_dependencies.yaml),
+      falling back to SafeLoader otherwise. Both produce identical results.
+    - Parsed documents of files of at least DISK_CACHE_MIN_BYTES are stored
+      in a content-hash keyed on-disk cache (.cache/vibe/yaml/), so a fresh
+      process loads FDG_dependencies.yaml in ~1 ms instead of re-parsing it.
+      The key is the sha256 of the file content, so edits, checkouts and
+      renames need no invalidation. The cache is size-bounded: the least
+      recently used entries are evicted once it exceeds its cap.
+
+In-process memoization is the composition cache's job (composition_cache.py
+read_yaml() parses through here on a miss).
+
+Cache entries are JSON (dates, bytes, sets and non-string keys use a tagged
+encoding), so loading an entry never runs code. Still, do not point
+VIBE_YAML_CACHE_DIR at a location others can write to.
+
+Usage:
+    data = load_yaml("agency_os/01_planning_framework/knowledge/APCE_rules.yaml")
+    documents = load_yaml(path, multi=True)       # multi-document files
+    data = parse_yaml(raw_bytes, path)            # content already read
+
+Environment:
+    VIBE_YAML_CACHE=0             Disable the on-disk cache
+    VIBE_YAML_CACHE_DIR=<path>    Cache directory (default: .cache/vibe/yaml)
+    VIBE_YAML_CACHE_MB=<n>        Cache size cap (default: 32)
+"""
+
+import base64
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEFAULT_CACHE_DIR = _REPO_ROOT / ".cache" / "vibe" / "yaml"
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Smaller files parse faster than the cache lookup pays off
+DISK_CACHE_MIN_BYTES = 8 * 1024
+
+# Bump when the entry format changes
+CACHE_FORMAT_VERSION = 1
+
+# Sentinel for "not in cache" (None is a legitimate parsed document)
+MISSING = object()
+
+PathLike = Union[str, Path]
+
+
+class YAMLParseError(ValueError):
+    """
+    Raised for invalid YAML (by load_yaml(), parse_yaml() and the composition
+    cache's read_yaml()).
+
+    Wraps yaml.YAMLError so callers can handle parse errors without importing
+    PyYAML eagerly (the import alone costs ~30 ms of CLI startup).
+    """
+
+    def __init__(self, path: str, error: Exception):
+        super().__init__(str(error))
+        self.path = path
+        if hasattr(error, "problem_mark"):
+            self.problem_mark = error.problem_mark
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+_loader = None
+
+
+def safe_loader():
+    """The fastest available safe YAML loader class (imports PyYAML on first use)"""
+    global _loader
+    if _loader is None:
+        import yaml
+        _loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return _loader
+
+
+def _parse(raw: Union[str, bytes], path: str, multi: bool) -> Any:
+    import yaml
+
+    # A named stream makes parse errors point at the file instead of "<unicode string>"
+    stream = io.StringIO(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+    stream.name = path
+    try:
+        if multi:
+            return list(yaml.load_all(stream, Loader=safe_loader()))
+        return yaml.load(stream, Loader=safe_loader())
+    except yaml.YAMLError as e:
+        raise YAMLParseError(path, e) from e
+
+
+def parse_yaml(
+    raw: Union[str, bytes],
+    path: str = "<string>",
+    multi: bool = False,
+    disk_cache: Any = MISSING
+) -> Any:
+    """
+    Parse YAML content (through the on-disk cache for large content).
+
+    Args:
+        raw: File content
+        path: Source path (for error messages)
+        multi: Parse all documents and return them as a list
+        disk_cache: YAMLDiskCache to use (default: the shared one; None disables it)
+
+    Raises:
+        YAMLParseError: If the content is not valid YAML
+    """
+    if disk_cache is MISSING:
+        disk_cache = get_yaml_disk_cache()
+    if disk_cache is None or len(raw) < DISK_CACHE_MIN_BYTES:
+        return _parse(raw, path, multi)
+
+    key = disk_cache.key(raw.encode("utf-8") if isinstance(raw, str) else raw, multi)
+    data = disk_cache.get(key)
+    if data is MISSING:
+        data = _parse(raw, path, multi)
+        disk_cache.put(key, data)
+    return data
+
+
+def load_yaml(path: PathLike, multi: bool = False) -> Any:
+    """
+    Read and parse a YAML file.
+
+    Args:
+        path: YAML file
+        multi: Parse all documents and return them as a list
+
+    Raises:
+        OSError: If the file cannot be read (FileNotFoundError if missing)
+        YAMLParseError: If the file is not valid YAML
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    return parse_yaml(raw, str(path), multi)
+
+
+# =============================================================================
+# ON-DISK CACHE
+# =============================================================================
+
+# Key of a tagged value: {"__yaml__": [tag, payload]} for the safe loader's
+# types that JSON has no type for
+_TAG = "__yaml__"
+
+
+def _encode(value: Any) -> Any:
+    """A safe-loaded YAML document as JSON-serializable data (TypeError if not possible)"""
+    if isinstance(value, dict):
+        if _TAG not in value and all(isinstance(key, str) for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {_TAG: ["map", [[_encode(key), _encode(item)] for key, item in value.items()]]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return {_TAG: ["datetime", value.isoformat()]}
+    if isinstance(value, datetime.date):
+        return {_TAG: ["date", value.isoformat()]}
+    if isinstance(value, bytes):
+        return {_TAG: ["bytes", base64.b64encode(value).decode("ascii")]}
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: ["set", [_encode(item) for item in value]]}
+    raise TypeError(f"{type(value).__name__} has no JSON encoding")
+
+
+def _decode_tagged(obj: dict) -> Any:
+    """json object_hook reversing _encode()"""
+    if _TAG not in obj:
+        return obj
+    tag, payload = obj[_TAG]
+    if tag == "map":
+        return {key: item for key, item in payload}
+    if tag == "datetime":
+        return datetime.datetime.fromisoformat(payload)
+    if tag == "date":
+        return datetime.date.fromisoformat(payload)
+    if tag == "bytes":
+        return base64.b64decode(payload)
+    if tag == "set":
+        return set(payload)
+    raise ValueError(f"Unknown tag {tag!r}")
+
+
+class YAMLDiskCache:
+    """
+    Parsed YAML documents keyed by content hash, one JSON file per entry.
+
+    Safe for concurrent processes: entries are written to a temp file and
+    renamed into place; a half-evicted or corrupt entry is a miss. Recency
+    is the file mtime (refreshed on hit), which eviction uses for LRU order.
+    """
+
+    def __init__(self, root: PathLike = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(raw: bytes, multi: bool = False) -> str:
+        import yaml
+
+        salt = f"v{CACHE_FORMAT_VERSION}:pyyaml-{yaml.__version__}:{'all' if multi else 'one'}:"
+        return hashlib.sha256(salt.encode("ascii") + raw).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = json.loads(f.read(), object_hook=_decode_tagged)
+        except FileNotFoundError:
+            self._count(misses=1)
+            return MISSING
+        except Exception as e:
+            logger.warning(f"Dropping unreadable YAML cache entry {path.name}: {e}")
+            self._discard(path)
+            self._count(misses=1)
+            return MISSING
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Recency is best-effort (read-only cache directory)
+        self._count(hits=1)
+        return data
+
+    def put(self, key: str, data: Any) -> None:
+        try:
+            payload = json.dumps(_encode(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.debug(f"YAML document not cacheable: {e}")
+            return
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                self._discard(Path(tmp))
+                raise
+            self.evict()
+        except OSError as e:
+            # A read-only checkout must not break loading
+            logger.warning(f"Could not write YAML cache entry to {self.root}: {e}")
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its cap; returns entries removed"""
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path in self.root.glob("*.json"):
+            self._discard(path)
+
+    def stats(self) -> dict:
+        sizes = [p.stat().st_size for p in self.root.glob("*.json")] if self.root.exists() else []
+        return {
+            "root": str(self.root),
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    @staticmethod
+    def _discard(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Could not remove {path}: {e}")
+
+
+_disk_cache: Optional[YAMLDiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_yaml_disk_cache() -> Optional[YAMLDiskCache]:
+    """Get the shared on-disk YAML cache (None if disabled via VIBE_YAML_CACHE=0)"""
+    global _disk_cache
+    if os.environ.get("VIBE_YAML_CACHE", "1") in ("0", "false", "no"):
+        return None
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                root = os.environ.get("VIBE_YAML_CACHE_DIR") or DEFAULT_CACHE_DIR
+                max_mb = os.environ.get("VIBE_YAML_CACHE_MB")
+                max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+                _disk_cache = YAMLDiskCache(root, max_bytes)
+    return _disk_cache
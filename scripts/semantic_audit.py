@@ -30,7 +30,6 @@ Exit Codes:
 """
 
 import sys
-import yaml
 import json
 import argparse
 from pathlib import Path
@@ -38,6 +37,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Set, Tuple, Optional
 from collections import defaultdict
 
+# Shared YAML loading (CSafeLoader + on-disk parse cache)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "agency_os" / "00_system" / "runtime"))
+from yaml_loader import YAMLParseError, load_yaml
+
 
 class SemanticAudit:
     """Core semantic audit engine."""
@@ -55,8 +58,7 @@ class SemanticAudit:
     def load_ontology(self) -> bool:
         """Load and parse the AOS_Ontology.yaml file."""
         try:
-            with open(self.ontology_path, 'r') as f:
-                data = yaml.safe_load(f)
+            data = load_yaml(self.ontology_path)
             self.ontology = data
             self.all_terms = data.get('terms', {})
             if self.verbose:
@@ -65,55 +67,54 @@ class SemanticAudit:
         except FileNotFoundError:
             self.errors.append(f"FATAL: Ontology file not found: {self.ontology_path}")
             return False
-        except yaml.YAMLError as e:
+        except YAMLParseError as e:
             self.errors.append(f"FATAL: Failed to parse ontology YAML: {e}")
             return False
 
     def load_kb_file(self, kb_path: str) -> Optional[Dict]:
         """Load a KB YAML file (supports multi-document YAML with --- separators)."""
         try:
-            with open(kb_path, 'r') as f:
-                # Use safe_load_all to handle multi-document YAML files
-                documents = list(yaml.safe_load_all(f))
-
-                # Filter out None documents (from empty sections)
-                documents = [doc for doc in documents if doc is not None]
-
-                if not documents:
-                    self.warnings.append(f"KB file '{kb_path}' is empty or contains no valid documents")
-                    return {}
-
-                # If single document, return as-is
-                if len(documents) == 1:
-                    return documents[0]
-
-                # If multiple documents, merge them intelligently
-                merged = {}
-                for i, doc in enumerate(documents):
-                    if not isinstance(doc, dict):
-                        self.warnings.append(
-                            f"KB file '{kb_path}' document {i+1} is not a dictionary (type: {type(doc).__name__}). Skipping."
-                        )
-                        continue
-
-                    # Merge documents (later documents override earlier ones for conflicting keys)
-                    for key, value in doc.items():
-                        if key in merged and isinstance(merged[key], list) and isinstance(value, list):
-                            # If both are lists, concatenate them
-                            merged[key].extend(value)
-                        elif key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-                            # If both are dicts, merge recursively
-                            merged[key].update(value)
-                        else:
-                            # Otherwise, later value overwrites
-                            merged[key] = value
-
-                return merged
+            # Multi-document YAML files are parsed with all their documents
+            documents = load_yaml(kb_path, multi=True)
+
+            # Filter out None documents (from empty sections)
+            documents = [doc for doc in documents if doc is not None]
+
+            if not documents:
+                self.warnings.append(f"KB file '{kb_path}' is empty or contains no valid documents")
+                return {}
+
+            # If single document, return as-is
+            if len(documents) == 1:
+                return documents[0]
+
+            # If multiple documents, merge them intelligently
+            merged = {}
+            for i, doc in enumerate(documents):
+                if not isinstance(doc, dict):
+                    self.warnings.append(
+                        f"KB file '{kb_path}' document {i+1} is not a dictionary (type: {type(doc).__name__}). Skipping."
+                    )
+                    continue
+
+                # Merge documents (later documents override earlier ones for conflicting keys)
+                for key, value in doc.items():
+                    if key in merged and isinstance(merged[key], list) and isinstance(value, list):
+                        # If both are lists, concatenate them
+                        merged[key].extend(value)
+                    elif key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
+                        # If both are dicts, merge recursively
+                        merged[key].update(value)
+                    else:
+                        # Otherwise, later value overwrites
+                        merged[key] = value
+
+            return merged
 
         except FileNotFoundError:
             self.errors.append(f"KB file not found: {kb_path}")
             return None
-        except yaml.YAMLError as e:
+        except YAMLParseError as e:
             self.errors.append(f"Failed to parse KB YAML '{kb_path}': {e}")
             return None
 
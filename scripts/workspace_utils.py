@@ -8,6 +8,7 @@ and registry operations. Used by both SSF (System Steward Framework) and AOS
 
 Functions:
     - get_active_workspace(): Returns current workspace context from environment
+    - set_active_workspace(): Sets the workspace context for this process
     - resolve_manifest_path(): Resolves workspace name to manifest path
     - load_workspace_manifest(): Loads project manifest for given workspace
     - get_workspace_by_project_id(): Looks up workspace by project UUID
@@ -25,7 +26,6 @@ Date: 2025-11-12
 
 import os
 import json
-import yaml
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List
@@ -58,6 +58,21 @@ def get_active_workspace() -> str:
     return os.getenv('ACTIVE_WORKSPACE', 'ROOT')
 
 
+def set_active_workspace(workspace_name: str) -> None:
+    """
+    Sets $ACTIVE_WORKSPACE for this process (and the processes it starts).
+
+    Args:
+        workspace_name: Workspace identifier (e.g., 'acme_corp')
+
+    Example:
+        >>> set_active_workspace('acme_corp')
+        >>> get_active_workspace()
+        'acme_corp'
+    """
+    os.environ['ACTIVE_WORKSPACE'] = workspace_name
+
+
 def resolve_manifest_path(workspace_name: Optional[str] = None) -> Path:
     """
     Resolves workspace name to project_manifest.json path.
@@ -203,6 +218,8 @@ def load_workspace_registry() -> Dict:
             "Repository may not be properly initialized."
         )
 
+    import yaml  # Deferred: keeps prompt_runtime startup free of the PyYAML import
+
     with open(registry_path, 'r') as f:
         return yaml.safe_load(f)
 
@@ -221,6 +238,8 @@ def save_workspace_registry(registry: Dict):
     # Auto-update metadata
     registry['metadata']['lastUpdated'] = datetime.now().strftime('%Y-%m-%d')
 
+    import yaml
+
     with open(registry_path, 'w') as f:
         yaml.dump(registry, f, sort_keys=False, default_flow_style=False)
 
@@ -0,0 +1,192 @@
+"""
+Shared test fixtures.
+
+fake_anthropic: a configurable stand-in for the Anthropic SDK client
+(anthropic.Anthropic / AsyncAnthropic) that LLM client tests install as
+`LLMClient.client`. Only the messages API is modelled: create() (sync or
+async) and, when streams are scripted, stream().
+
+Usage:
+    def test_invoke(fake_anthropic):
+        client = fake_anthropic(LLMClient(response_cache=None), usage={"input_tokens": 2000})
+        client.invoke("hi")
+        assert len(client.client.messages.calls) == 1
+
+bump_mtime: moves a file's mtime one second ahead, so a rewrite is seen as
+a change even on filesystems with coarse timestamps.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+DEFAULT_USAGE = {"input_tokens": 100, "output_tokens": 10}
+
+
+class FakeStream:
+    """A messages.stream() context: yields deltas, optionally failing after fail_after of them"""
+
+    def __init__(self, deltas, fail_after=None, error=None, usage=None):
+        self.deltas = deltas
+        self.fail_after = fail_after
+        self.error = error
+        self.usage = {"input_tokens": 1000, "output_tokens": len(deltas), **(usage or {})}
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    @property
+    def text_stream(self):
+        for i, delta in enumerate(self.deltas):
+            if i == self.fail_after:
+                raise self.error or ConnectionError("connection reset")
+            yield delta
+
+    def get_final_message(self):
+        return SimpleNamespace(
+            content=[SimpleNamespace(text="".join(self.deltas))],
+            usage=SimpleNamespace(**self.usage),
+            model="claude-3-5-sonnet-20241022", stop_reason="end_turn"
+        )
+
+
+class FakeMessages:
+    """
+    messages API that records every request and answers with a scripted message.
+
+    Args:
+        text: Reply text, or a callable(prompt, n) returning it (prompt:
+            the user message, n: the call number)
+        usage: Usage fields of the reply (merged into DEFAULT_USAGE)
+        failures: user message -> exception (raised on every call) or list
+            of exceptions (raised by the next calls, then answered)
+        on_call: Called with the request kwargs before answering
+    """
+
+    def __init__(self, text="ok", usage=None, failures=None, on_call=None):
+        self.text = text
+        self.usage = {**DEFAULT_USAGE, **(usage or {})}
+        self.failures = dict(failures or {})
+        self.on_call = on_call
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def prompts(self):
+        """The user message of every request"""
+        return [_prompt(request) for request in self.calls]
+
+    def create(self, **kwargs):
+        self._begin(kwargs)
+        try:
+            return self._reply(kwargs)
+        finally:
+            self.active -= 1
+
+    def message(self, request):
+        """The reply message for a request"""
+        prompt = _prompt(request)
+        text = self.text(prompt, len(self.calls)) if callable(self.text) else self.text
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)], usage=SimpleNamespace(**self.usage),
+            model=request["model"], stop_reason="end_turn"
+        )
+
+    def _begin(self, request):
+        self.calls.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        if self.on_call is not None:
+            self.on_call(request)
+
+    def _reply(self, request):
+        error = self.failures.get(_prompt(request))
+        if isinstance(error, list):
+            error = error.pop(0) if error else None
+        if error is not None:
+            raise error
+        return self.message(request)
+
+
+class FakeStreamingMessages(FakeMessages):
+    """
+    FakeMessages with stream(): each call takes the next scripted stream.
+
+    Args:
+        streams: Per call: an exception (raised when opening), a list of
+            deltas, or FakeStream keyword arguments ({deltas, fail_after, error, usage})
+    """
+
+    def __init__(self, streams, **options):
+        super().__init__(**options)
+        self.streams = list(streams)
+        self.opened = []
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        item = self.streams.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        stream = FakeStream(**item) if isinstance(item, dict) else FakeStream(item)
+        self.opened.append(stream)
+        return stream
+
+
+class FakeAsyncMessages(FakeMessages):
+    """FakeMessages with an awaitable create() that takes `delay` seconds"""
+
+    def __init__(self, delay=0.01, **options):
+        super().__init__(**options)
+        self.delay = delay
+
+    async def create(self, **kwargs):
+        self._begin(kwargs)
+        try:
+            await asyncio.sleep(self.delay)
+            return self._reply(kwargs)
+        finally:
+            self.active -= 1
+
+
+def _prompt(request):
+    content = request["messages"][0]["content"]
+    return content if isinstance(content, str) else "".join(block["text"] for block in content)
+
+
+@pytest.fixture
+def fake_anthropic():
+    """
+    fake_anthropic(client, is_async=False, streams=None, **options) -> client
+
+    Installs a fake SDK client into an LLMClient/AsyncLLMClient (its
+    messages: FakeAsyncMessages if is_async, FakeStreamingMessages if
+    streams are given, else FakeMessages; options go to their constructor).
+    """
+    def install(client, is_async=False, streams=None, **options):
+        if is_async:
+            messages = FakeAsyncMessages(**options)
+        elif streams is not None:
+            messages = FakeStreamingMessages(streams, **options)
+        else:
+            messages = FakeMessages(**options)
+        client.client = SimpleNamespace(messages=messages)
+        return client
+
+    return install
+
+
+@pytest.fixture
+def bump_mtime():
+    """bump_mtime(path): advance path's mtime by one second"""
+    def bump(path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    return bump
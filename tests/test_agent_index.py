@@ -0,0 +1,92 @@
+"""
+Tests for the scanned agent/task/SOP index.
+
+Verifies that:
+1. Agents, tasks (with phase/description) and SOPs are discovered by scanning
+2. The persisted index is reused by a new process and refreshed incrementally
+3. PromptRuntime finds agents created after it started, without registration
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from agent_index import AgentIndex  # noqa: E402
+from prompt_runtime import AgentNotFoundError, PromptRuntime  # noqa: E402
+
+
+def _make_agent(agents_dir: Path, name: str, agent_id: str = None, tasks=("01_first",)) -> Path:
+    agent_dir = agents_dir / name
+    (agent_dir / "tasks").mkdir(parents=True)
+    header = f"agent_id: {agent_id}\n" if agent_id else ""
+    (agent_dir / "_composition.yaml").write_text(header + "composition_order: []\n")
+    for task_id in tasks:
+        (agent_dir / "tasks" / f"task_{task_id}.md").write_text(f"# {task_id}\n")
+        (agent_dir / "tasks" / f"task_{task_id}.meta.yaml").write_text(
+            f"task_id: {task_id}\nphase: PLANNING\ndescription: Do {task_id}\n"
+        )
+    return agent_dir
+
+
+@pytest.fixture
+def repo(tmp_path):
+    agents = tmp_path / "agency_os" / "01_planning_framework" / "agents"
+    _make_agent(agents, "ALPHA_DIR", agent_id="ALPHA", tasks=("01_first", "02_second"))
+    _make_agent(agents / "research", "BETA")  # grouped, named by its directory
+    (agents / "research" / "notes").mkdir()  # not an agent: no _composition.yaml
+    sops = tmp_path / "system_steward_framework" / "knowledge" / "sops"
+    sops.mkdir(parents=True)
+    (sops / "SOP_001_Start_Project.md").write_text("# SOP 1\n")
+    return tmp_path
+
+
+def test_scan_discovers_agents_tasks_and_sops(repo):
+    index = AgentIndex(repo).load()
+
+    assert index.agent_ids() == ["ALPHA", "BETA"]
+    assert index.agent_path("ALPHA") == repo / "agency_os" / "01_planning_framework" / "agents" / "ALPHA_DIR"
+    assert index.task_ids("ALPHA") == ["01_first", "02_second"]
+    task = index.tasks("ALPHA")["02_second"]
+    assert (task.phase, task.description) == ("PLANNING", "Do 02_second")
+    assert index.sop_file("SOP_001").name == "SOP_001_Start_Project.md"
+    assert index.sop_file("SOP_002") is None
+
+
+def test_persisted_index_refreshes_incrementally(repo, bump_mtime):
+    AgentIndex(repo).load()
+
+    # Next process: loaded from disk, nothing re-scanned
+    index = AgentIndex(repo).load()
+    assert (index.full_scans, index.agents_rebuilt) == (0, 0)
+
+    # A new agent is discovered; existing agents are not rebuilt
+    agents = repo / "agency_os" / "01_planning_framework" / "agents"
+    _make_agent(agents, "GAMMA")
+    assert index.refresh()
+    assert "GAMMA" in index.agent_ids()
+    assert index.agents_rebuilt == 1
+
+    # An edited meta file rebuilds only its agent
+    meta = agents / "ALPHA_DIR" / "tasks" / "task_01_first.meta.yaml"
+    meta.write_text("task_id: 01_first\nphase: CODING\ndescription: Changed\n")
+    bump_mtime(meta)
+    assert index.refresh()
+    assert index.tasks("ALPHA")["01_first"].phase == "CODING"
+    assert index.agents_rebuilt == 2
+    assert not index.refresh()
+
+
+def test_runtime_finds_new_agents_without_registration(repo):
+    runtime = PromptRuntime(base_path=repo)
+    assert runtime.list_tasks("BETA") == ["01_first"]
+
+    with pytest.raises(AgentNotFoundError) as excinfo:
+        runtime._get_agent_path("DELTA")
+    assert "ALPHA" in str(excinfo.value)
+
+    _make_agent(repo / "system_steward_framework" / "agents", "DELTA")
+    assert runtime._get_agent_path("DELTA") == repo / "system_steward_framework" / "agents" / "DELTA"
@@ -0,0 +1,112 @@
+"""
+Tests for AsyncLLMClient (bounded concurrency, async retries, cancellation).
+
+Verifies that:
+1. invoke_many() never exceeds max_concurrency and keeps request order
+2. Retryable errors back off asynchronously; costs land in the shared tracker
+3. fail_fast and cancel() cancel queued/in-flight invocations
+4. LLMClient.invoke_many() is a blocking facade over the async client
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+import async_llm_client  # noqa: E402
+from async_llm_client import AsyncLLMClient  # noqa: E402
+from llm_client import LLMClient, LLMClientError, LLMInvocationError, LLMRequest  # noqa: E402
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def _echo(prompt, n):
+    return f"re:{prompt}"
+
+
+def test_invoke_many_bounds_concurrency_and_keeps_order(fake_anthropic):
+    client = fake_anthropic(
+        AsyncLLMClient(max_concurrency=3), is_async=True, text=_echo,
+        usage={"input_tokens": 1000, "output_tokens": 100}
+    )
+    messages = client.client.messages
+    prompts = [f"p{i}" for i in range(10)]
+
+    results = asyncio.run(client.invoke_many(prompts))
+
+    assert [r.response.content for r in results] == [f"re:{p}" for p in prompts]
+    assert messages.peak == 3
+    assert client.peak_in_flight == 3
+    assert client.in_flight == 0
+    summary = client.get_cost_summary()
+    assert summary["total_invocations"] == 10
+    assert summary["total_input_tokens"] == 10_000
+
+
+def test_retries_back_off_asynchronously(monkeypatch, fake_anthropic):
+    monkeypatch.setattr(async_llm_client, "backoff_delay", lambda attempt: 0.01)
+    client = fake_anthropic(AsyncLLMClient(max_concurrency=2), is_async=True, text=_echo, failures={
+        "flaky": [RateLimitError("429"), RateLimitError("429")],
+        "broken": ValueError("bad request"),
+    })
+    messages = client.client.messages
+
+    results = asyncio.run(client.invoke_many([
+        "flaky",
+        LLMRequest("broken"),
+        {"prompt": "fine", "max_tokens": 10},
+    ]))
+
+    assert results[0].ok and results[0].response.content == "re:flaky"
+    assert messages.prompts.count("flaky") == 3
+    assert isinstance(results[1].error, LLMInvocationError)
+    assert messages.prompts.count("broken") == 1  # not retryable
+    assert results[2].ok
+    assert client.cost_tracker.get_summary()["total_invocations"] == 2
+
+
+def test_fail_fast_and_cancel(fake_anthropic):
+    client = fake_anthropic(
+        AsyncLLMClient(max_concurrency=2), is_async=True, delay=0.05, failures={"p0": ValueError("boom")}
+    )
+    messages = client.client.messages
+    results = asyncio.run(client.invoke_many([f"p{i}" for i in range(6)], fail_fast=True))
+
+    assert isinstance(results[0].error, LLMInvocationError)
+    cancelled = [r for r in results if isinstance(r.error, asyncio.CancelledError)]
+    assert len(cancelled) >= 4
+    assert len(messages.calls) < 6
+
+    async def cancel_midway():
+        client = fake_anthropic(AsyncLLMClient(max_concurrency=2), is_async=True, delay=1.0)
+        batch = asyncio.ensure_future(client.invoke_many(["a", "b", "c"]))
+        await asyncio.sleep(0.05)
+        assert client.cancel() == 3
+        return await batch
+
+    results = asyncio.run(cancel_midway())
+    assert all(isinstance(r.error, asyncio.CancelledError) for r in results)
+
+
+def test_blocking_facade_shares_cost_tracker(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    client = LLMClient(budget_limit=1.0)
+    async_client = client.async_client(max_concurrency=2)
+    assert async_client.cost_tracker is client.cost_tracker
+    assert async_client.mode == "noop"
+
+    results = client.invoke_many(["a", "b", "c"], max_concurrency=2)
+    assert [r.response.content for r in results] == ["{}"] * 3
+    assert client.get_cost_summary()["total_invocations"] == 3
+
+    async def nested():
+        return client.invoke_many(["a"])
+
+    with pytest.raises(LLMClientError, match="running event loop"):
+        asyncio.run(nested())
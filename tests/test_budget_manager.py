@@ -0,0 +1,114 @@
+"""
+Tests for reservation-based budget enforcement.
+
+Verifies that:
+1. Concurrent calls reserve their worst case; calls that do not fit queue
+   until earlier ones settle, and spend never passes the limit
+2. A call whose worst case exceeds the remaining budget is rejected unsent
+3. The alert fires on settled + reserved spend, before the calls return
+4. Message batch requests hold their (discounted) reservation until resolved
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from budget_manager import BudgetManager  # noqa: E402
+from llm_client import BudgetExceededError, CostTracker, LLMClient  # noqa: E402
+from message_batches import LocalBatchBackend  # noqa: E402
+
+MODEL = "claude-3-5-sonnet-20241022"
+
+# Worst case of a one-word prompt with max_tokens=1000: ~$0.015 (output at $15/MTok)
+WORST_CASE = 1000 * 15 / 1_000_000
+
+
+# Usage of every fake Anthropic reply (conftest.py)
+USAGE = {"input_tokens": 10, "output_tokens": 100}
+
+
+def _client(budget_limit, **kwargs):
+    return LLMClient(budget_limit=budget_limit, response_cache=None, rate_scheduler=None, **kwargs)
+
+
+def test_concurrent_calls_queue_for_reservations(fake_anthropic):
+    client = _client(2.5 * WORST_CASE)
+
+    def within_budget(request):
+        assert client.budget.reserved_usd <= client.budget.limit_usd
+
+    async_client = fake_anthropic(
+        client.async_client(max_concurrency=8), is_async=True, delay=0.02, usage=USAGE, on_call=within_budget
+    )
+
+    results = asyncio.run(async_client.invoke_many([
+        {"prompt": f"p{i}", "max_tokens": 1000} for i in range(6)
+    ]))
+
+    assert all(result.ok for result in results)
+    # Only two worst cases fit at once, although 8 slots were free
+    assert async_client.client.messages.peak == 2
+    stats = client.budget.stats()
+    assert stats["reserved"] == stats["settled"] == 6 and stats["waited"] > 0
+    assert stats["reserved_usd"] == 0 and stats["reservations_in_flight"] == 0
+    assert client.cost_tracker.total_cost == pytest.approx(6 * (10 * 3 + 100 * 15) / 1_000_000)
+
+
+def test_call_exceeding_remaining_budget_is_rejected(fake_anthropic):
+    client = fake_anthropic(_client(WORST_CASE * 0.9), usage=USAGE)
+
+    # Settled spend is still $0, but the worst case does not fit
+    with pytest.raises(BudgetExceededError, match="may cost up to"):
+        client.invoke("hello", max_tokens=1000)
+    assert client.invoke("hello", max_tokens=100).content == "ok"
+    assert len(client.client.messages.calls) == 1 and client.budget.counts["rejected"] == 1
+
+    # Without waiting, a call that only fits once others settle is rejected too
+    budget = BudgetManager(1.5 * WORST_CASE, CostTracker(), wait=False)
+    request = {"model": MODEL, "max_tokens": 1000, "messages": [{"role": "user", "content": "x"}]}
+    held = budget.reserve(request)
+    with pytest.raises(BudgetExceededError, match="reserved by calls in flight"):
+        budget.reserve(request)
+    budget.settle(held)
+    budget.settle(budget.reserve(request))
+
+
+def test_alert_fires_on_reserved_spend(caplog):
+    tracker = CostTracker()
+    budget = BudgetManager(10 * WORST_CASE, tracker, alert_threshold=0.5)
+    request = {"model": MODEL, "max_tokens": 1000, "messages": [{"role": "user", "content": "x"}]}
+
+    with caplog.at_level(logging.WARNING, logger="budget_manager"):
+        held = [budget.reserve(request) for _ in range(5)]
+    # Nothing has been spent yet - the alert comes from the reservations
+    assert tracker.total_cost == 0
+    assert budget.counts["alerts"] == 1
+    assert "committed" in caplog.text and "reserved" in caplog.text
+
+    for reservation in held:
+        budget.settle(reservation)
+    assert budget.stats()["committed_percent"] == 0
+    budget.settle(budget.reserve(request))
+    assert budget.counts["alerts"] == 1  # Re-armed only after dropping below the threshold
+
+    # Cache-controlled system blocks are reserved at the cache write price
+    cached = dict(request, system=[{"type": "text", "text": "s" * 4000, "cache_control": {"type": "ephemeral"}}])
+    assert budget.estimate(cached) == pytest.approx(WORST_CASE + 1000 * 3.75 / 1_000_000, rel=0.01)
+    assert budget.estimate(cached, batch=True) == pytest.approx(budget.estimate(cached) / 2)
+
+
+def test_batch_requests_hold_reservations_until_resolved(fake_anthropic):
+    client = fake_anthropic(_client(1.0), usage=USAGE)
+    backend = LocalBatchBackend(client.client.messages.create, processing_delay=0.1)
+    with client.batch(backend=backend, poll_interval=0.01) as batcher:
+        futures = [batcher.submit(f"p{i}", max_tokens=1000) for i in range(3)]
+        assert client.budget.reserved_usd == pytest.approx(3 * WORST_CASE / 2, rel=0.01)
+    assert all(future.result().content == "ok" for future in futures)
+    assert client.budget.reserved_usd == 0
+    assert client.get_cost_summary()["budget_reserved_usd"] == 0
@@ -0,0 +1,82 @@
+"""
+Tests for concurrent batch composition (PromptRegistry.compose_many).
+
+Verifies that:
+1. Results come back in request order and match compose(), without
+   progress output on stdout (concurrent compositions would interleave)
+2. A failing request is reported without stopping the batch
+3. Concurrent cache misses on one key run the loader once
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from prompt_registry import CompositionRequest, PromptRegistry  # noqa: E402
+
+TASKS = ["01_education_calibration", "02_feature_extraction", "03_feasibility_validation"]
+
+
+def test_compose_many_preserves_order_and_matches_compose(capsys):
+    context = {"project_id": "demo"}
+    requests = [
+        CompositionRequest("VIBE_ALIGNER", task, inject_governance=False, context=context, token_budget=10**9)
+        for task in TASKS
+    ]
+    results = PromptRegistry.compose_many(requests, max_workers=3)
+
+    assert [r.request.task for r in results] == TASKS
+    assert all(r.ok and r.elapsed_ms > 0 for r in results)
+    assert context == {"project_id": "demo"}  # each request composes on a copy
+    assert capsys.readouterr().out == ""
+
+    expected = PromptRegistry.compose(
+        "VIBE_ALIGNER", TASKS[1], inject_governance=False,
+        context={"project_id": "demo"}, token_budget=10**9
+    )
+    assert results[1].prompt == expected
+
+
+def test_compose_many_reports_errors_per_item():
+    results = PromptRegistry.compose_many([
+        {"agent": "NO_SUCH_AGENT", "task": "01_x", "inject_governance": False},
+        {"agent": "VIBE_ALIGNER", "task": "01_education_calibration", "inject_governance": False},
+    ], max_workers=2)
+
+    assert not results[0].ok
+    assert "Agent not found" in str(results[0].error)
+    assert results[1].ok and results[1].prompt
+
+
+def test_request_coercion():
+    request = CompositionRequest.coerce(("VIBE_ALIGNER", "02_feature_extraction", {"a": 1}))
+    assert (request.agent, request.task, request.context) == ("VIBE_ALIGNER", "02_feature_extraction", {"a": 1})
+    assert request.inject_governance is True
+
+
+def test_get_or_load_runs_loader_once_for_concurrent_misses():
+    cache = CompositionCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "loaded"
+
+    values = []
+    threads = [
+        threading.Thread(target=lambda: values.append(cache.get_or_load(("k",), loader)))
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert values == ["loaded"] * 6
+    assert len(calls) == 1
@@ -0,0 +1,100 @@
+"""
+Tests for the process-wide composition cache.
+
+Verifies that:
+1. Cached file reads are invalidated when the file changes
+2. Touching a file without changing content keeps the entry (hash check)
+3. LRU eviction keeps the cache within its memory cap
+4. PromptRuntime instances share parsed specs through the cache
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache, MISSING  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+
+def test_read_text_invalidated_on_change(tmp_path, bump_mtime):
+    cache = CompositionCache()
+    f = tmp_path / "fragment.md"
+    f.write_text("version one")
+
+    assert cache.read_text(f) == "version one"
+    assert cache.read_text(f) == "version one"
+    assert cache.hits == 1
+
+    f.write_text("version two, longer")
+    bump_mtime(f)
+
+    assert cache.read_text(f) == "version two, longer"
+    assert cache.invalidations == 1
+
+
+def test_touch_without_content_change_keeps_entry(tmp_path, bump_mtime):
+    cache = CompositionCache()
+    f = tmp_path / "spec.yaml"
+    f.write_text("agent_id: TEST\n")
+
+    first = cache.read_yaml(f)
+    bump_mtime(f)
+    second = cache.read_yaml(f)
+
+    assert first is second
+    assert cache.invalidations == 0
+
+
+def test_get_or_load_tracks_dependencies(tmp_path, bump_mtime):
+    cache = CompositionCache()
+    dep = tmp_path / "dep.txt"
+    dep.write_text("a")
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return dep.read_text().upper()
+
+    assert cache.get_or_load(("derived",), loader, [dep]) == "A"
+    assert cache.get_or_load(("derived",), loader, [dep]) == "A"
+    assert len(calls) == 1
+
+    dep.write_text("bb")
+    bump_mtime(dep)
+    assert cache.get_or_load(("derived",), loader, [dep]) == "BB"
+    assert len(calls) == 2
+
+
+def test_lru_eviction_respects_memory_cap():
+    cache = CompositionCache(max_bytes=1000)
+    cache.put("a", "x", size_bytes=400)
+    cache.put("b", "y", size_bytes=400)
+    cache.get("a")  # "a" becomes most recently used
+    cache.put("c", "z", size_bytes=400)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == "x"
+    assert cache.get("c") == "z"
+    assert cache.total_bytes <= 1000
+    assert cache.evictions == 1
+
+
+def test_disabled_cache_always_misses(tmp_path):
+    cache = CompositionCache(enabled=False)
+    f = tmp_path / "x.md"
+    f.write_text("content")
+
+    assert cache.read_text(f) == "content"
+    assert cache.read_text(f) == "content"
+    assert cache.hits == 0
+
+
+def test_runtime_instances_share_parsed_spec():
+    cache = CompositionCache()
+    spec_a = PromptRuntime(cache=cache)._load_composition_spec("VIBE_ALIGNER")
+    spec_b = PromptRuntime(cache=cache)._load_composition_spec("VIBE_ALIGNER")
+
+    assert spec_a is spec_b
+    assert spec_a.agent_id == "VIBE_ALIGNER"
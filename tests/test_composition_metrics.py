@@ -0,0 +1,75 @@
+"""
+Tests for per-stage composition timing metrics.
+
+Verifies that:
+1. Histogram percentiles track the recorded samples
+2. Stages attribute cache hits/misses and bytes read of their thread
+3. PromptRuntime records every composition stage
+4. Failed stages are not recorded; snapshots export as JSON
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from composition_metrics import CompositionMetrics, StageHistogram  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+
+def test_histogram_percentiles():
+    histogram = StageHistogram()
+    for ms in [1.0] * 90 + [40.0] * 8 + [400.0] * 2:
+        histogram.add(ms)
+
+    stats = histogram.to_dict()
+    assert stats["count"] == 100
+    assert stats["min_ms"] == 1.0 and stats["max_ms"] == 400.0
+    assert stats["p50_ms"] <= 1.0
+    assert 25.0 < stats["p95_ms"] <= 50.0
+    assert 250.0 < stats["p99_ms"] <= 400.0
+
+
+def test_stage_attributes_cache_counters(tmp_path):
+    cache = CompositionCache()
+    metrics = CompositionMetrics()
+    fragment = tmp_path / "fragment.md"
+    fragment.write_text("x" * 100)
+
+    with metrics.stage("load", cache):
+        cache.read_text(fragment)
+    with metrics.stage("load", cache):
+        cache.read_text(fragment)
+
+    stats = metrics.snapshot()["load"]
+    assert stats["count"] == 2
+    assert stats["bytes_read"] == 100
+    assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+
+
+def test_runtime_records_stages(tmp_path):
+    metrics = CompositionMetrics()
+    runtime = PromptRuntime(cache=CompositionCache(), metrics=metrics)
+    runtime.execute_task("VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=10**9)
+
+    stages = metrics.snapshot()
+    for name in ("workspace", "spec", "meta", "knowledge", "compose", "total"):
+        assert stages[f"runtime.{name}"]["count"] == 1
+    assert stages["runtime.total"]["max_ms"] >= stages["runtime.knowledge"]["max_ms"]
+    assert metrics.check_targets()["runtime.total"]["p50_ms"] == stages["runtime.total"]["p50_ms"]
+
+    exported = json.loads(metrics.export(tmp_path / "metrics.json").read_text())
+    assert exported["stages"]["runtime.total"]["count"] == 1
+
+
+def test_failed_stage_not_recorded():
+    metrics = CompositionMetrics()
+    with pytest.raises(ValueError):
+        with metrics.stage("broken"):
+            raise ValueError("boom")
+    assert metrics.snapshot() == {}
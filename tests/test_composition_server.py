@@ -0,0 +1,147 @@
+"""
+Tests for the resident composition server (vibe-cli serve).
+
+Verifies that:
+1. A prompt composed through the server equals in-process composition
+2. Server-side failures surface as CompositionServerError with their type
+3. list_tasks/stats/shutdown work and a stale socket is replaced
+4. The socket is owner-only and shutdown is reserved for the server's uid
+5. Prompts resolve the caller's workspace, not the server's
+6. Clients fall back (None) when no server is listening
+"""
+
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("Unix sockets not available", allow_module_level=True)
+
+from composition_client import (  # noqa: E402
+    CompositionClient, CompositionServerError, active_workspace, get_composition_client
+)
+from composition_server import CompositionServer  # noqa: E402
+from prompt_registry import PromptRegistry  # noqa: E402
+
+CONTEXT = {"project_id": "server_test", "phase": "PLANNING"}
+
+
+@pytest.fixture
+def server(tmp_path):
+    # Unix socket paths are limited to ~100 chars; tmp_path can be longer
+    path = Path("/tmp") / f"vibe-test-{tmp_path.name}.sock"
+    path.write_text("stale")  # Left over by a crashed server
+    server = CompositionServer(path, hot_reload=False)
+    server.bind()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(5.0)
+    assert not path.exists()
+
+
+def test_compose_matches_in_process(server):
+    client = get_composition_client(server.path)
+    assert client is not None
+    with client:
+        result = client.compose_with_report("VIBE_ALIGNER", "02_feature_extraction", CONTEXT)
+
+    expected, report = PromptRegistry._get_runtime().compose_with_report(
+        "VIBE_ALIGNER", "02_feature_extraction", dict(CONTEXT, workspace_name=active_workspace())
+    )
+    assert result["prompt"] == expected
+    assert result["report"]["total_tokens"] == report.total_tokens
+
+
+def test_errors_and_introspection(server):
+    with CompositionClient(server.path) as client:
+        with pytest.raises(CompositionServerError) as excinfo:
+            client.compose("NO_SUCH_AGENT", "01_task")
+        assert excinfo.value.error_type == "AgentNotFoundError"
+
+        with pytest.raises(CompositionServerError) as excinfo:
+            client.call("no_such_method")
+        assert excinfo.value.code == -32601
+
+        assert "02_feature_extraction" in client.list_tasks("VIBE_ALIGNER")
+        stats = client.stats()
+        assert stats["server"]["requests"]["compose"] == 1
+        assert "entries" in stats["cache"]
+
+
+def test_socket_is_owner_only_and_shutdown_is_restricted(server):
+    assert stat.S_IMODE(server.path.stat().st_mode) == 0o600
+
+    request = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "shutdown"}).encode()
+    reply = json.loads(server.handle_line(request, peer_uid=os.getuid() + 1))
+    assert reply["error"]["code"] == -32001
+    assert json.loads(server.handle_line(b'{"method": "ping"}', peer_uid=os.getuid() + 1))["result"] == "pong"
+
+    # The same uid (checked via SO_PEERCRED over the real socket) may stop it
+    with CompositionClient(server.path) as client:
+        assert client.call("ping") == "pong"
+        assert client.call("shutdown") == "ok"
+
+
+def test_compose_uses_the_callers_workspace(tmp_path, monkeypatch):
+    path = Path("/tmp") / f"vibe-test-{tmp_path.name}.sock"
+    serve = (
+        "import sys; sys.path.insert(0, sys.argv[1]); from composition_server import CompositionServer; "
+        "CompositionServer(sys.argv[2], hot_reload=False).serve_forever()"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", serve, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"), str(path)],
+        env=dict(os.environ, ACTIVE_WORKSPACE="server_ws"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while get_composition_client(path) is None:
+            assert process.poll() is None and time.monotonic() < deadline, "server did not start"
+            time.sleep(0.1)
+
+        monkeypatch.setenv("ACTIVE_WORKSPACE", "client_ws")
+        with CompositionClient(path) as client:
+            prompt = client.compose("VIBE_ALIGNER", "02_feature_extraction", dict(CONTEXT))
+            batch = client.compose_many([
+                {"agent": "VIBE_ALIGNER", "task": "02_feature_extraction", "context": CONTEXT, "inject_governance": False}
+            ])
+
+            # The same server still composes for other workspaces
+            monkeypatch.setenv("ACTIVE_WORKSPACE", "other_ws")
+            other = client.compose("VIBE_ALIGNER", "02_feature_extraction", dict(CONTEXT))
+
+            client.shutdown()
+        process.wait(10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            path.unlink(missing_ok=True)
+
+    for composed in (prompt, batch[0]["prompt"]):
+        assert "workspaces/client_ws/artifacts/planning" in composed
+        assert "server_ws" not in composed
+    assert "workspaces/other_ws/artifacts" in other
+
+
+def test_no_server_means_no_client(tmp_path, monkeypatch):
+    assert get_composition_client(tmp_path / "missing.sock") is None
+
+    stale = tmp_path / "stale.sock"
+    stale.write_text("")
+    assert get_composition_client(stale) is None
+
+    monkeypatch.setenv("VIBE_COMPOSE_SERVER", "0")
+    assert get_composition_client() is None
@@ -0,0 +1,61 @@
+"""
+Tests for composition sessions (shared-prefix composition of one agent's tasks).
+
+Verifies that:
+1. Session prompts equal PromptRuntime.compose_with_report() for every task
+2. The prefix is rendered once and reused by later tasks
+3. shared_prefix is the first (cached) block of compose_blocks()
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+AGENT = "VIBE_ALIGNER"
+CONTEXT = {"project_id": "session-test", "user_input": "A booking app for yoga studios"}
+
+
+def test_session_prompts_match_full_composition():
+    runtime = PromptRuntime()
+    session = runtime.session(AGENT, context=CONTEXT)
+    task_ids = runtime.list_tasks(AGENT)
+    assert len(task_ids) >= 2
+
+    for task_id in task_ids:
+        prompt, report = session.compose_with_report(task_id)
+        expected, expected_report = runtime.compose_with_report(AGENT, task_id, dict(CONTEXT))
+        assert prompt == expected
+        assert report.runtime_layers == expected_report.runtime_layers
+        assert prompt.startswith(session.shared_prefix)
+
+
+def test_prefix_is_rendered_once():
+    runtime = PromptRuntime()
+    session = runtime.session(AGENT, context=CONTEXT)
+    for task_id in runtime.list_tasks(AGENT)[:3]:
+        session.compose(task_id)
+
+    stats = session.stats()
+    assert stats["tasks"] == 3
+    assert stats["prefix_builds"] == 1
+    assert stats["prefix_reuses"] >= 2
+    assert "CORE PERSONALITY" in session.shared_prefix
+    assert session.shared_prefix_chars == len(session.shared_prefix)
+
+
+def test_shared_prefix_is_first_cache_block():
+    runtime = PromptRuntime()
+    session = runtime.session(AGENT, context=CONTEXT)
+    assert session.shared_prefix == ""
+
+    for task_id in runtime.list_tasks(AGENT)[:2]:
+        blocks, _ = session.compose_blocks(task_id)
+        assert blocks[0].cache_breakpoint
+        assert blocks[0].text == session.shared_prefix
+        # Per-call context does not leak into the session context
+        session.compose(task_id, {"extra": "value"})
+    assert "extra" not in session.context
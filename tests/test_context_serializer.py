@@ -0,0 +1,109 @@
+"""
+Tests for the compact, size-capped runtime context serializer.
+
+Verifies that:
+1. Output is compact JSON with deterministic key order
+2. Depth, item and byte limits are applied without a store
+3. Oversized values become artifact references that fetch_artifact resolves
+4. PromptRuntime renders runtime context through the serializer
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "orchestrator" / "tools"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from context_serializer import (  # noqa: E402
+    ARTIFACT_KEY, ArtifactNotFoundError, ArtifactStore, ContextLimits, serialize_context
+)
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+
+def test_compact_deterministic_output():
+    first = serialize_context({"b": {"y": 1, "x": (1, 2)}, "a": "text", "_internal": 1}, skip_private=True)
+    second = serialize_context({"a": "text", "b": {"x": [1, 2], "y": 1}})
+
+    assert first.text == second.text == '{\n"a":"text",\n"b":{"x":[1,2],"y":1}\n}'
+    assert json.loads(first.text) == {"a": "text", "b": {"x": [1, 2], "y": 1}}
+    assert serialize_context({}).text == "{}"
+
+
+def test_limits_without_store():
+    limits = ContextLimits(max_value_bytes=100, max_total_bytes=10_000, max_depth=2, max_items=3)
+    result = serialize_context({
+        "deep": {"l1": {"l2": {"l3": 1}}},
+        "many": list(range(10)),
+        "long": "x" * 500,
+    }, limits)
+
+    data = json.loads(result.text)
+    assert data["deep"] == {"l1": {"l2": "<object with 1 keys: l3>"}}
+    assert data["many"] == [0, 1, 2, "<7 more items>"]
+    assert data["long"].startswith("x" * 100) and "400 chars truncated" in data["long"]
+    assert sorted(result.clipped) == ["deep", "long", "many"]
+    assert not result.artifacts
+
+
+def test_large_values_become_fetchable_artifacts(tmp_path):
+    store = ArtifactStore(tmp_path / "artifacts", base_path=tmp_path)
+    generated = {"files": [{"path": f"f{i}.py", "content": "x" * 300} for i in range(10)]}
+    limits = ContextLimits(max_value_bytes=1000, max_total_bytes=1000)
+
+    result = serialize_context({"generated_code": generated, "project_id": "demo", "notes": "y" * 900}, limits, store)
+
+    data = json.loads(result.text)
+    ref = data["generated_code"][ARTIFACT_KEY]
+    assert ref["path"] == f"artifacts/{ref['sha256']}.json"
+    assert ref["summary"] == "object with 1 keys: files"
+    assert data["project_id"] == "demo"
+    # Total budget pushed the next largest value out as well
+    assert ARTIFACT_KEY in data["notes"]
+    assert result.size <= 1000
+    assert store.load(ref["sha256"]) == generated
+
+    fetched = store.read(ref["sha256"], key_path="files.1.path")
+    assert fetched["content"] == "f1.py" and not fetched["truncated"]
+    page = store.read(ref["path"], max_bytes=100)
+    assert page["truncated"] and page["next_offset"] == 100 and len(page["content"]) == 100
+
+    with pytest.raises(ArtifactNotFoundError):
+        store.resolve("0" * 64)
+    with pytest.raises(ArtifactNotFoundError):
+        store.resolve("../../etc/passwd")
+
+
+def test_fetch_artifact_tool(tmp_path):
+    pytest.importorskip("requests")  # web_fetch/google_search clients
+    from tool_executor import ToolExecutor
+
+    store = ArtifactStore(tmp_path)
+    ref = store.put({"files": [{"path": "a.py"}, {"path": "b.py"}]})
+    executor = ToolExecutor()
+    executor._ensure_tools_initialized()
+    executor.tools["fetch_artifact"] = store
+
+    # Parameters parsed from tool_use XML are strings
+    fetched = executor.execute_tool("fetch_artifact", {"ref": ref.sha256, "key_path": "files.1.path"})
+    assert fetched["content"] == "b.py"
+    page = executor.execute_tool("fetch_artifact", {"ref": ref.path, "max_bytes": "10"})
+    assert page["truncated"] and page["next_offset"] == 10
+    assert "error" in executor.execute_tool("fetch_artifact", {"ref": "../../etc/passwd"})
+
+
+def test_runtime_context_rendered_as_json(tmp_path):
+    runtime = PromptRuntime(cache=CompositionCache(), artifact_store=ArtifactStore(tmp_path))
+    context = {"project_id": "demo", "feature_spec": {"body": "z" * 100_000}}
+    prompt = runtime.execute_task("VIBE_ALIGNER", "02_feature_extraction", context, token_budget=10**9)
+
+    section = prompt[prompt.index("**Runtime Context:**"):]
+    body = json.loads(section.split("```json\n", 1)[1].split("\n```", 1)[0])
+    assert body["project_id"] == "demo"
+    assert ARTIFACT_KEY in body["feature_spec"]
+    assert "fetch_artifact" in section
+    assert "z" * 5_000 not in prompt
@@ -0,0 +1,97 @@
+"""
+Tests for the persistent cost ledger.
+
+Verifies that:
+1. Spend survives a restart and the budget applies to the project total
+2. Concurrent writers (threads, separate connections) keep exact aggregates
+3. Rows carry the cost_scope() attribution; reports group by any dimension
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from cost_ledger import CostLedger, LedgerRecord, cost_scope  # noqa: E402
+from llm_client import BudgetExceededError, CostTracker, LLMClient  # noqa: E402
+
+
+def _client(fake_anthropic, ledger, budget_limit=None):
+    tracker = CostTracker(project="shop", ledger=ledger)
+    client = LLMClient(budget_limit=budget_limit, response_cache=None, rate_scheduler=None, cost_tracker=tracker)
+    return fake_anthropic(
+        client, text="{}", usage={"input_tokens": 100_000, "output_tokens": 10_000, "cache_read_input_tokens": 5000}
+    )
+
+
+def test_spend_survives_restart_and_bounds_budget(tmp_path, fake_anthropic):
+    path = tmp_path / "ledger.sqlite"
+    first = _client(fake_anthropic, CostLedger(path), budget_limit=1.0)
+    with cost_scope(phase="planning", agent="VIBE_ALIGNER", task="02_feature_extraction"):
+        first.invoke("plan")
+        first.invoke("plan again")
+    spent = first.get_cost_summary()["project_cost_usd"]
+    assert spent == pytest.approx(2 * (0.3 + 0.15 + 0.0015), abs=1e-4)
+
+    # A new process starts at the project's spend, not at $0
+    restarted = _client(fake_anthropic, CostLedger(path), budget_limit=0.9)
+    assert restarted.cost_tracker.total_cost == 0
+    assert restarted.get_cost_summary()["budget_remaining_usd"] == pytest.approx(0.9 - spent, abs=1e-4)
+    with pytest.raises(BudgetExceededError):
+        restarted.invoke("one more")
+    assert not restarted.client.messages.calls
+
+    (row, _) = CostLedger(path).records(project="shop")
+    assert (row["phase"], row["agent"], row["task"]) == ("planning", "VIBE_ALIGNER", "02_feature_extraction")
+    assert row["cache_read_tokens"] == 5000 and row["latency_ms"] >= 0
+
+
+def test_concurrent_writers_keep_exact_totals(tmp_path):
+    path = tmp_path / "ledger.sqlite"
+    ledgers = [CostLedger(path), CostLedger(path)]  # Two connections, like two workers
+
+    def work(ledger, phase):
+        for _ in range(50):
+            ledger.append(LedgerRecord(model="m", project="p", phase=phase, input_tokens=10, cost_usd=0.01))
+
+    threads = [threading.Thread(target=work, args=(ledgers[i % 2], f"phase{i % 3}")) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    totals = ledgers[0].project_totals("p")
+    assert totals["invocations"] == 300 and totals["input_tokens"] == 3000
+    assert ledgers[1].project_total("p") == pytest.approx(3.0)
+    assert sum(ledgers[0].phase_costs("p").values()) == pytest.approx(3.0)
+
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        ledgers[0]._conn.execute("DELETE FROM ledger")
+
+
+def test_report_groups_by_scope(tmp_path):
+    ledger = CostLedger(tmp_path / "ledger.sqlite")
+    for project, phase, agent, cost in [
+        ("a", "planning", "VIBE_ALIGNER", 0.5),
+        ("a", "planning", "VIBE_ALIGNER", 0.25),
+        ("a", "coding", "CODE_GENERATOR", 2.0),
+        ("b", "planning", "VIBE_ALIGNER", 1.0),
+    ]:
+        ledger.append(LedgerRecord(model="m", project=project, phase=phase, agent=agent, cost_usd=cost))
+
+    rows = ledger.report(("project", "agent"))
+    assert [(r["project"], r["agent"], r["invocations"], r["cost_usd"]) for r in rows] == [
+        ("a", "CODE_GENERATOR", 1, 2.0),
+        ("b", "VIBE_ALIGNER", 1, 1.0),
+        ("a", "VIBE_ALIGNER", 2, 0.75),
+    ]
+    (total,) = ledger.report((), project="a")
+    assert total["cost_usd"] == 2.75 and total["invocations"] == 3
+    assert ledger.report(("day",))[0]["invocations"] == 4
+    with pytest.raises(ValueError, match="Fix:"):
+        ledger.report(("cost_usd",))
@@ -0,0 +1,127 @@
+"""
+Tests for hot reload (file watcher + dependency-indexed cache invalidation).
+
+Verifies that:
+1. invalidate_path() drops exactly the entries built from a file/directory
+2. Watched entries skip stat() validation; unwatching restores it
+3. Both backends invalidate dependents and fire reload hooks (debounced)
+4. inotify hands over to polling (and stat validation) when a new
+   directory cannot be watched
+"""
+
+import errno
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from file_watcher import FileWatcher, InotifyBackend  # noqa: E402
+
+
+def test_invalidate_path_drops_only_dependents(tmp_path):
+    cache = CompositionCache()
+    (tmp_path / "sub").mkdir()
+    core, other, nested = tmp_path / "core.md", tmp_path / "other.md", tmp_path / "sub" / "k.yaml"
+    for path in (core, other, nested):
+        path.write_text(path.name)
+
+    cache.read_text(core)
+    cache.read_text(other)
+    cache.get_or_load(("section", "core"), lambda: "rendered", [core])
+    cache.get_or_load(("section", "nested"), lambda: "rendered", [nested])
+
+    assert cache.invalidate_path(core) == 2
+    assert cache.get(("text", str(other))) == "other.md"
+    assert cache.invalidate_path(tmp_path / "sub") == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_watched_entries_skip_validation(tmp_path):
+    cache = CompositionCache()
+    fragment = tmp_path / "fragment.md"
+    fragment.write_text("v1")
+    cache.read_text(fragment)
+
+    cache.watch([tmp_path])
+    fragment.write_text("v2-longer")
+    # Trusted: served without stat() until the watcher invalidates it
+    assert cache.read_text(fragment) == "v1"
+    cache.invalidate_path(fragment)
+    assert cache.read_text(fragment) == "v2-longer"
+
+    cache.unwatch()
+    fragment.write_text("v3")
+    assert cache.read_text(fragment) == "v3"
+
+
+@pytest.mark.parametrize("backend", ["polling", "inotify"])
+def test_watcher_invalidates_and_fires_hooks(tmp_path, backend, bump_mtime):
+    if backend == "inotify":
+        try:
+            InotifyBackend([tmp_path]).close()
+        except OSError:
+            pytest.skip("inotify not available")
+
+    cache = CompositionCache()
+    fragment = tmp_path / "_prompt_core.md"
+    fragment.write_text("old")
+    cache.get_or_load(("section", "core"), lambda: cache.read_text(fragment).upper(), [fragment])
+
+    flushed = []
+    done = threading.Event()
+
+    def hook(paths):
+        flushed.append(paths)
+        done.set()
+
+    watcher = FileWatcher([tmp_path], cache=cache, debounce=0.05, poll_interval=0.05, backend=backend)
+    watcher.add_hook(hook)
+    with watcher:
+        assert watcher.backend_name == backend
+        fragment.write_text("new content")
+        fragment.write_text("newer content")
+        bump_mtime(fragment)
+        assert done.wait(5.0)
+
+    assert len(flushed) == 1  # burst debounced into one reload
+    assert fragment.resolve() in [p.resolve() for p in flushed[0]]
+    assert cache.get_or_load(("section", "core"), lambda: cache.read_text(fragment).upper(), [fragment]) == "NEWER CONTENT"
+    assert watcher.stats()["entries_invalidated"] >= 1
+    assert cache.stats()["watched_roots"] == []
+
+
+def test_unwatchable_directory_falls_back_to_polling(tmp_path, monkeypatch):
+    try:
+        InotifyBackend([tmp_path]).close()
+    except OSError:
+        pytest.skip("inotify not available")
+
+    cache = CompositionCache()
+    watcher = FileWatcher([tmp_path], cache=cache, debounce=0.05, poll_interval=0.05, backend="inotify")
+    with watcher:
+        assert cache.stats()["watched_roots"]
+
+        def add_watch(self, dirpath):
+            raise OSError(errno.ENOSPC, "inotify_add_watch: No space left on device")
+
+        monkeypatch.setattr(InotifyBackend, "_add_watch", add_watch)
+        (tmp_path / "new").mkdir()
+        for _ in range(100):
+            if watcher.backend_name == "polling":
+                break
+            time.sleep(0.05)
+        assert watcher.backend_name == "polling"
+        assert cache.stats()["watched_roots"] == []
+
+        # Files in the unwatched directory are validated on lookup again
+        fragment = tmp_path / "new" / "fragment.md"
+        fragment.write_text("v1")
+        assert cache.read_text(fragment) == "v1"
+        fragment.write_text("v2-longer")
+        assert cache.read_text(fragment) == "v2-longer"
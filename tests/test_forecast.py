@@ -0,0 +1,131 @@
+"""
+Tests for the pre-flight run forecast.
+
+Verifies that:
+1. Output tokens and latency come from the cost ledger's history of the
+   task (or agent), and from the task metadata prior without history
+2. Parallel wall-clock time follows stages, agents and task dependencies
+3. The orchestrator walks the workflow from the project's current phase
+   and reports whether the p90 cost fits the remaining budget
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "orchestrator"))
+
+from cost_ledger import CostLedger, LedgerRecord  # noqa: E402
+from forecast import FIRST_TOKEN_SECONDS, OUTPUT_TOKENS_PER_SECOND, PlannedCall, RunForecaster  # noqa: E402
+
+MODEL = "claude-3-5-sonnet-20241022"
+
+
+def _history(ledger, agent, task, outputs, latency_ms=2000.0):
+    for output in outputs:
+        ledger.append(LedgerRecord(
+            model=MODEL, project="old", agent=agent, task=task,
+            input_tokens=5000, output_tokens=output, latency_ms=latency_ms
+        ))
+
+
+def test_history_and_priors(tmp_path):
+    ledger = CostLedger(tmp_path / "ledger.sqlite")
+    # The handler names the task "code_generation", the index "02_code_generation"
+    _history(ledger, "CODE_GENERATOR", "code_generation", [1000, 2000, 3000], latency_ms=30_000)
+    _history(ledger, "VIBE_ALIGNER", "other_task", [400])
+    ledger.append(LedgerRecord(model=MODEL, project="old", agent="VIBE_ALIGNER", output_tokens=9000, cached=True))
+
+    calls = [
+        PlannedCall("CODING", "CODE_GENERATOR", "02_code_generation", input_tokens=10_000),
+        PlannedCall("PLANNING", "VIBE_ALIGNER", "05_scope_negotiation", input_tokens=10_000),
+        PlannedCall("PLANNING", "GENESIS_BLUEPRINT", "01_select_core_modules", input_tokens=10_000,
+                    estimated_tokens=1000, complexity="low"),
+    ]
+    forecast = RunForecaster(ledger, simulations=3000).forecast("p", calls, budget_remaining_usd=1.0)
+    coding, aligner, genesis = forecast.calls
+
+    assert coding.history == 3
+    assert coding.expected_output_tokens == pytest.approx(2000, rel=0.05)
+    assert coding.expected_seconds == pytest.approx(30, rel=0.01)
+    # Too little task history: the agent's other calls (cache hits excluded)
+    assert aligner.history == 1 and aligner.expected_output_tokens == 400
+    # No history: triangular prior between 500 and 1500 around 1000
+    assert genesis.history == 0
+    assert genesis.expected_output_tokens == pytest.approx(1000, rel=0.05)
+    assert genesis.expected_seconds == pytest.approx(
+        FIRST_TOKEN_SECONDS + genesis.expected_output_tokens / OUTPUT_TOKENS_PER_SECOND, rel=0.01
+    )
+
+    assert forecast.input_tokens == 30_000
+    assert forecast.cost_usd.expected == pytest.approx(
+        3 * 10_000 * 3 / 1e6 + forecast.output_tokens.expected * 15 / 1e6, rel=1e-6
+    )
+    assert forecast.cost_usd.p90 >= forecast.cost_usd.expected and forecast.fits
+    forecast.budget_remaining_usd = forecast.cost_usd.expected
+    assert not forecast.fits
+    assert json.loads(json.dumps(forecast.to_dict()))["calls"][0]["history"] == 3
+
+
+def test_parallel_time_follows_dependencies(tmp_path):
+    ledger = CostLedger(tmp_path / "ledger.sqlite")
+    for agent, task in [("A", "first"), ("A", "second"), ("A", "third"), ("B", "only"), ("C", "last")]:
+        _history(ledger, agent, task, [100] * 3, latency_ms=10_000)
+
+    calls = [
+        PlannedCall("S1", "A", "01_first", 100, depends_on=[]),
+        PlannedCall("S1", "A", "02_second", 100, depends_on=["first"]),
+        PlannedCall("S1", "A", "03_third", 100, depends_on=["first"]),  # Parallel to second
+        PlannedCall("S1", "B", "only", 100),
+        PlannedCall("S2", "C", "last", 100),  # None: after the previous task of its agent
+    ]
+    forecast = RunForecaster(ledger, simulations=10).forecast("p", calls)
+
+    assert forecast.sequential_seconds.expected == pytest.approx(50)
+    # S1: first -> (second | third) = 20s, B in parallel; then S2 = 10s
+    assert forecast.parallel_seconds.expected == pytest.approx(30)
+    assert forecast.stages == ["S1", "S2"]
+
+
+def test_orchestrator_forecast_from_current_phase(tmp_path, monkeypatch):
+    import core_orchestrator
+    from core_orchestrator import CoreOrchestrator
+
+    ledger = CostLedger(tmp_path / "ledger.sqlite")
+    ledger.append(LedgerRecord(model=MODEL, project="shop", cost_usd=0.5))
+    monkeypatch.setattr(core_orchestrator, "get_cost_ledger", lambda: ledger)
+
+    workspace = tmp_path / "workspaces" / "shop"
+    workspace.mkdir(parents=True)
+    (workspace / "project_manifest.json").write_text(json.dumps({
+        "apiVersion": "agency.os/v1alpha1",
+        "kind": "Project",
+        "metadata": {"projectId": "shop", "name": "shop", "owner": "test", "createdAt": "2025-01-01T00:00:00Z"},
+        "status": {"projectPhase": "CODING"},
+        "artifacts": {},
+        "budget": {"max_cost_usd": 0.6, "current_cost_usd": 0.5},
+    }))
+
+    orchestrator = CoreOrchestrator(REPO_ROOT, execution_mode="autonomous")
+    orchestrator.workspaces_dir = tmp_path / "workspaces"
+    forecast = orchestrator.forecast("shop", simulations=200)
+
+    # CODING is the last state with an agent before PRODUCTION
+    assert forecast.stages == ["CODING"]
+    assert [call.task for call in forecast.calls] == [
+        "01_spec_analysis_validation", "02_code_generation", "03_test_generation",
+        "04_documentation_generation", "05_quality_assurance_packaging",
+    ]
+    assert all(call.input_tokens > 0 for call in forecast.calls)
+    # Tests and docs only depend on the generated code
+    assert forecast.parallel_seconds.expected < forecast.sequential_seconds.expected
+    assert forecast.budget_remaining_usd == pytest.approx(0.1)
+    assert not forecast.fits
+
+    monkeypatch.setenv("VIBE_FORECAST_PREFLIGHT", "1")
+    with pytest.raises(core_orchestrator.BudgetExceededError, match="Forecast p90 cost"):
+        orchestrator.run_full_sdlc("shop")
@@ -0,0 +1,89 @@
+"""
+Tests for relevance-sliced knowledge injection.
+
+Verifies that:
+1. Only records matching the runtime context (plus references) are injected
+2. Unkeyed general rules and scalar sections are always kept
+3. A context that matches nothing falls back to the full file
+4. PromptRuntime slices knowledge entries configured with `slice`
+"""
+
+import sys
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from knowledge_slicer import SliceConfig, slice_knowledge  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+KNOWLEDGE = """\
+version: "1.0"
+---
+features:
+  - id: "K-001"
+    name: "user_authentication"
+    required_dependencies:
+      - component: "email_service"
+  - id: "K-002"
+    name: "email_service"
+    required_dependencies:
+      - component: "smtp_relay"
+  - id: "K-003"
+    name: "video_streaming"
+heuristics:
+  - rule: "Keep v1.0 under 60 points"
+"""
+
+
+def _sliced(tmp_path, context, spec="relevant"):
+    path = tmp_path / "knowledge.yaml"
+    path.write_text(KNOWLEDGE)
+    return slice_knowledge(path, context, SliceConfig.from_spec(spec), CompositionCache())
+
+
+def _names(text):
+    docs = list(yaml.safe_load_all(text))
+    return [f["name"] for doc in docs if doc and "features" in doc for f in doc["features"]]
+
+
+def test_slice_keeps_matches_and_references(tmp_path):
+    text = _sliced(tmp_path, {"features": [{"name": "User Authentication"}]})
+
+    assert _names(text) == ["user_authentication", "email_service"]
+    assert "Keep v1.0 under 60 points" in text
+    assert "version" in text
+
+
+def test_max_depth_zero_skips_references(tmp_path):
+    text = _sliced(tmp_path, {"features": ["user authentication"]}, {"max_depth": 0})
+
+    assert _names(text) == ["user_authentication"]
+
+
+def test_no_match_falls_back_to_full_file(tmp_path):
+    assert _sliced(tmp_path, {"features": ["blockchain wallet"]}) == KNOWLEDGE
+
+
+def test_invalid_slice_mode_rejected():
+    try:
+        SliceConfig.from_spec({"mode": "smart"})
+    except ValueError as e:
+        assert "Fix:" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_runtime_slices_configured_knowledge():
+    context = {"features": [{"name": "Real-time chat"}, {"name": "User Authentication"}]}
+    runtime = PromptRuntime(cache=CompositionCache())
+
+    sliced = runtime.execute_task("VIBE_ALIGNER", "04_gap_detection", dict(context))
+    full = runtime.execute_task("VIBE_ALIGNER", "04_gap_detection", {})
+
+    assert "Relevance-sliced" in sliced
+    assert "real_time_chat_system" in sliced
+    assert len(sliced) < len(full) / 2
@@ -0,0 +1,133 @@
+"""
+Tests for streamed LLM responses and incremental JSON parsing.
+
+Verifies that:
+1. IncrementalJSONParser emits fields/elements as soon as they close, for
+   any chunking, with the values json.loads() produces
+2. invoke_stream() yields deltas then the response, tracks cost and retries
+   only before the first delta
+3. Providers without a streaming API (and NoOpClient without an API key)
+   fall back to one delta
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+import llm_client  # noqa: E402
+from json_stream import IncrementalJSONParser, JSONStreamError, iter_json_events  # noqa: E402
+from llm_client import LLMClient, LLMInvocationError  # noqa: E402
+
+DOCUMENT = {
+    "summary": "Two modules, one endpoint {not: a brace}",
+    "files": [
+        {"file_path": "src/core/auth.py", "content": "def login():\n    return \"[ok]\"\n"},
+        {"file_path": "src/app.py", "content": "print('\\\\ \\u00e9')", "deps": [1, 2.5, None, True]},
+    ],
+    "api_endpoints": [{"path": "/auth/login", "method": "POST"}],
+    "count": 2,
+    "empty": {},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 10_000])
+def test_parser_emits_values_as_they_close(chunk_size):
+    text = "```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```"
+    parser = IncrementalJSONParser(stream_paths=[("files",)])
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[i:i + chunk_size]))
+
+    assert [(e.kind, e.path) for e in events] == [
+        ("field", ("summary",)),
+        ("item", ("files", 0)),
+        ("item", ("files", 1)),
+        ("field", ("files",)),
+        ("field", ("api_endpoints",)),
+        ("field", ("count",)),
+        ("field", ("empty",)),
+    ]
+    assert events[1].value == DOCUMENT["files"][0]
+    assert events[2].value == DOCUMENT["files"][1]
+    assert parser.complete
+    assert parser.close() == DOCUMENT
+    assert parser.text == text
+
+
+def test_first_file_is_available_before_the_document_ends():
+    text = json.dumps(DOCUMENT)
+    cut = text.index("src/app.py")
+    parser = IncrementalJSONParser(stream_paths=[("files",)])
+    events = parser.feed(text[:cut])
+    assert [e.path for e in events if e.kind == "item"] == [("files", 0)]
+    assert not parser.complete
+    with pytest.raises(JSONStreamError):
+        parser.close()
+
+
+def test_root_arrays_and_nested_paths():
+    events = list(iter_json_events(['[{"a": 1}, ', '"x", [2]]']))
+    assert [(e.path, e.value) for e in events] == [((0,), {"a": 1}), ((1,), "x"), ((2,), [2])]
+
+    doc = {"result": {"modules": ["m1", "m2"]}, "ok": True}
+    events = list(iter_json_events([json.dumps(doc)], stream_paths=[("result", "modules")]))
+    assert [(e.kind, e.path) for e in events] == [
+        ("item", ("result", "modules", 0)),
+        ("item", ("result", "modules", 1)),
+        ("field", ("result",)),
+        ("field", ("ok",)),
+    ]
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+def test_invoke_stream_yields_deltas_then_usage(monkeypatch, fake_anthropic):
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt: 0)
+    deltas = ['{"files": [{"file_path": "a.py"}', ', {"file_path": "b.py"}', "]}"]
+    client = fake_anthropic(LLMClient(response_cache=None), streams=[APIConnectionError("refused"), deltas])
+
+    events = list(client.invoke_stream("generate"))
+    assert [e.text for e in events[:-1]] == deltas
+    response = events[-1].response
+    assert response.content == "".join(deltas)
+    assert response.usage.output_tokens == 3
+    assert client.get_cost_summary()["total_invocations"] == 1
+
+    # Failing mid-stream is not retried (text was already delivered)
+    client = fake_anthropic(LLMClient(response_cache=None), streams=[
+        {"deltas": deltas, "fail_after": 1, "error": APIConnectionError("connection reset")}, deltas
+    ])
+    messages = client.client.messages
+    stream = client.invoke_stream("generate")
+    assert next(stream).text == deltas[0]
+    with pytest.raises(LLMInvocationError):
+        next(stream)
+    assert len(messages.opened) == 1 and messages.opened[0].closed
+
+
+def test_invoke_stream_falls_back_without_streaming_api(fake_anthropic):
+    client = fake_anthropic(
+        LLMClient(response_cache=None), text='{"ok": true}', usage={"input_tokens": 10, "output_tokens": 5}
+    )
+    events = list(client.invoke_stream("hi"))
+    assert [e.text for e in events] == ['{"ok": true}', ""]
+    assert events[-1].response.usage.input_tokens == 10
+
+
+def test_invoke_stream_without_api_key(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    client = LLMClient(response_cache=None, rate_scheduler=None)
+    assert client.mode == "noop"
+
+    # Knowledge-only mode: NoOpClient's empty response as a single delta
+    events = list(client.invoke_stream("hi"))
+    assert [e.text for e in events] == ["{}", ""]
+    assert events[-1].response.finish_reason == "no_api_key"
+    assert client.invoke("hi").content == "{}"
@@ -0,0 +1,79 @@
+"""
+Tests for message-batch execution.
+
+Verifies that:
+1. Queued requests are submitted as batches and futures resolve in request order
+2. Batch results are recorded at the discounted batch price
+3. Errored/cancelled requests raise LLMInvocationError; cache hits skip the batch
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from llm_client import CostTracker, LLMClient, LLMInvocationError  # noqa: E402
+from message_batches import LocalBatchBackend, MessageBatcher  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+
+# Replies of the fake Anthropic client (conftest.py): the prompt upper-cased
+REPLY = {
+    "text": lambda prompt, n: prompt.upper(),
+    "usage": {"input_tokens": 1_000_000, "output_tokens": 100_000},
+    "failures": {"fail": ValueError("invalid request")},
+}
+
+
+def test_futures_resolve_in_batches_at_discount(fake_anthropic):
+    client = fake_anthropic(LLMClient(response_cache=None), **REPLY)
+    backend = LocalBatchBackend(client.client.messages.create)
+    with MessageBatcher(client, backend=backend, max_batch_size=2, poll_interval=0.01) as batcher:
+        futures = [batcher.submit(prompt, agent="AUDITOR") for prompt in ["a", "b", "c"]]
+        assert batcher.stats()["batches"] == 1  # Third request still queued
+    assert [f.result().content for f in futures] == ["A", "B", "C"]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["succeeded"] == 3 and stats["requests_in_progress"] == 0
+
+    # $3 input + $1.50 output per request, half price
+    full_price = CostTracker().calculate_cost(1_000_000, 100_000, "claude-3-5-sonnet-20241022")
+    assert futures[0].result().usage.cost_usd == pytest.approx(full_price * CostTracker.BATCH_DISCOUNT)
+    assert futures[0].result().usage.batch
+    summary = client.get_cost_summary()
+    assert summary["batch_invocations"] == 3
+    assert summary["total_cost_usd"] == pytest.approx(3 * 2.25)
+
+
+def test_invoke_batch_maps_errors_and_cache_hits(tmp_path, fake_anthropic):
+    client = fake_anthropic(LLMClient(response_cache=ResponseCache(tmp_path)), **REPLY)
+    results = client.invoke_batch(["x", "fail", {"prompt": "y", "max_tokens": 10}], poll_interval=0.01)
+    assert [r.ok for r in results] == [True, False, True]
+    assert isinstance(results[1].error, LLMInvocationError)
+    assert "errored" in str(results[1].error)
+    assert results[2].response.content == "Y"
+
+    # Answered by the response cache: nothing is submitted
+    with client.batch(poll_interval=0.01) as batcher:
+        future = batcher.submit("x")
+        assert future.done() and future.result().usage.cached
+    assert batcher.stats()["batches"] == 0 and batcher.stats()["cache_hits"] == 1
+
+
+def test_cancel_fails_unfinished_requests(fake_anthropic):
+    client = fake_anthropic(LLMClient(response_cache=None), **REPLY)
+    backend = LocalBatchBackend(client.client.messages.create, processing_delay=30)
+    batcher = MessageBatcher(client, backend=backend, poll_interval=0.01)
+    submitted = batcher.submit("a")
+    batcher.flush()
+    queued = batcher.submit("b")
+
+    assert batcher.cancel() == 2
+    assert batcher.wait(timeout=5)
+    assert queued.cancelled()
+    with pytest.raises(LLMInvocationError, match="canceled"):
+        submitted.result()
+    assert client.get_cost_summary()["total_invocations"] == 0
@@ -0,0 +1,218 @@
+"""
+Tests for the model router.
+
+Verifies that:
+1. Tiers come from task meta, the agent's _composition.yaml, the task's
+   complexity or an explicit override
+2. Throttled or failing models degrade to the next model of the chain
+   (also across providers) and are skipped until their cooldown ends
+3. Streams fail over before their first delta only; "latency" tiers try
+   the fastest model first, "cost" tiers the cheapest
+4. The orchestrator's autonomous calls go through the routed model
+"""
+
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "orchestrator"))
+
+from llm_client import CostTracker, LLMClient, LLMInvocationError  # noqa: E402
+from model_router import (  # noqa: E402
+    DOWN_COOLDOWN, ERROR_RATE_HALF_LIFE, FAILURE_THRESHOLD, THROTTLE_COOLDOWN, ModelRouter, ModelTier
+)
+from rate_limiter import RateLimitScheduler  # noqa: E402
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"{status_code} error")
+        self.status_code = status_code
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class LocalEndpoint:
+    """Stand-in for a provider's messages API: per-model scripted failures"""
+
+    def __init__(self, name, failures=None):
+        self.name = name
+        self.failures = failures or {}  # model -> errors raised by its next calls
+        self.calls = []
+
+    def _message(self, model):
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=f"{self.name}:{model}")],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=20),
+            model=model, stop_reason="end_turn"
+        )
+
+    def create(self, **kwargs):
+        self.calls.append((kwargs["model"], kwargs["max_tokens"]))
+        if self.failures.get(kwargs["model"]):
+            raise self.failures[kwargs["model"]].pop(0)
+        return self._message(kwargs["model"])
+
+    @contextmanager
+    def stream(self, **kwargs):
+        message = self.create(**kwargs)
+        text = message.content[0].text
+
+        def deltas():
+            yield text[:3]
+            if self.failures.get("mid-stream"):
+                raise self.failures["mid-stream"].pop(0)
+            yield text[3:]
+        yield SimpleNamespace(text_stream=deltas(), get_final_message=lambda: message)
+
+
+def _client(endpoint, rate_scheduler=None):
+    client = LLMClient(response_cache=None, rate_scheduler=rate_scheduler, cost_tracker=CostTracker(ledger=None))
+    client.client = SimpleNamespace(messages=endpoint)
+    return client
+
+
+def _router(models, select="ordered", **kwargs):
+    now = [0.0]
+    tiers = {"default": ModelTier("default", models, max_tokens=1000, select=select)}
+    return ModelRouter(tiers, clock=lambda: now[0], **kwargs), now
+
+
+def test_route_from_task_meta_composition_and_complexity(monkeypatch):
+    router = ModelRouter()
+
+    handoff = router.route("LEAN_CANVAS_VALIDATOR", "03_handoff")
+    assert (handoff.tier, handoff.source) == ("fast", "task")
+    assert handoff.model == "claude-3-5-haiku-20241022" and handoff.max_tokens == 2048
+
+    architecture = router.route("GENESIS_BLUEPRINT", "01_select_core_modules")
+    assert (architecture.tier, architecture.source, architecture.max_tokens) == ("deep", "composition", 8192)
+    # Per-task entries of _composition.yaml (matched without the NN_ prefix)
+    assert router.route("GENESIS_BLUEPRINT", "handoff").tier == "fast"
+
+    assert router.route("CODE_GENERATOR", "01_spec_analysis_validation").source == "complexity"
+    assert router.route("CODE_GENERATOR", "02_code_generation").tier == "default"
+    assert router.route("AUDITOR", "semantic_audit", tier="fast").source == "argument"
+    with pytest.raises(ValueError, match="Unknown model tier 'huge'"):
+        router.route("AUDITOR", tier="huge")
+
+    monkeypatch.setenv("VIBE_MODEL_TIER_FAST", "local:small, claude-3-haiku-20240307")
+    assert ModelRouter().route(tier="fast").models == ["local:small", "claude-3-haiku-20240307"]
+
+
+def test_failover_when_throttled_or_down():
+    primary = LocalEndpoint("primary", {"big": [ProviderError(429, retry_after="5")]})
+    backup = LocalEndpoint("backup")
+    router, now = _router(["big", "local:small"], providers={"local": _client(backup)})
+    client = _client(primary)
+    route = router.route()
+
+    # Rate limited: degrades to the local provider after one attempt, no retry wait
+    assert router.invoke(client, "hi", route).content == "backup:small"
+    assert primary.calls == [("big", 1000)] and backup.calls == [("small", 1000)]
+    stats = router.snapshot()["big"]
+    assert stats["throttled"] == stats["failovers"] == 1 and stats["unavailable_for_s"] == 5
+
+    # Skipped while its Retry-After lasts, then tried first again
+    assert router.candidates(route, client) == ["local:small", "big"]
+    router.invoke(client, "hi", route)
+    assert len(primary.calls) == 1
+    now[0] = 6
+    assert router.invoke(client, "hi", route).content == "primary:big"
+
+    # Down: every failure degrades; FAILURE_THRESHOLD in a row take it out for DOWN_COOLDOWN
+    primary.failures["big"] = [ProviderError(503) for _ in range(FAILURE_THRESHOLD)]
+    for attempt in range(FAILURE_THRESHOLD):
+        now[0] += ERROR_RATE_HALF_LIFE if attempt else 0  # Not demoted by its (decaying) error rate
+        assert router.invoke(client, "hi", route).content == "backup:small"
+    assert router.snapshot()["big"]["consecutive_failures"] == FAILURE_THRESHOLD
+    assert len(primary.calls) == 2 + FAILURE_THRESHOLD
+    assert router.candidates(route, client) == ["local:small", "big"]
+    now[0] += DOWN_COOLDOWN
+    assert router.invoke(client, "hi", route).content == "primary:big"
+    assert router.snapshot()["big"]["consecutive_failures"] == 0
+
+    # Errors another model would not fix propagate
+    primary.failures["big"] = [ProviderError(400)]
+    with pytest.raises(LLMInvocationError, match="400"):
+        router.invoke(client, "hi", route)
+    assert len(backup.calls) == 2 + FAILURE_THRESHOLD
+
+    # The rate scheduler's Retry-After pause also counts as unavailable
+    scheduler = RateLimitScheduler()
+    scheduler.release(scheduler.acquire("big"), error=ProviderError(429, retry_after="30"))
+    assert router.candidates(route, _client(primary, scheduler)) == ["local:small", "big"]
+
+
+def test_stream_failover_and_latency_selection():
+    endpoint = LocalEndpoint("local", {"big": [ProviderError(529)]})
+    router, now = _router(["big", "small"])
+    client = _client(endpoint)
+    route = router.route()
+
+    events = list(router.invoke_stream(client, "hi", route))
+    assert "".join(event.text for event in events) == "local:small"
+    assert events[-1].response.model == "small"
+
+    # Once text was streamed the call cannot move to another model
+    now[0] += THROTTLE_COOLDOWN
+    endpoint.failures["mid-stream"] = [ProviderError(529)]
+    with pytest.raises(LLMInvocationError):
+        list(router.invoke_stream(client, "hi", route))
+    assert [model for model, _ in endpoint.calls] == ["big", "small", "big"]
+    assert router.snapshot()["big"]["errors"] == 2
+
+    # "latency" tiers try the model with the lowest latency first
+    fast, _ = _router(["slow", "quick"], select="latency")
+    fast.record("slow", latency_ms=900)
+    fast.record("quick", latency_ms=200)
+    assert fast.candidates(fast.route(), client) == ["quick", "slow"]
+    # ... unless its error rate is too high
+    fast.record("quick", error=ProviderError(500))
+    fast.record("quick", error=ProviderError(500))
+    assert fast.candidates(fast.route(), client) == ["slow", "quick"]
+
+    # "cost" tiers try the cheapest healthy model first (CostTracker.PRICING)
+    cheap, _ = _router(["claude-3-5-sonnet-20241022", "claude-3-haiku-20240307", "claude-3-5-haiku-20241022"],
+                       select="cost")
+    assert cheap.candidates(cheap.route(), client) == [
+        "claude-3-haiku-20240307", "claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022"
+    ]
+    cheap.record("claude-3-haiku-20240307", error=ProviderError(429))
+    assert cheap.candidates(cheap.route(), client)[0] == "claude-3-5-haiku-20241022"
+
+
+def test_orchestrator_uses_routed_model(tmp_path, monkeypatch):
+    import core_orchestrator
+    from core_orchestrator import CoreOrchestrator
+
+    workspace = tmp_path / "workspaces" / "canvas"
+    workspace.mkdir(parents=True)
+    (workspace / "project_manifest.json").write_text(json.dumps({
+        "apiVersion": "agency.os/v1alpha1",
+        "kind": "Project",
+        "metadata": {"projectId": "canvas", "name": "canvas", "owner": "test", "createdAt": "2025-01-01T00:00:00Z"},
+        "status": {"projectPhase": "PLANNING"},
+        "artifacts": {},
+        "budget": {"max_cost_usd": 1.0},
+    }))
+    endpoint = LocalEndpoint("local", {"claude-3-5-haiku-20241022": [ProviderError(529)]})
+    router = ModelRouter()
+    monkeypatch.setattr(core_orchestrator, "get_model_router", lambda: router)
+
+    orchestrator = CoreOrchestrator(REPO_ROOT, execution_mode="autonomous")
+    orchestrator.workspaces_dir = tmp_path / "workspaces"
+    orchestrator.llm_client = _client(endpoint)
+    manifest = orchestrator.load_project_manifest("canvas")
+    result = orchestrator._execute_autonomous("LEAN_CANVAS_VALIDATOR", "hi", manifest, task_id="03_handoff")
+
+    # Fast tier, degraded to its second model
+    assert endpoint.calls == [("claude-3-5-haiku-20241022", 2048), ("claude-3-haiku-20240307", 2048)]
+    assert result == {"text": "local:claude-3-haiku-20240307"}
+    assert orchestrator.llm_client.cost_tracker.total_cost == pytest.approx((10 * 0.25 + 20 * 1.25) / 1e6)
@@ -0,0 +1,65 @@
+"""
+Tests for the compiled prompt bundle (vibe-cli compile).
+
+Verifies that:
+1. A compiled bundle serves composition inputs without re-parsing
+2. Files edited after compilation are read from the source tree
+3. Prompts composed from the bundle match prompts composed from source
+"""
+
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from prompt_bundle import compile_bundle, load_bundle, bundle_status  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+
+def _make_agent(root: Path) -> None:
+    agent = root / "agents" / "DEMO"
+    (agent / "tasks").mkdir(parents=True)
+    (agent / "_composition.yaml").write_text("agent_id: DEMO\n")
+    (agent / "_prompt_core.md").write_text("core personality")
+    (agent / "tasks" / "task_01.meta.yaml").write_text("task_id: '01'\n")
+
+
+def test_bundle_serves_files_until_they_change(tmp_path):
+    _make_agent(tmp_path)
+    bundle = tmp_path / "bundle.json"
+    info = compile_bundle(tmp_path, {"DEMO": "agents/DEMO"}, bundle)
+    assert info.agents == 1
+    assert info.yaml_files == 2
+
+    cache = CompositionCache()
+    assert load_bundle(tmp_path, cache, bundle) is not None
+
+    core = tmp_path / "agents" / "DEMO" / "_prompt_core.md"
+    assert cache.read_yaml(tmp_path / "agents" / "DEMO" / "_composition.yaml") == {"agent_id": "DEMO"}
+    assert cache.read_text(core) == "core personality"
+
+    core.write_text("edited personality")
+    st = os.stat(core)
+    os.utime(core, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    fresh = CompositionCache()
+    load_bundle(tmp_path, fresh, bundle)
+    assert fresh.read_text(core) == "edited personality"
+    assert bundle_status(tmp_path, bundle)["stale_files"] == ["agents/DEMO/_prompt_core.md"]
+
+
+def test_bundled_prompt_matches_source(tmp_path):
+    runtime_registry = {"VIBE_ALIGNER": "agency_os/01_planning_framework/agents/VIBE_ALIGNER"}
+    bundle = tmp_path / "bundle.json"
+    compile_bundle(REPO_ROOT, runtime_registry, bundle)
+
+    bundled_cache = CompositionCache()
+    load_bundle(REPO_ROOT, bundled_cache, bundle)
+
+    from_bundle = PromptRuntime(cache=bundled_cache).execute_task("VIBE_ALIGNER", "02_feature_extraction", {})
+    from_source = PromptRuntime(cache=CompositionCache()).execute_task("VIBE_ALIGNER", "02_feature_extraction", {})
+
+    assert from_bundle == from_source
@@ -0,0 +1,79 @@
+"""
+Tests for prefix-stable prompt blocks and prompt-cache support in LLMClient.
+
+Verifies that:
+1. Blocks join to exactly the composed prompt, stable layers first
+2. Cache breakpoints stop at the first volatile block
+3. PromptRegistry puts the per-call context after the agent prompt
+4. LLMClient sends cached blocks as system content with cache_control
+5. CostTracker prices cache writes and reads separately
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from llm_client import CostTracker, LLMClient  # noqa: E402
+from prompt_blocks import blocks_to_text, build_prompt_blocks  # noqa: E402
+from prompt_registry import PromptRegistry  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+CONTEXT = {"project_id": "demo", "user_input": "A booking app"}
+
+
+def test_blocks_join_to_prompt_with_stable_prefix_cached():
+    runtime = PromptRuntime(cache=CompositionCache())
+    prompt = runtime.execute_task("VIBE_ALIGNER", "02_feature_extraction", CONTEXT, token_budget=10**9)
+    blocks, _ = runtime.compose_blocks("VIBE_ALIGNER", "02_feature_extraction", CONTEXT, token_budget=10**9)
+
+    assert blocks_to_text(blocks) == prompt
+    assert [b.layers for b in blocks] == [("core",), ("knowledge",), ("task", "gates"), ("runtime_context",)]
+    assert [b.cache_breakpoint for b in blocks] == [True, True, True, False]
+
+
+def test_no_breakpoint_after_volatile_block():
+    blocks = build_prompt_blocks([
+        ("core", "A"), ("runtime_context", "B"), ("task", "C"), ("unknown_layer", "D")
+    ])
+    assert [b.cache_breakpoint for b in blocks] == [True, False, False, False]
+    assert blocks_to_text(blocks) == "ABCD"
+
+
+def test_registry_puts_context_last():
+    blocks, report = PromptRegistry.compose_blocks(
+        "VIBE_ALIGNER", "02_feature_extraction", workspace="default",
+        inject_governance=False, context=dict(CONTEXT), token_budget=10**9
+    )
+    assert blocks[-1].layers == ("runtime_context", "context")
+    assert not blocks[-1].cache_breakpoint
+    assert "# === CONTEXT ===" not in "".join(b.text for b in blocks[:-1])
+    assert "context" in report.registry_layers
+
+
+def test_llm_client_sends_cache_control_and_prices_cache_reads(fake_anthropic):
+    client = fake_anthropic(
+        LLMClient(), usage={"cache_creation_input_tokens": None, "cache_read_input_tokens": 9000}
+    )
+    messages = client.client.messages
+
+    blocks = build_prompt_blocks([("core", "core"), ("knowledge", "kb"), ("runtime_context", "ctx")])
+    response = client.invoke(prompt=blocks)
+
+    request = messages.calls[0]
+    assert [b["text"] for b in request["system"]] == ["core", "kb"]
+    assert all(b["cache_control"] == {"type": "ephemeral"} for b in request["system"])
+    assert request["messages"] == [{"role": "user", "content": [{"type": "text", "text": "ctx"}]}]
+
+    assert response.usage.cache_read_tokens == 9000
+    assert response.usage.cache_write_tokens == 0
+    tracker = CostTracker()
+    assert abs(response.usage.cost_usd - tracker.calculate_cost(100, 10, "claude-3-5-sonnet-20241022", 0, 9000)) < 1e-12
+    assert tracker.calculate_cost(0, 0, "claude-3-5-sonnet-20241022", 1_000_000, 1_000_000) == 3.75 + 0.30
+
+    # Plain strings keep the original single-message request
+    client.invoke(prompt="hello")
+    assert "system" not in messages.calls[1]
+    assert messages.calls[1]["messages"] == [{"role": "user", "content": "hello"}]
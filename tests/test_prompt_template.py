@@ -0,0 +1,88 @@
+"""
+Tests for precompiled prompt templates (CompositionSpec.variables).
+
+Verifies that:
+1. Templates compile into segments/slots and render with one join
+2. Undeclared ${...} text (LLM instructions) stays literal
+3. Declared variables are substituted in core, task and gate fragments,
+   with path_pattern and resolve_from honoured
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+import prompt_runtime  # noqa: E402
+from composition_cache import CompositionCache  # noqa: E402
+from prompt_template import compile_template, resolve_variables  # noqa: E402
+
+COMPOSITION = """\
+composition_version: "2.0"
+agent_id: TEMPLATE_AGENT
+agent_version: "1.0"
+composition_order:
+  - source: _prompt_core.md
+    type: base
+  - source: ${task_prompt}
+    type: task
+    path_pattern: steps/${task_id}.md
+  - source: ${gate_prompts}
+    type: validation
+    resolve_from: tasks/${task_id}.meta.yaml#validation_gates
+    path_pattern: checks/${gate_id}.md
+variables:
+  project_id: ${runtime_context.project_id}
+  owner: ${runtime_context.team.owner}
+"""
+
+
+def test_compile_and_render():
+    template = compile_template("A ${x} B ${y} C ${z}", frozenset({"x", "y"}))
+    assert template.segments == ("A ", " B ", " C ${z}")
+    assert template.slots == ("x", "y")
+    assert template.render({"x": "1", "y": "2"}) == "A 1 B 2 C ${z}"
+    # Unresolved slots render back to their placeholder
+    assert template.render({"x": "1"}) == "A 1 B ${y} C ${z}"
+
+    static = compile_template("no slots ${budget}", frozenset({"x"}))
+    assert static.is_static
+    assert static.render({}) is static.segments[0]
+
+
+def test_resolve_variables_skips_missing_values():
+    values = resolve_variables(
+        {"project_id": "${runtime_context.project_id}", "phase": "${runtime_context.phase}", "fixed": 3},
+        {"runtime_context": {"project_id": "demo"}}
+    )
+    assert values == {"project_id": "demo", "fixed": "3"}
+
+
+def test_runtime_substitutes_declared_variables(tmp_path, monkeypatch):
+    agent = tmp_path / "agents" / "TEMPLATE_AGENT"
+    (agent / "steps").mkdir(parents=True)
+    (agent / "tasks").mkdir()
+    (agent / "checks").mkdir()
+    (agent / "_composition.yaml").write_text(COMPOSITION)
+    (agent / "_knowledge_deps.yaml").write_text("required_knowledge: []\n")
+    (agent / "_prompt_core.md").write_text("Project ${project_id} owned by ${owner}. Budget: ${user_budget}")
+    (agent / "steps" / "01_plan.md").write_text("Plan ${project_id}")
+    (agent / "tasks" / "task_01_plan.meta.yaml").write_text(
+        "task_id: 01_plan\nphase: 1\nvalidation_gates: [gate_scope.md]\n"
+    )
+    (agent / "checks" / "gate_scope.md").write_text("Scope of ${project_id}")
+    monkeypatch.setitem(prompt_runtime.AGENT_REGISTRY, "TEMPLATE_AGENT", "agents/TEMPLATE_AGENT")
+
+    runtime = prompt_runtime.PromptRuntime(base_path=str(tmp_path), cache=CompositionCache())
+    prompt = runtime.execute_task(
+        "TEMPLATE_AGENT", "01_plan", {"project_id": "demo", "team": {"owner": "ops"}}, token_budget=10**9
+    )
+
+    assert "Project demo owned by ops. Budget: ${user_budget}" in prompt
+    assert "Plan demo" in prompt
+    assert "Scope of demo" in prompt
+
+    # Same compiled templates, different values
+    other = runtime.execute_task("TEMPLATE_AGENT", "01_plan", {"project_id": "other"}, token_budget=10**9)
+    assert "Project other owned by ${owner}." in other
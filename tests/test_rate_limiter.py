@@ -0,0 +1,153 @@
+"""
+Tests for the RPM/TPM rate scheduler.
+
+Verifies that:
+1. Calls wait until their estimated tokens fit the per-minute buckets
+2. Concurrency adapts AIMD-style (halved on 429/529, grown on success)
+3. Retry-After pauses every caller of the model; LLMClient retries honor it
+4. Queue depth and wait times are exposed per model
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from llm_client import LLMClient, is_retryable  # noqa: E402
+from rate_limiter import RateLimits, RateLimitScheduler, is_throttled, retry_after  # noqa: E402
+
+MODEL = "claude-3-5-sonnet-20241022"
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 rate limited")
+        self.status_code = 429
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+def test_token_buckets_delay_admission():
+    # 60k input tokens per minute = 1000 per second
+    scheduler = RateLimitScheduler(default=RateLimits(input_tpm=60_000))
+    first = scheduler.acquire(MODEL, input_tokens=60_000, max_tokens=10)
+    assert first.waited_ms < 50
+    scheduler.release(first, input_tokens=60_000, output_tokens=10)
+
+    start = time.perf_counter()
+    second = scheduler.acquire(MODEL, input_tokens=100, max_tokens=10)
+    assert time.perf_counter() - start >= 0.09
+    scheduler.release(second, input_tokens=100, output_tokens=5)
+
+    stats = scheduler.snapshot()[MODEL]
+    assert stats["admitted"] == 2 and stats["in_flight"] == 0
+    assert stats["wait"]["max_ms"] >= 90
+    assert stats["limits"]["input_tpm"] == 60_000
+
+
+def test_aimd_concurrency_and_queue_depth():
+    scheduler = RateLimitScheduler(max_in_flight=4)
+    tickets = [scheduler.acquire(MODEL) for _ in range(4)]
+
+    # A fifth caller queues until a slot is released
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(scheduler.acquire(MODEL)), daemon=True)
+    waiter.start()
+    time.sleep(0.05)
+    assert scheduler.snapshot()[MODEL]["queue_depth"] == 1 and not admitted
+
+    # One burst of 429s halves the limit once: 2 in flight, the waiter still queues
+    scheduler.release(tickets[0], error=RateLimitError())
+    scheduler.release(tickets[1], error=RateLimitError())
+    time.sleep(0.05)
+    stats = scheduler.snapshot()[MODEL]
+    assert stats["concurrency_limit"] == 2.0 and stats["throttled"] == 2
+    assert stats["queue_depth"] == 1 and stats["in_flight"] == 2
+
+    scheduler.release(tickets[2], 10, 10)
+    waiter.join(1)
+    assert admitted and scheduler.snapshot()[MODEL]["peak_queue_depth"] == 1
+
+    for ticket in tickets[3:] + admitted:
+        scheduler.release(ticket, 10, 10)
+    stats = scheduler.snapshot()[MODEL]
+    assert stats["in_flight"] == 0 and 2.0 < stats["concurrency_limit"] <= 4.0
+
+
+class RecordingClock:
+    """time.monotonic() that keeps its last reading (the scheduler's release/admission time)"""
+
+    def __init__(self):
+        self.last = None
+
+    def __call__(self):
+        self.last = time.monotonic()
+        return self.last
+
+
+def test_retry_after_pauses_sync_and_async_callers():
+    clock = RecordingClock()
+    scheduler = RateLimitScheduler(clock=clock)
+
+    # Measured from the release the scheduler recorded to the admission it recorded
+    scheduler.release(scheduler.acquire(MODEL), error=RateLimitError(retry_after="0.2"))
+    released_at = clock.last
+    ticket = scheduler.acquire(MODEL)
+    assert clock.last - released_at >= 0.2
+    scheduler.release(ticket, 1, 1)
+
+    scheduler.release(scheduler.acquire(MODEL), error=RateLimitError(retry_after="0.1"))
+    released_at = clock.last
+    ticket = asyncio.run(scheduler.acquire_async(MODEL))
+    assert clock.last - released_at >= 0.1
+    scheduler.release(ticket)
+
+
+def test_retry_after_parsing():
+    assert retry_after(RateLimitError("3")) == 3.0
+    assert retry_after(RateLimitError()) is None
+    error = RateLimitError()
+    error.response.headers["retry-after-ms"] = "250"
+    assert retry_after(error) == 0.25
+    assert 5 < retry_after(RateLimitError(formatdate(time.time() + 10, usegmt=True))) <= 10
+
+    overloaded = Exception("529 overloaded")
+    overloaded.status_code = 529
+    assert is_throttled(overloaded) and is_retryable(overloaded)
+    assert not is_throttled(ValueError("400"))
+
+
+def test_client_retries_after_server_delay(fake_anthropic):
+    scheduler = RateLimitScheduler(default=RateLimits(rpm=600, output_tpm=100_000))
+    client = fake_anthropic(
+        LLMClient(response_cache=None, rate_scheduler=scheduler),
+        usage={"input_tokens": 1200, "output_tokens": 300}, failures={"hello": [RateLimitError(retry_after="0.1")]}
+    )
+    start = time.perf_counter()
+    assert client.invoke("hello", max_tokens=1000).content == "ok"
+    assert time.perf_counter() - start >= 0.1
+
+    stats = scheduler.snapshot()[MODEL]
+    assert stats["admitted"] == 2 and stats["throttled"] == 1 and stats["in_flight"] == 0
+    # Output estimates follow observed usage instead of max_tokens
+    assert scheduler.acquire(MODEL, max_tokens=1000).output_tokens < 1000
+
+
+@pytest.mark.parametrize("value", [None, "0"])
+def test_shared_scheduler_toggle(monkeypatch, value):
+    import rate_limiter
+
+    if value is None:
+        monkeypatch.delenv("VIBE_LLM_RATE_LIMIT", raising=False)
+        assert rate_limiter.get_rate_scheduler() is rate_limiter.get_rate_scheduler() is not None
+    else:
+        monkeypatch.setenv("VIBE_LLM_RATE_LIMIT", value)
+        assert LLMClient(response_cache=None).rate_scheduler is None
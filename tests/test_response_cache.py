@@ -0,0 +1,114 @@
+"""
+Tests for the on-disk LLM response cache.
+
+Verifies that:
+1. A repeated request is answered from disk at $0 (hit accounted in CostTracker)
+2. Keys ignore cache_control markers and whitespace noise, but not parameters
+3. TTL expiry, LRU eviction and per-agent disabling
+4. Writes track the cache size in the index and only scan the directory
+   when it passes the cap
+"""
+
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from llm_client import LLMClient  # noqa: E402
+from prompt_blocks import build_prompt_blocks  # noqa: E402
+from response_cache import ResponseCache, response_cache_key  # noqa: E402
+
+
+# Replies of the fake Anthropic client (conftest.py)
+REPLY = {"text": lambda prompt, n: f"answer {n}", "usage": {"input_tokens": 2000, "output_tokens": 500}}
+
+
+def test_repeated_request_is_free(tmp_path, fake_anthropic):
+    cache = ResponseCache(tmp_path)
+    first = fake_anthropic(LLMClient(response_cache=cache), **REPLY)
+    response = first.invoke("plan the project", agent="VIBE_ALIGNER")
+    assert response.usage.cost_usd > 0
+
+    # A new process (new client and tracker) replays it from disk
+    second = fake_anthropic(LLMClient(response_cache=ResponseCache(tmp_path)), **REPLY)
+    replay = second.invoke("plan the project", agent="VIBE_ALIGNER")
+    assert len(second.client.messages.calls) == 0
+    assert replay.content == response.content == "answer 1"
+    assert replay.usage.cached and replay.usage.cost_usd == 0.0
+
+    summary = second.get_cost_summary()
+    assert summary["total_cost_usd"] == 0
+    assert summary["response_cache_hits"] == 1
+    assert summary["response_cache_saved_usd"] == round(response.usage.cost_usd, 4)
+    assert second.response_cache.stats()["hits"] == 1
+
+    # Different parameters are different requests
+    second.invoke("plan the project", agent="VIBE_ALIGNER", max_tokens=100)
+    assert len(second.client.messages.calls) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_key_normalization():
+    blocks = build_prompt_blocks([("core", "core"), ("runtime_context", "ctx")])
+    system, messages = LLMClient._build_request(blocks)
+    stripped = [{k: v for k, v in item.items() if k != "cache_control"} for item in system]
+
+    key = response_cache_key("m", system, messages, 4096, 1.0)
+    assert key == response_cache_key("m", stripped, messages, 4096, 1)
+    assert response_cache_key("m", [], [{"role": "user", "content": "a\r\nb  \n"}], 10, 0) == \
+        response_cache_key("m", None, [{"role": "user", "content": "a\nb"}], 10, 0.0)
+    assert key != response_cache_key("m", system, messages, 4096, 0.5)
+    assert key != response_cache_key("other", system, messages, 4096, 1.0)
+
+
+def test_ttl_eviction_and_disabled_agents(tmp_path, fake_anthropic):
+    cache = ResponseCache(tmp_path, ttl_seconds=60, disabled_agents=["AUDITOR"])
+    client = fake_anthropic(LLMClient(response_cache=cache), **REPLY)
+
+    client.invoke("audit", agent="AUDITOR")
+    client.invoke("audit", agent="AUDITOR")
+    assert len(client.client.messages.calls) == 2
+    assert cache.stats()["entries"] == 0
+
+    client.invoke("old")
+    (entry,) = tmp_path.glob("*.json")
+    old = entry.read_text().replace('"created":', '"created":1,"_":', 1)
+    entry.write_text(old)
+    client.invoke("old")
+    assert len(client.client.messages.calls) == 4
+    assert cache.stats()["expired"] == 1
+
+    # LRU: the cap keeps the most recently used entries
+    small = ResponseCache(tmp_path / "small", max_bytes=10_000)
+    for i in range(3):
+        small.put(f"k{i}", {"content": "x" * 3000})
+        os.utime(small._path(f"k{i}"), (i, i))
+    assert small.get("k0") is not None  # refreshes k0
+    small.put("k3", {"content": "x" * 3000})
+    assert small.get("k1") is None
+    assert small.get("k0") is not None and small.get("k3") is not None
+
+
+def test_writes_scan_only_past_the_cap(tmp_path, monkeypatch):
+    scans = []
+    evict = ResponseCache.evict
+    monkeypatch.setattr(ResponseCache, "evict", lambda self: scans.append(1) or evict(self))
+    cache = ResponseCache(tmp_path, max_bytes=10_000)
+    other = ResponseCache(tmp_path, max_bytes=10_000)  # A second process on the same directory
+
+    cache.put("k0", {"content": "x" * 1000})
+    assert len(scans) == 1  # Builds the index
+    for i in range(1, 4):
+        (cache if i % 2 else other).put(f"k{i}", {"content": "x" * 1000})
+    cache.put("k1", {"content": "x" * 1000})  # Overwrite: counted once
+    assert len(scans) == 1
+    assert abs(cache._index_bytes - cache.stats()["bytes"]) < 100
+
+    for i in range(4, 10):
+        other.put(f"k{i}", {"content": "x" * 1000})
+    assert len(scans) == 2
+    assert cache.stats()["bytes"] <= 9_000
+    other.put("k10", {"content": "x" * 500})
+    assert len(scans) == 2  # Trimmed below the cap, no rescan on the next write
@@ -0,0 +1,64 @@
+"""
+Tests for streaming prompt composition and the INTELLIGENCE_REQUEST writer.
+
+Verifies that:
+1. compose_stream() yields chunks that join to exactly the composed prompt
+2. The streaming envelope writer produces the same bytes as json.dumps()
+3. The writer can target a file path
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "orchestrator"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from intelligence_request import write_intelligence_request  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+
+CONTEXT = {"project_id": "demo", "phase": "PLANNING", "sub_state": None}
+
+
+def _expected(prompt):
+    request = {
+        "type": "INTELLIGENCE_REQUEST",
+        "agent": "VIBE_ALIGNER",
+        "task_id": "02_feature_extraction",
+        "prompt": prompt,
+        "context": CONTEXT,
+        "wait_for_response": True
+    }
+    return json.dumps(request, indent=2) + "\n"
+
+
+def test_stream_chunks_join_to_prompt():
+    runtime = PromptRuntime(cache=CompositionCache())
+    prompt = runtime.execute_task("VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=10**9)
+    chunks, report = runtime.compose_stream("VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=10**9)
+
+    chunks = list(chunks)
+    assert len(chunks) > 1
+    assert "".join(chunks) == prompt
+    assert report.total_tokens > 0
+
+
+def test_envelope_matches_json_dumps():
+    chunks = ["# Prompt \"quoted\"\n", "tabs\tand \\ backslashes ", "unicode: Fließband ✓ 🚀", ""]
+    out = io.StringIO()
+
+    length = write_intelligence_request(out, "VIBE_ALIGNER", "02_feature_extraction", iter(chunks), CONTEXT)
+
+    assert out.getvalue() == _expected("".join(chunks))
+    assert length == len("".join(chunks))
+
+
+def test_envelope_written_to_file(tmp_path):
+    target = tmp_path / "request.json"
+    write_intelligence_request(target, "VIBE_ALIGNER", "02_feature_extraction", "plain prompt", CONTEXT)
+
+    assert json.loads(target.read_text())["prompt"] == "plain prompt"
+    assert target.read_text() == _expected("plain prompt")
@@ -0,0 +1,90 @@
+"""
+Tests for token-budget-aware prompt composition.
+
+Verifies that:
+1. Budgets resolve explicit -> task -> agent -> max(NFR warning threshold,
+   estimated_tokens)
+2. Every composition returns a per-layer report
+3. Reduction strategies run in priority order until the prompt fits;
+   required knowledge the context matches nothing in stays whole, and a
+   prompt still over budget afterwards is marked exhausted
+4. A generous budget leaves the prompt untouched
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from prompt_runtime import PromptRuntime  # noqa: E402
+from token_budget import WARNING_THRESHOLD_TOKENS, estimate_tokens, resolve_token_budget  # noqa: E402
+
+FEATURES = {"features": [{"name": "User Authentication"}, {"name": "Real-time chat"}]}
+
+
+def test_resolve_token_budget_precedence():
+    assert resolve_token_budget(5000, 7000, 9000, 1500) == 5000
+    assert resolve_token_budget(None, 7000, 9000, 1500) == 7000
+    assert resolve_token_budget(None, None, 9000, 1500) == 9000
+    assert resolve_token_budget(None, None, None, 1500) == WARNING_THRESHOLD_TOKENS
+    assert resolve_token_budget(None, None, None, 60000) == 60000
+
+
+def test_report_has_layer_estimates():
+    runtime = PromptRuntime(cache=CompositionCache())
+    prompt, report = runtime.compose_with_report(
+        "VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=10**9
+    )
+
+    assert report.reductions == []
+    assert report.initial_tokens == report.total_tokens
+    assert {"core", "knowledge", "task", "gates", "runtime_context"} <= set(report.layers)
+    assert abs(report.total_tokens - estimate_tokens(prompt)) < 50
+    assert runtime.last_report is report
+
+
+def test_reductions_applied_in_priority_order():
+    runtime = PromptRuntime(cache=CompositionCache())
+    context = dict(FEATURES, notes="x" * 40000)
+
+    _, report = runtime.compose_with_report("VIBE_ALIGNER", "04_gap_detection", context, token_budget=8000)
+
+    strategies = [r.strategy for r in report.reductions]
+    assert strategies[0] == "truncate_runtime_context"
+    assert report.total_tokens < report.initial_tokens
+    assert report.within_budget
+
+
+def test_optional_knowledge_dropped_last():
+    runtime = PromptRuntime(cache=CompositionCache())
+    full = runtime.execute_task("VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=10**9)
+    reduced, report = runtime.compose_with_report("VIBE_ALIGNER", "02_feature_extraction", {}, token_budget=1000)
+
+    assert [r.strategy for r in report.reductions] == ["slice_knowledge", "drop_optional_knowledge"]
+    assert "# === KNOWLEDGE BASE ===" in full
+    assert "# === KNOWLEDGE BASE ===" not in reduced
+    # Core + task alone exceed 1000 tokens - reported, not raised
+    assert not report.within_budget and report.exhausted
+    assert "after all reductions" in report.summary() and report.to_dict()["exhausted"]
+
+
+def test_unmatched_required_knowledge_is_kept_whole():
+    runtime = PromptRuntime(cache=CompositionCache())
+    # Realistic context, but no knowledge entry mentions any of it
+    context = {"project_name": "zyxwv", "features": [{"name": "Qwertz flux", "description": "Plorb the vexil"}]}
+
+    full = runtime.execute_task("VIBE_ALIGNER", "04_gap_detection", dict(context), token_budget=10**9)
+    prompt, report = runtime.compose_with_report("VIBE_ALIGNER", "04_gap_detection", context, token_budget=10000)
+
+    # FDG_dependencies.yaml is critical for gap detection: never sliced to nothing
+    assert "Relevance-sliced: 0 of" not in prompt
+    assert prompt.count("FDG-0") == full.count("FDG-0") >= 60
+    # The overrun is reported instead
+    assert not report.within_budget and report.exhausted
+    assert "after all reductions" in report.summary()
+
+    # Without an explicit budget nothing is reduced (default: NFR warning threshold)
+    _, default = runtime.compose_with_report("VIBE_ALIGNER", "04_gap_detection", context)
+    assert default.budget_tokens == WARNING_THRESHOLD_TOKENS and default.reductions == []
@@ -0,0 +1,104 @@
+"""
+Tests for the precompiled tool catalog (GAD-003 tool sections).
+
+Verifies that:
+1. tool_definitions.yaml is parsed once and re-read only after it changes
+2. Sections are rendered in definition order with the usage footer
+3. A prompt carries a single tools section when PromptRegistry injects
+   tools into an agent that declares its own tools step
+"""
+
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+import prompt_runtime  # noqa: E402
+from composition_cache import CompositionCache  # noqa: E402
+from prompt_registry import PromptRegistry  # noqa: E402
+from tool_catalog import DEFAULT_TOOL_DEFINITIONS, get_tool_catalog  # noqa: E402
+
+TOOLS_YAML = """\
+tools:
+  alpha:
+    description: "First tool"
+    parameters:
+      query: {type: string, required: true, description: "Query"}
+  beta:
+    description: "Second tool"
+"""
+
+COMPOSITION = """\
+composition_version: "2.0"
+agent_id: TOOL_AGENT
+agent_version: "1.0"
+tools: [alpha]
+composition_order:
+  - source: _prompt_core.md
+    type: base
+  - source: tools.yaml
+    type: tools
+  - source: ${task_prompt}
+    type: task
+    path_pattern: tasks/${task_id}.md
+"""
+
+
+def test_catalog_loaded_once_and_invalidated(tmp_path):
+    cache = CompositionCache()
+    tools_file = tmp_path / "tools.yaml"
+    tools_file.write_text(TOOLS_YAML)
+
+    catalog = get_tool_catalog(tools_file, cache)
+    assert catalog.names == ["alpha", "beta"]
+    assert get_tool_catalog(tools_file, cache) is catalog
+
+    tools_file.write_text(TOOLS_YAML.replace("Second tool", "Changed tool"))
+    stat = tools_file.stat()
+    os.utime(tools_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = get_tool_catalog(tools_file, cache)
+    assert reloaded is not catalog
+    assert "Changed tool" in reloaded.blocks["beta"]
+
+
+def test_section_rendering(tmp_path):
+    tools_file = tmp_path / "tools.yaml"
+    tools_file.write_text(TOOLS_YAML)
+    catalog = get_tool_catalog(tools_file, CompositionCache())
+
+    section = catalog.section(["beta", "alpha", "unknown"])
+    assert section.index("## Tool: `alpha`") < section.index("## Tool: `beta`")
+    assert "- `query` (string) (required): Query" in section
+    assert section.count("### How to use tools:") == 1
+    assert catalog.section(["alpha", "beta"]) is section
+    assert catalog.missing(["alpha", "unknown"]) == ["unknown"]
+    assert "No tools available" in catalog.section(["unknown"])
+
+    # The shipped definitions include the artifact fetch tool
+    assert "fetch_artifact" in get_tool_catalog(DEFAULT_TOOL_DEFINITIONS).names
+
+
+def test_registry_merges_tools_into_single_section(tmp_path, monkeypatch):
+    agent = tmp_path / "agents" / "TOOL_AGENT"
+    (agent / "tasks").mkdir(parents=True)
+    (agent / "_composition.yaml").write_text(COMPOSITION)
+    (agent / "_knowledge_deps.yaml").write_text("required_knowledge: []\n")
+    (agent / "_prompt_core.md").write_text("Core")
+    (agent / "tools.yaml").write_text(TOOLS_YAML)
+    (agent / "tasks" / "task_01_search.md").write_text("Search")
+    (agent / "tasks" / "task_01_search.meta.yaml").write_text("task_id: 01_search\nphase: 1\n")
+    monkeypatch.setitem(prompt_runtime.AGENT_REGISTRY, "TOOL_AGENT", "agents/TOOL_AGENT")
+    monkeypatch.setattr(PromptRegistry, "_runtime", prompt_runtime.PromptRuntime(base_path=str(tmp_path)))
+
+    alone = PromptRegistry.compose("TOOL_AGENT", "01_search", inject_governance=False, token_budget=10**9)
+    assert alone.count("# === AVAILABLE TOOLS ===") == 1
+    assert "## Tool: `alpha`" in alone and "## Tool: `beta`" not in alone
+
+    merged = PromptRegistry.compose(
+        "TOOL_AGENT", "01_search", inject_governance=False, inject_tools=["beta", "alpha"], token_budget=10**9
+    )
+    assert merged.count("# === AVAILABLE TOOLS ===") == 1
+    assert merged.count("## Tool: `alpha`") == 1 and merged.count("## Tool: `beta`") == 1
+    assert merged.count("### How to use tools:") == 1
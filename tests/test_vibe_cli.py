@@ -0,0 +1,65 @@
+"""
+Smoke tests for vibe-cli.py.
+
+Verifies that:
+1. The CLI starts and its subcommands run end to end (generate-all exits
+   non-zero when a prompt cannot be composed)
+2. set_active_workspace() sets $ACTIVE_WORKSPACE without leaving state files
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import workspace_utils  # noqa: E402
+
+
+def _cli(*args, cwd=REPO_ROOT):
+    env = {key: value for key, value in os.environ.items() if key != "ACTIVE_WORKSPACE"}
+    return subprocess.run(
+        [sys.executable, str(REPO_ROOT / "vibe-cli.py"), *args],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120
+    )
+
+
+def test_cli_subcommands_run(tmp_path):
+    result = _cli("--help")
+    assert result.returncode == 0, result.stderr
+    for command in ("compile", "generate-all", "stats", "serve", "costs", "forecast"):
+        assert command in result.stdout
+
+    assert "VIBE_ALIGNER" in _cli("list").stdout
+
+    bundle = tmp_path / "bundle.json"
+    result = _cli("compile", "-o", str(bundle))
+    assert result.returncode == 0, result.stderr
+    assert json.loads(bundle.read_text())["agents"]
+
+    result = _cli("generate-all", "VIBE_ALIGNER", "-o", str(tmp_path / "prompts"))
+    assert result.returncode == 0, result.stdout
+    assert list((tmp_path / "prompts").glob("VIBE_ALIGNER.*.md"))
+    # Unknown agents (like failed compositions) make the command fail
+    assert _cli("generate-all", "NO_SUCH_AGENT", "-o", str(tmp_path / "prompts")).returncode == 1
+
+    result = _cli("costs", "--ledger", str(tmp_path / "ledger.sqlite"))
+    assert result.returncode == 0 and "nothing has been billed yet" in result.stdout
+
+    result = _cli("serve", "--status", "--socket", str(tmp_path / "compose.sock"))
+    assert result.returncode == 0 and "No composition server running" in result.stdout
+
+
+def test_set_active_workspace_uses_the_environment(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ACTIVE_WORKSPACE", raising=False)
+    assert workspace_utils.get_active_workspace() == "ROOT"
+
+    workspace_utils.set_active_workspace("acme_corp")
+    assert os.environ["ACTIVE_WORKSPACE"] == "acme_corp"
+    assert workspace_utils.get_active_workspace() == "acme_corp"
+    # No state file is left in the working directory
+    assert not list(tmp_path.iterdir())
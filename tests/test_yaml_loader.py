@@ -0,0 +1,96 @@
+"""
+Tests for the shared YAML loader (CSafeLoader + on-disk parse cache).
+
+Verifies that:
+1. Parsing matches yaml.safe_load and a fresh cache instance (new process) hits
+2. The cache is keyed by content, separates single/multi-document parses and
+   evicts least recently used entries beyond its cap
+3. Entries are JSON: every safe-loaded type round-trips and a pickle
+   planted as an entry is dropped, never loaded
+4. Parse errors raise YAMLParseError naming the file
+"""
+
+import datetime
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "agency_os" / "00_system" / "runtime"))
+
+from composition_cache import CompositionCache  # noqa: E402
+from yaml_loader import MISSING, YAMLDiskCache, YAMLParseError, load_yaml, parse_yaml  # noqa: E402
+
+FDG = REPO_ROOT / "agency_os" / "01_planning_framework" / "knowledge" / "FDG_dependencies.yaml"
+
+
+def test_disk_cache_survives_process_restart(tmp_path):
+    raw = FDG.read_bytes()
+    expected = list(yaml.safe_load_all(raw.decode("utf-8")))
+
+    first = YAMLDiskCache(tmp_path)
+    assert parse_yaml(raw, str(FDG), multi=True, disk_cache=first) == expected
+    assert first.stats()["entries"] == 1 and first.misses == 1
+
+    # A new instance stands in for the next process
+    second = YAMLDiskCache(tmp_path)
+    assert parse_yaml(raw, str(FDG), multi=True, disk_cache=second) == expected
+    assert second.hits == 1
+    # Single-document parse of the same content is a separate entry
+    assert second.get(second.key(raw, multi=False)) is MISSING
+
+
+def test_eviction_and_corrupt_entries(tmp_path):
+    cache = YAMLDiskCache(tmp_path, max_bytes=2500)
+    keys = [cache.key(str(i).encode()) for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, "x" * 1000)
+        os.utime(cache._path(key), ns=(age * 10**9, age * 10**9))
+    cache.put(cache.key(b"new"), "y" * 1000)
+
+    assert cache.get(keys[0]) is MISSING  # least recently used went first
+    assert cache.get(keys[2]) == "x" * 1000
+    assert cache.stats()["bytes"] <= 2500
+
+    cache._path(keys[2]).write_bytes(b"not json")
+    assert cache.get(keys[2]) is MISSING
+    assert not cache._path(keys[2]).exists()
+
+
+class _Planted:
+    def __reduce__(self):
+        return (os.remove, ("must-not-run",))
+
+
+def test_entries_are_json(tmp_path):
+    raw = (
+        b"date: 2025-01-02\nstamp: 2025-01-02 03:04:05+01:00\nblob: !!binary aGk=\n"
+        b"tags: !!set {a, b}\n1: int key\n__yaml__: [map]\nnested: {2025-01-02: [~, .inf]}\n"
+    )
+    expected = yaml.safe_load(raw)
+    cache = YAMLDiskCache(tmp_path)
+    key = cache.key(raw)
+    cache.put(key, expected)
+    assert YAMLDiskCache(tmp_path).get(key) == expected
+    assert isinstance(expected["stamp"], datetime.datetime) and expected["stamp"].utcoffset()
+
+    cache._path(key).write_bytes(pickle.dumps(_Planted()))
+    assert cache.get(key) is MISSING
+    assert not cache._path(key).exists()
+
+
+def test_parse_errors_name_the_file(tmp_path):
+    broken = tmp_path / "broken.yaml"
+    broken.write_text("a: [b\nc: d\n")
+
+    with pytest.raises(YAMLParseError) as excinfo:
+        load_yaml(broken)
+    assert excinfo.value.path == str(broken)
+    assert str(broken) in str(excinfo.value)
+
+    with pytest.raises(YAMLParseError):
+        CompositionCache().read_yaml(broken)
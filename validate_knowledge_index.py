@@ -4,10 +4,13 @@ Validation script for .knowledge_index.yaml
 Verifies that all referenced files exist and paths are correct.
 """
 
-import yaml
 import sys
 from pathlib import Path
 
+# Shared YAML loading (CSafeLoader + on-disk parse cache)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "agency_os" / "00_system" / "runtime"))
+from yaml_loader import YAMLParseError, load_yaml
+
 def validate_knowledge_index(index_path: str = ".knowledge_index.yaml") -> bool:
     """
     Validates the knowledge index file.
@@ -28,9 +31,8 @@ def validate_knowledge_index(index_path: str = ".knowledge_index.yaml") -> bool:
 
     # Load YAML
     try:
-        with open(index_file, 'r') as f:
-            index_data = yaml.safe_load(f)
-    except yaml.YAMLError as e:
+        index_data = load_yaml(index_file)
+    except YAMLParseError as e:
         print(f"❌ ERROR: Invalid YAML syntax: {e}")
         return False
 
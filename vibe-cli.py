@@ -6,6 +6,15 @@ Usage:
     ./vibe-cli.py list                                    # List all agents
     ./vibe-cli.py tasks VIBE_ALIGNER                      # List tasks for agent
     ./vibe-cli.py generate VIBE_ALIGNER 02_feature_extraction  # Generate prompt
+    ./vibe-cli.py generate-all --phase PLANNING           # Generate a prompt pack
+    ./vibe-cli.py compile                                 # Precompile prompt bundle
+    ./vibe-cli.py stats                                   # Composition timing histograms
+    ./vibe-cli.py serve                                   # Resident composition server
+    ./vibe-cli.py costs --project my_app                  # LLM spend from the cost ledger
+    ./vibe-cli.py forecast --project my_app               # Pre-flight cost/latency forecast
+
+While `serve` is running, `generate` (and vibe_helper.compose_prompt) compose
+through it from warm caches instead of loading the runtime in every process.
 
 The generated prompt is saved to: COMPOSED_PROMPT.md
 You can then copy/paste this into Claude Code.
@@ -15,7 +24,10 @@ import sys
 import os
 import argparse
 import json
+import time
 import getpass
+import logging
+import contextlib
 from pathlib import Path
 from datetime import datetime
 
@@ -28,6 +40,15 @@ spec = importlib.util.spec_from_file_location(
 prompt_runtime = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(prompt_runtime)
 PromptRuntime = prompt_runtime.PromptRuntime
+AGENT_REGISTRY = prompt_runtime.AGENT_REGISTRY
+
+# prompt_runtime puts the runtime directory on sys.path
+from prompt_bundle import compile_bundle
+from prompt_registry import PromptRegistry, CompositionRequest
+from composition_metrics import get_composition_metrics, TARGET_P50_MS, TARGET_P99_MS
+from composition_client import get_composition_client, CompositionClient, socket_path
+from token_budget import CompositionReport
+from cost_ledger import CostLedger, DEFAULT_LEDGER_PATH, GROUP_COLUMNS
 
 # CRITICAL FIX #2: Import workspace utilities
 sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
@@ -50,6 +71,22 @@ AGENT_DESCRIPTIONS = {
     "BUG_TRIAGE": "Bug analysis & remediation planning",
 }
 
+# SDLC phase -> framework directory whose agents the phase runs (generate-all --phase)
+PHASE_FRAMEWORKS = {
+    "PLANNING": "01_planning_framework",
+    "CODING": "02_code_gen_framework",
+    "TESTING": "03_qa_framework",
+    "DEPLOYMENT": "04_deploy_framework",
+    "MAINTENANCE": "05_maintenance_framework",
+}
+
+# Default runtime context for generated prompts
+DEFAULT_CONTEXT = {
+    "project_id": "user_project",
+    "workspace": "workspaces/user_project",
+    "phase": "PLANNING",
+}
+
 
 def list_agents():
     """List all available agents"""
@@ -57,9 +94,10 @@ def list_agents():
     print("AVAILABLE AGENTS")
     print("=" * 60 + "\n")
 
-    for agent_id, description in AGENT_DESCRIPTIONS.items():
+    # Every discovered agent; described ones first
+    for agent_id in sorted(AGENT_REGISTRY, key=lambda a: (a not in AGENT_DESCRIPTIONS, a)):
         print(f"  {agent_id}")
-        print(f"    → {description}\n")
+        print(f"    → {AGENT_DESCRIPTIONS.get(agent_id, AGENT_REGISTRY[agent_id])}\n")
 
     print("Use: ./vibe-cli.py tasks <AGENT_ID> to see tasks\n")
 
@@ -69,13 +107,12 @@ def list_tasks(agent_id: str):
     runtime = PromptRuntime()
 
     try:
-        agent_path = runtime._get_agent_path(agent_id)
+        task_ids = runtime.list_tasks(agent_id)
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
         return
 
-    tasks_dir = agent_path / "tasks"
-    if not tasks_dir.exists():
+    if not task_ids:
         print(f"\n❌ No tasks found for {agent_id}\n")
         return
 
@@ -83,23 +120,14 @@ def list_tasks(agent_id: str):
     print(f"TASKS FOR: {agent_id}")
     print("=" * 60 + "\n")
 
-    # Find all task files
-    task_files = sorted(tasks_dir.glob("task_*.md"))
-
-    for task_file in task_files:
-        task_id = task_file.stem.replace("task_", "")
-
-        # Try to load metadata
-        meta_file = tasks_dir / f"task_{task_id}.meta.yaml"
-        if meta_file.exists():
-            import yaml
-            with open(meta_file) as f:
-                meta = yaml.safe_load(f)
-                description = meta.get("description", "No description")
-                phase = meta.get("phase", "?")
-                print(f"  {task_id}")
-                print(f"    Phase: {phase}")
-                print(f"    → {description}\n")
+    # Phase and description come from the agent index (no meta file parsing)
+    tasks = runtime.agent_index.tasks(agent_id)
+    for task_id in task_ids:
+        task = tasks.get(task_id)
+        if task is not None and task.meta_file:
+            print(f"  {task_id}")
+            print(f"    Phase: {task.phase or '?'}")
+            print(f"    → {task.description or 'No description'}\n")
         else:
             print(f"  {task_id}\n")
 
@@ -112,33 +140,42 @@ def generate_prompt(agent_id: str, task_id: str, output_file: str = "COMPOSED_PR
     print(f"GENERATING PROMPT: {agent_id}.{task_id}")
     print("=" * 60 + "\n")
 
-    runtime = PromptRuntime()
-
     # Default context
-    context = {
-        "project_id": "user_project",
-        "workspace": "workspaces/user_project",
-        "phase": "PLANNING",
-    }
+    context = dict(DEFAULT_CONTEXT)
 
     try:
-        # Compose the prompt
-        composed_prompt = runtime.execute_task(
-            agent_id=agent_id,
-            task_id=task_id,
-            context=context
-        )
-
-        # Save to file
+        chunks, report = None, None
+        client = get_composition_client()
+        if client is not None:
+            # A composition server is running: compose there from warm caches
+            try:
+                with client:
+                    result = client.compose_with_report(agent_id, task_id, context)
+                chunks, report = [result["prompt"]], CompositionReport.from_dict(result["report"])
+            except ConnectionError:
+                pass
+
+        if chunks is None:
+            # Compose the prompt and stream it to the file section by section
+            chunks, report = PromptRuntime().compose_stream(
+                agent_id=agent_id,
+                task_id=task_id,
+                context=context
+            )
+
         output_path = Path(output_file)
+        prompt_size = 0
         with open(output_path, "w") as f:
-            f.write(composed_prompt)
+            for chunk in chunks:
+                f.write(chunk)
+                prompt_size += len(chunk)
 
         print("\n" + "=" * 60)
         print("✅ SUCCESS")
         print("=" * 60 + "\n")
         print(f"Prompt saved to: {output_path.absolute()}")
-        print(f"Prompt size: {len(composed_prompt):,} characters\n")
+        print(f"Prompt size: {prompt_size:,} characters")
+        print(f"Token estimate: {report.summary()}\n")
         print("Next steps:")
         print("  1. Open the file in your editor")
         print("  2. Copy the entire content")
@@ -153,6 +190,242 @@ def generate_prompt(agent_id: str, task_id: str, output_file: str = "COMPOSED_PR
         print()
 
 
+def _agent_task_ids(agent_id: str) -> list:
+    """Task IDs of an agent (task_<id>.md files), sorted"""
+    return PromptRegistry._get_runtime().list_tasks(agent_id)
+
+
+def generate_all_prompts(
+    agent_ids: list = None,
+    phase: str = None,
+    output_dir: str = "composed_prompts",
+    workers: int = None,
+    governance: bool = False
+):
+    """Compose every task prompt of the selected agents concurrently; returns whether all succeeded"""
+    print("\n" + "=" * 60)
+    print("GENERATING PROMPT PACK")
+    print("=" * 60 + "\n")
+
+    agents = agent_ids or sorted(AGENT_REGISTRY)
+    unknown = [a for a in agents if a not in AGENT_REGISTRY]
+    if unknown:
+        print(f"❌ Unknown agent(s): {', '.join(unknown)}\n")
+        return False
+    if phase:
+        framework = PHASE_FRAMEWORKS[phase]
+        agents = [a for a in agents if f"/{framework}/" in AGENT_REGISTRY[a]]
+
+    context = dict(DEFAULT_CONTEXT, phase=phase or DEFAULT_CONTEXT["phase"])
+    requests = [
+        CompositionRequest(agent_id, task_id, inject_governance=governance, context=context)
+        for agent_id in agents
+        for task_id in _agent_task_ids(agent_id)
+    ]
+    if not requests:
+        print("❌ No tasks found for the selected agents\n")
+        return False
+
+    start = time.perf_counter()
+    results = PromptRegistry.compose_many(requests, max_workers=workers)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    print("\n" + "=" * 60)
+    print("RESULTS")
+    print("=" * 60 + "\n")
+    failed = 0
+    for result in results:
+        if result.ok:
+            prompt_file = output_path / f"{result.request.agent}.{result.request.task}.md"
+            prompt_file.write_text(result.prompt)
+            print(f"  ✅ {result.request.label:<55} {result.elapsed_ms:7.0f}ms  ~{result.report.total_tokens:,} tokens")
+        else:
+            failed += 1
+            first_line = str(result.error).splitlines()[0] if str(result.error) else type(result.error).__name__
+            print(f"  ❌ {result.request.label:<55} {result.elapsed_ms:7.0f}ms  {first_line}")
+
+    print(f"\nComposed {len(results) - failed}/{len(results)} prompts in {wall_ms:,.0f}ms "
+          f"(sum of per-prompt times: {sum(r.elapsed_ms for r in results):,.0f}ms)")
+    print(f"Prompts saved to: {output_path.absolute()}\n")
+    return failed == 0
+
+
+def _print_stage_table(stages: dict):
+    """Print per-stage composition statistics"""
+    print(f"  {'STAGE':<22}{'COUNT':>7}{'P50 ms':>10}{'P95 ms':>10}{'P99 ms':>10}"
+          f"{'MAX ms':>10}{'READ KB':>10}{'HIT %':>8}")
+    for name, st in stages.items():
+        print(f"  {name:<22}{st['count']:>7}{st['p50_ms']:>10.2f}{st['p95_ms']:>10.2f}"
+              f"{st['p99_ms']:>10.2f}{st['max_ms']:>10.2f}{st['bytes_read'] / 1024:>10.1f}"
+              f"{st['cache_hit_rate'] * 100:>8.1f}")
+
+
+def composition_stats(
+    agent_ids: list = None,
+    iterations: int = 3,
+    input_file: str = None,
+    export_file: str = None,
+    as_json: bool = False
+):
+    """Measure composition per stage (or show an exported snapshot)"""
+    if input_file:
+        with open(input_file) as f:
+            snapshot = json.load(f)
+        stages = snapshot.get("stages", {})
+    else:
+        agents = agent_ids or sorted(AGENT_REGISTRY)
+        unknown = [a for a in agents if a not in AGENT_REGISTRY]
+        if unknown:
+            print(f"\n❌ Unknown agent(s): {', '.join(unknown)}\n")
+            return
+        requests = [
+            CompositionRequest(agent_id, task_id, inject_governance=False, context=DEFAULT_CONTEXT)
+            for agent_id in agents
+            for task_id in _agent_task_ids(agent_id)
+        ]
+
+        metrics = get_composition_metrics()
+        metrics.reset()
+        # First iteration is cold (empty cache), the rest are warm
+        logging.disable(logging.WARNING)
+        try:
+            for _ in range(max(iterations, 1)):
+                PromptRegistry.compose_many(requests, max_workers=1)
+        finally:
+            logging.disable(logging.NOTSET)
+        if export_file:
+            metrics.export(export_file)
+        stages = metrics.snapshot()
+
+    if as_json:
+        print(json.dumps(stages, indent=2))
+        return
+
+    print("\n" + "=" * 60)
+    print("COMPOSITION STATS")
+    print("=" * 60 + "\n")
+    if not stages:
+        print("No compositions recorded.\n")
+        return
+    _print_stage_table(stages)
+
+    print(f"\nNFR targets (docs/requirements/NFR_PERFORMANCE.yaml): "
+          f"p50 < {TARGET_P50_MS:.0f}ms, p99 < {TARGET_P99_MS:.0f}ms")
+    for name in ("runtime.total", "registry.total"):
+        if name in stages:
+            st = stages[name]
+            ok = st["p50_ms"] < TARGET_P50_MS and st["p99_ms"] < TARGET_P99_MS
+            print(f"  {'✅' if ok else '❌'} {name}: p50 {st['p50_ms']:.2f}ms, p99 {st['p99_ms']:.2f}ms")
+    if export_file:
+        print(f"\nSnapshot exported to: {Path(export_file).absolute()}")
+    print()
+
+
+def compile_prompts(output_file: str = None):
+    """Compile all agents into a prompt bundle for fast cold starts"""
+    print("\n" + "=" * 60)
+    print("COMPILING PROMPT BUNDLE")
+    print("=" * 60 + "\n")
+
+    repo_root = Path(__file__).resolve().parent
+    info = compile_bundle(repo_root, AGENT_REGISTRY, Path(output_file) if output_file else None)
+
+    print(f"✅ Bundle {info.version} written to: {info.path}")
+    print(f"   Agents: {info.agents}")
+    print(f"   Text fragments: {info.text_files}")
+    print(f"   Parsed YAML files: {info.yaml_files}")
+    print(f"   Size: {info.size_bytes:,} bytes\n")
+    print("PromptRuntime loads this bundle automatically; edited files fall back")
+    print("to the source tree until you re-run: ./vibe-cli.py compile\n")
+
+
+def cost_report(
+    project: str = None,
+    group_by: str = "project,phase",
+    since_days: float = None,
+    ledger_file: str = None,
+    as_json: bool = False
+):
+    """Aggregate LLM spend from the cost ledger"""
+    ledger_path = Path(ledger_file or os.environ.get("VIBE_COST_LEDGER") or DEFAULT_LEDGER_PATH)
+    if not ledger_path.exists():
+        print(f"\nNo cost ledger at {ledger_path} (nothing has been billed yet)\n")
+        return
+    columns = [c.strip() for c in group_by.split(",") if c.strip()]
+    since = time.time() - since_days * 86400 if since_days else None
+
+    ledger = CostLedger(ledger_path)
+    try:
+        rows = ledger.report(columns, project, since)
+        totals = ledger.report([], project, since)
+    except ValueError as e:
+        print(f"\n❌ {e}\n")
+        return
+    finally:
+        ledger.close()
+
+    if as_json:
+        print(json.dumps({"groups": rows, "total": totals[0] if totals else None}, indent=2))
+        return
+
+    print("\n" + "=" * 60)
+    print("LLM COSTS" + (f" - {project}" if project else ""))
+    print("=" * 60 + "\n")
+    if not rows:
+        print("No invocations recorded.\n")
+        return
+
+    widths = [max(len(c), *(len(str(r[c] or "-")) for r in rows)) + 2 for c in columns]
+
+    def print_row(label: str, r: dict):
+        print(f"  {label}{r['invocations']:>7}{r['cost_usd']:>11.4f}{r['input_tokens'] / 1000:>9.1f}"
+              f"{r['output_tokens'] / 1000:>9.1f}{r['response_cache_hits']:>8}"
+              f"{r['mean_latency_ms'] or 0:>9.0f}")
+
+    header = "".join(f"{c.upper():<{w}}" for c, w in zip(columns, widths))
+    print(f"  {header}{'CALLS':>7}{'COST $':>11}{'IN K':>9}{'OUT K':>9}{'CACHED':>8}{'AVG ms':>9}")
+    for r in rows:
+        print_row("".join(f"{str(r[c] or '-'):<{w}}" for c, w in zip(columns, widths)), r)
+    if columns and len(rows) > 1:
+        print_row(f"{'TOTAL':<{sum(widths)}}", totals[0])
+    print()
+
+
+def forecast_run(project_id: str, include_optional: bool = False, simulations: int = None,
+                 as_json: bool = False) -> bool:
+    """Forecast the cost and duration of a project's remaining run; returns whether it fits the budget"""
+    sys.path.insert(0, str(Path(__file__).parent / "agency_os/00_system/orchestrator"))
+    from core_orchestrator import CoreOrchestrator
+    from forecast import DEFAULT_SIMULATIONS
+
+    # Composition progress goes to stderr (stdout is the report)
+    with contextlib.redirect_stdout(sys.stderr):
+        orchestrator = CoreOrchestrator(repo_root=Path(__file__).parent, execution_mode="autonomous")
+        try:
+            forecast = orchestrator.forecast(project_id, include_optional, simulations or DEFAULT_SIMULATIONS)
+        except FileNotFoundError as e:
+            print(f"\n❌ {e}\n")
+            return False
+
+    if as_json:
+        print(json.dumps(forecast.to_dict(), indent=2))
+        return forecast.fits
+
+    print("\n" + "=" * 60)
+    print(f"RUN FORECAST - {project_id}")
+    print("=" * 60 + "\n")
+    print(forecast.summary())
+    if not forecast.fits:
+        print("\n❌ The p90 cost exceeds the remaining budget - re-plan before running:")
+        print("   raise budget.max_cost_usd in the project manifest, or skip optional stages\n")
+    else:
+        print()
+    return forecast.fits
+
+
 def set_workspace(workspace_name: str):
     """
     Set active workspace for this session (CRITICAL FIX #2)
@@ -175,15 +448,15 @@ def set_workspace(workspace_name: str):
             print()
         return
 
-    # Set workspace (persists to .active_workspace file)
+    # Set workspace for this process ($ACTIVE_WORKSPACE)
     set_active_workspace(workspace_name)
 
     print(f"✅ Active workspace set to: {workspace_name}")
     print(f"   Type: {ws['type']}")
     print(f"   Manifest: {ws['manifestPath']}")
     print(f"   Artifacts: workspaces/{workspace_name}/artifacts/\n")
-    print("✅ Workspace persisted to .active_workspace file")
-    print("   All subsequent CLI commands will use this workspace.\n")
+    print("To use this workspace in subsequent CLI commands, export it:")
+    print(f"   export ACTIVE_WORKSPACE={workspace_name}\n")
 
 
 def list_workspaces():
@@ -341,6 +614,59 @@ def reject_qa(project_id: str, reason: str = None):
     print("  2. Orchestrator will re-execute CODING phase to fix issues\n")
 
 
+def serve(
+    socket_file: str = None,
+    hot_reload: bool = True,
+    warm: bool = False,
+    verbose: bool = False
+):
+    """Run the resident composition server until Ctrl+C or `serve --stop`"""
+    from composition_server import CompositionServer, ServerAlreadyRunningError
+
+    server = CompositionServer(socket_file, hot_reload=hot_reload)
+    try:
+        server.bind()
+    except ServerAlreadyRunningError as e:
+        print(f"\n❌ {e}\n")
+        return
+
+    print("\n" + "=" * 60)
+    print("COMPOSITION SERVER")
+    print("=" * 60 + "\n")
+    print(f"Socket:     {server.path}")
+    print(f"Hot reload: {'on (' + server.watcher.backend_name + ')' if server.watcher else 'off'}")
+    if warm:
+        print("Warming caches...", end=" ", flush=True)
+        composed = server.warm()
+        print(f"{composed} prompts composed")
+    print("\nvibe-cli generate and vibe_helper now compose through this server.")
+    print("Stop with Ctrl+C or ./vibe-cli.py serve --stop\n")
+
+    if verbose:
+        # Composition progress is logged per request
+        logging.basicConfig(level=logging.INFO, format="%(threadName)s %(message)s")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass  # serve_forever() closes the server
+    print("Composition server stopped.\n")
+
+
+def serve_control(socket_file: str = None, stop: bool = False):
+    """Show the status of a running composition server (or stop it)"""
+    client = CompositionClient(socket_file or socket_path(), timeout=10.0)
+    if not client.ping():
+        print(f"\nNo composition server running on {client.path}\n")
+        return
+    with client:
+        if stop:
+            client.shutdown()
+            print(f"\n✅ Composition server on {client.path} stopped\n")
+            return
+        stats = client.stats()
+    print(json.dumps(stats, indent=2))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Vibe Agency CLI - Prompt Generator",
@@ -353,6 +679,13 @@ Examples:
   ./vibe-cli.py tasks VIBE_ALIGNER
   ./vibe-cli.py generate VIBE_ALIGNER 02_feature_extraction
   ./vibe-cli.py generate GENESIS_BLUEPRINT 01_select_core_modules
+  ./vibe-cli.py generate-all --phase PLANNING -o prompts/
+  ./vibe-cli.py compile
+  ./vibe-cli.py stats VIBE_ALIGNER -n 5
+  ./vibe-cli.py serve --warm
+  ./vibe-cli.py serve --status
+  ./vibe-cli.py costs --project my_app --by phase,agent
+  ./vibe-cli.py forecast --project my_app --research
   ./vibe-cli.py approve-qa my_app
   ./vibe-cli.py reject-qa my_app --reason "Tests failing"
         """
@@ -381,6 +714,68 @@ Examples:
     gen_parser.add_argument("-o", "--output", default="COMPOSED_PROMPT.md",
                            help="Output file (default: COMPOSED_PROMPT.md)")
 
+    # generate-all command (concurrent batch composition)
+    gen_all_parser = subparsers.add_parser("generate-all", help="Generate prompts for every task of many agents")
+    gen_all_parser.add_argument("agent_ids", nargs="*", help="Agent IDs (default: all agents)")
+    gen_all_parser.add_argument("-p", "--phase", choices=sorted(PHASE_FRAMEWORKS),
+                               help="Only agents of this SDLC phase")
+    gen_all_parser.add_argument("-o", "--output", default="composed_prompts",
+                               help="Output directory (default: composed_prompts)")
+    gen_all_parser.add_argument("-j", "--workers", type=int, default=None,
+                               help="Composition threads (default: up to 8)")
+    gen_all_parser.add_argument("--governance", action="store_true",
+                               help="Inject Guardian Directives into every prompt")
+
+    # compile command (prompt bundle for fast cold starts)
+    compile_parser = subparsers.add_parser("compile", help="Precompile all agent prompts into a bundle")
+    compile_parser.add_argument("-o", "--output", default=None,
+                               help="Bundle file (default: .cache/vibe/prompt_bundle.json)")
+
+    # stats command (per-stage composition timing)
+    stats_parser = subparsers.add_parser("stats", help="Show per-stage composition timing histograms")
+    stats_parser.add_argument("agent_ids", nargs="*", help="Agents to measure (default: all agents)")
+    stats_parser.add_argument("-n", "--iterations", type=int, default=3,
+                             help="Compositions per task; the first one is cold (default: 3)")
+    stats_parser.add_argument("-i", "--input", default=None,
+                             help="Show an exported metrics snapshot instead of measuring")
+    stats_parser.add_argument("-e", "--export", default=None,
+                             help="Write the measured snapshot to a JSON file")
+    stats_parser.add_argument("--json", action="store_true", help="Print raw JSON")
+
+    # serve command (resident composition server on a Unix socket)
+    serve_parser = subparsers.add_parser("serve", help="Run a resident composition server (warm caches)")
+    serve_parser.add_argument("-s", "--socket", default=None,
+                             help="Socket path (default: $VIBE_COMPOSE_SOCKET or .cache/vibe/compose.sock)")
+    serve_parser.add_argument("--no-hot-reload", action="store_true",
+                             help="Do not watch prompt files (restart the server after edits)")
+    serve_parser.add_argument("--warm", action="store_true",
+                             help="Compose every task once at startup")
+    serve_parser.add_argument("-v", "--verbose", action="store_true",
+                             help="Log the composition progress of every request")
+    serve_parser.add_argument("--status", action="store_true", help="Show stats of the running server")
+    serve_parser.add_argument("--stop", action="store_true", help="Stop the running server")
+
+    # costs command (cost ledger report)
+    costs_parser = subparsers.add_parser("costs", help="Report LLM spend from the cost ledger")
+    costs_parser.add_argument("-p", "--project", default=None, help="Only this project")
+    costs_parser.add_argument("-b", "--by", default="project,phase",
+                             help=f"Group columns, comma-separated: {', '.join(GROUP_COLUMNS)} "
+                                  "(default: project,phase)")
+    costs_parser.add_argument("-s", "--since", type=float, default=None,
+                             help="Only the last N days")
+    costs_parser.add_argument("-l", "--ledger", default=None,
+                             help="Ledger database (default: $VIBE_COST_LEDGER or .cache/vibe/cost_ledger.sqlite)")
+    costs_parser.add_argument("--json", action="store_true", help="Print raw JSON")
+
+    # forecast command (pre-flight cost and latency forecast)
+    forecast_parser = subparsers.add_parser("forecast", help="Forecast cost and duration of a project's remaining run")
+    forecast_parser.add_argument("-p", "--project", required=True, help="Project ID")
+    forecast_parser.add_argument("--research", action="store_true",
+                                help="Include optional states (RESEARCH)")
+    forecast_parser.add_argument("-n", "--simulations", type=int, default=None,
+                                help="Monte Carlo runs (default: 2000)")
+    forecast_parser.add_argument("--json", action="store_true", help="Print raw JSON")
+
     # approve-qa command (HITL - GAD-002 Decision 8)
     approve_parser = subparsers.add_parser("approve-qa", help="Approve QA and proceed to deployment")
     approve_parser.add_argument("project_id", help="Project ID (e.g., my_app)")
@@ -406,6 +801,25 @@ Examples:
         list_tasks(args.agent_id)
     elif args.command == "generate":
         generate_prompt(args.agent_id, args.task_id, args.output)
+    elif args.command == "generate-all":
+        # Exit status 1 if any prompt failed to compose (usable as a check after knowledge edits)
+        if not generate_all_prompts(args.agent_ids, args.phase, args.output, args.workers, args.governance):
+            sys.exit(1)
+    elif args.command == "compile":
+        compile_prompts(args.output)
+    elif args.command == "stats":
+        composition_stats(args.agent_ids, args.iterations, args.input, args.export, args.json)
+    elif args.command == "serve":
+        if args.status or args.stop:
+            serve_control(args.socket, args.stop)
+        else:
+            serve(args.socket, not args.no_hot_reload, args.warm, args.verbose)
+    elif args.command == "costs":
+        cost_report(args.project, args.by, args.since, args.ledger, args.json)
+    elif args.command == "forecast":
+        # Exit status 1 if the run does not fit the budget (scripts can refuse it)
+        if not forecast_run(args.project, args.research, args.simulations, args.json):
+            sys.exit(1)
     elif args.command == "approve-qa":
         approve_qa(args.project_id)
     elif args.command == "reject-qa":
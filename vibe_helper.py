@@ -9,20 +9,41 @@ Usage in Claude Code:
 
     prompt = compose_prompt("VIBE_ALIGNER", "02_feature_extraction")
     # Now Claude can work with the prompt directly!
+
+If a composition server is running (`./vibe-cli.py serve`), prompts are
+composed there from warm caches; otherwise the runtime is loaded in-process
+on first use.
 """
 
 import sys
 from pathlib import Path
 import importlib.util
 
-# Load prompt runtime
-spec = importlib.util.spec_from_file_location(
-    "prompt_runtime",
-    Path(__file__).parent / "agency_os/00_system/runtime/prompt_runtime.py"
-)
-prompt_runtime = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(prompt_runtime)
-PromptRuntime = prompt_runtime.PromptRuntime
+RUNTIME_DIR = Path(__file__).parent / "agency_os/00_system/runtime"
+
+_modules = {}
+
+
+def _load(name: str):
+    """Load a runtime module by file path (once)"""
+    if name not in _modules:
+        spec = importlib.util.spec_from_file_location(name, RUNTIME_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def __getattr__(name: str):
+    # PromptRuntime is loaded lazily: callers served by a composition server never import it
+    if name == "PromptRuntime":
+        return _load("prompt_runtime").PromptRuntime
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _server():
+    """Client of a running composition server, or None"""
+    return _load("composition_client").get_composition_client()
 
 
 def compose_prompt(agent_id: str, task_id: str, context: dict = None) -> str:
@@ -41,8 +62,6 @@ def compose_prompt(agent_id: str, task_id: str, context: dict = None) -> str:
         >>> prompt = compose_prompt("VIBE_ALIGNER", "02_feature_extraction")
         >>> # Now Claude reads the prompt and executes
     """
-    runtime = PromptRuntime()
-
     if context is None:
         context = {
             "project_id": "user_project",
@@ -50,6 +69,15 @@ def compose_prompt(agent_id: str, task_id: str, context: dict = None) -> str:
             "phase": "PLANNING",
         }
 
+    client = _server()
+    if client is not None:
+        try:
+            with client:
+                return client.compose(agent_id, task_id, context)
+        except ConnectionError:
+            pass  # Server went away - compose in-process
+
+    runtime = __getattr__("PromptRuntime")()
     return runtime.execute_task(
         agent_id=agent_id,
         task_id=task_id,
@@ -72,15 +100,15 @@ def list_agents() -> dict:
 
 def list_tasks(agent_id: str) -> list:
     """List all tasks for an agent"""
-    runtime = PromptRuntime()
-    agent_path = runtime._get_agent_path(agent_id)
-    tasks_dir = agent_path / "tasks"
-
-    if not tasks_dir.exists():
-        return []
-
-    task_files = sorted(tasks_dir.glob("task_*.md"))
-    return [f.stem.replace("task_", "") for f in task_files]
+    client = _server()
+    if client is not None:
+        try:
+            with client:
+                return client.list_tasks(agent_id)
+        except ConnectionError:
+            pass
+
+    return __getattr__("PromptRuntime")().list_tasks(agent_id)
 
 
 # For direct CLI usage (but Claude should use the functions above!)